@@ -1,3 +1,19 @@
 from django.contrib import admin
+from .models import Closure
 
-# Register your models here.
+
+@admin.register(Closure)
+class ClosureAdmin(admin.ModelAdmin):
+    """
+    Configuración del admin para los cierres del calendario.
+    Los feriados nacionales se leen del archivo de datos y no necesitan registrarse aquí.
+    """
+    
+    list_display = ('reason', 'doctor', 'start_date', 'end_date')
+    list_filter = ('start_date',)
+    search_fields = ('reason', 'doctor__user__first_name', 'doctor__user__last_name')
+    date_hierarchy = 'start_date'
+    ordering = ('-start_date',)
+    
+    def get_queryset(self, request):
+        return super().get_queryset(request).select_related('doctor__user')
@@ -0,0 +1,174 @@
+"""
+Calendario de cierres (feriados y días no laborables).
+
+Combina los feriados del archivo de datos local con los registros del modelo
+Closure y los compila por año en conjuntos en memoria, de modo que verificar
+una fecha sea una búsqueda O(1) sin consultas a la base de datos.
+"""
+
+import json
+import logging
+import threading
+import time as time_module
+from datetime import date, timedelta
+from pathlib import Path
+
+from django.conf import settings
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_HOLIDAYS_FILE = Path(__file__).resolve().parent / 'data' / 'holidays.json'
+DEFAULT_CACHE_SECONDS = 60
+
+
+class CompiledYear:
+    """Cierres de un año ya compilados en conjuntos de fechas."""
+
+    __slots__ = ('clinic_dates', 'doctor_dates', 'compiled_at')
+
+    def __init__(self, clinic_dates, doctor_dates):
+        self.clinic_dates = frozenset(clinic_dates)
+        self.doctor_dates = {
+            doctor_id: frozenset(dates) for doctor_id, dates in doctor_dates.items()
+        }
+        self.compiled_at = time_module.monotonic()
+
+
+class ClosureCalendar:
+    """
+    Calendario de cierres con caché por año en memoria del proceso.
+
+    🎯 Objetivo: Rechazar temprano fechas cerradas (feriados, cierres de clínica o del doctor)
+    💡 Concepto: Un conjunto compilado por año; se invalida con signals y expira tras
+    CACHE_SECONDS para recoger cambios hechos desde otros procesos.
+    """
+
+    def __init__(self, holidays_file=None, cache_seconds=None):
+        calendar_settings = getattr(settings, 'CLOSURE_CALENDAR', {})
+        self.holidays_file = Path(
+            holidays_file or calendar_settings.get('HOLIDAYS_FILE') or DEFAULT_HOLIDAYS_FILE
+        )
+        self.cache_seconds = (
+            cache_seconds if cache_seconds is not None
+            else calendar_settings.get('CACHE_SECONDS', DEFAULT_CACHE_SECONDS)
+        )
+        self._holidays = None
+        self._years = {}
+        self._lock = threading.Lock()
+
+    # ------------------------------------------------------------------
+    # Consultas
+    # ------------------------------------------------------------------
+
+    def is_clinic_closed(self, day):
+        """Indica si la clínica completa está cerrada en la fecha."""
+        return day in self._get_year(day.year).clinic_dates
+
+    def is_closed(self, day, doctor_id=None):
+        """Indica si la fecha está cerrada para la clínica o para el doctor indicado."""
+        compiled = self._get_year(day.year)
+        if day in compiled.clinic_dates:
+            return True
+        if doctor_id is not None:
+            return day in compiled.doctor_dates.get(doctor_id, ())
+        return False
+
+    def closed_doctor_ids(self, day):
+        """Ids de los doctores con un cierre individual en la fecha."""
+        compiled = self._get_year(day.year)
+        return {
+            doctor_id for doctor_id, dates in compiled.doctor_dates.items() if day in dates
+        }
+
+    def holiday_name(self, day):
+        """Nombre del feriado del archivo de datos, o None si la fecha no es feriado."""
+        return self._holidays_for_year(day.year).get(day)
+
+    # ------------------------------------------------------------------
+    # Caché
+    # ------------------------------------------------------------------
+
+    def invalidate(self, years=None):
+        """Descarta los años compilados (todos si no se indican)."""
+        with self._lock:
+            if years is None:
+                self._years.clear()
+            else:
+                for year in years:
+                    self._years.pop(year, None)
+
+    def _get_year(self, year):
+        compiled = self._years.get(year)
+        if compiled is not None and (
+            time_module.monotonic() - compiled.compiled_at < self.cache_seconds
+        ):
+            return compiled
+
+        with self._lock:
+            compiled = self._years.get(year)
+            if compiled is None or (
+                time_module.monotonic() - compiled.compiled_at >= self.cache_seconds
+            ):
+                compiled = self._compile(year)
+                self._years[year] = compiled
+            return compiled
+
+    def _compile(self, year):
+        """Construye los conjuntos de fechas cerradas de un año (una consulta)."""
+        from .models import Closure
+
+        clinic_dates = set(self._holidays_for_year(year))
+        doctor_dates = {}
+
+        year_start = date(year, 1, 1)
+        year_end = date(year, 12, 31)
+        closures = Closure.objects.filter(
+            start_date__lte=year_end,
+            end_date__gte=year_start
+        ).values_list('doctor_id', 'start_date', 'end_date')
+
+        for doctor_id, start_date, end_date in closures:
+            target = clinic_dates if doctor_id is None else doctor_dates.setdefault(doctor_id, set())
+            current = max(start_date, year_start)
+            last = min(end_date, year_end)
+            while current <= last:
+                target.add(current)
+                current += timedelta(days=1)
+
+        logger.debug(f"📅 Calendario de cierres {year} compilado: {len(clinic_dates)} días de clínica")
+        return CompiledYear(clinic_dates, doctor_dates)
+
+    def _holidays_for_year(self, year):
+        """Feriados del archivo de datos para un año: {fecha: nombre}."""
+        fixed, movable = self._load_holidays()
+        holidays = {date(year, month, day): name for month, day, name in fixed}
+        holidays.update(movable.get(year, {}))
+        return holidays
+
+    def _load_holidays(self):
+        """Lee el archivo de feriados una sola vez por proceso."""
+        if self._holidays is not None:
+            return self._holidays
+
+        try:
+            with open(self.holidays_file, encoding='utf-8') as handle:
+                data = json.load(handle)
+        except (OSError, ValueError) as e:
+            logger.error(f"❌ No se pudo leer el archivo de feriados {self.holidays_file}: {str(e)}")
+            data = {}
+
+        fixed = [
+            (entry['month'], entry['day'], entry['name'])
+            for entry in data.get('fixed', [])
+        ]
+        movable = {}
+        for year_key, entries in data.get('movable', {}).items():
+            movable[int(year_key)] = {
+                date.fromisoformat(entry['date']): entry['name'] for entry in entries
+            }
+
+        self._holidays = (fixed, movable)
+        return self._holidays
+
+
+closure_calendar = ClosureCalendar()
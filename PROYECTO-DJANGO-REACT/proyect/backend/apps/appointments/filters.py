@@ -2,7 +2,7 @@ import django_filters
 from django.db import models
 from datetime import datetime, date, timedelta
 from .models import Appointment
-from apps.doctors.models import Doctor
+from apps.doctors.models import Doctor, Specialization
 
 
 class AppointmentFilter(django_filters.FilterSet):
@@ -75,9 +75,8 @@ class AppointmentFilter(django_filters.FilterSet):
     
     # Filtro por especialización
     specialization = django_filters.CharFilter(
-        field_name='doctor__specialization',
-        lookup_expr='icontains',
-        help_text='Filtrar por especialización del doctor'
+        method='filter_by_specialization',
+        help_text='Filtrar por especialización del doctor (id, slug o nombre del catálogo)'
     )
     
     # Filtros por paciente
@@ -181,6 +180,14 @@ class AppointmentFilter(django_filters.FilterSet):
             today = date.today()
             return queryset.filter(date__lt=today)
         return queryset
+    
+    def filter_by_specialization(self, queryset, name, value):
+        """
+        Filtrar citas por la especialidad del doctor usando el id del catálogo.
+        """
+        if value:
+            return queryset.filter(doctor__specialty_id__in=Specialization.match_ids(value))
+        return queryset
 
 
 class DoctorFilter(django_filters.FilterSet):
@@ -197,9 +204,8 @@ class DoctorFilter(django_filters.FilterSet):
     
     # Filtro por especialización
     specialization = django_filters.CharFilter(
-        field_name='specialization',
-        lookup_expr='icontains',
-        help_text='Filtrar por especialización (búsqueda parcial)'
+        method='filter_by_specialization',
+        help_text='Filtrar por especialización (id, slug o nombre del catálogo)'
     )
     
     # Filtro por disponibilidad
@@ -224,7 +230,7 @@ class DoctorFilter(django_filters.FilterSet):
     class Meta:
         model = Doctor
         fields = {
-            'specialization': ['exact', 'icontains'],
+            'specialty': ['exact'],
             'is_available': ['exact'],
         }
     
@@ -238,4 +244,12 @@ class DoctorFilter(django_filters.FilterSet):
                 models.Q(user__first_name__icontains=value) |
                 models.Q(user__last_name__icontains=value)
             )
-        return queryset
\ No newline at end of file
+        return queryset
+    
+    def filter_by_specialization(self, queryset, name, value):
+        """
+        Filtrar doctores por especialización resolviendo el valor contra el catálogo.
+        """
+        if value:
+            return queryset.filter(specialty_id__in=Specialization.match_ids(value))
+        return queryset
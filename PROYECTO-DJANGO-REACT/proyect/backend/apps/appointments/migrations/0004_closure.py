@@ -0,0 +1,32 @@
+# Generated by Django 5.0.1 on 2026-10-19 11:30
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('appointments', '0003_initial'),
+        ('doctors', '0007_populate_schedule_blocks'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Closure',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('start_date', models.DateField(verbose_name='Fecha de inicio')),
+                ('end_date', models.DateField(verbose_name='Fecha de fin')),
+                ('reason', models.CharField(help_text='Feriado, mantenimiento, capacitación, etc.', max_length=200, verbose_name='Motivo')),
+                ('created_at', models.DateTimeField(auto_now_add=True, verbose_name='Fecha de creación')),
+                ('doctor', models.ForeignKey(blank=True, help_text='Vacío para un cierre de toda la clínica', null=True, on_delete=django.db.models.deletion.CASCADE, related_name='closures', to='doctors.doctor', verbose_name='Doctor')),
+            ],
+            options={
+                'verbose_name': 'Cierre',
+                'verbose_name_plural': 'Cierres',
+                'ordering': ['start_date'],
+                'indexes': [models.Index(fields=['start_date', 'end_date'], name='appointment_start_d_c56f06_idx'), models.Index(fields=['doctor', 'start_date'], name='appointment_doctor__3afb0a_idx')],
+            },
+        ),
+    ]
@@ -0,0 +1,29 @@
+# Generated by Django 5.0.1 on 2026-10-19 02:12
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('appointments', '0004_closure'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='appointment',
+            index=models.Index(condition=models.Q(('status__in', ['scheduled', 'confirmed'])), fields=['doctor', 'date', 'time'], name='appt_doctor_active_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='appointment',
+            index=models.Index(condition=models.Q(('status__in', ['scheduled', 'confirmed'])), fields=['patient', 'date', 'time'], name='appt_patient_active_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='appointment',
+            index=models.Index(condition=models.Q(('status__in', ['scheduled', 'confirmed'])), fields=['date', 'time'], name='appt_active_date_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='appointment',
+            index=models.Index(condition=models.Q(('status', 'completed')), fields=['patient', 'date', 'time'], name='appt_patient_completed_idx'),
+        ),
+    ]
@@ -3,6 +3,11 @@ from django.core.exceptions import ValidationError
 from django.utils import timezone
 from datetime import datetime, time
 
+# Estados que ocupan un horario (condición de los índices parciales). PostgreSQL
+# usa esos índices porque Django envía los valores en el SQL; SQLite no empareja
+# `status IN (?, ?)` con la condición y usa los índices compuestos
+ACTIVE_STATUSES = ['scheduled', 'confirmed']
+
 
 class Appointment(models.Model):
     """
@@ -80,10 +85,33 @@ class Appointment(models.Model):
             models.Index(fields=['doctor', 'date']),
             models.Index(fields=['patient', 'date']),
             models.Index(fields=['status']),
+            # Próximas citas activas por doctor / paciente (agenda, conflictos, conteos)
+            models.Index(
+                fields=['doctor', 'date', 'time'],
+                name='appt_doctor_active_idx',
+                condition=models.Q(status__in=ACTIVE_STATUSES)
+            ),
+            models.Index(
+                fields=['patient', 'date', 'time'],
+                name='appt_patient_active_idx',
+                condition=models.Q(status__in=ACTIVE_STATUSES)
+            ),
+            # Citas activas por fecha (dashboard)
+            models.Index(
+                fields=['date', 'time'],
+                name='appt_active_date_idx',
+                condition=models.Q(status__in=ACTIVE_STATUSES)
+            ),
+            # Última visita del paciente (listado de pacientes)
+            models.Index(
+                fields=['patient', 'date', 'time'],
+                name='appt_patient_completed_idx',
+                condition=models.Q(status='completed')
+            ),
         ]
     
     def __str__(self):
-        return f"Cita: {self.patient.get_full_name()} con Dr. {self.doctor.get_full_name()} - {self.date} {self.time}"
+        return f"Cita: {self.patient.full_name} con Dr. {self.doctor.get_full_name()} - {self.date} {self.time}"
     
     def clean(self):
         """
@@ -113,6 +141,13 @@ class Appointment(models.Model):
                 'doctor': 'El doctor seleccionado no está disponible para citas.'
             })
     
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # Doctor cargado, para mover la cita entre contadores de especialidad si se reasigna
+        instance._loaded_doctor_id = instance.__dict__.get('doctor_id')
+        return instance
+    
     def save(self, *args, **kwargs):
         """
         Sobrescribir el método save para ejecutar validaciones.
@@ -243,3 +278,60 @@ class Appointment(models.Model):
             datetime.combine(self.date, self.time)
         )
         return appointment_datetime < now
+
+
+class Closure(models.Model):
+    """
+    Cierre del calendario de atención: feriados, cierres de la clínica
+    o días no laborables de un doctor en particular.
+    
+    Si `doctor` es nulo, el cierre aplica a toda la clínica.
+    Los feriados del archivo de datos (ver apps/appointments/data/holidays.json)
+    se combinan con estos registros en ClosureCalendar.
+    """
+    
+    doctor = models.ForeignKey(
+        'doctors.Doctor',
+        on_delete=models.CASCADE,
+        null=True,
+        blank=True,
+        related_name='closures',
+        verbose_name='Doctor',
+        help_text='Vacío para un cierre de toda la clínica'
+    )
+    start_date = models.DateField(
+        verbose_name='Fecha de inicio'
+    )
+    end_date = models.DateField(
+        verbose_name='Fecha de fin'
+    )
+    reason = models.CharField(
+        max_length=200,
+        verbose_name='Motivo',
+        help_text='Feriado, mantenimiento, capacitación, etc.'
+    )
+    created_at = models.DateTimeField(
+        auto_now_add=True,
+        verbose_name='Fecha de creación'
+    )
+    
+    class Meta:
+        app_label = 'appointments'
+        verbose_name = 'Cierre'
+        verbose_name_plural = 'Cierres'
+        ordering = ['start_date']
+        indexes = [
+            models.Index(fields=['start_date', 'end_date']),
+            models.Index(fields=['doctor', 'start_date']),
+        ]
+    
+    def __str__(self):
+        scope = self.doctor.get_full_name() if self.doctor_id else 'Clínica'
+        return f"{scope}: {self.reason} ({self.start_date} - {self.end_date})"
+    
+    def clean(self):
+        super().clean()
+        if self.start_date and self.end_date and self.end_date < self.start_date:
+            raise ValidationError({
+                'end_date': 'La fecha de fin no puede ser anterior a la fecha de inicio.'
+            })
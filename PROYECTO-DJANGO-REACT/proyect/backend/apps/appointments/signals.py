@@ -1,7 +1,8 @@
-from django.db.models.signals import post_save, pre_save
+from django.db.models.signals import post_save, pre_save, post_delete
 from django.dispatch import receiver
 from django.contrib.auth import get_user_model
-from .models import Appointment
+from .models import Appointment, Closure
+from .closures import closure_calendar
 from apps.notifications.models import Notification
 from apps.notifications.services import (
     NotificationService,
@@ -195,4 +196,15 @@ def appointment_audit_log(sender, instance, created, **kwargs):
         # )
         
     except Exception as e:
-        logger.error(f"❌ Error en log de auditoría para cita {instance.id}: {str(e)}")
\ No newline at end of file
+        logger.error(f"❌ Error en log de auditoría para cita {instance.id}: {str(e)}")
+
+
+@receiver(post_save, sender=Closure)
+@receiver(post_delete, sender=Closure)
+def invalidate_closure_calendar(sender, instance, **kwargs):
+    """
+    Descarta los años compilados del calendario de cierres afectados por el cambio.
+    """
+    years = range(instance.start_date.year, instance.end_date.year + 1)
+    closure_calendar.invalidate(years)
+    logger.info(f"📅 Calendario de cierres invalidado para {list(years)}")
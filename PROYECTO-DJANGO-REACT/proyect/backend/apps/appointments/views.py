@@ -27,6 +27,8 @@ from .serializers import (
 from .filters import AppointmentFilter
 from apps.patients.models import Patient
 from apps.doctors.models import Doctor
+from apps.doctors.services import ScheduleService
+from apps.patients.services import PatientTimelineService
 
 
 class AppointmentViewSet(viewsets.ModelViewSet):
@@ -157,13 +159,15 @@ class AppointmentViewSet(viewsets.ModelViewSet):
         # Filtrar según el tipo de usuario
         user = self.request.user
         
+        auth_context = user.auth_context
+        
         # Si es un paciente (role='client'), solo ver sus propias citas
-        if user.role == 'client' and hasattr(user, 'patient_profile'):
-            queryset = queryset.filter(patient=user.patient_profile)
+        if user.role == 'client' and auth_context.patient_id:
+            queryset = queryset.filter(patient_id=auth_context.patient_id)
         
         # Si es un doctor, solo ver sus propias citas
-        elif user.role == 'doctor' and hasattr(user, 'doctor'):
-            queryset = queryset.filter(doctor=user.doctor)
+        elif user.role == 'doctor' and auth_context.doctor_id:
+            queryset = queryset.filter(doctor_id=auth_context.doctor_id)
         
         # Si es secretaria, puede ver todas las citas
         elif user.role == 'secretary':
@@ -370,12 +374,14 @@ class AppointmentViewSet(viewsets.ModelViewSet):
         if user.is_staff:
             return True
         
+        auth_context = user.auth_context
+        
         # El paciente puede modificar sus propias citas
-        if hasattr(user, 'patient_profile') and appointment.patient == user.patient_profile:
+        if auth_context.patient_id and appointment.patient_id == auth_context.patient_id:
             return True
         
         # El doctor puede modificar sus propias citas
-        if hasattr(user, 'doctor') and appointment.doctor == user.doctor:
+        if auth_context.doctor_id and appointment.doctor_id == auth_context.doctor_id:
             return True
         
         return False
@@ -388,8 +394,8 @@ class AppointmentViewSet(viewsets.ModelViewSet):
         appointment = self.get_object()
         
         # Solo el doctor puede confirmar citas
-        if not (hasattr(request.user, 'doctor') and 
-                appointment.doctor == request.user.doctor):
+        doctor_id = request.user.auth_context.doctor_id
+        if not (doctor_id and appointment.doctor_id == doctor_id):
             return Response(
                 {
                     'error': 'Sin permisos',
@@ -433,23 +439,8 @@ class AppointmentViewSet(viewsets.ModelViewSet):
         """
         appointment = self.get_object()
         
-        # DEBUG: Imprimir información de debug
-        logger.error(f"\n=== DEBUG CANCEL APPOINTMENT {appointment.id} ===")
-        logger.error(f"Usuario: {request.user.email} (ID: {request.user.id})")
-        logger.error(f"Rol: {request.user.role}")
-        logger.error(f"Es staff: {request.user.is_staff}")
-        logger.error(f"Tiene patient_profile: {hasattr(request.user, 'patient_profile')}")
-        if hasattr(request.user, 'patient_profile'):
-            logger.error(f"Patient profile ID: {request.user.patient_profile.id}")
-        logger.error(f"Appointment patient ID: {appointment.patient.id}")
-        logger.error(f"Appointment doctor ID: {appointment.doctor.id}")
-        
         # Verificar permisos
-        can_modify = self._can_modify_appointment(request.user, appointment)
-        logger.error(f"Puede modificar: {can_modify}")
-        logger.error("=== FIN DEBUG ===\n")
-        
-        if not can_modify:
+        if not self._can_modify_appointment(request.user, appointment):
             return Response(
                 {
                     'error': 'Sin permisos',
@@ -497,8 +488,8 @@ class AppointmentViewSet(viewsets.ModelViewSet):
         appointment = self.get_object()
         
         # Solo el doctor puede marcar como completada
-        if not (hasattr(request.user, 'doctor') and 
-                appointment.doctor == request.user.doctor):
+        doctor_id = request.user.auth_context.doctor_id
+        if not (doctor_id and appointment.doctor_id == doctor_id):
             return Response(
                 {
                     'error': 'Sin permisos',
@@ -646,7 +637,7 @@ class AppointmentViewSet(viewsets.ModelViewSet):
             )
         
         try:
-            patient = Patient.objects.get(id=patient_id)
+            patient = Patient.objects.select_related('user').get(id=patient_id)
         except Patient.DoesNotExist:
             return Response(
                 {
@@ -659,20 +650,10 @@ class AppointmentViewSet(viewsets.ModelViewSet):
         # Verificar permisos
         user = request.user
         
-        # DEBUG: Logs para diagnosticar permisos
-        logger.error(f"\n=== DEBUG PATIENT HISTORY ===")
-        logger.error(f"Usuario: {user.email} (ID: {user.id})")
-        logger.error(f"Es staff: {user.is_staff}")
-        logger.error(f"Tiene patient_profile: {hasattr(user, 'patient_profile')}")
-        if hasattr(user, 'patient_profile'):
-            logger.error(f"User patient_profile ID: {user.patient_profile.id}")
-        logger.error(f"Patient solicitado ID: {patient.id}")
-        logger.error(f"Tiene doctor: {hasattr(user, 'doctor')}")
-        logger.error("=== FIN DEBUG ===\n")
-        
+        auth_context = user.auth_context
         if not (user.is_staff or 
-                (hasattr(user, 'patient_profile') and user.patient_profile == patient) or
-                (hasattr(user, 'doctor'))):
+                auth_context.patient_id == patient.id or
+                auth_context.doctor_id):
             return Response(
                 {
                     'error': 'Sin permisos',
@@ -681,46 +662,13 @@ class AppointmentViewSet(viewsets.ModelViewSet):
                 status=status.HTTP_403_FORBIDDEN
             )
         
-        # Obtener filtros de fecha de los query params
-        date_from = request.query_params.get('date_from')
-        date_to = request.query_params.get('date_to')
-        status_filter = request.query_params.get('status')
-        
-        # Construir el queryset base
-        appointments = Appointment.objects.filter(patient=patient)
-        
-        # Aplicar filtros de fecha si están presentes
-        if date_from:
-            try:
-                from_date = datetime.strptime(date_from, '%Y-%m-%d').date()
-                appointments = appointments.filter(date__gte=from_date)
-                logger.error(f"Aplicando filtro date_from: {from_date}")
-            except ValueError:
-                logger.error(f"Formato de fecha inválido para date_from: {date_from}")
-        
-        if date_to:
-            try:
-                to_date = datetime.strptime(date_to, '%Y-%m-%d').date()
-                appointments = appointments.filter(date__lte=to_date)
-                logger.error(f"Aplicando filtro date_to: {to_date}")
-            except ValueError:
-                logger.error(f"Formato de fecha inválido para date_to: {date_to}")
-        
-        # Aplicar filtro de estado si está presente
-        if status_filter:
-            appointments = appointments.filter(status=status_filter)
-            logger.error(f"Aplicando filtro status: {status_filter}")
-        
-        # Finalizar queryset con relaciones y ordenamiento
-        appointments = appointments.select_related('doctor__user').order_by('-date', '-time')
-        
-        # Log para debugging
-        logger.error(f"Total de citas encontradas después de filtros: {appointments.count()}")
-        if appointments.exists():
-            logger.error(f"Primera cita: {appointments.first().date} - {appointments.first().time}")
-            logger.error(f"Última cita: {appointments.last().date} - {appointments.last().time}")
-        
-        serializer = AppointmentListSerializer(appointments, many=True)
+        # Filtros opcionales (date_from, date_to, status) sobre la línea de tiempo del paciente
+        appointments = PatientTimelineService.filter_appointments(
+            PatientTimelineService.get_timeline(patient),
+            status_filter=request.query_params.get('status'),
+            date_from=request.query_params.get('date_from'),
+            date_to=request.query_params.get('date_to')
+        )
         
         return Response(
             {
@@ -731,10 +679,10 @@ class AppointmentViewSet(viewsets.ModelViewSet):
                         'name': patient.full_name,
                         'email': patient.user.email
                     },
-                    'appointments': serializer.data,
-                    'total_appointments': appointments.count(),
-                    'completed_appointments': appointments.filter(status='completed').count(),
-                    'cancelled_appointments': appointments.filter(status='cancelled').count()
+                    'appointments': appointments,
+                    'total_appointments': len(appointments),
+                    'completed_appointments': sum(1 for a in appointments if a['status'] == 'completed'),
+                    'cancelled_appointments': sum(1 for a in appointments if a['status'] == 'cancelled')
                 }
             },
             status=status.HTTP_200_OK
@@ -867,34 +815,8 @@ class AppointmentViewSet(viewsets.ModelViewSet):
                 status=status.HTTP_400_BAD_REQUEST
             )
         
-        # Generar horarios disponibles (9:00 AM - 5:00 PM, cada 30 minutos)
-        available_slots = []
-        start_time = time(9, 0)  # 9:00 AM
-        end_time = time(17, 0)   # 5:00 PM
-        
-        current_time = datetime.combine(appointment_date, start_time)
-        end_datetime = datetime.combine(appointment_date, end_time)
-        
-        # Obtener citas existentes para esa fecha
-        existing_appointments = Appointment.objects.filter(
-            doctor=doctor,
-            date=appointment_date,
-            status__in=['scheduled', 'confirmed']
-        ).values_list('time', flat=True)
-        
-        while current_time < end_datetime:
-            slot_time = current_time.time()
-            
-            # Verificar si el horario no está ocupado
-            if slot_time not in existing_appointments:
-                available_slots.append({
-                    'time': slot_time.strftime('%H:%M'),
-                    'datetime': current_time.isoformat(),
-                    'available': True
-                })
-            
-            # Incrementar 30 minutos
-            current_time += timedelta(minutes=30)
+        # Generar horarios disponibles según los bloques de horario del doctor (cada 30 minutos)
+        available_slots = ScheduleService.generate_slots(doctor, appointment_date)
         
         return Response(
             {
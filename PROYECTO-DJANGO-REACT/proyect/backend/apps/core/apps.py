@@ -4,6 +4,8 @@ from django.apps import AppConfig
 class CoreConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'apps.core'
+    # 'core' es la etiqueta de la app core/ (AuditLog, SystemMetrics)
+    label = 'apps_core'
     verbose_name = 'Core'
     
     def ready(self):
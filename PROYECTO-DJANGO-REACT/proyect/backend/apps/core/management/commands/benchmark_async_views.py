@@ -0,0 +1,294 @@
+"""
+Comando para comparar las lecturas DRF bajo WSGI con sus versiones async
+(/api/async/, ver core/async_api.py) bajo ASGI, con la misma carga.
+
+- WSGI: el WSGIHandler real atendido por --wsgi-workers hilos (como gunicorn
+  con workers síncronos); los clientes que exceden ese número esperan turno.
+- ASGI: el ASGIHandler real en un event loop (como un worker uvicorn), con
+  todos los clientes concurrentes en vuelo.
+
+Cada consulta SQL espera --db-latency ms extra para simular la ida y vuelta
+a un PostgreSQL remoto (con SQLite local la espera de I/O es casi nula).
+Reporta throughput, latencia p50/p95 (incluida la espera en cola) y
+conexiones abiertas por escenario. No incluye el parseo HTTP del servidor.
+
+Uso:
+    python manage.py benchmark_async_views
+    python manage.py benchmark_async_views --concurrency 8 32 128 --requests 1000
+    python manage.py benchmark_async_views --endpoints dashboard slots --db-latency 5 --wsgi-workers 8
+"""
+
+import asyncio
+import io
+import threading
+import time
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.handlers.asgi import ASGIHandler
+from django.core.handlers.wsgi import WSGIHandler
+from django.core.management.base import BaseCommand
+from django.db.backends.signals import connection_created
+from django.utils import timezone
+from rest_framework_simplejwt.tokens import AccessToken
+
+from apps.doctors.async_views import public_doctors_queryset
+from apps.doctors.models import DoctorScheduleBlock
+from apps.users.models import User
+from core.async_api import get_async_api_settings, get_max_workers
+
+# nombre: (ruta WSGI, ruta ASGI, requiere token)
+ENDPOINTS = {
+    'dashboard': ('/api/reports/dashboard/summary/', '/api/async/reports/dashboard/summary/', True),
+    'slots': (
+        '/api/doctors/public/{doctor_id}/available-slots/',
+        '/api/async/doctors/public/{doctor_id}/available-slots/',
+        False
+    ),
+    'directory': ('/api/doctors/public/', '/api/async/doctors/public/', False),
+    'count': ('/api/notifications/count/', '/api/async/notifications/count/', True),
+}
+
+
+class LatencyInjector:
+    """Agrega una espera fija a cada consulta de cada conexión nueva, en cualquier hilo."""
+
+    def __init__(self, seconds):
+        self.seconds = seconds
+        self.connections = 0
+        self._lock = threading.Lock()
+
+    def __call__(self, sender, connection, **kwargs):
+        with self._lock:
+            self.connections += 1
+        if self.seconds and self.wrapper not in connection.execute_wrappers:
+            # Al principio: execute_wrapper() (MetricsMiddleware) saca el último al salir
+            connection.execute_wrappers.insert(0, self.wrapper)
+
+    def wrapper(self, execute, sql, params, many, context):
+        time.sleep(self.seconds)
+        return execute(sql, params, many, context)
+
+
+class Command(BaseCommand):
+    help = 'Compara throughput y latencia de las lecturas WSGI (DRF) con sus versiones async bajo ASGI'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--requests', type=int, default=400, help='Peticiones por escenario (default: 400)')
+        parser.add_argument(
+            '--concurrency',
+            type=int,
+            nargs='+',
+            default=[4, 16, 64],
+            help='Clientes concurrentes a comparar (default: 4 16 64)'
+        )
+        parser.add_argument(
+            '--wsgi-workers',
+            type=int,
+            default=4,
+            help='Peticiones que WSGI atiende a la vez (workers x hilos de gunicorn, default: 4)'
+        )
+        parser.add_argument(
+            '--db-latency',
+            type=float,
+            default=2.0,
+            help='Milisegundos extra por consulta SQL (default: 2)'
+        )
+        parser.add_argument(
+            '--endpoints',
+            nargs='+',
+            choices=list(ENDPOINTS),
+            default=list(ENDPOINTS),
+            help='Endpoints a medir (default: todos)'
+        )
+
+    def handle(self, *args, **options):
+        self.host = next(
+            (host for host in settings.ALLOWED_HOSTS if host != '*' and not host.startswith('.')),
+            'localhost'
+        )
+        headers = self.build_headers()
+        doctor_id, day = self.pick_slot_query()
+
+        async_settings = get_async_api_settings()
+        self.stdout.write(
+            f"⚡ Benchmark WSGI vs ASGI: {options['requests']} peticiones por escenario, "
+            f"{options['wsgi_workers']} workers WSGI, +{options['db_latency']}ms por consulta, "
+            f"consultas en paralelo={async_settings['PARALLEL_QUERIES']} "
+            f"(pool de {get_max_workers()} hilos)\n"
+        )
+
+        injector = LatencyInjector(options['db_latency'] / 1000)
+        connection_created.connect(injector)
+        wsgi_handler = WSGIHandler()
+        asgi_handler = ASGIHandler()
+        try:
+            for name in options['endpoints']:
+                sync_path, async_path, needs_token = ENDPOINTS[name]
+                if needs_token and headers is None:
+                    self.stdout.write(self.style.WARNING(f"⚠️ {name}: no hay un administrador activo, se omite"))
+                    continue
+                if '{doctor_id}' in sync_path and doctor_id is None:
+                    self.stdout.write(self.style.WARNING(f"⚠️ {name}: no hay doctores públicos, se omite"))
+                    continue
+                query = f'date={day.isoformat()}' if '{doctor_id}' in sync_path else ''
+                request_headers = headers if needs_token else {}
+
+                self.stdout.write(self.style.MIGRATE_HEADING(f"{name}: {sync_path.format(doctor_id=doctor_id)}"))
+                for concurrency in options['concurrency']:
+                    wsgi = self.run_wsgi(
+                        wsgi_handler, sync_path.format(doctor_id=doctor_id), query, request_headers,
+                        options['requests'], concurrency, options['wsgi_workers'], injector
+                    )
+                    asgi = asyncio.run(self.run_asgi(
+                        asgi_handler, async_path.format(doctor_id=doctor_id), query, request_headers,
+                        options['requests'], concurrency, injector
+                    ))
+                    self.report(f'WSGI c={concurrency}', *wsgi)
+                    self.report(f'ASGI c={concurrency}', *asgi, baseline=wsgi[1])
+        finally:
+            connection_created.disconnect(injector)
+
+    def build_headers(self):
+        admin = User.objects.filter(role__in=['admin', 'superadmin'], is_active=True).first()
+        if admin is None:
+            return None
+        return {'Authorization': f'Bearer {AccessToken.for_user(admin)}'}
+
+    def pick_slot_query(self):
+        """Primer doctor público y la próxima fecha en que tiene un bloque de horario."""
+        doctor = public_doctors_queryset().first()
+        if doctor is None:
+            return None, None
+        weekdays = set(
+            DoctorScheduleBlock.objects.filter(doctor=doctor, is_active=True).values_list('weekday', flat=True)
+        )
+        day = timezone.now().date() + timedelta(days=1)
+        for offset in range(7):
+            if (day + timedelta(days=offset)).weekday() in weekdays:
+                return doctor.id, day + timedelta(days=offset)
+        return doctor.id, day
+
+    # ------------------------------------------------------------------
+    # WSGI
+    # ------------------------------------------------------------------
+
+    def run_wsgi(self, handler, path, query, headers, requests, concurrency, workers, injector):
+        per_client = max(requests // max(concurrency, 1), 1)
+        # Los clientes que exceden los workers esperan en cola, como en el backlog de gunicorn
+        slots = threading.Semaphore(max(workers, 1))
+        latencies = []
+        statuses = {}
+        lock = threading.Lock()
+
+        def client():
+            for _ in range(per_client):
+                start = time.perf_counter()
+                with slots:
+                    status = self.call_wsgi(handler, path, query, headers)
+                elapsed = time.perf_counter() - start
+                with lock:
+                    latencies.append(elapsed)
+                    statuses[status] = statuses.get(status, 0) + 1
+
+        threads = [threading.Thread(target=client) for _ in range(max(concurrency, 1))]
+        injector.connections = 0
+        start = time.perf_counter()
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        return latencies, time.perf_counter() - start, injector.connections, statuses
+
+    def call_wsgi(self, handler, path, query, headers):
+        environ = {
+            'REQUEST_METHOD': 'GET',
+            'PATH_INFO': path,
+            'QUERY_STRING': query,
+            'SERVER_NAME': self.host,
+            'SERVER_PORT': '80',
+            'SERVER_PROTOCOL': 'HTTP/1.1',
+            'HTTP_HOST': self.host,
+            'REMOTE_ADDR': '127.0.0.1',
+            'wsgi.input': io.BytesIO(b''),
+            'wsgi.errors': io.StringIO(),
+            'wsgi.url_scheme': 'http',
+        }
+        for name, value in headers.items():
+            environ['HTTP_' + name.upper().replace('-', '_')] = value
+        status = []
+        response = handler(environ, lambda code, response_headers, exc_info=None: status.append(code))
+        # Igual que el servidor WSGI: close() dispara request_finished
+        response.close()
+        return int(status[0].split()[0])
+
+    # ------------------------------------------------------------------
+    # ASGI
+    # ------------------------------------------------------------------
+
+    async def run_asgi(self, handler, path, query, headers, requests, concurrency, injector):
+        per_client = max(requests // max(concurrency, 1), 1)
+        latencies = []
+        statuses = {}
+
+        async def client():
+            for _ in range(per_client):
+                start = time.perf_counter()
+                status = await self.call_asgi(handler, path, query, headers)
+                latencies.append(time.perf_counter() - start)
+                statuses[status] = statuses.get(status, 0) + 1
+
+        injector.connections = 0
+        start = time.perf_counter()
+        await asyncio.gather(*(client() for _ in range(max(concurrency, 1))))
+        return latencies, time.perf_counter() - start, injector.connections, statuses
+
+    async def call_asgi(self, handler, path, query, headers):
+        scope = {
+            'type': 'http',
+            'asgi': {'version': '3.0'},
+            'http_version': '1.1',
+            'method': 'GET',
+            'scheme': 'http',
+            'path': path,
+            'raw_path': path.encode(),
+            'query_string': query.encode(),
+            'root_path': '',
+            'headers': [(b'host', self.host.encode())] + [
+                (name.lower().encode(), value.encode()) for name, value in headers.items()
+            ],
+            'client': ('127.0.0.1', 0),
+            'server': (self.host, 80),
+        }
+        body_sent = False
+        status = []
+
+        async def receive():
+            nonlocal body_sent
+            if not body_sent:
+                body_sent = True
+                return {'type': 'http.request', 'body': b'', 'more_body': False}
+            # El cliente no se desconecta: Django cancela esta espera al responder
+            await asyncio.Future()
+
+        async def send(message):
+            if message['type'] == 'http.response.start':
+                status.append(message['status'])
+
+        await handler(scope, receive, send)
+        return status[0]
+
+    def report(self, label, latencies, seconds, opened, statuses, baseline=None):
+        latencies = sorted(latencies)
+        total = len(latencies)
+        p50 = latencies[int((total - 1) * 0.50)] * 1000 if total else 0
+        p95 = latencies[int((total - 1) * 0.95)] * 1000 if total else 0
+        line = (
+            f"  {label:<11} {total / seconds if seconds else 0:8.1f} req/s | "
+            f"p50 {p50:7.1f}ms | p95 {p95:7.1f}ms | {opened:4d} conexiones"
+        )
+        if baseline:
+            line += f" | {baseline / seconds if seconds else 0:.1f}x"
+        self.stdout.write(line)
+        if set(statuses) != {200}:
+            self.stdout.write(self.style.WARNING(f"    códigos HTTP: {statuses}"))
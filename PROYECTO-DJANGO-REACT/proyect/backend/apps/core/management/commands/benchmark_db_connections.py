@@ -0,0 +1,167 @@
+"""
+Comando para medir cuántas conexiones a la base de datos se abren bajo carga.
+
+Lanza peticiones GET contra el WSGIHandler real (con request_started /
+request_finished, como gunicorn, a diferencia del cliente de tests que no
+cierra conexiones) desde varios hilos, y simula tareas de Celery cerrando las
+conexiones viejas antes y después de cada una, igual que el fixup de Django de
+Celery. Compara CONN_MAX_AGE=0 (una conexión por petición/tarea) con el valor
+configurado y reporta conexiones abiertas y throughput. Con el backend
+core.backends.postgresql_pool muestra también las estadísticas del pool.
+
+Uso:
+    python manage.py benchmark_db_connections
+    python manage.py benchmark_db_connections --requests 2000 --threads 8 --tasks 500
+    python manage.py benchmark_db_connections --conn-max-age 0 60 600 --path /api/doctors/public/
+"""
+
+import io
+import threading
+import time
+
+from django.conf import settings
+from django.core.handlers.wsgi import WSGIHandler
+from django.core.management.base import BaseCommand
+from django.db import connections
+from django.db.backends.signals import connection_created
+
+from apps.users.models import User
+
+
+class ConnectionCounter:
+    """Cuenta las conexiones nuevas (señal connection_created) de todos los hilos."""
+
+    def __init__(self):
+        self.count = 0
+        self._lock = threading.Lock()
+
+    def __call__(self, sender, connection, **kwargs):
+        with self._lock:
+            self.count += 1
+
+
+class Command(BaseCommand):
+    help = 'Compara las conexiones abiertas por petición y por tarea con y sin conexiones persistentes'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--requests', type=int, default=500, help='Peticiones por escenario (default: 500)')
+        parser.add_argument('--threads', type=int, default=4, help='Hilos concurrentes (default: 4)')
+        parser.add_argument('--tasks', type=int, default=200, help='Tareas simuladas por escenario (default: 200)')
+        parser.add_argument(
+            '--path',
+            default='/api/doctors/public/stats/',
+            help='Endpoint GET público a llamar (default: /api/doctors/public/stats/)'
+        )
+        parser.add_argument(
+            '--conn-max-age',
+            type=int,
+            nargs='+',
+            help="Valores a comparar (default: 0 y el CONN_MAX_AGE configurado de 'default')"
+        )
+
+    def handle(self, *args, **options):
+        configured = {alias: connections[alias].settings_dict['CONN_MAX_AGE'] for alias in connections}
+        values = options['conn_max_age'] or sorted({0, configured['default'] or 60})
+        host = next(
+            (host for host in settings.ALLOWED_HOSTS if host != '*' and not host.startswith('.')),
+            'localhost'
+        )
+
+        self.stdout.write(
+            f"🔌 Benchmark de conexiones: {connections['default'].vendor} "
+            f"({connections['default'].settings_dict['ENGINE']}), {options['requests']} peticiones "
+            f"en {options['threads']} hilos a {options['path']}, {options['tasks']} tareas\n"
+        )
+
+        counter = ConnectionCounter()
+        connection_created.connect(counter)
+        handler = WSGIHandler()
+        try:
+            for conn_max_age in values:
+                for alias in connections:
+                    connections[alias].settings_dict['CONN_MAX_AGE'] = conn_max_age
+                connections.close_all()
+                self.stdout.write(self.style.MIGRATE_HEADING(f"CONN_MAX_AGE={conn_max_age}"))
+                self.run_requests(handler, host, options, counter)
+                self.run_tasks(options['tasks'], counter)
+                self.report_pool()
+        finally:
+            connection_created.disconnect(counter)
+            for alias, conn_max_age in configured.items():
+                connections[alias].settings_dict['CONN_MAX_AGE'] = conn_max_age
+            connections.close_all()
+
+    def run_requests(self, handler, host, options, counter):
+        per_thread = max(options['requests'] // max(options['threads'], 1), 1)
+        statuses = {}
+        lock = threading.Lock()
+
+        def worker():
+            for _ in range(per_thread):
+                status = self.call(handler, host, options['path'])
+                with lock:
+                    statuses[status] = statuses.get(status, 0) + 1
+            # El hilo termina como un worker que se recicla
+            connections.close_all()
+
+        threads = [threading.Thread(target=worker) for _ in range(max(options['threads'], 1))]
+        counter.count = 0
+        start = time.perf_counter()
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        elapsed = time.perf_counter() - start
+
+        total = per_thread * len(threads)
+        self.report('peticiones', total, counter.count, elapsed)
+        if set(statuses) != {200}:
+            self.stdout.write(self.style.WARNING(f"    códigos HTTP: {statuses}"))
+
+    def call(self, handler, host, path):
+        environ = {
+            'REQUEST_METHOD': 'GET',
+            'PATH_INFO': path,
+            'QUERY_STRING': '',
+            'SERVER_NAME': host,
+            'SERVER_PORT': '80',
+            'SERVER_PROTOCOL': 'HTTP/1.1',
+            'HTTP_HOST': host,
+            'REMOTE_ADDR': '127.0.0.1',
+            'wsgi.input': io.BytesIO(b''),
+            'wsgi.errors': io.StringIO(),
+            'wsgi.url_scheme': 'http',
+        }
+        status = []
+        response = handler(environ, lambda code, headers, exc_info=None: status.append(code))
+        # Igual que el servidor WSGI: close() dispara request_finished
+        response.close()
+        return int(status[0].split()[0])
+
+    def run_tasks(self, tasks, counter):
+        counter.count = 0
+        start = time.perf_counter()
+        for _ in range(tasks):
+            # task_prerun / task_postrun del fixup de Django en Celery
+            for connection in connections.all():
+                connection.close_if_unusable_or_obsolete()
+            User.objects.filter(is_active=True).exists()
+            for connection in connections.all():
+                connection.close_if_unusable_or_obsolete()
+        elapsed = time.perf_counter() - start
+        self.report('tareas', tasks, counter.count, elapsed)
+
+    def report(self, label, operations, opened, seconds):
+        self.stdout.write(
+            f"  {label:<11} {operations:6d} en {seconds:7.2f}s | {operations / seconds if seconds else 0:8.1f}/s | "
+            f"{opened:5d} conexiones abiertas ({opened / operations if operations else 0:.2f} por operación)"
+        )
+
+    def report_pool(self):
+        get_pool_stats = getattr(connections['default'], 'get_pool_stats', None)
+        if get_pool_stats is not None:
+            stats = get_pool_stats()
+            self.stdout.write(
+                f"  pool: {stats.get('pool_size', 0)} conexiones, {stats.get('connections_num', 0)} creadas, "
+                f"{stats.get('requests_num', 0)} préstamos, {stats.get('requests_waiting', 0)} en espera"
+            )
@@ -0,0 +1,225 @@
+"""
+Comando para verificar con EXPLAIN que las consultas frecuentes usan índices.
+
+Ejecuta EXPLAIN sobre cada consulta de HOT_QUERIES (ver apps/core/queryplans.py)
+con IDs reales de la base de datos y reporta el índice usado, las tablas
+recorridas completas (Seq Scan / SCAN) y los ordenamientos fuera de índice.
+Todo corre dentro de una transacción que se revierte al final, así que
+`--seed` no deja datos de prueba.
+
+Con pocas filas el planificador prefiere recorrer la tabla aunque exista el
+índice: esos recorridos (tablas con menos de --min-rows filas) se informan
+pero no cuentan como fallo. En PostgreSQL, --no-seqscan muestra qué índice
+elegiría igualmente. SQLite no usa los índices parciales con `status IN (...)`
+(ver ACTIVE_STATUSES en apps/appointments/models.py) ni `NOT is_read` sobre un
+índice: las consultas marcadas `postgresql_only` se informan sin contar para
+--strict; la referencia es PostgreSQL.
+
+--strict (CI) termina con error si alguna consulta recorre una tabla grande,
+usa un índice distinto del esperado o agrega un ordenamiento fuera de índice
+que la consulta no declara (`sort_expected`).
+
+Uso:
+    python manage.py check_query_plans
+    python manage.py check_query_plans --seed --patients 500 --appointments 5000
+    python manage.py check_query_plans --only doctor_upcoming patient_last_visit --verbose
+    python manage.py check_query_plans --seed --fail-on-scan
+    python manage.py check_query_plans --seed --strict         # para CI
+"""
+
+import random
+from datetime import timedelta
+
+from django.core.management import call_command
+from django.core.management.base import BaseCommand, CommandError
+from django.db import DEFAULT_DB_ALIAS, connections, transaction
+from django.utils import timezone
+
+from apps.core.queryplans import HOT_QUERIES, explain, sample_params
+from apps.notifications.models import Notification
+from apps.users.models import User
+
+ANALYZE_TABLES = [
+    'appointments_appointment',
+    'patients_patient',
+    'doctors_doctor',
+    'notifications_notification',
+    'users_user',
+]
+
+
+class _Rollback(Exception):
+    pass
+
+
+class Command(BaseCommand):
+    help = 'Verifica con EXPLAIN que las consultas frecuentes usan índices'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--seed', action='store_true', help='Generar datos de prueba antes de verificar (se revierten)')
+        parser.add_argument('--doctors', type=int, default=20, help='Doctores a generar con --seed (default: 20)')
+        parser.add_argument('--patients', type=int, default=200, help='Pacientes a generar con --seed (default: 200)')
+        parser.add_argument('--appointments', type=int, default=2000, help='Citas a generar con --seed (default: 2000)')
+        parser.add_argument(
+            '--notifications',
+            type=int,
+            default=5000,
+            help='Notificaciones a generar con --seed (default: 5000)'
+        )
+        parser.add_argument(
+            '--only',
+            nargs='+',
+            choices=[query.name for query in HOT_QUERIES],
+            help='Consultas a verificar (default: todas)'
+        )
+        parser.add_argument(
+            '--no-seqscan',
+            action='store_true',
+            help='PostgreSQL: desalentar Seq Scan (SET LOCAL enable_seqscan = off)'
+        )
+        parser.add_argument(
+            '--min-rows',
+            type=int,
+            default=1000,
+            help='Filas desde las que un recorrido completo cuenta como fallo (default: 1000)'
+        )
+        parser.add_argument('--verbose', action='store_true', help='Mostrar el plan completo de cada consulta')
+        parser.add_argument('--fail-on-scan', action='store_true', help='Terminar con error si alguna consulta recorre una tabla de --min-rows filas o más')
+        parser.add_argument(
+            '--strict',
+            action='store_true',
+            help='Como --fail-on-scan, y además falla con un índice inesperado o un ordenamiento no declarado'
+        )
+
+    def handle(self, *args, **options):
+        connection = connections[DEFAULT_DB_ALIAS]
+        if connection.vendor not in ('sqlite', 'postgresql'):
+            raise CommandError(f"EXPLAIN no soportado para '{connection.vendor}'")
+
+        results = []
+        try:
+            with transaction.atomic():
+                if options['seed']:
+                    self.stdout.write("🌱 Generando datos de prueba...")
+                    call_command(
+                        'generate_test_data',
+                        doctors=options['doctors'],
+                        patients=options['patients'],
+                        appointments=options['appointments'],
+                        verbosity=0
+                    )
+                    self.seed_notifications(options['notifications'])
+                self.prepare(connection, options)
+                results = self.run_checks(options)
+                raise _Rollback()
+        except _Rollback:
+            pass
+
+        scans = [result for result in results if result['large_scans']]
+        mismatches = [result for result in results if result['mismatches']]
+        if scans and (options['fail_on_scan'] or options['strict']):
+            raise CommandError(f"{len(scans)} consultas recorren tablas completas")
+        if mismatches and options['strict']:
+            names = ', '.join(result['query'].name for result in mismatches)
+            raise CommandError(f"{len(mismatches)} consultas no usan el plan esperado: {names}")
+        self.stdout.write(self.style.SUCCESS(
+            f"\n✅ {len(results)} consultas verificadas, {len(scans)} recorren tablas completas, "
+            f"{len(mismatches)} con un plan distinto del esperado"
+        ))
+
+    def seed_notifications(self, count):
+        """Notificaciones repartidas entre los usuarios, un tercio sin leer."""
+        user_ids = list(User.objects.values_list('pk', flat=True))
+        if not user_ids or count <= 0:
+            return
+        created = Notification.objects.bulk_create([
+            Notification(
+                user_id=random.choice(user_ids),
+                title='Notificación de prueba',
+                message='Generada por check_query_plans',
+                is_read=random.random() > 0.33
+            )
+            for _ in range(count)
+        ], batch_size=1000)
+        # created_at es auto_now_add: se reparte en los últimos 90 días
+        now = timezone.now()
+        for notification in created:
+            notification.created_at = now - timedelta(minutes=random.randint(0, 90 * 24 * 60))
+        Notification.objects.bulk_update(created, ['created_at'], batch_size=1000)
+
+    def prepare(self, connection, options):
+        """Estadísticas actualizadas para que el planificador vea los datos generados."""
+        with connection.cursor() as cursor:
+            if connection.vendor == 'postgresql':
+                for table in ANALYZE_TABLES:
+                    cursor.execute(f'ANALYZE {connection.ops.quote_name(table)}')
+                if options['no_seqscan']:
+                    cursor.execute('SET LOCAL enable_seqscan = off')
+            else:
+                cursor.execute('ANALYZE')
+
+    def run_checks(self, options):
+        params = sample_params()
+        if params['doctor_id'] is None or params['patient_id'] is None:
+            raise CommandError("No hay doctores ni pacientes: use --seed o cargue datos")
+
+        connection = connections[DEFAULT_DB_ALIAS]
+        self.stdout.write(f"🔍 Planes de ejecución ({connection.vendor}):\n")
+
+        row_counts = {}
+        results = []
+        for query in HOT_QUERIES:
+            if options['only'] and query.name not in options['only']:
+                continue
+            plan = explain(query.build(params))
+            for table in plan.full_scans:
+                if table not in row_counts:
+                    row_counts[table] = self.count_rows(connection, table)
+            large_scans = [table for table in plan.full_scans if row_counts[table] >= options['min_rows']]
+            mismatches = self.mismatches(query, plan, connection.vendor)
+            results.append({'query': query, 'plan': plan, 'large_scans': large_scans, 'mismatches': mismatches})
+            self.report(query, plan, large_scans, mismatches, row_counts, connection.vendor, options['verbose'])
+        return results
+
+    def mismatches(self, query, plan, vendor):
+        """Diferencias con el plan esperado (ninguna si la expectativa no aplica a esta base)."""
+        if not query.applies_to(vendor) or plan.full_scans:
+            return []
+        mismatches = []
+        if query.expected_index and query.expected_index not in plan.indexes:
+            mismatches.append(
+                f"usa {', '.join(plan.indexes) or 'ningún índice'} (se esperaba {query.expected_index})"
+            )
+        if plan.sorts and not query.sort_expected:
+            mismatches.append("ordena fuera de índice")
+        return mismatches
+
+    def count_rows(self, connection, table):
+        with connection.cursor() as cursor:
+            cursor.execute(f'SELECT COUNT(*) FROM {connection.ops.quote_name(table)}')
+            return cursor.fetchone()[0]
+
+    def report(self, query, plan, large_scans, mismatches, row_counts, vendor, verbose):
+        scans = ', '.join(f"{table} ({row_counts[table]} filas)" for table in plan.full_scans)
+        sort = ''
+        if plan.sorts:
+            sort = " + ordenamiento" + (" (esperado)" if query.sort_expected else "")
+        if large_scans:
+            line = self.style.ERROR(f"❌ {query.name}: recorre {scans}")
+        elif plan.full_scans:
+            line = f"ℹ️ {query.name}: recorre {scans}, tabla pequeña"
+        elif mismatches:
+            line = self.style.WARNING(f"⚠️ {query.name}: {'; '.join(mismatches)}")
+        elif not query.applies_to(vendor):
+            line = (
+                f"ℹ️ {query.name}: {', '.join(plan.indexes) or 'ningún índice'}{sort} "
+                f"(referencia PostgreSQL: {query.expected_index or 'sin índice esperado'}"
+                f"{'' if query.sort_expected else ', sin ordenamiento'})"
+            )
+        else:
+            line = f"✅ {query.name}: {', '.join(plan.indexes)}{sort}"
+        self.stdout.write(line)
+        self.stdout.write(f"   {query.description}")
+        if verbose:
+            for plan_line in plan.lines:
+                self.stdout.write(f"     {plan_line}")
@@ -0,0 +1,263 @@
+"""
+Comando para recorrer los endpoints GET de la API y reportar consultas N+1.
+
+Cada URL registrada se resuelve con IDs reales de la base de datos, se llama
+con un usuario autenticado y se inspeccionan sus consultas con QueryInspector
+(ver apps/core/querycount.py). Las respuestas que no son 2xx se reportan como
+fallidas: sus consultas no representan el endpoint. Todo corre dentro de una transacción que se
+revierte al final, así que `--seed` no deja datos de prueba.
+
+Uso:
+    python manage.py crawl_queries
+    python manage.py crawl_queries --seed --threshold 3
+    python manage.py crawl_queries --format json --output n_plus_one.json
+    python manage.py crawl_queries --fail-on-offenders --fail-on-errors   # para CI
+"""
+
+import json
+import re
+
+from django.apps import apps
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.test.utils import override_settings
+from django.urls import URLPattern, URLResolver, get_resolver
+from rest_framework.test import APIClient
+
+from apps.core.querycount import QueryInspector
+
+User = get_user_model()
+
+# Modelo usado para resolver parámetros de URL que no pertenecen a un ViewSet
+KWARG_MODELS = {
+    'patient_id': 'patients.Patient',
+    'doctor_id': 'doctors.Doctor',
+    'appointment_id': 'appointments.Appointment',
+    'user_id': 'users.User',
+    'notification_id': 'notifications.Notification',
+}
+
+_REGEX_GROUP_RE = re.compile(r'\(\?P<(\w+)>[^)]*\)')
+_ROUTE_PARAM_RE = re.compile(r'<(?:\w+:)?(\w+)>')
+
+
+class _Rollback(Exception):
+    pass
+
+
+def iter_patterns(patterns, prefix=''):
+    """(patrón completo, URLPattern) de todo el URLconf, recursivamente."""
+    for pattern in patterns:
+        if isinstance(pattern, URLResolver):
+            yield from iter_patterns(pattern.url_patterns, prefix + str(pattern.pattern))
+        elif isinstance(pattern, URLPattern):
+            yield prefix + str(pattern.pattern), pattern
+
+
+def allows_get(callback):
+    """Indica si la vista responde a GET."""
+    actions = getattr(callback, 'actions', None)
+    if actions is not None:
+        return 'get' in actions
+    view_class = getattr(callback, 'cls', None) or getattr(callback, 'view_class', None)
+    if view_class is not None:
+        return hasattr(view_class, 'get')
+    return True
+
+
+def crawl_host():
+    """Host de ALLOWED_HOSTS para las peticiones (APIClient usa 'testserver')."""
+    for host in settings.ALLOWED_HOSTS:
+        host = host.lstrip('.')
+        if host and host != '*':
+            return host
+    return 'localhost'
+
+
+def is_success(result):
+    return 'status' in result and 200 <= result['status'] < 300
+
+
+def model_for_kwarg(callback, name):
+    """Modelo cuyo primer ID se usará para el parámetro `name`."""
+    if name in ('pk', 'id'):
+        view_class = getattr(callback, 'cls', None)
+        queryset = getattr(view_class, 'queryset', None)
+        if queryset is not None:
+            return queryset.model
+        return None
+    label = KWARG_MODELS.get(name)
+    if label is None:
+        return None
+    try:
+        return apps.get_model(label)
+    except LookupError:
+        return None
+
+
+class Command(BaseCommand):
+    help = 'Recorre los endpoints GET y reporta consultas repetidas (N+1) y lentas'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--prefix', default='api/', help='Solo rutas que comienzan con este prefijo (default: api/)')
+        parser.add_argument('--threshold', type=int, help='Repeticiones de una consulta para reportarla')
+        parser.add_argument('--user', help='Email del usuario con el que se hacen las peticiones (default: un superusuario temporal)')
+        parser.add_argument('--seed', action='store_true', help='Generar datos de prueba antes de recorrer (se revierten)')
+        parser.add_argument('--format', choices=['text', 'json'], default='text')
+        parser.add_argument('--output', help='Archivo donde escribir el reporte')
+        parser.add_argument('--fail-on-offenders', action='store_true', help='Terminar con error si hay consultas N+1')
+        parser.add_argument('--fail-on-errors', action='store_true', help='Terminar con error si algún endpoint no responde 2xx')
+
+    def handle(self, *args, **options):
+        results = []
+        try:
+            with transaction.atomic():
+                if options['seed']:
+                    self.stdout.write("🌱 Generando datos de prueba...")
+                    call_command('generate_test_data', verbosity=0)
+                # Sin rate limiting: el recorrido supera el límite por minuto de cualquier rol
+                rate_limit_disabled = dict(getattr(settings, 'RATE_LIMIT_SETTINGS', {}), ENABLED=False)
+                with override_settings(RATE_LIMIT_SETTINGS=rate_limit_disabled):
+                    results = self.crawl(options)
+                raise _Rollback()
+        except _Rollback:
+            pass
+
+        report = self.format_report(results, options['format'])
+        if options['output']:
+            with open(options['output'], 'w', encoding='utf-8') as handle:
+                handle.write(report)
+            self.stdout.write(f"📄 Reporte escrito en {options['output']}")
+        else:
+            self.stdout.write(report)
+
+        offenders = [result for result in results if is_success(result) and result['offenders']]
+        failures = [result for result in results if 'skipped' not in result and not is_success(result)]
+        if offenders and options['fail_on_offenders']:
+            raise CommandError(f"{len(offenders)} endpoints con consultas N+1")
+        if failures and options['fail_on_errors']:
+            raise CommandError(f"{len(failures)} endpoints no respondieron 2xx")
+        self.stdout.write(self.style.SUCCESS(
+            f"\n✅ {len(results)} endpoints recorridos, {len(offenders)} con consultas N+1, "
+            f"{len(failures)} fallidos"
+        ))
+
+    def crawl(self, options):
+        host = crawl_host()
+        client = APIClient(SERVER_NAME=host, HTTP_HOST=host)
+        client.force_authenticate(self.get_user(options['user']))
+
+        results = []
+        seen = set()
+        for raw_pattern, pattern in iter_patterns(get_resolver().url_patterns):
+            route = raw_pattern.replace('^', '').replace('$', '')
+            if not route.startswith(options['prefix']) or 'format' in route:
+                continue
+            if not allows_get(pattern.callback):
+                continue
+
+            url, missing = self.build_url(route, pattern.callback)
+            if url is None:
+                results.append({'route': route, 'skipped': f"sin datos para {missing}"})
+                continue
+            if url in seen:
+                continue
+            seen.add(url)
+
+            inspector = QueryInspector(threshold=options['threshold'])
+            try:
+                with inspector.capture():
+                    response = client.get(url)
+                status_code = response.status_code
+            except Exception as e:
+                results.append({'route': route, 'url': url, 'error': str(e)})
+                continue
+
+            report = inspector.report()
+            results.append({
+                'route': route,
+                'url': url,
+                'status': status_code,
+                'total_queries': report['total_queries'],
+                'offenders': report['offenders'],
+                'slow_queries': report['slow_queries'],
+            })
+        return results
+
+    def get_user(self, email):
+        if email:
+            try:
+                return User.objects.get(email=email)
+            except User.DoesNotExist:
+                raise CommandError(f"No existe un usuario con email {email}")
+        return User.objects.create_superuser(
+            username='crawl_queries',
+            email='crawl_queries@example.com',
+            password=None,
+            role='superadmin'
+        )
+
+    def build_url(self, route, callback):
+        """Reemplaza los parámetros de la ruta por IDs existentes."""
+        names = _REGEX_GROUP_RE.findall(route) + _ROUTE_PARAM_RE.findall(route)
+        values = {}
+        for name in names:
+            model = model_for_kwarg(callback, name)
+            pk = model.objects.order_by('pk').values_list('pk', flat=True).first() if model else None
+            if pk is None:
+                return None, name
+            values[name] = str(pk)
+
+        url = _REGEX_GROUP_RE.sub(lambda match: values[match.group(1)], route)
+        url = _ROUTE_PARAM_RE.sub(lambda match: values[match.group(1)], url)
+        if re.search(r'[()\[\]?*+\\]', url):
+            return None, 'patrón no soportado'
+        return '/' + url, None
+
+    def format_report(self, results, output_format):
+        if output_format == 'json':
+            return json.dumps(results, indent=2, ensure_ascii=False)
+
+        lines = []
+        ordered = sorted(
+            results,
+            key=lambda result: (
+                is_success(result),
+                max((o['count'] for o in result.get('offenders', [])), default=0),
+            ),
+            reverse=True
+        )
+        for result in ordered:
+            if 'skipped' in result:
+                lines.append(f"⏭️  {result['route']} - omitido ({result['skipped']})")
+            elif 'error' in result:
+                lines.append(f"❌ {result['url']} - error: {result['error']}")
+                continue
+            elif not is_success(result):
+                lines.append(
+                    f"❌ {result['url']} [{result['status']}] - respuesta no exitosa, "
+                    f"{result['total_queries']} consultas no representativas"
+                )
+                continue
+            elif result['offenders']:
+                lines.append(
+                    f"🔴 {result['url']} [{result['status']}] - {result['total_queries']} consultas"
+                )
+                for offender in result['offenders']:
+                    lines.append(
+                        f"     {offender['count']}x en {offender['call_site']}\n"
+                        f"        {offender['sql'][:200]}"
+                    )
+            else:
+                lines.append(
+                    f"🟢 {result['url']} [{result['status']}] - {result['total_queries']} consultas"
+                )
+            for slow_query in result.get('slow_queries', []):
+                lines.append(
+                    f"     🐢 {slow_query['duration_ms']}ms en {slow_query['call_site']}: "
+                    f"{slow_query['sql'][:200]}"
+                )
+        return '\n'.join(lines)
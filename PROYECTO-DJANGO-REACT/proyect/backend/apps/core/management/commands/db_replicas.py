@@ -0,0 +1,56 @@
+"""
+Comando para revisar las réplicas de lectura (ver core/replicas.py).
+
+Muestra cada alias de DATABASE_REPLICAS['ALIASES'], si responde y su atraso
+(PostgreSQL). Con --sync copia el primario SQLite sobre las réplicas SQLite,
+para probar el enrutamiento en desarrollo (DB_SQLITE_REPLICA=True).
+
+Uso:
+    python manage.py db_replicas
+    python manage.py db_replicas --sync
+"""
+
+from django.core.management.base import BaseCommand
+from django.db import DatabaseError, connections
+
+from core.replicas import (
+    get_replica_aliases,
+    get_replica_settings,
+    replica_lag_seconds,
+    sync_sqlite_replica,
+)
+
+
+class Command(BaseCommand):
+    help = 'Estado de las réplicas de lectura y copia de la réplica SQLite de desarrollo'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--sync', action='store_true', help='Copiar el primario sobre las réplicas SQLite')
+
+    def handle(self, *args, **options):
+        aliases = get_replica_aliases()
+        if not aliases:
+            self.stdout.write("ℹ️ No hay réplicas configuradas: todas las lecturas van a 'default'")
+            return
+
+        if options['sync']:
+            for alias in aliases:
+                if connections[alias].vendor != 'sqlite':
+                    continue
+                sync_sqlite_replica(alias)
+                self.stdout.write(f"📋 {alias}: copiada desde el primario")
+
+        self.stdout.write(self.style.MIGRATE_HEADING(
+            f"Réplicas (lecturas al primario {get_replica_settings()['STICKY_SECONDS']}s después de escribir)"
+        ))
+        for alias in aliases:
+            connection = connections[alias]
+            location = connection.settings_dict.get('HOST') or connection.settings_dict['NAME']
+            try:
+                connection.ensure_connection()
+                lag = replica_lag_seconds(alias)
+            except DatabaseError as e:
+                self.stdout.write(self.style.ERROR(f"  ❌ {alias:<10} {location}: {str(e)}"))
+                continue
+            lag_text = f"atraso {lag:.1f}s" if lag is not None else "atraso no disponible"
+            self.stdout.write(f"  ✅ {alias:<10} {connection.vendor} {location} ({lag_text})")
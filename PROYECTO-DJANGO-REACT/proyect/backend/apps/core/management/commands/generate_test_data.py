@@ -198,29 +198,20 @@ class Command(BaseCommand):
                 first_name=self.get_random_first_name(),
                 last_name=self.get_random_last_name(),
                 phone=self.get_random_phone(),
-                role='doctor'  # Esto activará el signal que crea automáticamente el Doctor
+                role='doctor'
             )
             
-            # El signal ya creó el doctor, solo necesitamos obtenerlo y actualizarlo
-            try:
-                doctor = user.doctor  # Relación OneToOne creada por el signal
-                
-                # Actualizar con datos más específicos (mantener la licencia generada por el signal)
-                # El signal ya asignó una licencia única basada en el user.id
-                doctor.specialization = random.choice(specializations)
-                doctor.years_experience = random.randint(1, 25)
-                doctor.consultation_fee = Decimal(str(random.randint(50, 200)))
-                doctor.bio = f'Doctor especializado en {doctor.specialization.lower()} con amplia experiencia.'
-                doctor.is_available = True
-                doctor.work_days = ['monday', 'tuesday', 'wednesday', 'thursday', 'friday']
-                doctor.save()
-                
-                doctors.append(doctor)
-                
-            except Doctor.DoesNotExist:
-                self.stdout.write(
-                    self.style.ERROR(f'Error: No se pudo crear el perfil de doctor para {username}')
-                )
+            # Ningún signal crea el perfil Doctor: se crea aquí con una licencia única por usuario
+            doctor = Doctor(user=user, medical_license=f'LIC{user.id:06d}')
+            doctor.specialization = random.choice(specializations)
+            doctor.years_experience = random.randint(1, 25)
+            doctor.consultation_fee = Decimal(str(random.randint(50, 200)))
+            doctor.bio = f'Doctor especializado en {doctor.specialization.lower()} con amplia experiencia.'
+            doctor.is_available = True
+            doctor.work_days = ['monday', 'tuesday', 'wednesday', 'thursday', 'friday']
+            doctor.save()
+            
+            doctors.append(doctor)
         
         return doctors
 
@@ -0,0 +1,131 @@
+"""
+Registro de métricas en formato Prometheus.
+
+Las métricas se definen una vez a nivel de módulo (prometheus_client) y cada
+proceso solo incrementa valores en memoria. Con gunicorn (varios workers) se
+define la variable de entorno PROMETHEUS_MULTIPROC_DIR antes de arrancar:
+cada worker escribe sus valores en archivos mmap de ese directorio y
+`render_metrics` los combina al exponerlos. En ese modo el hook `child_exit`
+de gunicorn llama a `mark_process_dead(worker.pid)` (ver gunicorn.conf.py).
+
+Expuesto en GET /metrics (ver apps.core.views.metrics).
+"""
+
+import os
+
+from prometheus_client import (
+    CONTENT_TYPE_LATEST,
+    CollectorRegistry,
+    Counter,
+    Histogram,
+    REGISTRY,
+    generate_latest,
+    multiprocess,
+)
+
+MULTIPROCESS_DIR_ENV = 'PROMETHEUS_MULTIPROC_DIR'
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+QUERY_COUNT_BUCKETS = (0, 1, 2, 5, 10, 20, 50, 100, 250)
+FANOUT_BUCKETS = (1, 2, 5, 10, 25, 50, 100, 250, 1000)
+TASK_DURATION_BUCKETS = (0.01, 0.05, 0.1, 0.5, 1.0, 5.0, 15.0, 60.0, 300.0)
+
+REQUEST_LATENCY = Histogram(
+    'http_request_duration_seconds',
+    'Duración de las peticiones HTTP por ruta',
+    ['method', 'route', 'status'],
+    buckets=LATENCY_BUCKETS,
+)
+REQUEST_DB_QUERIES = Histogram(
+    'http_request_db_queries',
+    'Consultas SQL ejecutadas por petición',
+    ['method', 'route'],
+    buckets=QUERY_COUNT_BUCKETS,
+)
+CELERY_TASK_DURATION = Histogram(
+    'celery_task_duration_seconds',
+    'Duración de las tareas de Celery',
+    ['task', 'state'],
+    buckets=TASK_DURATION_BUCKETS,
+)
+NOTIFICATION_FANOUT = Histogram(
+    'notification_fanout_size',
+    'Notificaciones generadas por evento',
+    ['event'],
+    buckets=FANOUT_BUCKETS,
+)
+NOTIFICATION_DELIVERIES = Counter(
+    'notification_deliveries_total',
+    'Entregas de notificaciones por canal y resultado (sent / retry / dead)',
+    ['channel', 'result'],
+)
+NOTIFICATION_DELIVERY_BATCH_DURATION = Histogram(
+    'notification_delivery_batch_seconds',
+    'Duración del envío de cada lote de entregas por canal',
+    ['channel'],
+    buckets=TASK_DURATION_BUCKETS,
+)
+RATE_LIMIT_REJECTIONS = Counter(
+    'rate_limit_rejections_total',
+    'Peticiones rechazadas por rate limiting',
+    ['role'],
+)
+CACHE_REQUESTS = Counter(
+    'cache_requests_total',
+    'Lecturas de cache por resultado (hit / miss)',
+    ['result'],
+)
+
+
+def observe_request(method, route, status, duration, db_queries):
+    REQUEST_LATENCY.labels(method, route, str(status)).observe(duration)
+    REQUEST_DB_QUERIES.labels(method, route).observe(db_queries)
+
+
+def observe_notification_fanout(event, size):
+    NOTIFICATION_FANOUT.labels(event).observe(size)
+
+
+def observe_delivery_batch(channel, duration, sent=0, retried=0, dead=0):
+    NOTIFICATION_DELIVERY_BATCH_DURATION.labels(channel).observe(duration)
+    for result, count in (('sent', sent), ('retry', retried), ('dead', dead)):
+        if count:
+            NOTIFICATION_DELIVERIES.labels(channel, result).inc(count)
+
+
+def observe_rate_limit_rejection(role):
+    RATE_LIMIT_REJECTIONS.labels(role).inc()
+
+
+def observe_cache(hits=0, misses=0):
+    if hits:
+        CACHE_REQUESTS.labels('hit').inc(hits)
+    if misses:
+        CACHE_REQUESTS.labels('miss').inc(misses)
+
+
+def observe_task(task_name, state, duration):
+    CELERY_TASK_DURATION.labels(task_name, state or 'UNKNOWN').observe(duration)
+
+
+def is_multiprocess():
+    return bool(os.environ.get(MULTIPROCESS_DIR_ENV))
+
+
+def mark_process_dead(pid):
+    """Para el hook child_exit de gunicorn en modo multiproceso."""
+    if is_multiprocess():
+        multiprocess.mark_process_dead(pid)
+
+
+def render_metrics():
+    """
+    Retorna (contenido, content_type) en formato de texto de Prometheus.
+    En modo multiproceso combina los archivos de todos los workers.
+    """
+    if is_multiprocess():
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+    else:
+        registry = REGISTRY
+    return generate_latest(registry), CONTENT_TYPE_LATEST
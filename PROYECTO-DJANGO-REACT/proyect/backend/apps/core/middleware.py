@@ -0,0 +1,123 @@
+"""
+Middleware de observabilidad:
+
+1. MetricsMiddleware: métricas para el endpoint /metrics (ver apps/core/metrics.py).
+2. QueryInspectorMiddleware: detector de N+1 en desarrollo (ver apps/core/querycount.py).
+"""
+
+import logging
+import time
+from contextlib import ExitStack
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.db import connections
+
+from .metrics import observe_request
+from .querycount import NPlusOneError, QueryInspector, get_inspector_settings
+
+performance_logger = logging.getLogger('performance')
+
+
+class QueryCounter:
+    """Wrapper para connection.execute_wrapper que solo cuenta consultas."""
+
+    __slots__ = ('count',)
+
+    def __init__(self):
+        self.count = 0
+
+    def __call__(self, execute, sql, params, many, context):
+        self.count += 1
+        return execute(sql, params, many, context)
+
+
+class MetricsMiddleware:
+    """
+    Registra la duración y las consultas SQL de cada petición por ruta.
+    
+    La ruta es el patrón del URLconf (sin IDs concretos) para mantener
+    acotada la cantidad de series. Las consultas que las vistas async lanzan
+    con core.async_api.gather_queries usan otras conexiones y no se cuentan.
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        counter = QueryCounter()
+        start = time.perf_counter()
+        with ExitStack() as stack:
+            for connection in connections.all():
+                stack.enter_context(connection.execute_wrapper(counter))
+            response = self.get_response(request)
+        
+        self.observe(request, response, start, counter)
+        return response
+
+    async def __acall__(self, request):
+        counter = QueryCounter()
+        start = time.perf_counter()
+        with ExitStack() as stack:
+            for connection in connections.all():
+                stack.enter_context(connection.execute_wrapper(counter))
+            response = await self.get_response(request)
+        
+        self.observe(request, response, start, counter)
+        return response
+
+    def observe(self, request, response, start, counter):
+        observe_request(
+            request.method,
+            self.get_route(request),
+            response.status_code,
+            time.perf_counter() - start,
+            counter.count
+        )
+
+    def get_route(self, request):
+        match = getattr(request, 'resolver_match', None)
+        if match is None:
+            return 'unresolved'
+        return '/' + (match.route or match.view_name).lstrip('^').rstrip('$')
+
+
+class QueryInspectorMiddleware:
+    """
+    Reporta en el log las consultas repetidas (N+1) y lentas de cada petición.
+    Solo se activa con QUERY_INSPECTOR['ENABLED'] (por defecto, DEBUG).
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        inspector_settings = get_inspector_settings()
+        if not inspector_settings['ENABLED']:
+            return self.get_response(request)
+        
+        inspector = QueryInspector()
+        with inspector.capture():
+            response = self.get_response(request)
+        
+        if inspector.offenders():
+            message = (
+                f"N+1 en {request.method} {request.path} "
+                f"({inspector.total_queries} consultas):\n{inspector.format_offenders()}"
+            )
+            if inspector_settings['RAISE']:
+                raise NPlusOneError(message)
+            performance_logger.warning(message)
+        
+        for slow_query in inspector.slow_queries:
+            performance_logger.warning(
+                f"Consulta lenta en {request.method} {request.path} "
+                f"({slow_query['duration_ms']}ms, {slow_query['call_site']}): {slow_query['sql'][:300]}"
+            )
+        return response
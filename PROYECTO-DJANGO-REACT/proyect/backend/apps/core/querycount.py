@@ -0,0 +1,182 @@
+"""
+Detector de consultas N+1 y consultas lentas (desarrollo y tests).
+
+Agrupa las consultas SQL ejecutadas dentro de una petición (o bloque `with`)
+por "forma": el SQL con los literales reemplazados. Si una misma forma se
+repite THRESHOLD veces o más, casi siempre es una relación cargada de forma
+perezosa dentro de un bucle (falta select_related / prefetch_related).
+
+Configuración (settings.QUERY_INSPECTOR):
+    'ENABLED': DEBUG
+    'THRESHOLD': 5           # repeticiones de la misma forma para reportarla
+    'SLOW_QUERY_MS': 100     # consultas individuales más lentas que esto
+    'RAISE': False           # lanzar NPlusOneError (útil en tests)
+
+Uso en tests:
+    with assert_max_repeated_queries(3):
+        client.get('/api/reports/popular-doctors/')
+"""
+
+import logging
+import os
+import re
+import time
+import traceback
+from contextlib import ExitStack, contextmanager
+
+from django.conf import settings
+from django.db import connections
+
+logger = logging.getLogger('performance')
+
+DEFAULT_INSPECTOR_SETTINGS = {
+    'THRESHOLD': 5,
+    'SLOW_QUERY_MS': 100,
+    'RAISE': False,
+}
+
+# Frames de estos paquetes no se consideran "sitio de llamada"
+IGNORED_PATH_PARTS = (
+    f'{os.sep}site-packages{os.sep}',
+    f'{os.sep}django{os.sep}',
+    f'{os.sep}rest_framework{os.sep}',
+)
+
+_STRING_LITERAL_RE = re.compile(r"'(?:[^']|'')*'")
+_NUMBER_RE = re.compile(r'\b\d+(?:\.\d+)?\b')
+_IN_LIST_RE = re.compile(r'\bIN \((?:[^()]*)\)', re.IGNORECASE)
+_WHITESPACE_RE = re.compile(r'\s+')
+
+
+class NPlusOneError(AssertionError):
+    """Se repitió la misma consulta más veces que el umbral permitido."""
+
+
+def get_inspector_settings():
+    inspector_settings = dict(DEFAULT_INSPECTOR_SETTINGS)
+    inspector_settings['ENABLED'] = settings.DEBUG
+    inspector_settings.update(getattr(settings, 'QUERY_INSPECTOR', {}))
+    return inspector_settings
+
+
+def normalize_sql(sql):
+    """Forma de la consulta: literales, números y listas IN reemplazados."""
+    shape = _STRING_LITERAL_RE.sub('?', sql)
+    shape = _IN_LIST_RE.sub('IN (...)', shape)
+    shape = _NUMBER_RE.sub('?', shape)
+    return _WHITESPACE_RE.sub(' ', shape).strip()
+
+
+def find_call_site():
+    """Primer frame del proyecto (fuera de Django/DRF y de este módulo)."""
+    this_file = os.path.abspath(__file__)
+    for frame in reversed(traceback.extract_stack()[:-2]):
+        filename = os.path.abspath(frame.filename)
+        if filename == this_file or any(part in filename for part in IGNORED_PATH_PARTS):
+            continue
+        return f"{os.path.relpath(filename, settings.BASE_DIR)}:{frame.lineno} in {frame.name}"
+    return 'desconocido'
+
+
+class QueryShape:
+    __slots__ = ('sql', 'count', 'total_ms', 'call_site')
+
+    def __init__(self, sql):
+        self.sql = sql
+        self.count = 0
+        self.total_ms = 0.0
+        self.call_site = None
+
+
+class QueryInspector:
+    """
+    Registra las consultas de un bloque mediante connection.execute_wrapper.
+
+    🎯 Objetivo: Detectar relaciones cargadas en bucle antes de llegar a producción
+    💡 Concepto: Contar consultas por forma; el sitio de llamada se captura solo
+    cuando una forma se repite (recorrer la pila en cada consulta sería costoso)
+    """
+
+    def __init__(self, threshold=None, slow_query_ms=None):
+        inspector_settings = get_inspector_settings()
+        self.threshold = threshold or inspector_settings['THRESHOLD']
+        self.slow_query_ms = (
+            slow_query_ms if slow_query_ms is not None
+            else inspector_settings['SLOW_QUERY_MS']
+        )
+        self.shapes = {}
+        self.slow_queries = []
+        self.total_queries = 0
+
+    def __call__(self, execute, sql, params, many, context):
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.record(sql, (time.perf_counter() - start) * 1000)
+
+    def record(self, sql, duration_ms):
+        self.total_queries += 1
+        key = normalize_sql(sql)
+        shape = self.shapes.get(key)
+        if shape is None:
+            shape = self.shapes[key] = QueryShape(key)
+        shape.count += 1
+        shape.total_ms += duration_ms
+        if shape.count == 2:
+            shape.call_site = find_call_site()
+        if duration_ms >= self.slow_query_ms:
+            self.slow_queries.append({
+                'sql': sql,
+                'duration_ms': round(duration_ms, 2),
+                'call_site': find_call_site(),
+            })
+
+    @contextmanager
+    def capture(self):
+        """Instala el inspector en todas las conexiones durante el bloque."""
+        with ExitStack() as stack:
+            for connection in connections.all():
+                stack.enter_context(connection.execute_wrapper(self))
+            yield self
+
+    def offenders(self):
+        """Formas repetidas THRESHOLD veces o más, de la más repetida a la menos."""
+        repeated = [shape for shape in self.shapes.values() if shape.count >= self.threshold]
+        return [
+            {
+                'sql': shape.sql,
+                'count': shape.count,
+                'total_ms': round(shape.total_ms, 2),
+                'call_site': shape.call_site,
+            }
+            for shape in sorted(repeated, key=lambda shape: shape.count, reverse=True)
+        ]
+
+    def report(self):
+        return {
+            'total_queries': self.total_queries,
+            'offenders': self.offenders(),
+            'slow_queries': self.slow_queries,
+        }
+
+    def format_offenders(self):
+        lines = []
+        for offender in self.offenders():
+            lines.append(
+                f"  {offender['count']}x ({offender['total_ms']}ms) en {offender['call_site']}\n"
+                f"     {offender['sql'][:300]}"
+            )
+        return '\n'.join(lines)
+
+
+@contextmanager
+def assert_max_repeated_queries(threshold):
+    """Lanza NPlusOneError si alguna forma de consulta se repite `threshold` veces o más."""
+    inspector = QueryInspector(threshold=threshold)
+    with inspector.capture():
+        yield inspector
+    if inspector.offenders():
+        raise NPlusOneError(
+            f"Consultas repetidas {threshold}+ veces:\n{inspector.format_offenders()}"
+        )
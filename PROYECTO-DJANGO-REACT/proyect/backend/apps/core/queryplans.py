@@ -0,0 +1,250 @@
+"""
+Verificación de planes de ejecución de las consultas más frecuentes.
+
+Cada HotQuery reproduce la forma de una consulta real (filtros, orden y
+límite) y declara el índice pensado para ella y si se acepta un ordenamiento
+fuera de índice. `explain` obtiene el plan con EXPLAIN QUERY PLAN (SQLite) o
+EXPLAIN (FORMAT JSON) (PostgreSQL) y lo reduce a los índices usados, las
+tablas recorridas completas y los ordenamientos que no salen de un índice.
+
+Las expectativas con `postgresql_only` solo valen en PostgreSQL y en SQLite
+se informan sin evaluarse: SQLite no usa los índices parciales con
+`status IN (...)` ni una columna booleana indexada con `NOT is_read` (la forma
+en que Django compila `is_read=False`).
+
+Comando: python manage.py check_query_plans
+"""
+
+import json
+import re
+
+from django.db import connections
+from django.utils import timezone
+
+from apps.appointments.models import ACTIVE_STATUSES, Appointment
+from apps.doctors.models import Doctor
+from apps.notifications.models import Notification
+from apps.patients.models import Patient
+from apps.users.models import User
+
+# "SEARCH tabla USING INDEX idx (...)", "SCAN tabla", "SCAN tabla USING COVERING INDEX idx"
+_SQLITE_STEP_RE = re.compile(
+    r'^(?P<op>SCAN|SEARCH) (?P<table>\S+)(?: AS \S+)?'
+    r'(?: USING (?:(?:COVERING )?INDEX (?P<index>\S+)|(?P<pk>(?:INTEGER )?PRIMARY KEY)))?'
+)
+_PG_INDEX_NODES = ('Index Scan', 'Index Only Scan', 'Bitmap Index Scan')
+
+
+class HotQuery:
+    """Consulta frecuente: `build(params)` retorna el QuerySet a analizar."""
+
+    def __init__(self, name, description, expected_index, build, sort_expected=False, postgresql_only=False):
+        self.name = name
+        self.description = description
+        self.expected_index = expected_index
+        self.build = build
+        self.sort_expected = sort_expected
+        self.postgresql_only = postgresql_only
+
+    def applies_to(self, vendor):
+        """Las expectativas (índice y ordenamiento) valen para esta base de datos."""
+        return not self.postgresql_only or vendor == 'postgresql'
+
+
+class QueryPlan:
+    """Resumen de un plan: índices usados, tablas recorridas completas y ordenamientos."""
+
+    def __init__(self, lines):
+        self.lines = lines
+        self.indexes = []
+        self.full_scans = []
+        self.sorts = 0
+
+    @property
+    def uses_index(self):
+        return bool(self.indexes) and not self.full_scans
+
+
+HOT_QUERIES = [
+    HotQuery(
+        'doctor_upcoming',
+        'Próximas citas activas del doctor (perfil y agenda)',
+        'appt_doctor_active_idx',
+        lambda p: Appointment.objects.filter(
+            doctor_id=p['doctor_id'], status__in=ACTIVE_STATUSES, date__gte=p['today']
+        ).order_by('date', 'time')[:10],
+        postgresql_only=True,
+    ),
+    HotQuery(
+        'patient_upcoming',
+        'Próximas citas activas del paciente (patients/querysets.py: upcoming_appointments_count)',
+        'appt_patient_active_idx',
+        lambda p: Appointment.objects.filter(
+            patient_id=p['patient_id'], date__gte=p['today'], status__in=ACTIVE_STATUSES
+        ).order_by('date', 'time')[:5],
+        postgresql_only=True,
+    ),
+    HotQuery(
+        'doctor_slot_conflict',
+        'Doble reserva del doctor (core/validators.py: validate_doctor_availability)',
+        None,
+        lambda p: Appointment.objects.filter(
+            doctor_id=p['doctor_id'], date=p['date'], time=p['time'], status__in=ACTIVE_STATUSES
+        ),
+    ),
+    HotQuery(
+        'patient_slot_conflict',
+        'Doble reserva del paciente (core/validators.py: validate_patient_availability)',
+        'appt_patient_active_idx',
+        lambda p: Appointment.objects.filter(
+            patient_id=p['patient_id'], date=p['date'], time=p['time'], status__in=ACTIVE_STATUSES
+        ),
+        postgresql_only=True,
+    ),
+    HotQuery(
+        'doctor_daily_active',
+        'Citas activas del doctor en el día (core/validators.py: validate_max_daily_appointments)',
+        'appt_doctor_active_idx',
+        lambda p: Appointment.objects.filter(
+            doctor_id=p['doctor_id'], date=p['date'], status__in=ACTIVE_STATUSES
+        ),
+        postgresql_only=True,
+    ),
+    HotQuery(
+        'active_upcoming',
+        'Citas pendientes (dashboard_summary)',
+        'appt_active_date_idx',
+        lambda p: Appointment.objects.filter(status__in=ACTIVE_STATUSES, date__gte=p['today']).order_by(),
+        postgresql_only=True,
+    ),
+    HotQuery(
+        'appointments_today',
+        'Citas del día (dashboards)',
+        None,
+        lambda p: Appointment.objects.filter(date=p['today']).order_by(),
+    ),
+    HotQuery(
+        'patient_last_visit',
+        'Última visita completada (patients/querysets.py: last_visit_date)',
+        'appt_patient_completed_idx',
+        lambda p: Appointment.objects.filter(
+            patient_id=p['patient_id'], status='completed'
+        ).order_by('-date', '-time').values('date')[:1],
+    ),
+    HotQuery(
+        'patients_recent',
+        'Listado de pacientes (administradores)',
+        'patient_created_idx',
+        lambda p: Patient.objects.order_by('-created_at')[:20],
+    ),
+    HotQuery(
+        'patients_active',
+        'Listado de pacientes activos',
+        'patient_status_created_idx',
+        lambda p: Patient.objects.filter(status='active').order_by('-created_at')[:20],
+    ),
+    HotQuery(
+        'doctors_recent',
+        'Listado de doctores (administradores)',
+        'doctor_created_idx',
+        lambda p: Doctor.objects.order_by('-created_at')[:20],
+    ),
+    HotQuery(
+        'doctors_public',
+        'Directorio público de doctores',
+        'doctor_available_idx',
+        lambda p: Doctor.objects.filter(is_available=True, status__in=['active', 'inactive']).order_by(),
+    ),
+    HotQuery(
+        'notifications_unread',
+        'Notificaciones no leídas del usuario',
+        'notif_user_read_created_idx',
+        lambda p: Notification.objects.filter(user_id=p['user_id'], is_read=False).order_by('-created_at')[:20],
+        postgresql_only=True,
+    ),
+    HotQuery(
+        'notifications_list',
+        'Listado de notificaciones del usuario (top-N sobre sus filas, acotadas por la retención)',
+        'notif_user_read_created_idx',
+        lambda p: Notification.objects.filter(user_id=p['user_id']).order_by('-created_at')[:20],
+        sort_expected=True,
+    ),
+]
+
+
+def sample_params():
+    """Valores reales de la base de datos para los filtros de las consultas."""
+    appointment = (
+        Appointment.objects.filter(status__in=ACTIVE_STATUSES).order_by('-date').first()
+        or Appointment.objects.order_by('-date').first()
+    )
+    user_id = (
+        Notification.objects.order_by().values_list('user_id', flat=True).first()
+        or User.objects.order_by('pk').values_list('pk', flat=True).first()
+    )
+    today = timezone.now().date()
+    return {
+        'today': today,
+        'doctor_id': appointment.doctor_id if appointment else Doctor.objects.values_list('pk', flat=True).first(),
+        'patient_id': appointment.patient_id if appointment else Patient.objects.values_list('pk', flat=True).first(),
+        'date': appointment.date if appointment else today,
+        'time': appointment.time if appointment else timezone.now().time().replace(second=0, microsecond=0),
+        'user_id': user_id,
+    }
+
+
+def explain(queryset):
+    """QueryPlan del QuerySet en su base de datos."""
+    connection = connections[queryset.db]
+    sql, params = queryset.query.sql_with_params()
+    with connection.cursor() as cursor:
+        if connection.vendor == 'sqlite':
+            cursor.execute(f'EXPLAIN QUERY PLAN {sql}', params)
+            return _sqlite_plan([row[-1] for row in cursor.fetchall()])
+        if connection.vendor == 'postgresql':
+            cursor.execute(f'EXPLAIN (FORMAT JSON) {sql}', params)
+            document = cursor.fetchone()[0]
+            if isinstance(document, str):
+                document = json.loads(document)
+            return _postgresql_plan(document[0]['Plan'])
+    raise NotImplementedError(f"EXPLAIN no soportado para '{connection.vendor}'")
+
+
+def _sqlite_plan(details):
+    plan = QueryPlan(details)
+    for detail in details:
+        if 'TEMP B-TREE' in detail:
+            plan.sorts += 1
+            continue
+        match = _SQLITE_STEP_RE.match(detail)
+        if match is None:
+            continue
+        if match.group('index'):
+            plan.indexes.append(match.group('index'))
+        elif match.group('pk'):
+            plan.indexes.append('PRIMARY KEY')
+        elif match.group('op') == 'SCAN':
+            plan.full_scans.append(match.group('table'))
+    return plan
+
+
+def _postgresql_plan(root):
+    lines = []
+    plan = QueryPlan(lines)
+
+    def walk(node, depth):
+        node_type = node['Node Type']
+        relation = node.get('Relation Name')
+        index = node.get('Index Name')
+        lines.append('  ' * depth + ' '.join(part for part in (node_type, relation, index and f'({index})') if part))
+        if node_type in _PG_INDEX_NODES and index:
+            plan.indexes.append(index)
+        elif node_type == 'Seq Scan':
+            plan.full_scans.append(relation)
+        elif node_type in ('Sort', 'Incremental Sort'):
+            plan.sorts += 1
+        for child in node.get('Plans', ()):
+            walk(child, depth + 1)
+
+    walk(root, 0)
+    return plan
@@ -39,27 +39,26 @@ def validate_max_future_date(value, max_months=6):
         )
 
 
-def validate_holiday_exclusion(value):
-    """
-    Valida que la fecha no sea un día feriado.
-    Puedes personalizar esta lista según los feriados de tu país.
-    """
-    # Lista de feriados fijos (formato: (mes, día))
-    fixed_holidays = [
-        (1, 1),   # Año Nuevo
-        (5, 1),   # Día del Trabajo
-        (7, 20),  # Día de la Independencia (Colombia)
-        (8, 7),   # Batalla de Boyacá (Colombia)
-        (12, 8),  # Inmaculada Concepción
-        (12, 25), # Navidad
-    ]
+def validate_holiday_exclusion(value, doctor=None):
+    """
+    Valida que la fecha no sea un día feriado ni un cierre de la clínica
+    (o del doctor, si se indica).
+    Los feriados se definen en apps/appointments/data/holidays.json y los cierres
+    en el modelo Closure; la verificación es una búsqueda en memoria.
+    """
+    from apps.appointments.closures import closure_calendar
     
-    # Verificar feriados fijos
-    if (value.month, value.day) in fixed_holidays:
+    if closure_calendar.is_clinic_closed(value):
         raise ValidationError(
             _('No se pueden programar citas en días feriados.'),
             code='holiday_date'
         )
+    
+    if doctor is not None and closure_calendar.is_closed(value, doctor.id):
+        raise ValidationError(
+            _('El doctor no atiende en la fecha seleccionada.'),
+            code='doctor_closed_date'
+        )
 
 
 def validate_age_appropriate_time(patient_birth_date, appointment_time):
@@ -213,6 +212,20 @@ def validate_doctor_availability(doctor, date_value, time_value, exclude_appoint
         )
 
 
+def validate_doctor_schedule(doctor, date_value, time_value):
+    """
+    Valida que la fecha y hora caigan dentro del horario de atención del doctor
+    (bloques semanales y excepciones registradas).
+    """
+    from apps.doctors.services import ScheduleService
+    
+    if not ScheduleService.is_working_at(doctor, date_value, time_value):
+        raise ValidationError(
+            _('El doctor no atiende en la fecha y hora seleccionadas.'),
+            code='outside_doctor_schedule'
+        )
+
+
 def validate_patient_availability(patient, date_value, time_value, exclude_appointment_id=None):
     """
     Valida que el paciente no tenga otra cita en la misma fecha y hora.
@@ -316,6 +329,7 @@ class AppointmentValidator:
         # Validaciones básicas de fecha y hora
         validate_future_date(date_value)
         validate_weekday(date_value)
+        validate_holiday_exclusion(date_value, doctor)
         validate_business_hours(time_value)
         validate_appointment_time_slot(time_value)
         
@@ -324,6 +338,7 @@ class AppointmentValidator:
         
         # Validaciones de disponibilidad
         validate_doctor_availability(doctor, date_value, time_value)
+        validate_doctor_schedule(doctor, date_value, time_value)
         validate_patient_availability(patient, date_value, time_value)
         
         # Validación de límite diario
@@ -350,6 +365,7 @@ class AppointmentValidator:
         # Validaciones básicas de fecha y hora
         validate_future_date(date_value)
         validate_weekday(date_value)
+        validate_holiday_exclusion(date_value, doctor)
         validate_business_hours(time_value)
         validate_appointment_time_slot(time_value)
         
@@ -358,6 +374,7 @@ class AppointmentValidator:
         
         # Validaciones de disponibilidad (excluyendo la cita actual)
         validate_doctor_availability(doctor, date_value, time_value, appointment.id)
+        validate_doctor_schedule(doctor, date_value, time_value)
         validate_patient_availability(patient, date_value, time_value, appointment.id)
         
         # Validación de límite diario
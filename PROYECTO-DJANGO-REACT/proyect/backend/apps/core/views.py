@@ -1,3 +1,5 @@
+import hmac
+
 from rest_framework.decorators import api_view
 from rest_framework.response import Response
 from django.http import JsonResponse
@@ -6,6 +8,9 @@ from drf_spectacular.utils import extend_schema
 from django.urls import reverse
 from django.shortcuts import render
 from django.http import HttpResponse
+from django.conf import settings
+
+from .metrics import render_metrics
 
 
 @api_view(['GET'])
@@ -81,4 +86,21 @@ def api_status(request):
             'doctors': '/api/doctors/',
             'appointments': '/api/appointments/',
         }
-    })
\ No newline at end of file
+    })
+
+
+def metrics(request):
+    """
+    Métricas en formato de texto de Prometheus.
+    Exige `Authorization: Bearer <METRICS_AUTH_TOKEN>`; sin token configurado
+    solo se exponen con DEBUG=True.
+    """
+    token = getattr(settings, 'METRICS_AUTH_TOKEN', '')
+    if not token:
+        if not settings.DEBUG:
+            return HttpResponse('Forbidden: METRICS_AUTH_TOKEN not set', status=403, content_type='text/plain')
+    elif not hmac.compare_digest(request.headers.get('Authorization', ''), f'Bearer {token}'):
+        return HttpResponse('Unauthorized', status=401, content_type='text/plain')
+    
+    content, content_type = render_metrics()
+    return HttpResponse(content, content_type=content_type)
@@ -2,7 +2,7 @@ from django.contrib import admin
 from django.contrib.auth import get_user_model
 from django import forms
 import json
-from .models import Doctor
+from .models import Doctor, Specialization, DoctorScheduleBlock, DoctorScheduleException
 
 User = get_user_model()
 
@@ -41,6 +41,36 @@ class DoctorForm(forms.ModelForm):
                 self.fields['work_days'].initial = []
 
 
+@admin.register(Specialization)
+class SpecializationAdmin(admin.ModelAdmin):
+    """
+    Configuración del admin para el catálogo de especialidades.
+    Los contadores son de solo lectura: los mantienen los signals.
+    """
+    
+    list_display = ('name', 'slug', 'is_active', 'doctors_count', 'appointments_count')
+    list_filter = ('is_active',)
+    search_fields = ('name', 'slug')
+    prepopulated_fields = {'slug': ('name',)}
+    readonly_fields = ('doctors_count', 'appointments_count', 'created_at', 'updated_at')
+    ordering = ('name',)
+
+
+class DoctorScheduleBlockInline(admin.TabularInline):
+    """Bloques semanales de atención del doctor."""
+    model = DoctorScheduleBlock
+    extra = 0
+    fields = ('weekday', 'start_time', 'end_time', 'is_active', 'source')
+    readonly_fields = ('source',)
+
+
+class DoctorScheduleExceptionInline(admin.TabularInline):
+    """Ausencias y jornadas adicionales del doctor."""
+    model = DoctorScheduleException
+    extra = 0
+    fields = ('exception_type', 'start_date', 'end_date', 'start_time', 'end_time', 'reason')
+
+
 @admin.register(Doctor)
 class DoctorAdmin(admin.ModelAdmin):
     """
@@ -55,7 +85,7 @@ class DoctorAdmin(admin.ModelAdmin):
     
     # Campos por los que se puede filtrar
     list_filter = (
-        'specialization', 'is_available', 'created_at'
+        'specialty', 'is_available', 'created_at'
     )
     
     # Campos por los que se puede buscar
@@ -76,6 +106,9 @@ class DoctorAdmin(admin.ModelAdmin):
     # Campos de solo lectura
     readonly_fields = []
     
+    # Horario estructurado (los campos work_* regeneran los bloques al guardarse)
+    inlines = [DoctorScheduleBlockInline, DoctorScheduleExceptionInline]
+    
     def get_full_name(self, obj):
         """Retorna el nombre completo del doctor."""
         return obj.full_name
@@ -94,7 +127,7 @@ class DoctorAdmin(admin.ModelAdmin):
     
     def get_queryset(self, request):
         """Optimiza las consultas incluyendo el usuario relacionado."""
-        return super().get_queryset(request).select_related('user')
+        return super().get_queryset(request).select_related('user', 'specialty')
     
     def formfield_for_foreignkey(self, db_field, request, **kwargs):
         """Personaliza el campo de usuario para mostrar solo usuarios con rol doctor."""
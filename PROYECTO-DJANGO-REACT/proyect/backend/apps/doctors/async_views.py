@@ -0,0 +1,93 @@
+"""
+Versiones async de las lecturas públicas de doctores (ver core/async_api.py).
+
+Mismas respuestas que public_doctors_list y DoctorListViewSet.available_slots,
+en /api/async/doctors/... (config/async_urls.py).
+"""
+
+from datetime import datetime
+
+from django.http import JsonResponse
+from django.utils import timezone
+
+from core.async_api import async_get_view, error_response, gather_queries
+from .models import Doctor
+from .serializers import DoctorPublicSerializer
+from .services import ScheduleService
+
+
+def public_doctors_queryset():
+    """Mismo filtro que DoctorListViewSet.get_queryset."""
+    return Doctor.objects.filter(
+        is_available=True,
+        user__is_active=True,
+        status__in=['active', 'inactive']
+    ).select_related('user')
+
+
+@async_get_view
+async def public_doctors_list(request):
+    """GET /api/async/doctors/public/ - Doctores públicos disponibles"""
+    results, = await gather_queries(
+        lambda: DoctorPublicSerializer(
+            Doctor.objects.filter(is_available=True, user__is_active=True).select_related('user'),
+            many=True
+        ).data
+    )
+    return JsonResponse({'count': len(results), 'results': results})
+
+
+@async_get_view
+async def available_slots(request, pk):
+    """
+    GET /api/async/doctors/public/{id}/available-slots/?date=YYYY-MM-DD
+
+    El doctor, su jornada (bloques, excepciones y cierres) y las citas ya
+    tomadas se consultan a la vez.
+    """
+    date_str = request.GET.get('date')
+    date_error = None
+    appointment_date = None
+    if not date_str:
+        date_error = ('Fecha requerida', 'Debe proporcionar una fecha en formato YYYY-MM-DD')
+    else:
+        try:
+            appointment_date = datetime.strptime(date_str, '%Y-%m-%d').date()
+        except ValueError:
+            date_error = ('Formato de fecha inválido', 'Use el formato YYYY-MM-DD')
+        else:
+            if appointment_date < timezone.now().date():
+                date_error = ('Fecha inválida', 'No se pueden agendar citas en fechas pasadas')
+                appointment_date = None
+
+    queries = [lambda: public_doctors_queryset().filter(pk=pk).first()]
+    if appointment_date is not None:
+        queries += [
+            lambda: ScheduleService.get_working_intervals(Doctor(pk=pk), appointment_date),
+            lambda: ScheduleService.get_booked_times(Doctor(pk=pk), appointment_date),
+        ]
+    doctor, *schedule = await gather_queries(*queries)
+
+    if doctor is None:
+        return error_response('No encontrado', 'No existe un doctor disponible con ese id', 404)
+    if not doctor.is_available:
+        return error_response('Doctor no disponible', 'El doctor no está aceptando citas en este momento', 400)
+    if date_error:
+        return error_response(*date_error, 400)
+
+    intervals, booked_times = schedule
+    slots = ScheduleService.build_slots(appointment_date, intervals, booked_times) if intervals else []
+
+    return JsonResponse({
+        'message': 'Horarios disponibles obtenidos exitosamente',
+        'data': {
+            'doctor': {
+                'id': doctor.id,
+                'name': doctor.full_name,
+                'specialization': doctor.specialization
+            },
+            'date': appointment_date.isoformat(),
+            'available_slots': slots,
+            'total_slots': len(slots)
+        }
+    })
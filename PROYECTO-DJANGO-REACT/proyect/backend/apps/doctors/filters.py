@@ -1,6 +1,6 @@
 import django_filters
 from django.db import models
-from .models import Doctor
+from .models import Doctor, Specialization
 
 
 class DoctorFilter(django_filters.FilterSet):
@@ -15,11 +15,16 @@ class DoctorFilter(django_filters.FilterSet):
         help_text='Buscar por nombre o apellido del doctor'
     )
     
-    # Filtro por especialización
+    # Filtro por especialización (id, slug o nombre; se resuelve contra el catálogo)
     specialization = django_filters.CharFilter(
-        field_name='specialization',
-        lookup_expr='icontains',
-        help_text='Filtrar por especialización (búsqueda parcial)'
+        method='filter_by_specialization',
+        help_text='Filtrar por especialización (id, slug o nombre del catálogo)'
+    )
+    
+    # Filtro directo por id del catálogo de especialidades
+    specialty = django_filters.ModelChoiceFilter(
+        queryset=Specialization.objects.all(),
+        help_text='Filtrar por id de especialidad del catálogo'
     )
     
     # Filtro por disponibilidad
@@ -63,7 +68,7 @@ class DoctorFilter(django_filters.FilterSet):
     class Meta:
         model = Doctor
         fields = {
-            'specialization': ['exact', 'icontains'],
+            'specialty': ['exact'],
             'is_available': ['exact'],
             'status': ['exact'],
             'years_experience': ['exact', 'gte', 'lte'],
@@ -80,4 +85,14 @@ class DoctorFilter(django_filters.FilterSet):
                 models.Q(user__first_name__icontains=value) |
                 models.Q(user__last_name__icontains=value)
             )
+        return queryset
+    
+    def filter_by_specialization(self, queryset, name, value):
+        """
+        Filtrar doctores por especialización.
+        El texto se resuelve primero contra el catálogo y luego se filtra por id,
+        evitando escanear el texto libre de cada doctor.
+        """
+        if value:
+            return queryset.filter(specialty_id__in=Specialization.match_ids(value))
         return queryset
\ No newline at end of file
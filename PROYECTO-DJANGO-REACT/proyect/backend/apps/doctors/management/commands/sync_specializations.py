@@ -0,0 +1,33 @@
+from django.core.management.base import BaseCommand
+from apps.doctors.models import Doctor, Specialization
+
+
+class Command(BaseCommand):
+    help = 'Enlaza doctores sin especialidad al catálogo y recalcula los contadores'
+
+    def handle(self, *args, **options):
+        self.stdout.write("🔧 Sincronizando catálogo de especialidades...")
+        
+        linked_count = 0
+        pending = Doctor.objects.filter(specialty__isnull=True).exclude(specialization='')
+        for doctor in pending:
+            specialty = Specialization.get_or_create_from_name(doctor.specialization)
+            if specialty is None:
+                continue
+            Doctor.objects.filter(pk=doctor.pk).update(
+                specialty=specialty,
+                specialization=specialty.name
+            )
+            linked_count += 1
+        
+        self.stdout.write(f"📈 Doctores enlazados al catálogo: {linked_count}")
+        
+        total = Specialization.rebuild_counters()
+        self.stdout.write(f"📊 Contadores recalculados para {total} especialidades")
+        
+        for spec in Specialization.objects.filter(doctors_count__gt=0):
+            self.stdout.write(
+                f"   - {spec.name}: {spec.doctors_count} doctores, {spec.appointments_count} citas"
+            )
+        
+        self.stdout.write(self.style.SUCCESS("\n✅ Sincronización completada!"))
@@ -0,0 +1,37 @@
+# Generated by Django 5.0.1 on 2026-10-19 09:15
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('doctors', '0003_doctor_status'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Specialization',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(help_text='Nombre de la especialidad médica', max_length=100, unique=True, verbose_name='Nombre')),
+                ('slug', models.SlugField(help_text='Identificador legible para URLs y filtros', max_length=120, unique=True, verbose_name='Slug')),
+                ('is_active', models.BooleanField(default=True, help_text='Indica si la especialidad se ofrece actualmente', verbose_name='Activa')),
+                ('doctors_count', models.PositiveIntegerField(default=0, verbose_name='Cantidad de Doctores')),
+                ('appointments_count', models.PositiveIntegerField(default=0, verbose_name='Cantidad de Citas')),
+                ('created_at', models.DateTimeField(auto_now_add=True, verbose_name='Fecha de Creación')),
+                ('updated_at', models.DateTimeField(auto_now=True, verbose_name='Fecha de Actualización')),
+            ],
+            options={
+                'verbose_name': 'Especialidad',
+                'verbose_name_plural': 'Especialidades',
+                'ordering': ['name'],
+            },
+        ),
+        migrations.AddField(
+            model_name='doctor',
+            name='specialty',
+            field=models.ForeignKey(blank=True, help_text='Especialidad normalizada; se sincroniza con el campo de texto', null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='doctors', to='doctors.specialization', verbose_name='Especialidad (catálogo)'),
+        ),
+    ]
@@ -0,0 +1,88 @@
+# Generated by Django 5.0.1 on 2026-10-19 09:20
+
+import re
+import unicodedata
+
+from django.db import migrations
+from django.db.models import Count
+from django.utils.text import slugify
+
+# Copia congelada de apps.doctors.models.normalize_specialization_name: la
+# migración no debe cambiar si la normalización evoluciona
+SPECIALIZATION_CORRECTIONS = {
+    'Cardiolog??a': 'Cardiología',
+    'CardiologÃa': 'Cardiología',
+    'Traumatolog??a': 'Traumatología',
+    'TraumatologÃa': 'Traumatología',
+}
+
+
+def normalize_specialization_name(name):
+    if not name:
+        return ''
+    name = re.sub(r'\s+', ' ', str(name)).strip()
+    name = SPECIALIZATION_CORRECTIONS.get(name, name)
+    return unicodedata.normalize('NFC', name)
+
+
+def populate_specializations(apps, schema_editor):
+    """
+    Crea el catálogo a partir de los textos existentes en Doctor.specialization,
+    enlaza cada doctor con su especialidad e inicializa los contadores.
+    """
+    Doctor = apps.get_model('doctors', 'Doctor')
+    Specialization = apps.get_model('doctors', 'Specialization')
+    Appointment = apps.get_model('appointments', 'Appointment')
+
+    catalog = {}
+    raw_values = (
+        Doctor.objects.exclude(specialization__isnull=True)
+        .values_list('specialization', flat=True).distinct()
+    )
+    for raw in raw_values:
+        name = normalize_specialization_name(raw)
+        if not name:
+            continue
+        slug = slugify(name)
+        if slug not in catalog:
+            catalog[slug], _ = Specialization.objects.get_or_create(
+                slug=slug,
+                defaults={'name': name}
+            )
+        specialization = catalog[slug]
+        Doctor.objects.filter(specialization=raw).update(
+            specialty=specialization,
+            specialization=specialization.name
+        )
+
+    doctors = dict(
+        Doctor.objects.filter(specialty__isnull=False)
+        .values('specialty').annotate(total=Count('id'))
+        .values_list('specialty', 'total')
+    )
+    appointments = dict(
+        Appointment.objects.filter(doctor__specialty__isnull=False)
+        .values('doctor__specialty').annotate(total=Count('id'))
+        .values_list('doctor__specialty', 'total')
+    )
+    for specialization in catalog.values():
+        specialization.doctors_count = doctors.get(specialization.id, 0)
+        specialization.appointments_count = appointments.get(specialization.id, 0)
+        specialization.save(update_fields=['doctors_count', 'appointments_count'])
+
+
+def unlink_specializations(apps, schema_editor):
+    Doctor = apps.get_model('doctors', 'Doctor')
+    Doctor.objects.update(specialty=None)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('doctors', '0004_specialization'),
+        ('appointments', '0003_initial'),
+    ]
+
+    operations = [
+        migrations.RunPython(populate_specializations, unlink_specializations),
+    ]
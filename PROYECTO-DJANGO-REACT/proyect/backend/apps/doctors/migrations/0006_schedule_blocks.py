@@ -0,0 +1,66 @@
+# Generated by Django 5.0.1 on 2026-10-19 10:00
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('doctors', '0005_populate_specializations'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DoctorScheduleException',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('exception_type', models.CharField(choices=[('time_off', 'Ausencia'), ('extra_hours', 'Horario Adicional')], default='time_off', max_length=20, verbose_name='Tipo')),
+                ('start_date', models.DateField(verbose_name='Fecha de Inicio')),
+                ('end_date', models.DateField(verbose_name='Fecha de Fin')),
+                ('start_time', models.TimeField(blank=True, help_text='Vacío para todo el día', null=True, verbose_name='Hora de Inicio')),
+                ('end_time', models.TimeField(blank=True, help_text='Vacío para todo el día', null=True, verbose_name='Hora de Fin')),
+                ('reason', models.CharField(blank=True, max_length=200, verbose_name='Motivo')),
+                ('created_at', models.DateTimeField(auto_now_add=True, verbose_name='Fecha de Creación')),
+                ('doctor', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='schedule_exceptions', to='doctors.doctor', verbose_name='Doctor')),
+            ],
+            options={
+                'verbose_name': 'Excepción de Horario',
+                'verbose_name_plural': 'Excepciones de Horario',
+                'ordering': ['start_date', 'start_time'],
+            },
+        ),
+        migrations.CreateModel(
+            name='DoctorScheduleBlock',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('weekday', models.PositiveSmallIntegerField(choices=[(0, 'Lunes'), (1, 'Martes'), (2, 'Miércoles'), (3, 'Jueves'), (4, 'Viernes'), (5, 'Sábado'), (6, 'Domingo')], help_text='0 = lunes ... 6 = domingo', verbose_name='Día de la Semana')),
+                ('start_time', models.TimeField(verbose_name='Hora de Inicio')),
+                ('end_time', models.TimeField(verbose_name='Hora de Fin')),
+                ('is_active', models.BooleanField(default=True, verbose_name='Activo')),
+                ('doctor', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='schedule_blocks', to='doctors.doctor', verbose_name='Doctor')),
+            ],
+            options={
+                'verbose_name': 'Bloque de Horario',
+                'verbose_name_plural': 'Bloques de Horario',
+                'ordering': ['doctor', 'weekday', 'start_time'],
+                'indexes': [models.Index(fields=['weekday', 'start_time', 'end_time'], name='sched_block_when_idx'), models.Index(fields=['doctor', 'weekday'], name='sched_block_doctor_idx')],
+            },
+        ),
+        migrations.AddConstraint(
+            model_name='doctorscheduleblock',
+            constraint=models.CheckConstraint(check=models.Q(('end_time__gt', models.F('start_time'))), name='sched_block_end_after_start'),
+        ),
+        migrations.AddIndex(
+            model_name='doctorscheduleexception',
+            index=models.Index(fields=['doctor', 'start_date', 'end_date'], name='sched_exc_doctor_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='doctorscheduleexception',
+            index=models.Index(fields=['start_date', 'end_date'], name='sched_exc_dates_idx'),
+        ),
+        migrations.AddConstraint(
+            model_name='doctorscheduleexception',
+            constraint=models.CheckConstraint(check=models.Q(('end_date__gte', models.F('start_date'))), name='sched_exc_end_after_start'),
+        ),
+    ]
@@ -0,0 +1,57 @@
+# Generated by Django 5.0.1 on 2026-10-19 10:05
+
+import datetime
+
+from django.db import migrations
+
+WEEKDAY_NAMES = ['monday', 'tuesday', 'wednesday', 'thursday', 'friday', 'saturday', 'sunday']
+
+# Horario que usaba la generación de slots antes de existir los bloques
+DEFAULT_WORK_START = datetime.time(9, 0)
+DEFAULT_WORK_END = datetime.time(17, 0)
+DEFAULT_WORK_WEEKDAYS = [0, 1, 2, 3, 4]
+
+
+def create_schedule_blocks(apps, schema_editor):
+    """
+    Convierte work_start_time/work_end_time/work_days de cada doctor en
+    bloques DoctorScheduleBlock (uno por día laboral).
+    """
+    Doctor = apps.get_model('doctors', 'Doctor')
+    DoctorScheduleBlock = apps.get_model('doctors', 'DoctorScheduleBlock')
+
+    blocks = []
+    for doctor in Doctor.objects.only('id', 'work_start_time', 'work_end_time', 'work_days'):
+        start = doctor.work_start_time or DEFAULT_WORK_START
+        end = doctor.work_end_time or DEFAULT_WORK_END
+        if start >= end:
+            continue
+
+        weekdays = sorted({
+            WEEKDAY_NAMES.index(day.lower())
+            for day in (doctor.work_days or [])
+            if isinstance(day, str) and day.lower() in WEEKDAY_NAMES
+        }) or DEFAULT_WORK_WEEKDAYS
+
+        blocks.extend(
+            DoctorScheduleBlock(doctor_id=doctor.id, weekday=weekday, start_time=start, end_time=end)
+            for weekday in weekdays
+        )
+
+    DoctorScheduleBlock.objects.bulk_create(blocks, batch_size=500)
+
+
+def delete_schedule_blocks(apps, schema_editor):
+    DoctorScheduleBlock = apps.get_model('doctors', 'DoctorScheduleBlock')
+    DoctorScheduleBlock.objects.all().delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('doctors', '0006_schedule_blocks'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_schedule_blocks, delete_schedule_blocks),
+    ]
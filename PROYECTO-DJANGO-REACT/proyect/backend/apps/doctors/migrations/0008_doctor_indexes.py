@@ -0,0 +1,27 @@
+# Generated by Django 5.0.1 on 2026-10-19 02:12
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('doctors', '0007_populate_schedule_blocks'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='doctor',
+            index=models.Index(fields=['-created_at'], name='doctor_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='doctor',
+            index=models.Index(fields=['status', '-created_at'], name='doctor_status_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='doctor',
+            index=models.Index(fields=['is_available', 'status'], name='doctor_available_idx'),
+        ),
+    ]
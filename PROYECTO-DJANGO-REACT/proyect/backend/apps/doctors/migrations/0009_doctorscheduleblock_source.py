@@ -0,0 +1,62 @@
+# Generated by Django 5.0.1 on 2026-10-19 02:30
+
+import datetime
+
+from django.db import migrations, models
+
+WEEKDAY_NAMES = ['monday', 'tuesday', 'wednesday', 'thursday', 'friday', 'saturday', 'sunday']
+
+# Mismo horario por defecto que 0007_populate_schedule_blocks
+DEFAULT_WORK_START = datetime.time(9, 0)
+DEFAULT_WORK_END = datetime.time(17, 0)
+DEFAULT_WORK_WEEKDAYS = [0, 1, 2, 3, 4]
+
+
+def mark_legacy_blocks(apps, schema_editor):
+    """
+    Marca como 'legacy' los bloques que coinciden con el horario heredado del
+    doctor (creados por 0007 o por la sincronización de work_*); el resto se
+    configuró directamente y queda como 'manual'.
+    """
+    Doctor = apps.get_model('doctors', 'Doctor')
+    DoctorScheduleBlock = apps.get_model('doctors', 'DoctorScheduleBlock')
+
+    legacy_ids = []
+    doctors = Doctor.objects.filter(schedule_blocks__isnull=False).distinct().only(
+        'id', 'work_start_time', 'work_end_time', 'work_days'
+    )
+    for doctor in doctors:
+        start = doctor.work_start_time or DEFAULT_WORK_START
+        end = doctor.work_end_time or DEFAULT_WORK_END
+        weekdays = {
+            WEEKDAY_NAMES.index(day.lower())
+            for day in (doctor.work_days or [])
+            if isinstance(day, str) and day.lower() in WEEKDAY_NAMES
+        } or set(DEFAULT_WORK_WEEKDAYS)
+        legacy_ids.extend(
+            DoctorScheduleBlock.objects.filter(
+                doctor_id=doctor.id,
+                weekday__in=weekdays,
+                start_time=start,
+                end_time=end
+            ).values_list('id', flat=True)
+        )
+
+    for offset in range(0, len(legacy_ids), 500):
+        DoctorScheduleBlock.objects.filter(id__in=legacy_ids[offset:offset + 500]).update(source='legacy')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('doctors', '0008_doctor_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='doctorscheduleblock',
+            name='source',
+            field=models.CharField(choices=[('legacy', 'Horario Heredado'), ('manual', 'Configurado')], default='manual', max_length=10, verbose_name='Origen'),
+        ),
+        migrations.RunPython(mark_legacy_blocks, migrations.RunPython.noop),
+    ]
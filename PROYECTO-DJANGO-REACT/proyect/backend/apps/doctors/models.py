@@ -1,11 +1,195 @@
+import re
+import unicodedata
+from datetime import time
+
 from django.db import models
+from django.db.models import F
+from django.db.models.functions import Greatest
 from django.contrib.auth import get_user_model
 from django.core.validators import MinValueValidator
+from django.utils.text import slugify
 from decimal import Decimal
 
 User = get_user_model()
 
 
+# Correcciones conocidas de codificación en especialidades cargadas a mano
+SPECIALIZATION_CORRECTIONS = {
+    'Cardiolog??a': 'Cardiología',
+    'CardiologÃa': 'Cardiología',
+    'Traumatolog??a': 'Traumatología',
+    'TraumatologÃa': 'Traumatología',
+}
+
+
+# Días de la semana usados en Doctor.work_days -> índice de datetime.weekday()
+WEEKDAY_NAMES = ['monday', 'tuesday', 'wednesday', 'thursday', 'friday', 'saturday', 'sunday']
+WEEKDAY_CHOICES = [
+    (0, 'Lunes'),
+    (1, 'Martes'),
+    (2, 'Miércoles'),
+    (3, 'Jueves'),
+    (4, 'Viernes'),
+    (5, 'Sábado'),
+    (6, 'Domingo'),
+]
+
+# Horario por defecto de la clínica para doctores sin horario definido
+DEFAULT_WORK_START = time(9, 0)
+DEFAULT_WORK_END = time(17, 0)
+DEFAULT_WORK_WEEKDAYS = [0, 1, 2, 3, 4]
+
+
+def normalize_specialization_name(name):
+    """
+    Normaliza el nombre de una especialidad: corrige codificación conocida,
+    elimina espacios sobrantes y unifica la forma Unicode.
+    """
+    if not name:
+        return ''
+    name = re.sub(r'\s+', ' ', str(name)).strip()
+    name = SPECIALIZATION_CORRECTIONS.get(name, name)
+    return unicodedata.normalize('NFC', name)
+
+
+class Specialization(models.Model):
+    """
+    Catálogo normalizado de especialidades médicas.
+    Mantiene contadores desnormalizados de doctores y citas para consultas de facetas.
+    """
+    
+    name = models.CharField(
+        max_length=100,
+        unique=True,
+        verbose_name="Nombre",
+        help_text="Nombre de la especialidad médica"
+    )
+    slug = models.SlugField(
+        max_length=120,
+        unique=True,
+        verbose_name="Slug",
+        help_text="Identificador legible para URLs y filtros"
+    )
+    is_active = models.BooleanField(
+        default=True,
+        verbose_name="Activa",
+        help_text="Indica si la especialidad se ofrece actualmente"
+    )
+    
+    # Contadores desnormalizados (mantenidos por signals)
+    doctors_count = models.PositiveIntegerField(
+        default=0,
+        verbose_name="Cantidad de Doctores"
+    )
+    appointments_count = models.PositiveIntegerField(
+        default=0,
+        verbose_name="Cantidad de Citas"
+    )
+    
+    created_at = models.DateTimeField(
+        auto_now_add=True,
+        verbose_name="Fecha de Creación"
+    )
+    updated_at = models.DateTimeField(
+        auto_now=True,
+        verbose_name="Fecha de Actualización"
+    )
+    
+    class Meta:
+        app_label = 'doctors'
+        verbose_name = "Especialidad"
+        verbose_name_plural = "Especialidades"
+        ordering = ['name']
+    
+    def __str__(self):
+        return self.name
+    
+    def save(self, *args, **kwargs):
+        self.name = normalize_specialization_name(self.name)
+        if not self.slug:
+            self.slug = slugify(self.name)
+        super().save(*args, **kwargs)
+    
+    @classmethod
+    def get_or_create_from_name(cls, name):
+        """
+        Obtiene (o crea) la especialidad correspondiente a un texto libre.
+        Retorna None si el texto está vacío.
+        """
+        name = normalize_specialization_name(name)
+        if not name:
+            return None
+        
+        slug = slugify(name)
+        specialization = cls.objects.filter(slug=slug).first()
+        if specialization is None:
+            specialization, _ = cls.objects.get_or_create(
+                name=name,
+                defaults={'slug': slug}
+            )
+        return specialization
+    
+    @classmethod
+    def match_ids(cls, value):
+        """
+        Resuelve un valor de filtro (id, slug o nombre) a una lista de ids del catálogo.
+        La búsqueda parcial se hace sobre el catálogo (pocas filas), de modo que
+        el filtro sobre doctores sea siempre un join por entero.
+        """
+        value = (value or '').strip()
+        if not value:
+            return []
+        if value.isdigit():
+            return [int(value)]
+        
+        exact = list(
+            cls.objects.filter(
+                models.Q(slug=slugify(value)) | models.Q(name__iexact=value)
+            ).values_list('id', flat=True)
+        )
+        if exact:
+            return exact
+        return list(cls.objects.filter(name__icontains=value).values_list('id', flat=True))
+    
+    @classmethod
+    def adjust_counters(cls, specialization_id, doctors=0, appointments=0):
+        """Ajusta atómicamente los contadores de una especialidad (sin bajar de cero)."""
+        if not specialization_id or (not doctors and not appointments):
+            return
+        updates = {}
+        if doctors:
+            updates['doctors_count'] = Greatest(F('doctors_count') + doctors, 0)
+        if appointments:
+            updates['appointments_count'] = Greatest(F('appointments_count') + appointments, 0)
+        cls.objects.filter(pk=specialization_id).update(**updates)
+    
+    @classmethod
+    def rebuild_counters(cls):
+        """
+        Recalcula todos los contadores desde cero.
+        Útil para corregir desvíos tras cargas masivas o cambios hechos fuera del ORM.
+        """
+        from apps.appointments.models import Appointment
+        
+        doctors = dict(
+            Doctor.objects.filter(specialty__isnull=False)
+            .values('specialty').annotate(total=models.Count('id'))
+            .values_list('specialty', 'total')
+        )
+        appointments = dict(
+            Appointment.objects.filter(doctor__specialty__isnull=False)
+            .values('doctor__specialty').annotate(total=models.Count('id'))
+            .values_list('doctor__specialty', 'total')
+        )
+        
+        specializations = list(cls.objects.all())
+        for specialization in specializations:
+            specialization.doctors_count = doctors.get(specialization.id, 0)
+            specialization.appointments_count = appointments.get(specialization.id, 0)
+        cls.objects.bulk_update(specializations, ['doctors_count', 'appointments_count'])
+        return len(specializations)
+
+
 class Doctor(models.Model):
     """
     Modelo para representar un doctor en el sistema.
@@ -37,6 +221,15 @@ class Doctor(models.Model):
         verbose_name="Especialización",
         help_text="Especialidad médica del doctor"
     )
+    specialty = models.ForeignKey(
+        Specialization,
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name='doctors',
+        verbose_name="Especialidad (catálogo)",
+        help_text="Especialidad normalizada; se sincroniza con el campo de texto"
+    )
     years_experience = models.PositiveIntegerField(
         validators=[MinValueValidator(0)],
         verbose_name="Años de Experiencia",
@@ -105,10 +298,63 @@ class Doctor(models.Model):
         verbose_name = "Doctor"
         verbose_name_plural = "Doctores"
         ordering = ['user__last_name', 'user__first_name']
+        indexes = [
+            # Listado de administración (ordenado por fecha de alta, filtro por estado)
+            models.Index(fields=['-created_at'], name='doctor_created_idx'),
+            models.Index(fields=['status', '-created_at'], name='doctor_status_created_idx'),
+            # Directorio público: disponibles y no inhabilitados
+            models.Index(fields=['is_available', 'status'], name='doctor_available_idx'),
+        ]
         
     def __str__(self):
         return f"Dr. {self.user.get_full_name()} - {self.specialization}"
     
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # Guardar los valores cargados para detectar cambios de especialidad al guardar
+        instance._loaded_specialization = instance.__dict__.get('specialization')
+        instance._loaded_specialty_id = instance.__dict__.get('specialty_id')
+        instance._loaded_work_schedule = (
+            instance.__dict__.get('work_start_time'),
+            instance.__dict__.get('work_end_time'),
+            instance.__dict__.get('work_days'),
+        )
+        return instance
+    
+    def save(self, *args, **kwargs):
+        """Mantiene sincronizados el texto de especialización y la FK al catálogo."""
+        update_fields = kwargs.get('update_fields')
+        loaded_text = getattr(self, '_loaded_specialization', None)
+        loaded_id = getattr(self, '_loaded_specialty_id', None)
+        
+        if self.specialty_id and self.specialty_id != loaded_id:
+            # Se asignó la FK directamente: el texto sigue al catálogo
+            self.specialization = self.specialty.name
+            synced = 'specialization'
+        elif self.specialization != loaded_text or (self.specialization and not self.specialty_id):
+            self.specialty = Specialization.get_or_create_from_name(self.specialization)
+            if self.specialty is not None:
+                self.specialization = self.specialty.name
+            synced = 'specialty'
+        else:
+            synced = None
+        
+        if synced and update_fields is not None and synced not in update_fields:
+            kwargs['update_fields'] = list(update_fields) + [synced]
+        
+        adding = self._state.adding
+        work_schedule = (self.work_start_time, self.work_end_time, self.work_days)
+        schedule_changed = work_schedule != getattr(self, '_loaded_work_schedule', None)
+        
+        super().save(*args, **kwargs)
+        self._loaded_specialization = self.specialization
+        
+        # Los campos heredados de horario se reflejan en bloques estructurados
+        if schedule_changed and (adding or self.work_days or self.work_start_time):
+            self.sync_schedule_blocks()
+        self._loaded_work_schedule = work_schedule
+    
     def get_full_name(self):
         """Retorna el nombre completo del doctor con título."""
         return f"Dr. {self.user.get_full_name()}"
@@ -210,8 +456,42 @@ class Doctor(models.Model):
             return 'Desconocido'
     
     def is_working_day(self, day_name):
-        """Verifica si el doctor trabaja en un día específico."""
-        return day_name.lower() in [day.lower() for day in self.work_days]
+        """Verifica si el doctor trabaja en un día específico (nombre en inglés o índice 0-6)."""
+        if isinstance(day_name, int):
+            weekday = day_name
+        elif day_name.lower() in WEEKDAY_NAMES:
+            weekday = WEEKDAY_NAMES.index(day_name.lower())
+        else:
+            return False
+        return self.schedule_blocks.filter(weekday=weekday, is_active=True).exists()
+    
+    def sync_schedule_blocks(self):
+        """
+        Reconstruye los bloques heredados a partir de work_start_time/work_end_time/work_days.
+        Si faltan las horas se usa el horario por defecto de la clínica.
+        Los bloques configurados directamente no se tocan y, si existen, el
+        horario heredado deja de generar bloques.
+        """
+        self.schedule_blocks.filter(source='legacy').delete()
+        if self.schedule_blocks.filter(source='manual').exists():
+            return []
+        return DoctorScheduleBlock.objects.bulk_create(self.build_schedule_blocks())
+    
+    def build_schedule_blocks(self):
+        """Bloques sin guardar que corresponden al horario heredado del doctor."""
+        start = self.work_start_time or DEFAULT_WORK_START
+        end = self.work_end_time or DEFAULT_WORK_END
+        if start >= end:
+            return []
+        weekdays = sorted({
+            WEEKDAY_NAMES.index(day.lower())
+            for day in (self.work_days or [])
+            if isinstance(day, str) and day.lower() in WEEKDAY_NAMES
+        }) or DEFAULT_WORK_WEEKDAYS
+        return [
+            DoctorScheduleBlock(doctor=self, weekday=weekday, start_time=start, end_time=end, source='legacy')
+            for weekday in weekdays
+        ]
     
     def get_work_schedule(self):
         """Retorna el horario de trabajo formateado."""
@@ -227,3 +507,151 @@ class Doctor(models.Model):
         self.work_end_time = end_time
         self.work_days = work_days
         self.save(update_fields=['work_start_time', 'work_end_time', 'work_days', 'updated_at'])
+
+
+class DoctorScheduleBlock(models.Model):
+    """
+    Bloque semanal de atención de un doctor (día de la semana + rango horario).
+    Permite consultar en base de datos qué doctores trabajan en un momento dado.
+    """
+    
+    # 'legacy': generado desde work_start_time/work_end_time/work_days (se
+    # regenera al cambiarlos); 'manual': configurado directamente (admin/API)
+    SOURCE_CHOICES = [
+        ('legacy', 'Horario Heredado'),
+        ('manual', 'Configurado'),
+    ]
+    
+    doctor = models.ForeignKey(
+        Doctor,
+        on_delete=models.CASCADE,
+        related_name='schedule_blocks',
+        verbose_name="Doctor"
+    )
+    weekday = models.PositiveSmallIntegerField(
+        choices=WEEKDAY_CHOICES,
+        verbose_name="Día de la Semana",
+        help_text="0 = lunes ... 6 = domingo"
+    )
+    start_time = models.TimeField(
+        verbose_name="Hora de Inicio"
+    )
+    end_time = models.TimeField(
+        verbose_name="Hora de Fin"
+    )
+    is_active = models.BooleanField(
+        default=True,
+        verbose_name="Activo"
+    )
+    source = models.CharField(
+        max_length=10,
+        choices=SOURCE_CHOICES,
+        default='manual',
+        verbose_name="Origen"
+    )
+    
+    class Meta:
+        app_label = 'doctors'
+        verbose_name = "Bloque de Horario"
+        verbose_name_plural = "Bloques de Horario"
+        ordering = ['doctor', 'weekday', 'start_time']
+        indexes = [
+            models.Index(fields=['weekday', 'start_time', 'end_time'], name='sched_block_when_idx'),
+            models.Index(fields=['doctor', 'weekday'], name='sched_block_doctor_idx'),
+        ]
+        constraints = [
+            models.CheckConstraint(
+                check=models.Q(end_time__gt=models.F('start_time')),
+                name='sched_block_end_after_start'
+            ),
+        ]
+    
+    def __str__(self):
+        return f"{self.doctor} - {self.get_weekday_display()} {self.start_time:%H:%M}-{self.end_time:%H:%M}"
+
+
+class DoctorScheduleException(models.Model):
+    """
+    Excepción al horario semanal: ausencias (vacaciones, licencias, permisos)
+    o jornadas adicionales puntuales.
+    """
+    
+    TYPE_CHOICES = [
+        ('time_off', 'Ausencia'),
+        ('extra_hours', 'Horario Adicional'),
+    ]
+    
+    doctor = models.ForeignKey(
+        Doctor,
+        on_delete=models.CASCADE,
+        related_name='schedule_exceptions',
+        verbose_name="Doctor"
+    )
+    exception_type = models.CharField(
+        max_length=20,
+        choices=TYPE_CHOICES,
+        default='time_off',
+        verbose_name="Tipo"
+    )
+    start_date = models.DateField(
+        verbose_name="Fecha de Inicio"
+    )
+    end_date = models.DateField(
+        verbose_name="Fecha de Fin"
+    )
+    start_time = models.TimeField(
+        null=True,
+        blank=True,
+        verbose_name="Hora de Inicio",
+        help_text="Vacío para todo el día"
+    )
+    end_time = models.TimeField(
+        null=True,
+        blank=True,
+        verbose_name="Hora de Fin",
+        help_text="Vacío para todo el día"
+    )
+    reason = models.CharField(
+        max_length=200,
+        blank=True,
+        verbose_name="Motivo"
+    )
+    created_at = models.DateTimeField(
+        auto_now_add=True,
+        verbose_name="Fecha de Creación"
+    )
+    
+    class Meta:
+        app_label = 'doctors'
+        verbose_name = "Excepción de Horario"
+        verbose_name_plural = "Excepciones de Horario"
+        ordering = ['start_date', 'start_time']
+        indexes = [
+            models.Index(fields=['doctor', 'start_date', 'end_date'], name='sched_exc_doctor_idx'),
+            models.Index(fields=['start_date', 'end_date'], name='sched_exc_dates_idx'),
+        ]
+        constraints = [
+            models.CheckConstraint(
+                check=models.Q(end_date__gte=models.F('start_date')),
+                name='sched_exc_end_after_start'
+            ),
+        ]
+    
+    def __str__(self):
+        return f"{self.doctor} - {self.get_exception_type_display()} {self.start_date} a {self.end_date}"
+    
+    @property
+    def is_all_day(self):
+        return self.start_time is None or self.end_time is None
+    
+    def clean(self):
+        from django.core.exceptions import ValidationError
+        
+        if self.end_date and self.start_date and self.end_date < self.start_date:
+            raise ValidationError('La fecha de fin no puede ser anterior a la fecha de inicio.')
+        if (self.start_time is None) != (self.end_time is None):
+            raise ValidationError('Debe indicar hora de inicio y de fin, o dejar ambas vacías.')
+        if self.start_time and self.end_time and self.end_time <= self.start_time:
+            raise ValidationError('La hora de fin debe ser posterior a la hora de inicio.')
+        if self.exception_type == 'extra_hours' and self.is_all_day:
+            raise ValidationError('Un horario adicional requiere hora de inicio y de fin.')
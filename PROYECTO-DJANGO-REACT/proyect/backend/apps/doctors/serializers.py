@@ -42,6 +42,7 @@ class DoctorSerializer(serializers.ModelSerializer):
             'full_name',
             'medical_license',
             'specialization',
+            'specialty',
             'years_experience',
             'consultation_fee',
             'bio',
@@ -58,7 +59,7 @@ class DoctorSerializer(serializers.ModelSerializer):
             'created_at',
             'updated_at'
         ]
-        read_only_fields = ['id', 'created_at', 'updated_at']
+        read_only_fields = ['id', 'specialty', 'created_at', 'updated_at']
 
     def validate_medical_license(self, value):
         """
@@ -378,6 +379,7 @@ class DoctorListSerializer(serializers.ModelSerializer):
             'full_name',
             'email',
             'specialization',
+            'specialty',
             'years_experience',
             'consultation_fee',
             'status',
@@ -404,6 +406,7 @@ class DoctorPublicSerializer(serializers.ModelSerializer):
             'id',
             'full_name',
             'specialization',
+            'specialty',
             'years_experience',
             'bio',
             'is_available'
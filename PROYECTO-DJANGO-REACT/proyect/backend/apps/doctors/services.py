@@ -0,0 +1,193 @@
+"""
+Servicios para el manejo de horarios de doctores.
+Centraliza el cálculo de jornadas y la generación de horarios disponibles
+a partir de los bloques estructurados (DoctorScheduleBlock), sus excepciones
+y el calendario de cierres (feriados y cierres de la clínica).
+"""
+
+from datetime import datetime, timedelta, time
+from django.db.models import Exists, OuterRef, Q
+from .models import Doctor, DoctorScheduleBlock, DoctorScheduleException
+from apps.appointments.closures import closure_calendar
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Estados de cita que ocupan un horario
+ACTIVE_APPOINTMENT_STATUSES = ['scheduled', 'confirmed']
+
+
+def _subtract_interval(intervals, start, end):
+    """Resta el rango [start, end) de una lista de intervalos (inicio, fin)."""
+    result = []
+    for interval_start, interval_end in intervals:
+        if end <= interval_start or start >= interval_end:
+            result.append((interval_start, interval_end))
+            continue
+        if interval_start < start:
+            result.append((interval_start, start))
+        if end < interval_end:
+            result.append((end, interval_end))
+    return result
+
+
+class ScheduleService:
+    """
+    Servicio para consultar la disponibilidad de los doctores.
+
+    🎯 Objetivo: Responder "quién trabaja cuándo" desde la base de datos
+    💡 Concepto: Bloques semanales + excepciones puntuales (ausencias / horario adicional)
+    """
+
+    @staticmethod
+    def get_working_intervals(doctor, day):
+        """
+        Calcula los intervalos de atención de un doctor para una fecha.
+
+        Args:
+            doctor: Doctor a consultar
+            day: Fecha (date)
+
+        Returns:
+            list[tuple[time, time]]: Intervalos (inicio, fin) ordenados
+        """
+        if closure_calendar.is_closed(day, doctor.id):
+            return []
+
+        intervals = list(
+            DoctorScheduleBlock.objects.filter(
+                doctor=doctor,
+                weekday=day.weekday(),
+                is_active=True
+            ).order_by('start_time').values_list('start_time', 'end_time')
+        )
+
+        exceptions = DoctorScheduleException.objects.filter(
+            doctor=doctor,
+            start_date__lte=day,
+            end_date__gte=day
+        )
+
+        for exception in exceptions:
+            if exception.exception_type == 'extra_hours':
+                intervals.append((exception.start_time, exception.end_time))
+
+        for exception in exceptions:
+            if exception.exception_type != 'time_off':
+                continue
+            if exception.is_all_day:
+                return []
+            intervals = _subtract_interval(intervals, exception.start_time, exception.end_time)
+
+        return sorted(intervals)
+
+    @staticmethod
+    def is_working_at(doctor, day, at_time, slot_minutes=30):
+        """Verifica si el horario [at_time, at_time + slot_minutes) cae dentro de la jornada."""
+        slot_end = (datetime.combine(day, at_time) + timedelta(minutes=slot_minutes)).time()
+        if slot_end <= at_time:
+            # El horario cruza la medianoche
+            slot_end = time.max
+        return any(
+            start <= at_time and slot_end <= end
+            for start, end in ScheduleService.get_working_intervals(doctor, day)
+        )
+
+    @staticmethod
+    def generate_slots(doctor, day, slot_minutes=30):
+        """
+        Genera los horarios libres de un doctor para una fecha.
+
+        Returns:
+            list[dict]: Horarios con 'time', 'datetime' y 'available'
+        """
+        intervals = ScheduleService.get_working_intervals(doctor, day)
+        if not intervals:
+            return []
+        return ScheduleService.build_slots(
+            day, intervals, ScheduleService.get_booked_times(doctor, day), slot_minutes
+        )
+
+    @staticmethod
+    def get_booked_times(doctor, day):
+        """Horas de inicio de las citas activas del doctor en la fecha."""
+        from apps.appointments.models import Appointment
+
+        return set(
+            Appointment.objects.filter(
+                doctor=doctor,
+                date=day,
+                status__in=ACTIVE_APPOINTMENT_STATUSES
+            ).values_list('time', flat=True)
+        )
+
+    @staticmethod
+    def build_slots(day, intervals, booked_times, slot_minutes=30):
+        """
+        Horarios libres a partir de la jornada y las horas ocupadas, ya
+        consultadas (la vista async las obtiene en paralelo).
+        """
+        step = timedelta(minutes=slot_minutes)
+        slots = []
+        for start, end in intervals:
+            current = datetime.combine(day, start)
+            end_datetime = datetime.combine(day, end)
+            while current + step <= end_datetime:
+                slot_time = current.time()
+                if slot_time not in booked_times:
+                    slots.append({
+                        'time': slot_time.strftime('%H:%M'),
+                        'datetime': current.isoformat(),
+                        'available': True
+                    })
+                current += step
+        return slots
+
+    @staticmethod
+    def doctors_working_at(day, at_time, queryset=None):
+        """
+        Filtra en base de datos los doctores que atienden en una fecha y hora.
+
+        Args:
+            day: Fecha (date)
+            at_time: Hora (time)
+            queryset: QuerySet de doctores a filtrar (default: todos)
+
+        Returns:
+            QuerySet: Doctores con un bloque o jornada adicional que cubre el momento
+            y sin ausencias registradas en ese momento
+        """
+        if queryset is None:
+            queryset = Doctor.objects.all()
+
+        if closure_calendar.is_clinic_closed(day):
+            return queryset.none()
+        closed_doctor_ids = closure_calendar.closed_doctor_ids(day)
+        if closed_doctor_ids:
+            queryset = queryset.exclude(pk__in=closed_doctor_ids)
+
+        in_block = DoctorScheduleBlock.objects.filter(
+            doctor=OuterRef('pk'),
+            weekday=day.weekday(),
+            is_active=True,
+            start_time__lte=at_time,
+            end_time__gt=at_time
+        )
+        exceptions = DoctorScheduleException.objects.filter(
+            doctor=OuterRef('pk'),
+            start_date__lte=day,
+            end_date__gte=day
+        )
+        extra_hours = exceptions.filter(
+            exception_type='extra_hours',
+            start_time__lte=at_time,
+            end_time__gt=at_time
+        )
+        time_off = exceptions.filter(exception_type='time_off').filter(
+            Q(start_time__isnull=True) |
+            Q(start_time__lte=at_time, end_time__gt=at_time)
+        )
+
+        return queryset.filter(
+            Q(Exists(in_block)) | Q(Exists(extra_hours))
+        ).exclude(Exists(time_off))
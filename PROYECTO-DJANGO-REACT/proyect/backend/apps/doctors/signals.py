@@ -1,11 +1,70 @@
-from django.db.models.signals import post_save
+from django.db import models
+from django.db.models.signals import post_save, post_delete
 from django.dispatch import receiver
 from django.contrib.auth import get_user_model
-from .models import Doctor
+from .models import Doctor, Specialization
 
 User = get_user_model()
 
 
+@receiver(post_save, sender=Doctor)
+def update_specialization_counters_on_doctor_save(sender, instance, created, **kwargs):
+    """
+    Mantiene los contadores desnormalizados del catálogo de especialidades
+    cuando se crea un doctor o cambia su especialidad.
+    """
+    old_specialty_id = None if created else getattr(instance, '_loaded_specialty_id', None)
+    new_specialty_id = instance.specialty_id
+    
+    if old_specialty_id != new_specialty_id:
+        appointments = 0 if created else instance.appointments.count()
+        Specialization.adjust_counters(old_specialty_id, doctors=-1, appointments=-appointments)
+        Specialization.adjust_counters(new_specialty_id, doctors=1, appointments=appointments)
+    
+    instance._loaded_specialty_id = new_specialty_id
+
+
+@receiver(post_delete, sender=Doctor)
+def update_specialization_counters_on_doctor_delete(sender, instance, **kwargs):
+    """Descuenta al doctor eliminado del contador de su especialidad."""
+    # Las citas se eliminan en cascada y descuentan su propio contador
+    Specialization.adjust_counters(instance.specialty_id, doctors=-1)
+
+
+@receiver(post_save, sender='appointments.Appointment')
+def update_specialization_counters_on_appointment_save(sender, instance, created, **kwargs):
+    """
+    Suma la nueva cita al contador de la especialidad del doctor; si la cita
+    se reasignó a otro doctor, la mueve de una especialidad a la otra.
+    """
+    if created:
+        Specialization.objects.filter(doctors__id=instance.doctor_id).update(
+            appointments_count=models.F('appointments_count') + 1
+        )
+    else:
+        old_doctor_id = getattr(instance, '_loaded_doctor_id', instance.doctor_id)
+        if old_doctor_id is not None and old_doctor_id != instance.doctor_id:
+            specialties = dict(
+                Doctor.objects.filter(pk__in=[old_doctor_id, instance.doctor_id])
+                .values_list('pk', 'specialty_id')
+            )
+            old_specialty_id = specialties.get(old_doctor_id)
+            new_specialty_id = specialties.get(instance.doctor_id)
+            if old_specialty_id != new_specialty_id:
+                Specialization.adjust_counters(old_specialty_id, appointments=-1)
+                Specialization.adjust_counters(new_specialty_id, appointments=1)
+    instance._loaded_doctor_id = instance.doctor_id
+
+
+@receiver(post_delete, sender='appointments.Appointment')
+def update_specialization_counters_on_appointment_delete(sender, instance, **kwargs):
+    """Descuenta la cita eliminada del contador de la especialidad del doctor."""
+    Specialization.objects.filter(
+        doctors__id=instance.doctor_id,
+        appointments_count__gt=0
+    ).update(appointments_count=models.F('appointments_count') - 1)
+
+
 # TEMPORALMENTE DESHABILITADO - Ahora se maneja desde el formulario dinámico
 # @receiver(post_save, sender=User)
 # def create_doctor_profile(sender, instance, created, **kwargs):
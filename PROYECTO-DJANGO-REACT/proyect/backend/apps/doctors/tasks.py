@@ -0,0 +1,18 @@
+import logging
+
+from celery import shared_task
+
+from .models import Specialization
+
+logger = logging.getLogger(__name__)
+
+
+@shared_task
+def rebuild_specialization_counters():
+    """
+    Recalcula los contadores de doctores y citas por especialidad (corrige
+    desvíos por update() masivos, SQL manual o cambios hechos desde el admin).
+    """
+    total = Specialization.rebuild_counters()
+    logger.info(f"📊 Contadores recalculados para {total} especialidades")
+    return {'specializations': total}
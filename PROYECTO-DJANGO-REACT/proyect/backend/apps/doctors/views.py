@@ -9,7 +9,7 @@ from decimal import Decimal, InvalidOperation
 from django_filters.rest_framework import DjangoFilterBackend
 from rest_framework.filters import SearchFilter, OrderingFilter
 
-from .models import Doctor
+from .models import Doctor, Specialization
 from .serializers import (
     DoctorSerializer,
     DoctorCreateSerializer,
@@ -20,8 +20,10 @@ from .serializers import (
     DoctorProfileSerializer
 )
 from .filters import DoctorFilter
+from .services import ScheduleService
 from apps.appointments.models import Appointment
 from core.permissions import IsDoctor, IsDoctorOrAdmin, IsAdminOrSuperAdmin
+from core.replicas import ReplicaReadMixin
 
 
 class DoctorViewSet(viewsets.ModelViewSet):
@@ -147,7 +149,7 @@ class DoctorViewSet(viewsets.ModelViewSet):
         # Filtro por especialización
         specialization = self.request.query_params.get('specialization', None)
         if specialization:
-            queryset = queryset.filter(specialization__icontains=specialization)
+            queryset = queryset.filter(specialty_id__in=Specialization.match_ids(specialization))
         
         # Filtro por disponibilidad
         is_available = self.request.query_params.get('is_available', None)
@@ -278,7 +280,7 @@ class DoctorViewSet(viewsets.ModelViewSet):
             )
 
 
-class DoctorListViewSet(viewsets.ReadOnlyModelViewSet):
+class DoctorListViewSet(ReplicaReadMixin, viewsets.ReadOnlyModelViewSet):
     """
     ViewSet para endpoints públicos de listado de doctores.
     
@@ -291,6 +293,9 @@ class DoctorListViewSet(viewsets.ReadOnlyModelViewSet):
     queryset = Doctor.objects.filter(is_available=True).select_related('user')
     serializer_class = DoctorPublicSerializer
     permission_classes = [AllowAny]
+    
+    # Acciones de solo lectura servidas desde una réplica (ver core/replicas.py)
+    replica_actions = ['statistics', 'general_stats']
     filter_backends = [DjangoFilterBackend, SearchFilter, OrderingFilter]
     filterset_class = DoctorFilter
     search_fields = ['user__first_name', 'user__last_name', 'specialization', 'bio']
@@ -311,20 +316,23 @@ class DoctorListViewSet(viewsets.ReadOnlyModelViewSet):
         GET /api/doctors/public/specializations/
         Obtener lista de todas las especializaciones disponibles.
         """
-        specializations = Doctor.objects.filter(
-            is_available=True,
-            user__is_active=True
-        ).values_list('specialization', flat=True).distinct().order_by('specialization')
-        
-        # Filtrar valores vacíos o None
-        specializations = [spec for spec in specializations if spec and spec.strip()]
+        facets = list(
+            Specialization.objects.filter(
+                is_active=True,
+                doctors__is_available=True,
+                doctors__user__is_active=True
+            ).annotate(
+                available_doctors=Count('doctors')
+            ).values('id', 'name', 'slug', 'available_doctors').order_by('name')
+        )
         
         return Response(
             {
                 'message': 'Especializaciones obtenidas exitosamente',
                 'data': {
-                    'specializations': list(specializations),
-                    'total_specializations': len(specializations)
+                    'specializations': [facet['name'] for facet in facets],
+                    'facets': facets,
+                    'total_specializations': len(facets)
                 }
             },
             status=status.HTTP_200_OK
@@ -342,15 +350,12 @@ class DoctorListViewSet(viewsets.ReadOnlyModelViewSet):
             user__is_active=True
         ).count()
         
-        # Total de especialidades únicas
-        specializations = Doctor.objects.filter(
-            is_available=True,
-            user__is_active=True
-        ).values_list('specialization', flat=True).distinct()
-        
-        # Filtrar valores vacíos o None
-        unique_specializations = [spec for spec in specializations if spec and spec.strip()]
-        total_specializations = len(unique_specializations)
+        # Total de especialidades con al menos un doctor disponible
+        total_specializations = Specialization.objects.filter(
+            is_active=True,
+            doctors__is_available=True,
+            doctors__user__is_active=True
+        ).distinct().count()
         
         return Response(
             {
@@ -375,6 +380,7 @@ class DoctorListViewSet(viewsets.ReadOnlyModelViewSet):
         - min_fee: tarifa mínima de consulta
         - max_fee: tarifa máxima de consulta
         - available_only: solo doctores disponibles (default: true)
+        - date, time: solo doctores que atienden en esa fecha (YYYY-MM-DD) y hora (HH:MM)
         """
         queryset = self.get_queryset()
         
@@ -384,6 +390,7 @@ class DoctorListViewSet(viewsets.ReadOnlyModelViewSet):
         min_fee = request.query_params.get('min_fee', None)
         max_fee = request.query_params.get('max_fee', None)
         available_only = request.query_params.get('available_only', 'true').lower() == 'true'
+        specialty_ids = Specialization.match_ids(specialization) if specialization else []
         
         # Aplicar filtros
         if search_term:
@@ -395,7 +402,7 @@ class DoctorListViewSet(viewsets.ReadOnlyModelViewSet):
             )
         
         if specialization:
-            queryset = queryset.filter(specialization__icontains=specialization)
+            queryset = queryset.filter(specialty_id__in=specialty_ids)
         
         if min_fee:
             try:
@@ -435,12 +442,29 @@ class DoctorListViewSet(viewsets.ReadOnlyModelViewSet):
                     Q(bio__icontains=search_term)
                 )
             if specialization:
-                queryset = queryset.filter(specialization__icontains=specialization)
+                queryset = queryset.filter(specialty_id__in=specialty_ids)
             if min_fee:
                 queryset = queryset.filter(consultation_fee__gte=Decimal(min_fee))
             if max_fee:
                 queryset = queryset.filter(consultation_fee__lte=Decimal(max_fee))
         
+        # Filtrar por horario de atención (bloques de horario en base de datos)
+        date_str = request.query_params.get('date', None)
+        time_str = request.query_params.get('time', None)
+        if date_str and time_str:
+            try:
+                working_date = datetime.strptime(date_str, '%Y-%m-%d').date()
+                working_time = datetime.strptime(time_str, '%H:%M').time()
+            except ValueError:
+                return Response(
+                    {
+                        'error': 'Parámetro inválido',
+                        'detail': 'Use date=YYYY-MM-DD y time=HH:MM'
+                    },
+                    status=status.HTTP_400_BAD_REQUEST
+                )
+            queryset = ScheduleService.doctors_working_at(working_date, working_time, queryset)
+        
         # Ordenar resultados
         ordering = request.query_params.get('ordering', 'user__first_name')
         if ordering in ['user__first_name', '-user__first_name', 'user__last_name', '-user__last_name', 
@@ -580,34 +604,8 @@ class DoctorListViewSet(viewsets.ReadOnlyModelViewSet):
                 status=status.HTTP_400_BAD_REQUEST
             )
         
-        # Generar horarios disponibles (9:00 AM - 5:00 PM, cada 30 minutos)
-        available_slots = []
-        start_time = time(9, 0)  # 9:00 AM
-        end_time = time(17, 0)   # 5:00 PM
-        
-        current_time = datetime.combine(appointment_date, start_time)
-        end_datetime = datetime.combine(appointment_date, end_time)
-        
-        # Obtener citas existentes para esa fecha
-        existing_appointments = Appointment.objects.filter(
-            doctor=doctor,
-            date=appointment_date,
-            status__in=['scheduled', 'confirmed']
-        ).values_list('time', flat=True)
-        
-        while current_time < end_datetime:
-            slot_time = current_time.time()
-            
-            # Verificar si el horario no está ocupado
-            if slot_time not in existing_appointments:
-                available_slots.append({
-                    'time': slot_time.strftime('%H:%M'),
-                    'datetime': current_time.isoformat(),
-                    'available': True
-                })
-            
-            # Incrementar 30 minutos
-            current_time += timedelta(minutes=30)
+        # Generar horarios disponibles según los bloques de horario del doctor (cada 30 minutos)
+        available_slots = ScheduleService.generate_slots(doctor, appointment_date)
         
         return Response(
             {
@@ -1090,7 +1088,29 @@ class DoctorProfileViewSet(viewsets.ViewSet):
                 'start_time': doctor.work_start_time.strftime('%H:%M') if doctor.work_start_time else None,
                 'end_time': doctor.work_end_time.strftime('%H:%M') if doctor.work_end_time else None,
                 'work_days': doctor.work_days,
-                'formatted_schedule': doctor.get_work_schedule()
+                'formatted_schedule': doctor.get_work_schedule(),
+                'blocks': [
+                    {
+                        'weekday': block.weekday,
+                        'weekday_display': block.get_weekday_display(),
+                        'start_time': block.start_time.strftime('%H:%M'),
+                        'end_time': block.end_time.strftime('%H:%M')
+                    }
+                    for block in doctor.schedule_blocks.filter(is_active=True)
+                ],
+                'upcoming_exceptions': [
+                    {
+                        'type': exception.exception_type,
+                        'start_date': exception.start_date.isoformat(),
+                        'end_date': exception.end_date.isoformat(),
+                        'start_time': exception.start_time.strftime('%H:%M') if exception.start_time else None,
+                        'end_time': exception.end_time.strftime('%H:%M') if exception.end_time else None,
+                        'reason': exception.reason
+                    }
+                    for exception in doctor.schedule_exceptions.filter(
+                        end_date__gte=timezone.now().date()
+                    )
+                ]
             },
             'availability': {
                 'is_available': doctor.is_available,
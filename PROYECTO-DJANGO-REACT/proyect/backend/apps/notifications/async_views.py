@@ -0,0 +1,22 @@
+"""
+Versión async del conteo de notificaciones (ver core/async_api.py), en
+/api/async/notifications/count/ (config/async_urls.py). El cliente lo
+consulta periódicamente cuando no usa el stream SSE.
+"""
+
+from django.http import JsonResponse
+
+from apps.users.authentication import authenticate_async
+from core.async_api import async_get_view, error_response
+from . import counters
+
+
+@async_get_view
+async def notification_count(request):
+    """GET /api/async/notifications/count/ - Conteo de notificaciones no leídas"""
+    user = await authenticate_async(request)
+    if user is None:
+        return error_response('No autenticado', 'Token inválido, expirado o ausente', 401)
+
+    counts = await counters.aget_counts(user.pk)
+    return JsonResponse({'unread_count': counts['unread_count']})
@@ -0,0 +1,101 @@
+"""
+Canales de entrega externos (ver apps/notifications/delivery.py).
+
+Cada canal recibe un lote de NotificationDelivery y retorna, por entrega,
+None si se envió o el mensaje de error si falló; el worker decide si se
+reintenta o pasa a dead-letter. Se configuran en
+settings.NOTIFICATIONS_DELIVERY['CHANNELS'][<canal>]['BACKEND'].
+"""
+
+from collections import deque
+import logging
+
+from django.conf import settings
+from django.core.mail import EmailMultiAlternatives, get_connection
+
+from .rendering import render_email
+
+logger = logging.getLogger(__name__)
+
+SMS_MAX_LENGTH = 160
+SMS_OUTBOX_SIZE = 100
+
+# Últimos mensajes "enviados" por LocalSMSChannel, para desarrollo y pruebas.
+# Acotado: el proceso no acumula teléfonos indefinidamente
+sms_outbox = deque(maxlen=SMS_OUTBOX_SIZE)
+
+
+class BaseChannel:
+    """Canal de entrega; las subclases implementan send_batch."""
+
+    def __init__(self, name, channel_settings):
+        self.name = name
+        self.settings = channel_settings
+
+    def send_batch(self, deliveries):
+        """
+        Envía el lote.
+
+        Returns:
+            dict: {delivery.id: None | 'mensaje de error'}
+        """
+        raise NotImplementedError
+
+
+class EmailChannel(BaseChannel):
+    """
+    Email por el EMAIL_BACKEND configurado.
+
+    🎯 Objetivo: Enviar lotes de correos sin abrir una conexión SMTP por mensaje
+    💡 Concepto: Una conexión de get_connection() abierta por lote y send_messages por mensaje (para aislar los errores)
+    """
+
+    def build_message(self, delivery, connection):
+        html, text = render_email(delivery.template, delivery.context) if delivery.template else (None, '')
+        message = EmailMultiAlternatives(
+            subject=delivery.subject,
+            body=delivery.body or text,
+            from_email=settings.DEFAULT_FROM_EMAIL,
+            to=[delivery.recipient],
+            connection=connection,
+        )
+        if html:
+            message.attach_alternative(html, 'text/html')
+        return message
+
+    def send_batch(self, deliveries):
+        connection = get_connection(fail_silently=False)
+        try:
+            connection.open()
+        except Exception as e:
+            logger.error(f"❌ No se pudo abrir la conexión de email: {str(e)}")
+            return {delivery.id: f'Conexión: {e}' for delivery in deliveries}
+
+        results = {}
+        try:
+            for delivery in deliveries:
+                try:
+                    sent = connection.send_messages([self.build_message(delivery, connection)])
+                    results[delivery.id] = None if sent else 'El backend no envió el mensaje'
+                except Exception as e:
+                    results[delivery.id] = str(e) or e.__class__.__name__
+        finally:
+            connection.close()
+        return results
+
+
+class LocalSMSChannel(BaseChannel):
+    """
+    SMS simulado: registra el mensaje en el log y en `sms_outbox` (solo los
+    últimos SMS_OUTBOX_SIZE). Sustituto local hasta integrar un proveedor real
+    con la misma interfaz.
+    """
+
+    def send_batch(self, deliveries):
+        results = {}
+        for delivery in deliveries:
+            text = f"{delivery.subject}: {delivery.body}"[:SMS_MAX_LENGTH]
+            sms_outbox.append({'to': delivery.recipient, 'text': text})
+            logger.info(f"📱 SMS a {delivery.recipient}: {text}")
+            results[delivery.id] = None
+        return results
@@ -0,0 +1,183 @@
+"""
+Contadores de notificaciones por usuario (no leídas y total).
+
+Fuente de verdad: la fila NotificationCounter del usuario, ajustada con
+UPDATE ... SET unread_count = unread_count + n en la misma transacción que
+modifica las notificaciones. El cache guarda una copia que se descarta al
+confirmarse cada ajuste, de modo que el conteo se resuelve sin consultas en
+el caso normal y con una lectura por clave primaria en el peor caso.
+
+Si un usuario aún no tiene fila, se crea a partir de un COUNT (una sola vez).
+Los cambios hechos fuera de NotificationService (admin, SQL manual) se
+corrigen con la tarea reconcile_notification_counters.
+"""
+
+import logging
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.cache import cache
+from django.db import IntegrityError, transaction
+from django.db.models import Count, Q
+
+from .models import Notification, NotificationCounter
+
+logger = logging.getLogger(__name__)
+
+COUNTER_CACHE_KEY = 'notification_counts:{user_id}'
+DEFAULT_COUNTER_CACHE_SECONDS = 60
+
+
+def cache_key(user_id):
+    return COUNTER_CACHE_KEY.format(user_id=user_id)
+
+
+def get_cache_timeout():
+    return getattr(settings, 'NOTIFICATION_COUNTER_CACHE_SECONDS', DEFAULT_COUNTER_CACHE_SECONDS)
+
+
+def count_notifications(user_id):
+    """Conteo real (una consulta agregada); usado al crear y reconciliar contadores."""
+    return Notification.objects.filter(user_id=user_id).aggregate(
+        unread_count=Count('id', filter=Q(is_read=False)),
+        total_count=Count('id'),
+    )
+
+
+def _ensure_counter(user_id):
+    """Fila de contadores del usuario, creada desde un COUNT si no existe."""
+    counter = NotificationCounter.objects.filter(pk=user_id).first()
+    if counter is not None:
+        return counter
+    try:
+        with transaction.atomic():
+            return NotificationCounter.objects.create(user_id=user_id, **count_notifications(user_id))
+    except IntegrityError:
+        # Otra petición la creó al mismo tiempo
+        return NotificationCounter.objects.get(pk=user_id)
+
+
+def get_counts(user_id):
+    """{'unread_count': n, 'total_count': m} del usuario."""
+    key = cache_key(user_id)
+    counts = cache.get(key)
+    if counts is None:
+        counter = _ensure_counter(user_id)
+        counts = {'unread_count': counter.unread_count, 'total_count': counter.total_count}
+        cache.set(key, counts, get_cache_timeout())
+    return counts
+
+
+def get_unread_count(user_id):
+    return get_counts(user_id)['unread_count']
+
+
+async def aget_counts(user_id):
+    """get_counts para vistas async: el caso normal es un solo aget al cache."""
+    counts = await cache.aget(cache_key(user_id))
+    if counts is None:
+        counts = await sync_to_async(get_counts)(user_id)
+    return counts
+
+
+def invalidate(user_id):
+    cache.delete(cache_key(user_id))
+
+
+def adjust(user_id, unread=0, total=0):
+    """
+    Aplica un delta a los contadores del usuario. Debe llamarse después de
+    modificar las notificaciones y dentro de la misma transacción.
+    """
+    if not unread and not total:
+        return
+    if not NotificationCounter.adjust(user_id, unread=unread, total=total):
+        # Sin fila todavía: el COUNT ya incluye el cambio recién hecho
+        _ensure_counter(user_id)
+    transaction.on_commit(lambda: invalidate(user_id))
+
+
+def adjust_many(user_ids, unread=0, total=0):
+    """
+    Aplica el mismo delta a los contadores de varios usuarios (sin repetir)
+    con un solo UPDATE; las filas que faltan se crean desde un COUNT agrupado.
+    """
+    user_ids = list(user_ids)
+    if not user_ids or (not unread and not total):
+        return
+    existing = set(NotificationCounter.objects.filter(pk__in=user_ids).values_list('pk', flat=True))
+    if existing:
+        NotificationCounter.objects.filter(pk__in=existing).update(
+            **NotificationCounter.delta_updates(unread, total)
+        )
+    missing = [user_id for user_id in user_ids if user_id not in existing]
+    if missing:
+        actual = {
+            row['user_id']: row
+            for row in Notification.objects.filter(user_id__in=missing).order_by().values('user_id').annotate(
+                unread_count=Count('id', filter=Q(is_read=False)),
+                total_count=Count('id'),
+            )
+        }
+        NotificationCounter.objects.bulk_create(
+            [
+                NotificationCounter(
+                    user_id=user_id,
+                    unread_count=actual.get(user_id, {}).get('unread_count', 0),
+                    total_count=actual.get(user_id, {}).get('total_count', 0),
+                )
+                for user_id in missing
+            ],
+            # Otra transacción pudo crearla desde su propio COUNT
+            ignore_conflicts=True,
+        )
+    keys = [cache_key(user_id) for user_id in user_ids]
+    transaction.on_commit(lambda: cache.delete_many(keys))
+
+
+def reconcile(batch_size=1000):
+    """
+    Recalcula los contadores desde Notification y corrige los que difieren.
+
+    Una pasada agregada detecta candidatos; cada candidato se corrige con su
+    fila bloqueada (select_for_update) y un COUNT dentro de la misma
+    transacción, así un ajuste concurrente no se pierde ni se cuenta dos veces.
+    Retorna la cantidad de usuarios corregidos.
+    """
+    actual = {
+        row['user_id']: (row['unread_count'], row['total_count'])
+        for row in Notification.objects.order_by().values('user_id').annotate(
+            unread_count=Count('id', filter=Q(is_read=False)),
+            total_count=Count('id'),
+        ).iterator(chunk_size=batch_size)
+    }
+
+    candidates = []
+    for user_id, unread_count, total_count in NotificationCounter.objects.values_list(
+        'user_id', 'unread_count', 'total_count'
+    ).iterator(chunk_size=batch_size):
+        if actual.pop(user_id, (0, 0)) != (unread_count, total_count):
+            candidates.append(user_id)
+    # Usuarios con notificaciones y sin fila de contadores
+    candidates.extend(actual)
+
+    repaired = []
+    for user_id in candidates:
+        with transaction.atomic():
+            counter = NotificationCounter.objects.select_for_update().filter(pk=user_id).first()
+            real = count_notifications(user_id)
+            if counter is None:
+                NotificationCounter.objects.get_or_create(user_id=user_id, defaults=real)
+            elif (counter.unread_count, counter.total_count) != (real['unread_count'], real['total_count']):
+                counter.unread_count = real['unread_count']
+                counter.total_count = real['total_count']
+                counter.save(update_fields=['unread_count', 'total_count'])
+            else:
+                # La diferencia era un ajuste en curso durante la primera pasada
+                continue
+        repaired.append(user_id)
+
+    if repaired:
+        cache.delete_many([cache_key(user_id) for user_id in repaired])
+        logger.warning(f"⚠️ Contadores de notificaciones corregidos para {len(repaired)} usuarios")
+    return len(repaired)
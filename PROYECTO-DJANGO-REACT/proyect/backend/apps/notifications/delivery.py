@@ -0,0 +1,306 @@
+"""
+Entrega de notificaciones por canales externos (email, SMS).
+
+La notificación in-app es la fila Notification. Para los tipos de
+ROUTED_TYPES, `DeliveryService.route` crea además una NotificationDelivery
+por cada canal preferido del usuario (NotificationPreference, o
+DEFAULT_CHANNELS), en la misma transacción: un outbox que sobrevive a
+reinicios y caídas del broker.
+
+Cada canal tiene su worker (tarea deliver_notifications): reclama lotes de
+entregas vencidas, los envía con el backend del canal (apps/notifications/
+channels.py) y registra el resultado. Un fallo se reintenta con backoff
+exponencial hasta MAX_ATTEMPTS; después la entrega queda en 'dead'
+(dead-letter) con su último error, para revisarla o reencolarla con
+`python manage.py notification_deliveries --retry-dead`.
+
+Reclamar un lote adelanta next_attempt_at en CLAIM_TIMEOUT_SECONDS: si el
+worker muere a mitad del envío, el lote vuelve a quedar disponible solo.
+
+Configuración (settings.NOTIFICATIONS_DELIVERY):
+    'ENABLED': True
+    'ROUTED_TYPES': ['appointment', 'reminder', 'result']
+    'DEFAULT_CHANNELS': ['email']
+    'CLAIM_TIMEOUT_SECONDS': 300
+    'CHANNELS': {'email': {'BACKEND': ..., 'BATCH_SIZE': 100, 'MAX_ATTEMPTS': 5, 'RETRY_SECONDS': 60}, ...}
+"""
+
+import logging
+import time
+from datetime import timedelta
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import Count, F
+from django.utils import timezone
+from django.utils.module_loading import import_string
+
+from apps.core.metrics import observe_delivery_batch
+from .models import NotificationDelivery, NotificationPreference
+
+User = get_user_model()
+logger = logging.getLogger(__name__)
+
+DEFAULT_DELIVERY_SETTINGS = {
+    'ENABLED': True,
+    'ROUTED_TYPES': ['appointment', 'reminder', 'result'],
+    'DEFAULT_CHANNELS': ['email'],
+    'CLAIM_TIMEOUT_SECONDS': 300,
+    'CHANNELS': {
+        'email': {
+            'BACKEND': 'apps.notifications.channels.EmailChannel',
+            'BATCH_SIZE': 100,
+            'MAX_ATTEMPTS': 5,
+            'RETRY_SECONDS': 60,
+        },
+        'sms': {
+            'BACKEND': 'apps.notifications.channels.LocalSMSChannel',
+            'BATCH_SIZE': 200,
+            'MAX_ATTEMPTS': 3,
+            'RETRY_SECONDS': 120,
+        },
+    },
+}
+
+NOTIFICATION_EMAIL_TEMPLATE = 'emails/notification.html'
+
+# Evita encolar una tarea por cada notificación mientras el worker ya tiene trabajo
+SCHEDULED_CACHE_KEY = 'notification_delivery_scheduled:{channel}'
+SCHEDULED_CACHE_SECONDS = 30
+
+# Campo del usuario con la dirección de cada canal
+RECIPIENT_FIELDS = {
+    'email': 'email',
+    'sms': 'phone',
+}
+
+_channels = {}
+
+
+def get_delivery_settings():
+    delivery_settings = dict(DEFAULT_DELIVERY_SETTINGS)
+    delivery_settings.update(getattr(settings, 'NOTIFICATIONS_DELIVERY', {}))
+    return delivery_settings
+
+
+def get_channel(name):
+    """Instancia del backend del canal (una por proceso)."""
+    channel = _channels.get(name)
+    if channel is None:
+        channel_settings = get_delivery_settings()['CHANNELS'][name]
+        channel = _channels[name] = import_string(channel_settings['BACKEND'])(name, channel_settings)
+    return channel
+
+
+def schedule_delivery(channel):
+    """
+    Encola el worker del canal al confirmarse la transacción actual.
+
+    Se intenta una sola conexión al broker, sin reintentos ni suscripción al
+    backend de resultados: con el broker caído la petición no espera y la tarea
+    periódica deliver_pending_notifications (cada minuto) envía lo pendiente.
+    """
+    def enqueue():
+        if not cache.add(SCHEDULED_CACHE_KEY.format(channel=channel), True, SCHEDULED_CACHE_SECONDS):
+            return
+        try:
+            from celery import current_app
+            from .tasks import deliver_notifications
+            with current_app.connection_for_write() as connection:
+                connection.ensure_connection(max_retries=1, interval_start=0)
+                deliver_notifications.apply_async(
+                    (channel,), connection=connection, retry=False, ignore_result=True
+                )
+        except Exception as e:
+            # La clave se conserva: no se reintenta encolar hasta que venza, y la
+            # tarea periódica deliver_pending_notifications recoge lo pendiente
+            logger.warning(f"⚠️ No se pudo encolar la entrega por {channel}: {str(e)}")
+
+    transaction.on_commit(enqueue)
+
+
+class DeliveryService:
+    """
+    Enrutamiento de notificaciones a los canales externos.
+
+    🎯 Objetivo: Que una notificación llegue también por email/SMS según las preferencias del usuario
+    💡 Concepto: Outbox transaccional (NotificationDelivery) consumido por un worker por canal
+    """
+
+    @staticmethod
+    def route(notifications):
+        """
+        Crea las entregas externas de las notificaciones (misma transacción).
+
+        Returns:
+            int: Entregas creadas
+        """
+        delivery_settings = get_delivery_settings()
+        if not delivery_settings['ENABLED']:
+            return 0
+        notifications = [
+            notification for notification in notifications
+            if notification.type in delivery_settings['ROUTED_TYPES']
+        ]
+        if not notifications:
+            return 0
+
+        user_ids = {notification.user_id for notification in notifications}
+        preferences = dict(
+            NotificationPreference.objects.filter(user_id__in=user_ids).values_list('user_id', 'channels')
+        )
+        users = {
+            user.id: user
+            for user in User.objects.filter(id__in=user_ids).only('id', 'email', 'phone', 'first_name', 'last_name')
+        }
+        configured = delivery_settings['CHANNELS']
+
+        deliveries = []
+        for notification in notifications:
+            user = users.get(notification.user_id)
+            if user is None:
+                continue
+            for channel in preferences.get(user.id, delivery_settings['DEFAULT_CHANNELS']):
+                recipient = getattr(user, RECIPIENT_FIELDS.get(channel, ''), '') if channel in configured else ''
+                if not recipient:
+                    continue
+                deliveries.append(NotificationDelivery(
+                    notification_id=notification.pk,
+                    user_id=user.id,
+                    channel=channel,
+                    recipient=recipient,
+                    subject=notification.title,
+                    body=notification.message,
+                    template=NOTIFICATION_EMAIL_TEMPLATE if channel == 'email' else '',
+                    context={
+                        'user_name': user.get_full_name() or user.email,
+                        'title': notification.title,
+                        'message': notification.message,
+                        'type': notification.type,
+                    } if channel == 'email' else {},
+                ))
+
+        if not deliveries:
+            return 0
+        NotificationDelivery.objects.bulk_create(deliveries)
+        for channel in {delivery.channel for delivery in deliveries}:
+            schedule_delivery(channel)
+        return len(deliveries)
+
+    @staticmethod
+    def enqueue_email(recipient, subject, template, context, user=None):
+        """Encola un correo con plantilla HTML que no corresponde a una notificación in-app."""
+        delivery = NotificationDelivery.objects.create(
+            user=user,
+            channel='email',
+            recipient=recipient,
+            subject=subject,
+            template=template,
+            context=context,
+        )
+        schedule_delivery('email')
+        return delivery
+
+    @staticmethod
+    def retry_dead(channel=None):
+        """Reencola las entregas en dead-letter. Retorna cuántas."""
+        queryset = NotificationDelivery.objects.filter(status='dead')
+        if channel:
+            queryset = queryset.filter(channel=channel)
+        channels = list(queryset.order_by().values_list('channel', flat=True).distinct())
+        requeued = queryset.update(status='pending', attempts=0, next_attempt_at=timezone.now(), last_error='')
+        for name in channels:
+            schedule_delivery(name)
+        return requeued
+
+    @staticmethod
+    def get_stats():
+        """{canal: {estado: cantidad}}"""
+        stats = {}
+        for row in NotificationDelivery.objects.order_by().values('channel', 'status').annotate(total=Count('id')):
+            stats.setdefault(row['channel'], {})[row['status']] = row['total']
+        return stats
+
+
+def claim_batch(channel, batch_size, claim_timeout):
+    """
+    Reserva hasta `batch_size` entregas vencidas del canal. Con PostgreSQL,
+    SKIP LOCKED permite varios workers del mismo canal sin repartir filas dos veces.
+    """
+    now = timezone.now()
+    with transaction.atomic():
+        ids = list(
+            NotificationDelivery.objects.select_for_update(skip_locked=True)
+            .filter(channel=channel, status='pending', next_attempt_at__lte=now)
+            .order_by('next_attempt_at', 'id')
+            .values_list('id', flat=True)[:batch_size]
+        )
+        if not ids:
+            return []
+        NotificationDelivery.objects.filter(id__in=ids).update(
+            attempts=F('attempts') + 1,
+            next_attempt_at=now + timedelta(seconds=claim_timeout),
+        )
+    return list(NotificationDelivery.objects.filter(id__in=ids).order_by('id'))
+
+
+def record_results(deliveries, results, channel_settings):
+    """Marca enviadas, programa reintentos y pasa a dead-letter las agotadas."""
+    now = timezone.now()
+    sent_ids = {delivery.id for delivery in deliveries if results.get(delivery.id, 'Sin resultado') is None}
+    if sent_ids:
+        NotificationDelivery.objects.filter(id__in=sent_ids).update(status='sent', sent_at=now, last_error='')
+
+    failed = []
+    dead = 0
+    for delivery in deliveries:
+        if delivery.id in sent_ids:
+            continue
+        delivery.last_error = results.get(delivery.id) or 'Sin resultado'
+        if delivery.attempts >= channel_settings['MAX_ATTEMPTS']:
+            delivery.status = 'dead'
+            dead += 1
+        else:
+            delivery.next_attempt_at = now + timedelta(
+                seconds=channel_settings['RETRY_SECONDS'] * 2 ** (delivery.attempts - 1)
+            )
+        failed.append(delivery)
+    if failed:
+        NotificationDelivery.objects.bulk_update(failed, ['status', 'next_attempt_at', 'last_error'])
+    return len(sent_ids), len(failed) - dead, dead
+
+
+def deliver_pending(channel, max_batches=None):
+    """
+    Envía las entregas vencidas del canal, lote por lote.
+
+    Returns:
+        dict: 'sent', 'retried', 'dead', 'batches' y 'per_second'
+    """
+    delivery_settings = get_delivery_settings()
+    channel_settings = delivery_settings['CHANNELS'][channel]
+    backend = get_channel(channel)
+    result = {'sent': 0, 'retried': 0, 'dead': 0, 'batches': 0}
+
+    started = time.monotonic()
+    while max_batches is None or result['batches'] < max_batches:
+        deliveries = claim_batch(channel, channel_settings['BATCH_SIZE'], delivery_settings['CLAIM_TIMEOUT_SECONDS'])
+        if not deliveries:
+            break
+        batch_started = time.monotonic()
+        results = backend.send_batch(deliveries)
+        sent, retried, dead = record_results(deliveries, results, channel_settings)
+        observe_delivery_batch(channel, time.monotonic() - batch_started, sent=sent, retried=retried, dead=dead)
+
+        result['sent'] += sent
+        result['retried'] += retried
+        result['dead'] += dead
+        result['batches'] += 1
+        if dead:
+            logger.error(f"❌ {dead} entregas por {channel} agotaron sus reintentos (dead-letter)")
+
+    elapsed = time.monotonic() - started
+    result['per_second'] = round(result['sent'] / elapsed, 1) if result['sent'] and elapsed else 0
+    return result
@@ -0,0 +1,102 @@
+"""
+Comando para medir el renderizado de emails de citas.
+
+Compara render_to_string + strip_tags por destinatario (el camino anterior de
+EmailChannel) con EmailRenderer (apps/notifications/rendering.py), para un
+envío de N pacientes repartidos entre M doctores. Verifica además que el HTML
+y el texto plano resultantes sean idénticos. No toca la base de datos ni
+envía correos.
+
+Uso:
+    python manage.py benchmark_email_rendering
+    python manage.py benchmark_email_rendering --emails 20000 --doctors 50
+    python manage.py benchmark_email_rendering --template emails/appointment_confirmation.html
+"""
+
+import time
+from datetime import date, timedelta
+
+from django.core.management.base import BaseCommand
+from django.template.loader import render_to_string
+from django.utils.html import strip_tags
+
+from apps.notifications.rendering import EmailRenderer, get_rendering_settings
+
+
+class Command(BaseCommand):
+    help = 'Compara el renderizado de emails por llamada con el renderizador compilado y memoizado'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--emails', type=int, default=5000, help='Emails a renderizar (default: 5000)')
+        parser.add_argument('--doctors', type=int, default=20, help='Doctores distintos en el envío (default: 20)')
+        parser.add_argument(
+            '--template',
+            default='emails/appointment_reminder.html',
+            help='Plantilla a renderizar (default: emails/appointment_reminder.html)'
+        )
+
+    def handle(self, *args, **options):
+        name = options['template']
+        contexts = self.build_contexts(options['emails'], max(options['doctors'], 1))
+
+        self.stdout.write(
+            f"✉️ Benchmark de renderizado: {len(contexts)} emails, {options['doctors']} doctores ({name})\n"
+        )
+
+        renderer = EmailRenderer(memo_size=get_rendering_settings()['MEMO_SIZE'])
+        start = time.perf_counter()
+        renderer.preload([name])
+        self.stdout.write(f"  compilación      {(time.perf_counter() - start) * 1000:8.2f}ms (una vez por worker)")
+
+        baseline, baseline_seconds = self.measure(
+            lambda: [(html, strip_tags(html)) for html in (render_to_string(name, context) for context in contexts)]
+        )
+        self.report('por llamada', len(contexts), baseline_seconds)
+
+        compiled, compiled_seconds = self.measure(lambda: renderer.render_many(name, contexts))
+        self.report('compilado', len(contexts), compiled_seconds, baseline_seconds)
+        self.stdout.write(
+            f"  memo: {renderer.memo.hits} aciertos, {renderer.memo.misses} renderizados"
+        )
+
+        mismatches = sum(1 for expected, rendered in zip(baseline, compiled) if expected != rendered)
+        if mismatches:
+            self.stdout.write(self.style.ERROR(
+                f"\n❌ {mismatches} emails distintos a render_to_string + strip_tags"
+            ))
+        else:
+            self.stdout.write(self.style.SUCCESS("\n✅ HTML y texto idénticos a render_to_string + strip_tags"))
+
+    @staticmethod
+    def build_contexts(emails, doctors):
+        """Contextos como los que arma core/tasks.py, con varios pacientes por doctor."""
+        day = date.today() + timedelta(days=1)
+        return [
+            {
+                'patient_name': f'Paciente {i}',
+                'doctor_name': f'Doctor {i % doctors}',
+                'doctor_specialty': ('Cardiología', 'Pediatría', 'Dermatología')[i % doctors % 3],
+                'appointment_date': day.strftime('%d/%m/%Y'),
+                'appointment_time': f'{8 + i % 10:02d}:{(i * 15) % 60:02d}',
+                'clinic_address': None,
+                'clinic_phone': None,
+                'confirm_url': f'https://lifetrack.example.com/appointments/{i}/confirm',
+                'reschedule_url': f'https://lifetrack.example.com/appointments/{i}/reschedule',
+                'cancel_url': f'https://lifetrack.example.com/appointments/{i}/cancel',
+                'show_actions': True,
+                'preparation_instructions': 'Traer exámenes previos' if i % 4 == 0 else None,
+            }
+            for i in range(emails)
+        ]
+
+    @staticmethod
+    def measure(render):
+        start = time.perf_counter()
+        rendered = render()
+        return rendered, time.perf_counter() - start
+
+    def report(self, label, emails, seconds, baseline_seconds=None):
+        line = f"  {label:<16} {seconds * 1000:8.2f}ms | {emails / seconds if seconds else 0:9.1f} emails/s"
+        if baseline_seconds:
+            line += f" | {baseline_seconds / seconds if seconds else 0:.1f}x"
+        self.stdout.write(line)
@@ -0,0 +1,130 @@
+"""
+Comando para medir la creación masiva de notificaciones y las estadísticas.
+
+Compara la creación una por una (create_appointment_notification) con
+create_bulk_notifications en distintos tamaños de lote, y las estadísticas
+con dos COUNT por tipo frente al aggregate único de get_notification_stats.
+Reporta tiempo, filas por segundo y consultas SQL. Todo corre dentro de una
+transacción que se revierte al final (los eventos SSE no se publican).
+
+Uso:
+    python manage.py benchmark_notifications
+    python manage.py benchmark_notifications --users 20000 --batch-sizes 500 1000 5000
+    python manage.py benchmark_notifications --per-row-users 200 --stats-rounds 100
+"""
+
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+from django.test.utils import CaptureQueriesContext
+
+from apps.notifications.models import Notification
+from apps.notifications.services import NotificationService, get_bulk_settings
+from apps.users.models import User
+
+
+class _Rollback(Exception):
+    pass
+
+
+class Command(BaseCommand):
+    help = 'Mide la creación masiva de notificaciones y el cálculo de estadísticas'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--users', type=int, default=5000, help='Destinatarios temporales (default: 5000)')
+        parser.add_argument(
+            '--per-row-users',
+            type=int,
+            default=500,
+            help='Destinatarios para la creación una por una (default: 500)'
+        )
+        parser.add_argument(
+            '--batch-sizes',
+            type=int,
+            nargs='+',
+            help='Tamaños de lote a comparar (default: NOTIFICATIONS_BULK["BATCH_SIZE"])'
+        )
+        parser.add_argument('--stats-rounds', type=int, default=50, help='Repeticiones de las estadísticas (default: 50)')
+
+    def handle(self, *args, **options):
+        batch_sizes = options['batch_sizes'] or [get_bulk_settings()['BATCH_SIZE']]
+
+        self.stdout.write(f"🔔 Benchmark de notificaciones: {options['users']} destinatarios\n")
+        try:
+            with transaction.atomic():
+                users = User.objects.bulk_create([
+                    User(
+                        username=f'bench_notif_{i}',
+                        email=f'bench_notif_{i}@example.com',
+                        password='!',
+                        role='client'
+                    )
+                    for i in range(options['users'])
+                ])
+                self.run_creation(users, options['per_row_users'], batch_sizes)
+                self.run_stats(users[0], options['stats_rounds'])
+                raise _Rollback()
+        except _Rollback:
+            pass
+
+    def run_creation(self, users, per_row_users, batch_sizes):
+        self.stdout.write(self.style.MIGRATE_HEADING('Creación'))
+
+        def per_row():
+            for user in users[:per_row_users]:
+                NotificationService.create_appointment_notification(
+                    user=user, title='Benchmark', message='Uno por uno', notification_type='system'
+                )
+            return min(per_row_users, len(users))
+
+        self.report('una por una', *self.measure(per_row))
+
+        for batch_size in batch_sizes:
+            self.report(f'lotes de {batch_size}', *self.measure(
+                lambda: NotificationService.create_bulk_notifications(
+                    users, 'Benchmark', 'Masiva', batch_size=batch_size
+                )
+            ))
+
+    def run_stats(self, user, rounds):
+        self.stdout.write(self.style.MIGRATE_HEADING(
+            f"Estadísticas ({Notification.objects.filter(user=user).count()} notificaciones del usuario)"
+        ))
+
+        def count_per_type():
+            notifications = Notification.objects.filter(user=user)
+            stats = {'total': notifications.count(), 'unread': notifications.filter(is_read=False).count()}
+            for type_code, _ in Notification.NOTIFICATION_TYPES:
+                stats[type_code] = (
+                    notifications.filter(type=type_code).count(),
+                    notifications.filter(type=type_code, is_read=False).count(),
+                )
+            return stats
+
+        for label, stats in (
+            ('COUNT por tipo', count_per_type),
+            ('aggregate único', lambda: NotificationService.get_notification_stats(user)),
+        ):
+            start = time.perf_counter()
+            with CaptureQueriesContext(connection) as queries:
+                for _ in range(rounds):
+                    stats()
+            elapsed_ms = (time.perf_counter() - start) * 1000
+            self.stdout.write(
+                f"  {label:<16} {elapsed_ms / rounds:8.2f}ms/llamada | {len(queries) / rounds:.0f} consultas/llamada"
+            )
+
+    @staticmethod
+    def measure(create):
+        start = time.perf_counter()
+        with CaptureQueriesContext(connection) as queries:
+            created = create()
+        return created, time.perf_counter() - start, len(queries)
+
+    def report(self, label, created, seconds, queries):
+        self.stdout.write(
+            f"  {label:<16} {created:6d} notificaciones en {seconds:7.2f}s | "
+            f"{created / seconds if seconds else 0:9.1f} filas/s | "
+            f"{queries / created if created else 0:.2f} consultas/fila"
+        )
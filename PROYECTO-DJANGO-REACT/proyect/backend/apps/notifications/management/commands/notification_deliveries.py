@@ -0,0 +1,61 @@
+"""
+Comando para operar las entregas de notificaciones por email/SMS.
+
+Muestra las entregas por canal y estado, reencola el dead-letter y permite
+procesar la cola en el proceso actual (sin Celery), reportando el throughput.
+
+Uso:
+    python manage.py notification_deliveries
+    python manage.py notification_deliveries --retry-dead --channel email
+    python manage.py notification_deliveries --run
+    python manage.py notification_deliveries --run --channel sms --max-batches 10
+"""
+
+from django.core.management.base import BaseCommand, CommandError
+
+from apps.notifications.delivery import DeliveryService, deliver_pending, get_delivery_settings
+from apps.notifications.models import NotificationDelivery
+
+
+class Command(BaseCommand):
+    help = 'Estado de las entregas de notificaciones, reintento del dead-letter y envío manual'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--channel', help='Limitar a un canal (default: todos)')
+        parser.add_argument('--retry-dead', action='store_true', help='Reencolar las entregas descartadas')
+        parser.add_argument('--run', action='store_true', help='Enviar ahora las entregas pendientes')
+        parser.add_argument('--max-batches', type=int, help='Lotes máximos por canal con --run')
+
+    def handle(self, *args, **options):
+        channels = list(get_delivery_settings()['CHANNELS'])
+        if options['channel']:
+            if options['channel'] not in channels:
+                raise CommandError(f"Canal desconocido: {options['channel']}. Opciones: {', '.join(channels)}")
+            channels = [options['channel']]
+
+        if options['retry_dead']:
+            requeued = DeliveryService.retry_dead(options['channel'])
+            self.stdout.write(f"🔁 {requeued} entregas reencoladas desde dead-letter")
+
+        if options['run']:
+            for channel in channels:
+                result = deliver_pending(channel, max_batches=options['max_batches'])
+                self.stdout.write(
+                    f"📤 {channel}: {result['sent']} enviadas, {result['retried']} reintentos, "
+                    f"{result['dead']} descartadas en {result['batches']} lotes ({result['per_second']}/s)"
+                )
+
+        self.print_stats(channels)
+
+    def print_stats(self, channels):
+        stats = DeliveryService.get_stats()
+        self.stdout.write(self.style.MIGRATE_HEADING('Entregas por canal'))
+        for channel in channels:
+            counts = stats.get(channel, {})
+            summary = ', '.join(
+                f"{label.lower()}: {counts.get(code, 0)}" for code, label in NotificationDelivery.STATUS_CHOICES
+            )
+            self.stdout.write(f"  {channel:<6} {summary}")
+            if counts.get('dead'):
+                last = NotificationDelivery.objects.filter(channel=channel, status='dead').order_by('-id').first()
+                self.stdout.write(self.style.WARNING(f"         último error: {last.last_error[:200]}"))
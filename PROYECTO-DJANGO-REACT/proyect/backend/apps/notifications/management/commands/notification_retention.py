@@ -0,0 +1,39 @@
+"""
+Comando para aplicar la retención de notificaciones a demanda (la tarea
+apply_notification_retention lo hace a diario).
+
+Uso:
+    python manage.py notification_retention
+    python manage.py notification_retention --dry-run
+    python manage.py notification_retention --batch-size 5000 --skip-compaction
+"""
+
+from django.core.management.base import BaseCommand
+
+from apps.notifications import retention
+
+
+class Command(BaseCommand):
+    help = 'Archiva las notificaciones vencidas y compacta las repetidas de una misma cita'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, help='Notificaciones por lote (default: NOTIFICATIONS_RETENTION["BATCH_SIZE"])')
+        parser.add_argument('--skip-compaction', action='store_true', help='No compactar notificaciones repetidas')
+        parser.add_argument('--dry-run', action='store_true', help='Contar lo que se archivaría sin modificar nada')
+
+    def handle(self, *args, **options):
+        result = retention.run(
+            batch_size=options['batch_size'],
+            dry_run=options['dry_run'],
+            compaction=not options['skip_compaction'],
+        )
+
+        prefix = "🔍 [dry-run] " if options['dry_run'] else "🗄️ "
+        if result['compaction'] is not None:
+            self.stdout.write(
+                f"{prefix}Compactación: {result['compaction']['archived']} notificaciones repetidas "
+                f"en {result['compaction']['groups']} grupos"
+            )
+        self.stdout.write(f"{prefix}Retención: {result['retention']['archived']} notificaciones vencidas")
+
+        self.stdout.write(self.style.SUCCESS("\n✅ Retención de notificaciones completada!"))
@@ -0,0 +1,49 @@
+# Generated by Django 5.0.1 on 2026-10-19 01:22
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import Count, Q
+
+
+def populate_counters(apps, schema_editor):
+    """Inicializa los contadores de cada usuario con notificaciones."""
+    Notification = apps.get_model('notifications', 'Notification')
+    NotificationCounter = apps.get_model('notifications', 'NotificationCounter')
+
+    rows = Notification.objects.order_by().values('user_id').annotate(
+        unread_count=Count('id', filter=Q(is_read=False)),
+        total_count=Count('id'),
+    )
+    NotificationCounter.objects.bulk_create(
+        [NotificationCounter(**row) for row in rows.iterator()],
+        batch_size=1000
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('notifications', '0001_initial'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='NotificationCounter',
+            fields=[
+                ('user', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='notification_counter', serialize=False, to=settings.AUTH_USER_MODEL, verbose_name='Usuario')),
+                ('unread_count', models.PositiveIntegerField(default=0, verbose_name='No leídas')),
+                ('total_count', models.PositiveIntegerField(default=0, verbose_name='Total')),
+            ],
+            options={
+                'verbose_name': 'Contador de notificaciones',
+                'verbose_name_plural': 'Contadores de notificaciones',
+            },
+        ),
+        migrations.AddIndex(
+            model_name='notification',
+            index=models.Index(fields=['user', 'is_read', '-created_at'], name='notif_user_read_created_idx'),
+        ),
+        migrations.RunPython(populate_counters, migrations.RunPython.noop),
+    ]
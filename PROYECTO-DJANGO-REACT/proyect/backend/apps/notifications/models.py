@@ -1,4 +1,11 @@
+import gzip
+import json
+
+from django.core.serializers.json import DjangoJSONEncoder
 from django.db import models
+from django.db.models import F, Q
+from django.db.models.functions import Greatest
+from django.utils import timezone
 from django.contrib.auth import get_user_model
 
 User = get_user_model()
@@ -13,11 +20,16 @@ class Notification(models.Model):
         ('message', 'Mensaje'),
     ]
 
-    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='notifications')
+    # Sin índice propio: notif_user_read_created_idx empieza por user y cubre
+    # los filtros por usuario y el borrado en cascada
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='notifications', db_index=False)
     type = models.CharField(max_length=20, choices=NOTIFICATION_TYPES, default='system')
     title = models.CharField(max_length=200)
     message = models.TextField()
     is_read = models.BooleanField(default=False)
+    # Agrupa notificaciones sobre el mismo objeto (p. ej. 'appointment:42')
+    # para compactarlas en una sola (ver apps/notifications/retention.py)
+    group_key = models.CharField(max_length=100, blank=True, default='')
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
@@ -26,6 +38,13 @@ class Notification(models.Model):
         ordering = ['-created_at']
         verbose_name = 'Notificación'
         verbose_name_plural = 'Notificaciones'
+        indexes = [
+            # Listado del usuario: ya ordenado con filtro de leídas; sin filtro, el
+            # orden es un top-N sobre las filas del usuario (acotadas por la retención)
+            models.Index(fields=['user', 'is_read', '-created_at'], name='notif_user_read_created_idx'),
+            # Compactación por grupo; solo las filas que tienen group_key
+            models.Index(fields=['user', 'group_key'], name='notif_user_group_idx', condition=~Q(group_key='')),
+        ]
 
     def __str__(self):
         return f"{self.title} - {self.user.username}"
@@ -33,4 +52,187 @@ class Notification(models.Model):
     def mark_as_read(self):
         """Marca la notificación como leída"""
         self.is_read = True
-        self.save()
\ No newline at end of file
+        self.save()
+
+
+class NotificationCounter(models.Model):
+    """
+    Contadores desnormalizados de notificaciones por usuario.
+    Se mantienen con actualizaciones F() en cada alta, lectura y eliminación
+    (ver apps/notifications/counters.py) y se reconcilian periódicamente.
+    """
+
+    user = models.OneToOneField(
+        User,
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name='notification_counter',
+        verbose_name='Usuario'
+    )
+    unread_count = models.PositiveIntegerField(default=0, verbose_name='No leídas')
+    total_count = models.PositiveIntegerField(default=0, verbose_name='Total')
+
+    class Meta:
+        app_label = 'notifications'
+        verbose_name = 'Contador de notificaciones'
+        verbose_name_plural = 'Contadores de notificaciones'
+
+    def __str__(self):
+        return f"{self.user_id}: {self.unread_count}/{self.total_count}"
+
+    @classmethod
+    def adjust(cls, user_id, unread=0, total=0):
+        """
+        Ajusta atómicamente los contadores (sin bajar de cero).
+        Retorna False si el usuario aún no tiene fila de contadores.
+        """
+        updates = cls.delta_updates(unread, total)
+        if not updates:
+            return True
+        return cls.objects.filter(pk=user_id).update(**updates) > 0
+
+    @staticmethod
+    def delta_updates(unread=0, total=0):
+        """Expresiones de UPDATE para sumar un delta (sin bajar de cero)."""
+        updates = {}
+        if unread:
+            updates['unread_count'] = Greatest(F('unread_count') + unread, 0)
+        if total:
+            updates['total_count'] = Greatest(F('total_count') + total, 0)
+        return updates
+
+
+class NotificationArchive(models.Model):
+    """
+    Notificaciones retiradas de la tabla activa, comprimidas por usuario.
+
+    Cada fila guarda un lote de notificaciones de un usuario como JSON
+    comprimido con gzip, para que Notification conserve solo el historial
+    reciente. Se crean en apps/notifications/retention.py.
+    """
+
+    REASON_CHOICES = [
+        ('retention', 'Retención'),
+        ('compaction', 'Compactación'),
+    ]
+
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='notification_archives')
+    reason = models.CharField(max_length=20, choices=REASON_CHOICES)
+    notification_count = models.PositiveIntegerField()
+    first_created_at = models.DateTimeField()
+    last_created_at = models.DateTimeField()
+    payload = models.BinaryField()
+    archived_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        app_label = 'notifications'
+        ordering = ['-archived_at']
+        verbose_name = 'Archivo de notificaciones'
+        verbose_name_plural = 'Archivos de notificaciones'
+        indexes = [
+            models.Index(fields=['user', '-archived_at'], name='notif_archive_user_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.user_id}: {self.notification_count} notificaciones ({self.reason})"
+
+    @classmethod
+    def from_rows(cls, user_id, rows, reason):
+        """Archivo (sin guardar) con las filas `values()` de un mismo usuario."""
+        created = [row['created_at'] for row in rows]
+        return cls(
+            user_id=user_id,
+            reason=reason,
+            notification_count=len(rows),
+            first_created_at=min(created),
+            last_created_at=max(created),
+            payload=gzip.compress(json.dumps(rows, cls=DjangoJSONEncoder).encode('utf-8')),
+        )
+
+    def get_notifications(self):
+        """Filas archivadas como lista de dicts."""
+        return json.loads(gzip.decompress(bytes(self.payload)).decode('utf-8'))
+
+
+class NotificationPreference(models.Model):
+    """
+    Canales externos por los que el usuario quiere recibir sus notificaciones,
+    además de la notificación in-app. Sin fila se usan los canales de
+    NOTIFICATIONS_DELIVERY['DEFAULT_CHANNELS'].
+    """
+
+    user = models.OneToOneField(
+        User,
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name='notification_preference',
+        verbose_name='Usuario'
+    )
+    channels = models.JSONField(default=list, blank=True, verbose_name='Canales')
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        app_label = 'notifications'
+        verbose_name = 'Preferencia de notificaciones'
+        verbose_name_plural = 'Preferencias de notificaciones'
+
+    def __str__(self):
+        return f"{self.user_id}: {', '.join(self.channels) or 'solo in-app'}"
+
+
+class NotificationDelivery(models.Model):
+    """
+    Entrega pendiente o realizada de una notificación por un canal externo
+    (email, SMS). Funciona como outbox: se crea en la misma transacción que la
+    notificación y la envían los workers de apps/notifications/delivery.py.
+    Las que agotan los reintentos quedan en estado 'dead' (dead-letter).
+    """
+
+    STATUS_CHOICES = [
+        ('pending', 'Pendiente'),
+        ('sent', 'Enviada'),
+        ('dead', 'Descartada'),
+    ]
+
+    notification = models.ForeignKey(
+        Notification,
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name='deliveries'
+    )
+    user = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        null=True,
+        blank=True,
+        related_name='notification_deliveries'
+    )
+    channel = models.CharField(max_length=20)
+    recipient = models.CharField(max_length=254)
+    subject = models.CharField(max_length=200)
+    body = models.TextField(blank=True)
+    template = models.CharField(max_length=200, blank=True)
+    context = models.JSONField(default=dict, blank=True, encoder=DjangoJSONEncoder)
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default='pending')
+    attempts = models.PositiveSmallIntegerField(default=0)
+    next_attempt_at = models.DateTimeField(default=timezone.now)
+    last_error = models.TextField(blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    sent_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        app_label = 'notifications'
+        verbose_name = 'Entrega de notificación'
+        verbose_name_plural = 'Entregas de notificaciones'
+        indexes = [
+            # Cola de cada canal: solo las pendientes, por vencimiento
+            models.Index(
+                fields=['channel', 'next_attempt_at'],
+                name='notif_delivery_due_idx',
+                condition=Q(status='pending')
+            ),
+        ]
+
+    def __str__(self):
+        return f"{self.channel} -> {self.recipient} ({self.status})"
@@ -0,0 +1,349 @@
+"""
+Push de notificaciones en tiempo real (Server-Sent Events).
+
+Cada conexión SSE (ver views.notification_stream) se suscribe a los eventos
+de su usuario; NotificationService publica un evento al crear notificaciones
+y las vistas al marcarlas como leídas o eliminarlas. El cliente recibe el
+conteo de no leídas una vez al conectarse y luego solo deltas, en lugar de
+consultar /api/notifications/count/ cada pocos segundos.
+
+Eventos (campo `event` del SSE, `data` en JSON):
+    unread_count            {'unread_count': n}            al conectarse
+    notification.created    {'notification': {...}, 'unread_delta': 1}
+    notifications.read      {'ids': [...] | None, 'unread_delta': -n}
+    notifications.unread    {'ids': [...], 'unread_delta': n}
+    notification.deleted    {'id': pk, 'unread_delta': 0 | -1}
+    resync                  {}  la cola del cliente se desbordó: recargar
+
+Con NOTIFICATIONS_PUSH['ENABLED'] = False no se publica nada (ni se
+serializan las notificaciones) y el stream responde 503.
+
+Backends (settings.NOTIFICATIONS_PUSH['BACKEND']):
+    InProcessBroker  colas asyncio dentro del proceso. Solo sirve si quien
+                     publica y la conexión SSE corren en el mismo proceso
+                     (desarrollo, un único worker ASGI).
+    RedisBroker      publica en Redis (PUBLISH) y cada proceso ASGI mantiene
+                     una sola suscripción por patrón que reparte los eventos a
+                     sus colas locales. Necesario con varios workers o Celery.
+"""
+
+import asyncio
+import json
+import logging
+import threading
+
+from django.conf import settings
+from django.db import transaction
+from django.utils.module_loading import import_string
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_PUSH_SETTINGS = {
+    'ENABLED': True,
+    'BACKEND': 'apps.notifications.realtime.InProcessBroker',
+    'REDIS_URL': 'redis://127.0.0.1:6379/2',
+    'CHANNEL_PREFIX': 'notifications',
+    'QUEUE_SIZE': 100,
+    'HEARTBEAT_SECONDS': 25,
+    'TICKET_SECONDS': 60,
+    # Al vencer se cierra el stream; el cliente se reconecta con un ticket nuevo
+    'MAX_CONNECTION_SECONDS': 1800,
+    # Timeouts del cliente Redis que publica: un Redis caído no debe colgar
+    # la petición o la tarea que creó la notificación
+    'SOCKET_CONNECT_TIMEOUT': 1,
+    'SOCKET_TIMEOUT': 2,
+}
+
+_broker = None
+_broker_lock = threading.Lock()
+
+
+def get_push_settings():
+    push_settings = dict(DEFAULT_PUSH_SETTINGS)
+    push_settings.update(getattr(settings, 'NOTIFICATIONS_PUSH', {}))
+    return push_settings
+
+
+def push_enabled():
+    return get_push_settings()['ENABLED']
+
+
+def get_broker():
+    """Broker configurado (uno por proceso)."""
+    global _broker
+    if _broker is None:
+        with _broker_lock:
+            if _broker is None:
+                push_settings = get_push_settings()
+                _broker = import_string(push_settings['BACKEND'])(push_settings)
+    return _broker
+
+
+class Subscription:
+    """Cola de eventos de una conexión SSE."""
+
+    def __init__(self, broker, user_id, queue):
+        self.broker = broker
+        self.user_id = user_id
+        self.queue = queue
+
+    async def get(self, timeout=None):
+        """Siguiente evento, o None si pasa `timeout` segundos sin eventos."""
+        try:
+            return await asyncio.wait_for(self.queue.get(), timeout)
+        except asyncio.TimeoutError:
+            return None
+
+    async def ready(self, timeout=None):
+        """
+        Espera a que los eventos publicados desde ahora lleguen a esta cola.
+        Retorna False si pasa `timeout` segundos sin confirmarlo.
+        """
+        return await self.broker.wait_ready(timeout)
+
+    def close(self):
+        self.broker.unsubscribe(self)
+
+
+class InProcessBroker:
+    """
+    Pub/sub en memoria del proceso.
+
+    🎯 Objetivo: Entregar eventos a las conexiones SSE sin consultar la base de datos
+    💡 Concepto: Una asyncio.Queue por conexión; publish() es seguro desde cualquier hilo
+    """
+
+    def __init__(self, push_settings):
+        self.queue_size = push_settings['QUEUE_SIZE']
+        # user_id -> {Subscription: event loop de la conexión}
+        self._subscribers = {}
+        self._lock = threading.Lock()
+
+    def subscribe(self, user_id):
+        """Registra una conexión; debe llamarse desde su event loop."""
+        loop = asyncio.get_running_loop()
+        subscription = Subscription(self, user_id, asyncio.Queue(maxsize=self.queue_size))
+        with self._lock:
+            self._subscribers.setdefault(user_id, {})[subscription] = loop
+        return subscription
+
+    async def wait_ready(self, timeout=None):
+        # En memoria la cola recibe eventos desde que se registra
+        return True
+
+    def unsubscribe(self, subscription):
+        with self._lock:
+            subscribers = self._subscribers.get(subscription.user_id, {})
+            subscribers.pop(subscription, None)
+            if not subscribers:
+                self._subscribers.pop(subscription.user_id, None)
+
+    def connection_count(self):
+        with self._lock:
+            return sum(len(subscribers) for subscribers in self._subscribers.values())
+
+    def publish(self, user_id, event):
+        self.dispatch(user_id, event)
+
+    def publish_many(self, events):
+        """Publica una secuencia de (user_id, evento)."""
+        for user_id, event in events:
+            self.publish(user_id, event)
+
+    def dispatch(self, user_id, event):
+        """Entrega el evento a las conexiones locales del usuario."""
+        with self._lock:
+            targets = list(self._subscribers.get(user_id, {}).items())
+        for subscription, loop in targets:
+            try:
+                loop.call_soon_threadsafe(self._enqueue, subscription.queue, event)
+            except RuntimeError:
+                # El event loop de la conexión ya se cerró
+                self.unsubscribe(subscription)
+
+    @staticmethod
+    def _enqueue(queue, event):
+        try:
+            queue.put_nowait(event)
+        except asyncio.QueueFull:
+            # Cliente lento: se descartan los eventos pendientes y se pide recargar
+            while not queue.empty():
+                queue.get_nowait()
+            queue.put_nowait({'type': 'resync'})
+
+
+class RedisBroker(InProcessBroker):
+    """
+    Pub/sub entre procesos a través de Redis.
+
+    🎯 Objetivo: Que una notificación creada en cualquier worker (o en Celery) llegue a la conexión SSE
+    💡 Concepto: PUBLISH por usuario; una sola suscripción PSUBSCRIBE por event loop reparte a las colas locales
+    """
+
+    def __init__(self, push_settings):
+        super().__init__(push_settings)
+        import redis
+
+        self.redis_url = push_settings['REDIS_URL']
+        self.channel_prefix = push_settings['CHANNEL_PREFIX']
+        self.socket_connect_timeout = push_settings['SOCKET_CONNECT_TIMEOUT']
+        self._publisher = redis.Redis.from_url(
+            self.redis_url,
+            socket_connect_timeout=push_settings['SOCKET_CONNECT_TIMEOUT'],
+            socket_timeout=push_settings['SOCKET_TIMEOUT'],
+        )
+        self._listeners = {}
+        # event loop -> asyncio.Event que se activa cuando PSUBSCRIBE está confirmado
+        self._ready = {}
+
+    def channel(self, user_id):
+        return f'{self.channel_prefix}:{user_id}'
+
+    def subscribe(self, user_id):
+        subscription = super().subscribe(user_id)
+        loop = asyncio.get_running_loop()
+        listener = self._listeners.get(loop)
+        if listener is None or listener.done():
+            self._ready[loop] = asyncio.Event()
+            self._listeners[loop] = loop.create_task(self._listen(self._ready[loop]))
+        return subscription
+
+    async def wait_ready(self, timeout=None):
+        ready = self._ready.get(asyncio.get_running_loop())
+        if ready is None:
+            return True
+        try:
+            await asyncio.wait_for(ready.wait(), timeout)
+            return True
+        except asyncio.TimeoutError:
+            return False
+
+    def publish(self, user_id, event):
+        try:
+            self._publisher.publish(self.channel(user_id), json.dumps(event, default=str))
+        except Exception as e:
+            logger.error(f"❌ Error publicando evento de notificación para usuario {user_id}: {str(e)}")
+
+    def publish_many(self, events):
+        """Todos los PUBLISH en un pipeline (un solo viaje a Redis por lote)."""
+        pipeline = self._publisher.pipeline(transaction=False)
+        count = 0
+        for user_id, event in events:
+            pipeline.publish(self.channel(user_id), json.dumps(event, default=str))
+            count += 1
+        try:
+            pipeline.execute()
+        except Exception as e:
+            logger.error(f"❌ Error publicando {count} eventos de notificación: {str(e)}")
+
+    async def _listen(self, ready):
+        import redis.asyncio as aioredis
+
+        pattern = f'{self.channel_prefix}:*'
+        prefix_length = len(self.channel_prefix) + 1
+        retry_seconds = 1
+        while True:
+            # Sin socket_timeout: la suscripción espera mensajes indefinidamente
+            client = aioredis.Redis.from_url(self.redis_url, socket_connect_timeout=self.socket_connect_timeout)
+            pubsub = client.pubsub(ignore_subscribe_messages=True)
+            try:
+                await pubsub.psubscribe(pattern)
+                ready.set()
+                retry_seconds = 1
+                async for message in pubsub.listen():
+                    if message['type'] != 'pmessage':
+                        continue
+                    try:
+                        user_id = int(message['channel'][prefix_length:])
+                        event = json.loads(message['data'])
+                    except ValueError:
+                        continue
+                    self.dispatch(user_id, event)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                ready.clear()
+                logger.error(f"❌ Suscripción Redis de notificaciones interrumpida: {str(e)}; reintentando en {retry_seconds}s")
+                await asyncio.sleep(retry_seconds)
+                retry_seconds = min(retry_seconds * 2, 30)
+            finally:
+                await _aclose(pubsub)
+                await _aclose(client)
+
+
+async def _aclose(connection):
+    # redis-py >= 5.0.1 renombró close() a aclose() en el cliente asyncio
+    close = getattr(connection, 'aclose', None) or connection.close
+    await close()
+
+
+def publish_event(user_id, event_type, **payload):
+    """
+    Publica un evento para el usuario cuando la transacción actual se confirma
+    (inmediatamente si no hay transacción).
+    """
+    if not push_enabled():
+        return
+    event = {'type': event_type, **payload}
+    transaction.on_commit(lambda: get_broker().publish(user_id, event))
+
+
+def publish_notification_created(notification):
+    if not push_enabled():
+        return
+    from .serializers import NotificationSerializer
+
+    publish_event(
+        notification.user_id,
+        'notification.created',
+        notification=NotificationSerializer(notification).data,
+        unread_delta=0 if notification.is_read else 1,
+    )
+
+
+def publish_notifications_created(notifications):
+    """Un evento notification.created por notificación, publicados juntos al confirmar."""
+    if not push_enabled():
+        return
+    from .serializers import NotificationSerializer
+
+    events = [
+        (notification.user_id, {
+            'type': 'notification.created',
+            'notification': data,
+            'unread_delta': 0 if notification.is_read else 1,
+        })
+        for notification, data in zip(notifications, NotificationSerializer(notifications, many=True).data)
+    ]
+    if events:
+        transaction.on_commit(lambda: get_broker().publish_many(events))
+
+
+def publish_notifications_read(user_id, count, ids=None):
+    """`ids=None` indica que se marcaron todas."""
+    if count:
+        publish_event(user_id, 'notifications.read', ids=ids, unread_delta=-count)
+
+
+def publish_notifications_unread(user_id, ids):
+    publish_event(user_id, 'notifications.unread', ids=ids, unread_delta=len(ids))
+
+
+def publish_notification_deleted(user_id, notification_id, was_unread):
+    publish_event(user_id, 'notification.deleted', id=notification_id, unread_delta=-1 if was_unread else 0)
+
+
+def publish_notifications_deleted(rows):
+    """Un evento notification.deleted por fila ({'id', 'user_id', 'is_read'}) retirada en lote."""
+    if not push_enabled():
+        return
+    events = [
+        (row['user_id'], {
+            'type': 'notification.deleted',
+            'id': row['id'],
+            'unread_delta': 0 if row['is_read'] else -1,
+        })
+        for row in rows
+    ]
+    if events:
+        transaction.on_commit(lambda: get_broker().publish_many(events))
@@ -0,0 +1,289 @@
+"""
+Renderizado de plantillas de email para envíos masivos.
+
+render_to_string + strip_tags por destinatario vuelve a recorrer la plantilla
+completa, incluido el layout (emails/base_email.html, con sus estilos), y
+vuelve a parsear todo el HTML para la versión en texto. Aquí:
+
+- Cada plantilla se compila y analiza una vez por proceso (`preload` al
+  arrancar el worker de Celery).
+- El layout se renderiza una vez por día como "shell" con marcadores en el
+  lugar de cada bloque de la plantilla hija; por destinatario solo se
+  renderizan los bloques ({% block title %}, {% block content %}) y se
+  insertan en el shell, tanto en HTML como en texto plano.
+- El resultado de cada bloque se memoiza según los valores de las variables
+  que realmente leyó (se registran al renderizar), así el título o un cuerpo
+  idéntico se reutilizan entre destinatarios. {% fragment %}
+  (templatetags/email_fragments.py) aplica lo mismo a una porción del bloque,
+  p. ej. los datos del doctor, compartidos por todos sus pacientes.
+- El texto plano se obtiene con una regex cuando el HTML del bloque solo
+  tiene etiquetas simples (strip_tags, con HTMLParser, queda como respaldo).
+
+Las plantillas que usan {{ block.super }} o no extienden un layout se
+renderizan completas (con la misma memoización).
+
+Benchmark: python manage.py benchmark_email_rendering
+"""
+
+import json
+import re
+import threading
+from collections import OrderedDict
+
+from django.conf import settings
+from django.template import Context, engines
+from django.template.base import VariableNode
+from django.template.loader_tags import BlockNode, ExtendsNode
+from django.utils import timezone
+from django.utils.html import strip_tags
+from django.utils.safestring import mark_safe
+
+DEFAULT_RENDERING_SETTINGS = {
+    # Plantillas compiladas al arrancar cada worker
+    'PRELOAD': [
+        'emails/notification.html',
+        'emails/appointment_confirmation.html',
+        'emails/appointment_reminder.html',
+        'emails/appointment_cancellation.html',
+    ],
+    # Resultados de bloques y fragmentos memoizados por proceso (LRU)
+    'MEMO_SIZE': 5000,
+}
+
+MARKER = '\x00email-block:{name}\x00'
+
+# Etiquetas simples (<div class="x">, </p>, <br/>); los valores de contexto ya
+# vienen escapados, así que en el HTML de un bloque no hay otros '<'
+SIMPLE_TAG_RE = re.compile(r'<[A-Za-z/][^<>"\']*(?:(?:"[^"]*"|\'[^\']*\')[^<>"\']*)*>')
+
+
+def get_rendering_settings():
+    rendering_settings = dict(DEFAULT_RENDERING_SETTINGS)
+    rendering_settings.update(getattr(settings, 'EMAIL_RENDERING', {}))
+    return rendering_settings
+
+
+class RecordingContext(Context):
+    """Context que registra los nombres de variables consultados al renderizar."""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.accessed = set()
+
+    def __getitem__(self, key):
+        self.accessed.add(key)
+        return super().__getitem__(key)
+
+    def __contains__(self, key):
+        self.accessed.add(key)
+        return super().__contains__(key)
+
+    def get(self, key, otherwise=None):
+        self.accessed.add(key)
+        return super().get(key, otherwise)
+
+
+class RenderMemo:
+    """
+    Memoización de fragmentos por los valores de las variables que leen.
+
+    Para cada fragmento se acumulan los nombres de variables que alguna vez
+    consultó; si un contexto nuevo coincide en todos ellos con uno ya
+    renderizado, el resultado es el mismo (el renderizado es determinista).
+    """
+
+    def __init__(self, max_size):
+        self.max_size = max_size
+        self._dependencies = {}
+        self._results = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def _freeze(value):
+        if value is None or isinstance(value, (str, int, float)):
+            # La clase distingue 1, 1.0 y True, que se renderizan distinto
+            return value.__class__, value
+        return json.dumps(value, sort_keys=True, default=str)
+
+    def get(self, key):
+        with self._lock:
+            value = self._results.get(key)
+            if value is not None:
+                self._results.move_to_end(key)
+            return value
+
+    def set(self, key, value):
+        with self._lock:
+            self._results[key] = value
+            if len(self._results) > self.max_size:
+                self._results.popitem(last=False)
+
+    def render(self, fragment_id, nodelist, context, template=None, autoescape=True, parent=None):
+        """
+        Salida (SafeString) de `nodelist` con `context` (dict plano). Si el
+        fragmento está dentro de otro que se está registrando (`parent`), sus
+        dependencias pasan también al de afuera.
+        """
+        dependencies = self._dependencies.get(fragment_id, ())
+        cached = self.get((fragment_id, self._key(dependencies, context)))
+        if cached is not None:
+            self.hits += 1
+            if isinstance(parent, RecordingContext):
+                parent.accessed.update(dependencies)
+            return cached
+
+        recording = RecordingContext(context, autoescape=autoescape)
+        if template is not None:
+            with recording.render_context.push_state(template), recording.bind_template(template):
+                output = nodelist.render(recording)
+        else:
+            output = nodelist.render(recording)
+        output = mark_safe(output)
+
+        with self._lock:
+            self.misses += 1
+            known = self._dependencies.setdefault(fragment_id, set())
+            known.update(recording.accessed)
+            dependencies = set(known)
+        self.set((fragment_id, self._key(dependencies, context)), output)
+        if isinstance(parent, RecordingContext):
+            parent.accessed.update(dependencies)
+        return output
+
+    def _key(self, dependencies, context):
+        return tuple((name, self._freeze(context.get(name))) for name in sorted(dependencies))
+
+    def clear(self):
+        with self._lock:
+            self._dependencies.clear()
+            self._results.clear()
+            self.hits = self.misses = 0
+
+
+class CompiledEmail:
+    """Plantilla compilada y separada en layout + bloques de la plantilla hija."""
+
+    def __init__(self, name, template):
+        self.name = name
+        self.template = template
+        self.blocks = {}
+        self.parent = None
+
+        extends = template.nodelist.get_nodes_by_type(ExtendsNode)
+        # Solo layouts con nombre fijo ({% extends "emails/base_email.html" %})
+        if not extends or not isinstance(extends[0].parent_name.var, str):
+            return
+        blocks = {node.name: node for node in extends[0].nodelist if isinstance(node, BlockNode)}
+        for block in blocks.values():
+            for node in block.nodelist.get_nodes_by_type(VariableNode):
+                if node.filter_expression.token.startswith('block.super'):
+                    return
+        self.parent = extends[0].parent_name.var
+        self.blocks = blocks
+
+    @property
+    def splits(self):
+        return self.parent is not None
+
+
+class EmailRenderer:
+    """
+    Renderizador con plantillas precompiladas, layout compartido y memoización.
+
+    🎯 Objetivo: Que renderizar miles de emails cueste poco más que renderizar su contenido variable
+    💡 Concepto: Shell del layout por día + bloques memoizados por las variables que leen
+    """
+
+    def __init__(self, memo_size=None):
+        self.engine = engines['django'].engine
+        self.memo = RenderMemo(memo_size or get_rendering_settings()['MEMO_SIZE'])
+        self._compiled = {}
+        self._shells = {}
+        self._lock = threading.Lock()
+
+    def compile(self, name):
+        compiled = self._compiled.get(name)
+        if compiled is None:
+            compiled = CompiledEmail(name, self.engine.get_template(name))
+            with self._lock:
+                self._compiled[name] = compiled
+        return compiled
+
+    def preload(self, names=None):
+        for name in names if names is not None else get_rendering_settings()['PRELOAD']:
+            self.compile(name)
+
+    def _shell(self, compiled):
+        """(html, texto) del layout con marcadores por bloque; uno por día ({% now %} en el pie)."""
+        key = (compiled.name, timezone.localdate())
+        shell = self._shells.get(key)
+        if shell is None:
+            source = '{% extends "' + compiled.parent + '" %}' + ''.join(
+                '{% block ' + name + ' %}' + MARKER.format(name=name) + '{% endblock %}'
+                for name in compiled.blocks
+            )
+            html = self.engine.from_string(source).render(Context(autoescape=self.engine.autoescape))
+            shell = (html, strip_tags(html))
+            with self._lock:
+                self._shells = {k: v for k, v in self._shells.items() if k[1] == key[1]}
+                self._shells[key] = shell
+        return shell
+
+    def render(self, name, context):
+        """
+        Renderiza la plantilla con un dict de contexto ya construido.
+
+        Returns:
+            tuple: (html, texto plano)
+        """
+        compiled = self.compile(name)
+        context = dict(context)
+        autoescape = self.engine.autoescape
+        if not compiled.splits:
+            html = self.memo.render((name, None), compiled.template.nodelist, context, compiled.template, autoescape)
+            return html, self._strip((name, None), html)
+
+        html, text = self._shell(compiled)
+        for block_name, block in compiled.blocks.items():
+            marker = MARKER.format(name=block_name)
+            output = self.memo.render((name, block_name), block.nodelist, context, compiled.template, autoescape)
+            html = html.replace(marker, output)
+            text = text.replace(marker, self._strip((name, block_name), output))
+        return mark_safe(html), text
+
+    def render_many(self, name, contexts):
+        """Renderiza un lote con la misma plantilla (compilación, shell y memo compartidos)."""
+        return [self.render(name, context) for context in contexts]
+
+    def _strip(self, fragment_id, output):
+        # strip_tags (HTMLParser) es lo más costoso del texto plano: se memoiza
+        # por salida y, si el HTML solo tiene etiquetas simples, se usa una regex
+        key = ('text', fragment_id, output)
+        text = self.memo.get(key)
+        if text is None:
+            text = SIMPLE_TAG_RE.sub('', output)
+            if '<' in text or '>' in text:
+                text = strip_tags(output)
+            self.memo.set(key, text)
+        return text
+
+
+_renderer = None
+_renderer_lock = threading.Lock()
+
+
+def get_renderer():
+    """Renderizador del proceso."""
+    global _renderer
+    if _renderer is None:
+        with _renderer_lock:
+            if _renderer is None:
+                _renderer = EmailRenderer()
+    return _renderer
+
+
+def render_email(name, context):
+    """(html, texto) de la plantilla `name`; atajo sobre get_renderer().render."""
+    return get_renderer().render(name, context)
@@ -0,0 +1,201 @@
+"""
+Retención y compactación de notificaciones.
+
+La tabla Notification solo debe conservar el historial reciente: los
+listados, /count/ y mark_all_as_read filtran por usuario y las filas viejas
+solo agregan trabajo. Este módulo retira notificaciones en lotes hacia
+NotificationArchive (un JSON comprimido por usuario y lote):
+
+- `apply_retention` retira las notificaciones leídas más antiguas que el TTL
+  de su tipo. Las no leídas se conservan salvo que UNREAD_TTL_DAYS lo indique.
+- `compact` colapsa las notificaciones repetidas de un mismo grupo (misma
+  cita, ver Notification.group_key) conservando solo la más reciente, una vez
+  que todas superan COMPACT_AFTER_HOURS.
+
+Cada lote se archiva, elimina y descuenta de NotificationCounter en una sola
+transacción; las conexiones SSE reciben notification.deleted al confirmarse.
+
+Configuración (settings.NOTIFICATIONS_RETENTION):
+    'BATCH_SIZE': 2000
+    'DEFAULT_TTL_DAYS': 90
+    'TTL_DAYS': {'reminder': 30, ...}   None = sin límite para ese tipo
+    'UNREAD_TTL_DAYS': None
+    'COMPACT_AFTER_HOURS': 24
+"""
+
+from collections import defaultdict
+from datetime import timedelta
+from functools import reduce
+from operator import or_
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Count, Max, Q
+from django.utils import timezone
+
+from . import counters
+from .models import Notification, NotificationArchive
+from .realtime import publish_notifications_deleted
+
+DEFAULT_RETENTION_SETTINGS = {
+    'BATCH_SIZE': 2000,
+    'DEFAULT_TTL_DAYS': 90,
+    'TTL_DAYS': {},
+    'UNREAD_TTL_DAYS': None,
+    'COMPACT_AFTER_HOURS': 24,
+}
+
+ARCHIVED_FIELDS = ['id', 'user_id', 'type', 'title', 'message', 'is_read', 'group_key', 'created_at', 'updated_at']
+
+# Grupos por consulta al buscar notificaciones a compactar
+COMPACT_GROUPS_PER_BATCH = 200
+
+
+def get_retention_settings():
+    retention_settings = dict(DEFAULT_RETENTION_SETTINGS)
+    retention_settings.update(getattr(settings, 'NOTIFICATIONS_RETENTION', {}))
+    return retention_settings
+
+
+def expired_filter(now=None, retention_settings=None):
+    """
+    Q de las notificaciones vencidas según el TTL de su tipo, o None si
+    ningún tipo tiene límite.
+    """
+    retention_settings = retention_settings or get_retention_settings()
+    now = now or timezone.now()
+
+    conditions = []
+    for type_code, _ in Notification.NOTIFICATION_TYPES:
+        days = retention_settings['TTL_DAYS'].get(type_code, retention_settings['DEFAULT_TTL_DAYS'])
+        if days is not None:
+            conditions.append(Q(type=type_code, created_at__lt=now - timedelta(days=days)))
+    if not conditions:
+        return None
+
+    expired = reduce(or_, conditions)
+    unread_days = retention_settings['UNREAD_TTL_DAYS']
+    if unread_days is None:
+        return expired & Q(is_read=True)
+    return expired & (Q(is_read=True) | Q(created_at__lt=now - timedelta(days=unread_days)))
+
+
+def archive_and_delete(ids, reason, condition=None):
+    """
+    Archiva y elimina las notificaciones `ids` que todavía cumplen `condition`
+    (se vuelve a comprobar con las filas bloqueadas) en una transacción.
+
+    Returns:
+        int: Notificaciones retiradas
+    """
+    queryset = Notification.objects.filter(id__in=ids)
+    if condition is not None:
+        queryset = queryset.filter(condition)
+
+    with transaction.atomic():
+        rows = list(queryset.select_for_update().order_by('id').values(*ARCHIVED_FIELDS))
+        if not rows:
+            return 0
+
+        by_user = defaultdict(list)
+        for row in rows:
+            by_user[row['user_id']].append(row)
+        NotificationArchive.objects.bulk_create([
+            NotificationArchive.from_rows(user_id, user_rows, reason)
+            for user_id, user_rows in by_user.items()
+        ])
+        Notification.objects.filter(id__in=[row['id'] for row in rows]).delete()
+
+        # Un UPDATE por cada delta distinto en lugar de uno por usuario
+        by_delta = defaultdict(list)
+        for user_id, user_rows in by_user.items():
+            unread = sum(1 for row in user_rows if not row['is_read'])
+            by_delta[(-unread, -len(user_rows))].append(user_id)
+        for (unread, total), user_ids in by_delta.items():
+            counters.adjust_many(user_ids, unread=unread, total=total)
+
+        publish_notifications_deleted(rows)
+    return len(rows)
+
+
+def apply_retention(batch_size=None, dry_run=False):
+    """
+    Retira las notificaciones vencidas en lotes de `batch_size`.
+
+    Returns:
+        dict: 'archived' (o candidatas si dry_run) y 'batches'
+    """
+    retention_settings = get_retention_settings()
+    batch_size = batch_size or retention_settings['BATCH_SIZE']
+    result = {'archived': 0, 'batches': 0}
+
+    condition = expired_filter(retention_settings=retention_settings)
+    if condition is None:
+        return result
+    if dry_run:
+        result['archived'] = Notification.objects.filter(condition).count()
+        return result
+
+    last_id = 0
+    while True:
+        ids = list(
+            Notification.objects.filter(condition, id__gt=last_id)
+            .order_by('id').values_list('id', flat=True)[:batch_size]
+        )
+        if not ids:
+            break
+        last_id = ids[-1]
+        result['archived'] += archive_and_delete(ids, 'retention', condition)
+        result['batches'] += 1
+    return result
+
+
+def compact(batch_size=None, dry_run=False):
+    """
+    Colapsa las notificaciones repetidas de cada (usuario, group_key) en la
+    más reciente. Solo considera notificaciones anteriores a COMPACT_AFTER_HOURS.
+
+    Returns:
+        dict: 'archived' (o candidatas si dry_run), 'groups' y 'batches'
+    """
+    retention_settings = get_retention_settings()
+    batch_size = batch_size or retention_settings['BATCH_SIZE']
+    cutoff = timezone.now() - timedelta(hours=retention_settings['COMPACT_AFTER_HOURS'])
+    result = {'archived': 0, 'groups': 0, 'batches': 0}
+
+    groups = (
+        Notification.objects.exclude(group_key='').filter(created_at__lt=cutoff)
+        .order_by().values('user_id', 'group_key')
+        .annotate(total=Count('id'), newest_id=Max('id'))
+        .filter(total__gt=1)
+    )
+
+    # Se materializa antes de borrar: no se escribe en la tabla mientras se recorre
+    groups = list(groups)
+    result['groups'] = len(groups)
+    if dry_run:
+        result['archived'] = sum(group['total'] - 1 for group in groups)
+        return result
+
+    for start in range(0, len(groups), COMPACT_GROUPS_PER_BATCH):
+        _compact_groups(groups[start:start + COMPACT_GROUPS_PER_BATCH], cutoff, batch_size, result)
+    return result
+
+
+def _compact_groups(groups, cutoff, batch_size, result):
+    condition = Q(created_at__lt=cutoff) & reduce(or_, (
+        Q(user_id=group['user_id'], group_key=group['group_key'], id__lt=group['newest_id'])
+        for group in groups
+    ))
+    ids = list(Notification.objects.filter(condition).order_by('id').values_list('id', flat=True))
+    for start in range(0, len(ids), batch_size):
+        result['archived'] += archive_and_delete(ids[start:start + batch_size], 'compaction')
+        result['batches'] += 1
+
+
+def run(batch_size=None, dry_run=False, compaction=True):
+    """Compactación seguida de retención; es lo que ejecuta la tarea diaria."""
+    return {
+        'compaction': compact(batch_size, dry_run) if compaction else None,
+        'retention': apply_retention(batch_size, dry_run),
+    }
@@ -1,5 +1,9 @@
+from django.contrib.auth import get_user_model
 from rest_framework import serializers
-from .models import Notification
+from .delivery import get_delivery_settings
+from .models import Notification, NotificationPreference
+
+User = get_user_model()
 
 
 class NotificationSerializer(serializers.ModelSerializer):
@@ -63,4 +67,34 @@ class NotificationUpdateSerializer(serializers.ModelSerializer):
     
     class Meta:
         model = Notification
-        fields = ['is_read']
\ No newline at end of file
+        fields = ['is_read']
+
+class BroadcastNotificationSerializer(serializers.Serializer):
+    """Notificación masiva: a todos los usuarios activos, a un rol o a una lista de IDs"""
+    
+    title = serializers.CharField(max_length=200)
+    message = serializers.CharField()
+    type = serializers.ChoiceField(choices=Notification.NOTIFICATION_TYPES, default='system')
+    role = serializers.ChoiceField(choices=User.ROLE_CHOICES, required=False)
+    user_ids = serializers.ListField(child=serializers.IntegerField(min_value=1), required=False, allow_empty=False)
+
+
+
+class NotificationPreferenceSerializer(serializers.ModelSerializer):
+    """Canales externos elegidos por el usuario (la notificación in-app siempre se crea)"""
+    
+    channels = serializers.ListField(child=serializers.CharField(), allow_empty=True)
+    
+    class Meta:
+        model = NotificationPreference
+        fields = ['channels', 'updated_at']
+        read_only_fields = ['updated_at']
+    
+    def validate_channels(self, value):
+        available = get_delivery_settings()['CHANNELS']
+        unknown = sorted(set(value) - set(available))
+        if unknown:
+            raise serializers.ValidationError(
+                f"Canales no disponibles: {', '.join(unknown)}. Opciones: {', '.join(available)}"
+            )
+        return list(dict.fromkeys(value))
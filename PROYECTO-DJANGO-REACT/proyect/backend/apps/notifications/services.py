@@ -3,13 +3,39 @@ Servicios para el manejo de notificaciones.
 Centraliza la lógica de creación y gestión de notificaciones.
 """
 
+from django.conf import settings
 from django.contrib.auth import get_user_model
+from django.db import transaction
+from django.db.models import Count, Q
 from .models import Notification
+from . import counters
+from .delivery import DeliveryService
+from .realtime import (
+    publish_notification_created,
+    publish_notifications_created,
+    publish_notification_deleted,
+    publish_notifications_read,
+    publish_notifications_unread,
+)
+from apps.core.metrics import observe_notification_fanout
 import logging
 
 User = get_user_model()
 logger = logging.getLogger(__name__)
 
+DEFAULT_BULK_SETTINGS = {
+    # Filas por INSERT (bulk_create) y por transacción
+    'BATCH_SIZE': 1000,
+    # Audiencias mayores se envían con la tarea Celery send_bulk_notifications
+    'ASYNC_THRESHOLD': 1000,
+}
+
+
+def get_bulk_settings():
+    bulk_settings = dict(DEFAULT_BULK_SETTINGS)
+    bulk_settings.update(getattr(settings, 'NOTIFICATIONS_BULK', {}))
+    return bulk_settings
+
 
 class NotificationService:
     """
@@ -20,7 +46,7 @@ class NotificationService:
     """
     
     @staticmethod
-    def create_appointment_notification(user, title, message, notification_type='appointment'):
+    def create_appointment_notification(user, title, message, notification_type='appointment', group_key=''):
         """
         Crea una notificación relacionada con citas médicas.
         
@@ -29,23 +55,39 @@ class NotificationService:
             title: Título de la notificación
             message: Mensaje de la notificación
             notification_type: Tipo de notificación (default: 'appointment')
+            group_key: Objeto al que se refiere (ver appointment_group_key); las
+                notificaciones repetidas del mismo grupo se compactan en una
         
         Returns:
             Notification: La notificación creada
         """
         try:
-            notification = Notification.objects.create(
-                user=user,
-                type=notification_type,
-                title=title,
-                message=message
-            )
+            with transaction.atomic():
+                notification = Notification.objects.create(
+                    user=user,
+                    type=notification_type,
+                    title=title,
+                    message=message,
+                    group_key=group_key
+                )
+                NotificationService.on_created(notification)
             logger.info(f"✅ Notificación creada: {title} para {user.email}")
             return notification
         except Exception as e:
             logger.error(f"❌ Error al crear notificación para {user.email}: {str(e)}")
             return None
     
+    @staticmethod
+    def on_created(notification):
+        """
+        Efectos de una notificación recién creada: contadores del usuario y
+        entregas por email/SMS (en la transacción actual) y evento en tiempo
+        real (al confirmarse).
+        """
+        counters.adjust(notification.user_id, unread=0 if notification.is_read else 1, total=1)
+        DeliveryService.route([notification])
+        publish_notification_created(notification)
+    
     @staticmethod
     def create_system_notification(user, title, message):
         """
@@ -107,33 +149,70 @@ class NotificationService:
         )
     
     @staticmethod
-    def create_bulk_notifications(users, title, message, notification_type='system'):
+    def create_bulk_notifications(users, title, message, notification_type='system', batch_size=None):
         """
         Crea notificaciones masivas para múltiples usuarios.
         
+        💡 Concepto: Un bulk_create, un UPDATE de contadores, las entregas por
+        email/SMS y un envío de eventos por lote, cada lote en su propia
+        transacción; un lote que falla no revierte los anteriores.
+        
         Args:
-            users: Lista de usuarios que recibirán la notificación
+            users: Usuarios (o sus IDs) que recibirán la notificación
             title: Título de la notificación
             message: Mensaje de la notificación
             notification_type: Tipo de notificación (default: 'system')
+            batch_size: Notificaciones por lote (default: NOTIFICATIONS_BULK['BATCH_SIZE'])
         
         Returns:
             int: Número de notificaciones creadas exitosamente
         """
+        user_ids = list(dict.fromkeys(getattr(user, 'pk', user) for user in users))
+        batch_size = batch_size or get_bulk_settings()['BATCH_SIZE']
+        
         created_count = 0
-        for user in users:
-            notification = NotificationService.create_appointment_notification(
-                user=user,
-                title=title,
-                message=message,
-                notification_type=notification_type
-            )
-            if notification:
-                created_count += 1
+        for start in range(0, len(user_ids), batch_size):
+            batch = user_ids[start:start + batch_size]
+            try:
+                with transaction.atomic():
+                    notifications = Notification.objects.bulk_create([
+                        Notification(user_id=user_id, title=title, message=message, type=notification_type)
+                        for user_id in batch
+                    ])
+                    counters.adjust_many(batch, unread=1, total=1)
+                    DeliveryService.route(notifications)
+                    publish_notifications_created(notifications)
+                created_count += len(notifications)
+            except Exception as e:
+                logger.error(f"❌ Error creando lote de {len(batch)} notificaciones masivas: {str(e)}")
         
-        logger.info(f"✅ Notificaciones masivas creadas: {created_count}/{len(users)}")
+        logger.info(f"✅ Notificaciones masivas creadas: {created_count}/{len(user_ids)}")
+        observe_notification_fanout('bulk', created_count)
         return created_count
     
+    @staticmethod
+    def broadcast(user_ids, title, message, notification_type='system'):
+        """
+        Envía una notificación a una audiencia: en la petición si es pequeña,
+        o encolada en Celery si supera NOTIFICATIONS_BULK['ASYNC_THRESHOLD'].
+        
+        Returns:
+            dict: {'recipients', 'queued', 'created' | 'task_id'}
+        """
+        user_ids = list(dict.fromkeys(user_ids))
+        result = {'recipients': len(user_ids), 'queued': len(user_ids) > get_bulk_settings()['ASYNC_THRESHOLD']}
+        if result['queued']:
+            from .tasks import send_bulk_notifications
+            
+            task = send_bulk_notifications.delay(user_ids, title, message, notification_type)
+            result['task_id'] = task.id
+            logger.info(f"📨 Notificación masiva encolada para {len(user_ids)} usuarios (tarea {task.id})")
+        else:
+            result['created'] = NotificationService.create_bulk_notifications(
+                user_ids, title, message, notification_type
+            )
+        return result
+    
     @staticmethod
     def mark_all_as_read_for_user(user):
         """
@@ -146,10 +225,13 @@ class NotificationService:
             int: Número de notificaciones marcadas como leídas
         """
         try:
-            updated_count = Notification.objects.filter(
-                user=user,
-                is_read=False
-            ).update(is_read=True)
+            with transaction.atomic():
+                updated_count = Notification.objects.filter(
+                    user=user,
+                    is_read=False
+                ).update(is_read=True)
+                counters.adjust(user.id, unread=-updated_count)
+            publish_notifications_read(user.id, updated_count)
             
             logger.info(f"✅ {updated_count} notificaciones marcadas como leídas para {user.email}")
             return updated_count
@@ -169,15 +251,69 @@ class NotificationService:
             int: Número de notificaciones no leídas
         """
         try:
-            count = Notification.objects.filter(
-                user=user,
-                is_read=False
-            ).count()
-            return count
+            return counters.get_unread_count(user.id)
         except Exception as e:
             logger.error(f"❌ Error al obtener conteo de notificaciones para {user.email}: {str(e)}")
             return 0
     
+    @staticmethod
+    def mark_as_read(user, notification_ids):
+        """
+        Marca como leídas las notificaciones indicadas del usuario.
+        
+        Returns:
+            int: Número de notificaciones que estaban sin leer
+        """
+        with transaction.atomic():
+            updated_count = Notification.objects.filter(
+                pk__in=notification_ids,
+                user=user,
+                is_read=False
+            ).update(is_read=True)
+            counters.adjust(user.id, unread=-updated_count)
+        publish_notifications_read(user.id, updated_count, ids=list(notification_ids))
+        return updated_count
+    
+    @staticmethod
+    def set_read_state(notification, is_read):
+        """Cambia el estado de lectura de una notificación (en ambos sentidos)."""
+        if notification.is_read == is_read:
+            return False
+        with transaction.atomic():
+            updated = Notification.objects.filter(
+                pk=notification.pk,
+                is_read=not is_read
+            ).update(is_read=is_read)
+            counters.adjust(notification.user_id, unread=-updated if is_read else updated)
+        notification.is_read = is_read
+        if updated and is_read:
+            publish_notifications_read(notification.user_id, updated, ids=[notification.pk])
+        elif updated:
+            publish_notifications_unread(notification.user_id, [notification.pk])
+        return bool(updated)
+    
+    @staticmethod
+    def delete_notification(user, notification_id):
+        """
+        Elimina una notificación del usuario.
+        
+        Returns:
+            bool: False si la notificación no existe
+        """
+        with transaction.atomic():
+            is_read = Notification.objects.filter(
+                pk=notification_id,
+                user=user
+            ).values_list('is_read', flat=True).first()
+            if is_read is None:
+                return False
+            deleted, _ = Notification.objects.filter(pk=notification_id, user=user).delete()
+            if deleted:
+                counters.adjust(user.id, unread=0 if is_read else -1, total=-1)
+        if deleted:
+            publish_notification_deleted(user.id, notification_id, was_unread=not is_read)
+        return bool(deleted)
+    
     # Métodos de conveniencia con nombres más cortos
     @staticmethod
     def get_unread_count(user):
@@ -191,35 +327,47 @@ class NotificationService:
     
     @staticmethod
     def get_notification_stats(user):
-        """Obtiene estadísticas detalladas de notificaciones del usuario"""
-        from django.db.models import Count, Q
+        """
+        Obtiene estadísticas detalladas de notificaciones del usuario.
         
-        notifications = Notification.objects.filter(user=user)
+        💡 Concepto: Un solo aggregate con COUNT filtrado por tipo y estado,
+        en lugar de dos conteos por tipo más los totales.
+        """
+        aggregates = {
+            'total': Count('id'),
+            'unread': Count('id', filter=Q(is_read=False)),
+        }
+        for type_code, _ in Notification.NOTIFICATION_TYPES:
+            aggregates[f'{type_code}_total'] = Count('id', filter=Q(type=type_code))
+            aggregates[f'{type_code}_unread'] = Count('id', filter=Q(type=type_code, is_read=False))
+        
+        counts = Notification.objects.filter(user=user).aggregate(**aggregates)
         
         stats = {
-            'total': notifications.count(),
-            'unread': notifications.filter(is_read=False).count(),
-            'read': notifications.filter(is_read=True).count(),
+            'total': counts['total'],
+            'unread': counts['unread'],
+            'read': counts['total'] - counts['unread'],
             'by_type': {}
         }
-        
-        # Estadísticas por tipo
-        type_stats = notifications.values('type').annotate(
-            count=Count('id'),
-            unread_count=Count('id', filter=Q(is_read=False))
-        )
-        
-        for stat in type_stats:
-            stats['by_type'][stat['type']] = {
-                'total': stat['count'],
-                'unread': stat['unread_count'],
-                'read': stat['count'] - stat['unread_count']
+        for type_code, type_name in Notification.NOTIFICATION_TYPES:
+            total = counts[f'{type_code}_total']
+            unread = counts[f'{type_code}_unread']
+            stats['by_type'][type_code] = {
+                'name': type_name,
+                'total': total,
+                'unread': unread,
+                'read': total - unread
             }
         
         return stats
 
 
 # Funciones de conveniencia para usar en signals
+def appointment_group_key(appointment):
+    """Clave que agrupa las notificaciones de una misma cita."""
+    return f'appointment:{appointment.pk}'
+
+
 def notify_appointment_created(patient_user, doctor_user, appointment):
     """
     Notifica sobre la creación de una nueva cita.
@@ -239,7 +387,8 @@ def notify_appointment_created(patient_user, doctor_user, appointment):
     NotificationService.create_appointment_notification(
         user=patient_user,
         title='🎯 Cita Médica Programada',
-        message=patient_message
+        message=patient_message,
+        group_key=appointment_group_key(appointment)
     )
     
     # Notificación al doctor
@@ -252,8 +401,11 @@ def notify_appointment_created(patient_user, doctor_user, appointment):
     NotificationService.create_appointment_notification(
         user=doctor_user,
         title='📅 Nueva Cita Programada',
-        message=doctor_message
+        message=doctor_message,
+        group_key=appointment_group_key(appointment)
     )
+    
+    observe_notification_fanout('appointment_created', 2)
 
 
 def notify_appointment_status_change(patient_user, doctor_user, appointment, old_status, new_status):
@@ -278,7 +430,8 @@ def notify_appointment_status_change(patient_user, doctor_user, appointment, old
         NotificationService.create_appointment_notification(
             user=patient_user,
             title='❌ Cita Cancelada',
-            message=cancel_message_patient
+            message=cancel_message_patient,
+            group_key=appointment_group_key(appointment)
         )
         
         cancel_message_doctor = (
@@ -290,8 +443,10 @@ def notify_appointment_status_change(patient_user, doctor_user, appointment, old
         NotificationService.create_appointment_notification(
             user=doctor_user,
             title='❌ Cita Cancelada',
-            message=cancel_message_doctor
+            message=cancel_message_doctor,
+            group_key=appointment_group_key(appointment)
         )
+        observe_notification_fanout('appointment_cancelled', 2)
     
     elif new_status == 'confirmed':
         # Notificación de confirmación
@@ -304,7 +459,8 @@ def notify_appointment_status_change(patient_user, doctor_user, appointment, old
         NotificationService.create_appointment_notification(
             user=patient_user,
             title='✅ Cita Confirmada',
-            message=confirmed_message_patient
+            message=confirmed_message_patient,
+            group_key=appointment_group_key(appointment)
         )
         
         confirmed_message_doctor = (
@@ -316,8 +472,10 @@ def notify_appointment_status_change(patient_user, doctor_user, appointment, old
         NotificationService.create_appointment_notification(
             user=doctor_user,
             title='✅ Cita Confirmada',
-            message=confirmed_message_doctor
+            message=confirmed_message_doctor,
+            group_key=appointment_group_key(appointment)
         )
+        observe_notification_fanout('appointment_confirmed', 2)
     
     elif new_status == 'completed':
         # Notificación de cita completada
@@ -330,8 +488,10 @@ def notify_appointment_status_change(patient_user, doctor_user, appointment, old
         NotificationService.create_appointment_notification(
             user=patient_user,
             title='✅ Cita Completada',
-            message=completed_message
+            message=completed_message,
+            group_key=appointment_group_key(appointment)
         )
+        observe_notification_fanout('appointment_completed', 1)
 
 
 def notify_appointment_datetime_change(patient_user, doctor_user, appointment, old_date, old_time):
@@ -356,7 +516,8 @@ def notify_appointment_datetime_change(patient_user, doctor_user, appointment, o
     NotificationService.create_appointment_notification(
         user=patient_user,
         title='📅 Cita Reprogramada',
-        message=reschedule_message_patient
+        message=reschedule_message_patient,
+        group_key=appointment_group_key(appointment)
     )
     
     # Notificación al doctor sobre reprogramación
@@ -370,5 +531,8 @@ def notify_appointment_datetime_change(patient_user, doctor_user, appointment, o
     NotificationService.create_appointment_notification(
         user=doctor_user,
         title='📅 Cita Reprogramada',
-        message=reschedule_message_doctor
-    )
\ No newline at end of file
+        message=reschedule_message_doctor,
+        group_key=appointment_group_key(appointment)
+    )
+    
+    observe_notification_fanout('appointment_rescheduled', 2)
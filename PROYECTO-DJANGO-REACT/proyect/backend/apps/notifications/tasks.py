@@ -0,0 +1,84 @@
+import logging
+
+from celery import shared_task
+from celery.signals import worker_process_init
+
+from . import counters
+
+logger = logging.getLogger(__name__)
+
+
+@worker_process_init.connect
+def preload_email_templates(**kwargs):
+    """Compila las plantillas de email una vez por proceso del worker."""
+    from .rendering import get_renderer
+
+    get_renderer().preload()
+
+
+@shared_task
+def reconcile_notification_counters():
+    """
+    Corrige los contadores de notificaciones que se desviaron del conteo real
+    (cambios hechos desde el admin, SQL manual o transacciones interrumpidas).
+    """
+    repaired = counters.reconcile()
+    logger.info(f"🔢 Reconciliación de contadores de notificaciones: {repaired} usuarios corregidos")
+    return {'repaired': repaired}
+
+
+@shared_task
+def send_bulk_notifications(user_ids, title, message, notification_type='system'):
+    """
+    Crea una notificación masiva fuera de la petición (audiencias grandes,
+    ver NotificationService.broadcast).
+    """
+    from .services import NotificationService
+
+    created = NotificationService.create_bulk_notifications(user_ids, title, message, notification_type)
+    return {'recipients': len(user_ids), 'created': created}
+
+
+@shared_task
+def apply_notification_retention():
+    """
+    Archiva las notificaciones vencidas y compacta las repetidas
+    (ver apps/notifications/retention.py).
+    """
+    from . import retention
+
+    result = retention.run()
+    logger.info(
+        f"🗄️ Retención de notificaciones: {result['retention']['archived']} vencidas y "
+        f"{result['compaction']['archived']} repetidas archivadas"
+    )
+    return result
+
+
+@shared_task
+def deliver_notifications(channel, max_batches=None):
+    """
+    Worker de un canal externo: envía por lotes las entregas pendientes
+    (ver apps/notifications/delivery.py).
+    """
+    from django.core.cache import cache
+    from .delivery import SCHEDULED_CACHE_KEY, deliver_pending
+
+    # Desde aquí, las entregas nuevas vuelven a encolar el worker
+    cache.delete(SCHEDULED_CACHE_KEY.format(channel=channel))
+    result = deliver_pending(channel, max_batches=max_batches)
+    if result['batches']:
+        logger.info(
+            f"📤 Entregas por {channel}: {result['sent']} enviadas, {result['retried']} reintentos, "
+            f"{result['dead']} descartadas ({result['per_second']}/s)"
+        )
+    return result
+
+
+@shared_task
+def deliver_pending_notifications():
+    """Recoge los reintentos vencidos y lo que no se pudo encolar al crear las entregas."""
+    from .delivery import get_delivery_settings
+
+    for channel in get_delivery_settings()['CHANNELS']:
+        deliver_notifications.delay(channel)
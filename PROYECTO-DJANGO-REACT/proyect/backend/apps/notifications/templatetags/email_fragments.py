@@ -0,0 +1,41 @@
+"""
+{% fragment "nombre" %} ... {% endfragment %}
+
+Memoiza la porción de plantilla según los valores de las variables que lee
+(ver apps/notifications/rendering.py): en un envío masivo, los datos de un
+mismo doctor se renderizan una vez y se reutilizan para todos sus pacientes.
+La memoización es del proceso y también aplica con render_to_string.
+"""
+
+from django import template
+
+from apps.notifications.rendering import get_renderer
+
+register = template.Library()
+
+
+class FragmentNode(template.Node):
+    def __init__(self, name, nodelist):
+        self.name = name
+        self.nodelist = nodelist
+
+    def render(self, context):
+        fragment_id = ('fragment', context.template.origin.name if context.template else None, self.name)
+        return get_renderer().memo.render(
+            fragment_id,
+            self.nodelist,
+            context.flatten(),
+            context.template,
+            context.autoescape,
+            parent=context,
+        )
+
+
+@register.tag
+def fragment(parser, token):
+    bits = token.split_contents()
+    if len(bits) != 2 or bits[1][0] not in '"\'' or bits[1][0] != bits[1][-1]:
+        raise template.TemplateSyntaxError("'fragment' recibe un nombre entre comillas")
+    nodelist = parser.parse(('endfragment',))
+    parser.delete_first_token()
+    return FragmentNode(bits[1][1:-1], nodelist)
@@ -22,12 +22,22 @@ urlpatterns = [
     # Estadísticas de notificaciones
     path('stats/', views.notification_stats, name='stats'),
     
+    # Canales externos preferidos (email, SMS)
+    path('preferences/', views.notification_preferences, name='preferences'),
+    
     # Marcar todas como leídas
     path('mark-all-read/', views.mark_all_as_read, name='mark_all_read'),
     
     # Marcar múltiples como leídas
     path('bulk-mark-read/', views.bulk_mark_as_read, name='bulk_mark_read'),
     
+    # Push en tiempo real (Server-Sent Events, requiere ASGI)
+    path('stream/', views.notification_stream, name='stream'),
+    path('stream/ticket/', views.notification_stream_ticket, name='stream_ticket'),
+    
+    # Notificación masiva (administradores)
+    path('broadcast/', views.broadcast_notification, name='broadcast'),
+    
     # Crear notificación (para testing)
     path('create/', views.create_notification, name='create'),
 ]
\ No newline at end of file
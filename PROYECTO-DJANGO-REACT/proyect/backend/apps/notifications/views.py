@@ -1,10 +1,35 @@
+import json
+import secrets
+import time
+
+from asgiref.sync import sync_to_async
 from rest_framework import generics, status
 from rest_framework.decorators import api_view, permission_classes
+from rest_framework.exceptions import AuthenticationFailed
 from rest_framework.permissions import IsAuthenticated
 from rest_framework.response import Response
+from rest_framework_simplejwt.exceptions import InvalidToken
+from django.core.cache import cache
+from django.core.handlers.asgi import ASGIRequest
+from django.db import transaction
 from django.db.models import Q
-from .models import Notification
-from .serializers import NotificationSerializer, NotificationUpdateSerializer
+from django.http import JsonResponse, StreamingHttpResponse
+from django.contrib.auth import get_user_model
+from apps.users.authentication import CachedJWTAuthentication
+from core.permissions import IsAdminOrSuperAdmin
+from .models import Notification, NotificationPreference
+from .services import NotificationService
+from . import counters
+from .realtime import get_broker, get_push_settings, push_enabled
+from .delivery import get_delivery_settings
+from .serializers import (
+    BroadcastNotificationSerializer,
+    NotificationPreferenceSerializer,
+    NotificationSerializer,
+    NotificationUpdateSerializer,
+)
+
+User = get_user_model()
 
 
 class NotificationListView(generics.ListAPIView):
@@ -46,15 +71,20 @@ class NotificationUpdateView(generics.UpdateAPIView):
     def get_queryset(self):
         return Notification.objects.filter(user=self.request.user)
 
+    def perform_update(self, serializer):
+        # El estado de lectura pasa por el servicio para mantener los contadores
+        is_read = serializer.validated_data.pop('is_read', None)
+        if serializer.validated_data:
+            serializer.save()
+        if is_read is not None:
+            NotificationService.set_read_state(serializer.instance, is_read)
+
 
 @api_view(['GET'])
 @permission_classes([IsAuthenticated])
 def notification_count(request):
     """Obtiene el conteo de notificaciones no leídas"""
-    unread_count = Notification.objects.filter(
-        user=request.user,
-        is_read=False
-    ).count()
+    unread_count = counters.get_unread_count(request.user.id)
     
     return Response({
         'unread_count': unread_count
@@ -65,32 +95,24 @@ def notification_count(request):
 @permission_classes([IsAuthenticated])
 def mark_notification_as_read(request, pk):
     """Marca una notificación específica como leída"""
-    try:
-        notification = Notification.objects.get(
-            pk=pk,
-            user=request.user
-        )
-        notification.mark_as_read()
-        
-        return Response({
-            'message': 'Notificación marcada como leída',
-            'notification_id': pk
-        })
-    except Notification.DoesNotExist:
+    updated_count = NotificationService.mark_as_read(request.user, [pk])
+    if not updated_count and not Notification.objects.filter(pk=pk, user=request.user).exists():
         return Response(
             {'error': 'Notificación no encontrada'},
             status=status.HTTP_404_NOT_FOUND
         )
+    
+    return Response({
+        'message': 'Notificación marcada como leída',
+        'notification_id': pk
+    })
 
 
 @api_view(['POST'])
 @permission_classes([IsAuthenticated])
 def mark_all_as_read(request):
     """Marca todas las notificaciones del usuario como leídas"""
-    updated_count = Notification.objects.filter(
-        user=request.user,
-        is_read=False
-    ).update(is_read=True)
+    updated_count = NotificationService.mark_all_as_read(request.user)
     
     return Response({
         'message': f'{updated_count} notificaciones marcadas como leídas',
@@ -107,37 +129,81 @@ def create_notification(request):
     
     serializer = NotificationSerializer(data=data)
     if serializer.is_valid():
-        serializer.save(user=request.user)
+        with transaction.atomic():
+            notification = serializer.save(user=request.user)
+            NotificationService.on_created(notification)
         return Response(serializer.data, status=status.HTTP_201_CREATED)
     
     return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
 
+@api_view(['POST'])
+@permission_classes([IsAuthenticated, IsAdminOrSuperAdmin])
+def broadcast_notification(request):
+    """
+    Envía una notificación a todos los usuarios activos, a un rol o a una
+    lista de IDs. Las audiencias grandes se encolan en Celery (202).
+    """
+    serializer = BroadcastNotificationSerializer(data=request.data)
+    if not serializer.is_valid():
+        return Response(
+            {'error': 'Datos inválidos', 'detail': serializer.errors},
+            status=status.HTTP_400_BAD_REQUEST
+        )
+    
+    data = serializer.validated_data
+    audience = User.objects.filter(is_active=True)
+    if data.get('role'):
+        audience = audience.filter(role=data['role'])
+    if data.get('user_ids'):
+        audience = audience.filter(id__in=data['user_ids'])
+    
+    result = NotificationService.broadcast(
+        list(audience.values_list('id', flat=True)),
+        title=data['title'],
+        message=data['message'],
+        notification_type=data['type']
+    )
+    
+    if result['queued']:
+        return Response(
+            {'message': 'Notificación masiva encolada', 'data': result},
+            status=status.HTTP_202_ACCEPTED
+        )
+    return Response(
+        {'message': 'Notificación masiva enviada', 'data': result},
+        status=status.HTTP_201_CREATED
+    )
+
+
+@api_view(['GET', 'PUT'])
+@permission_classes([IsAuthenticated])
+def notification_preferences(request):
+    """Consulta o actualiza los canales externos (email, SMS) del usuario"""
+    preference = NotificationPreference.objects.filter(user=request.user).first()
+    
+    if request.method == 'GET':
+        if preference is None:
+            data = {'channels': get_delivery_settings()['DEFAULT_CHANNELS'], 'updated_at': None}
+        else:
+            data = NotificationPreferenceSerializer(preference).data
+        return Response({'message': 'Preferencias de notificaciones', 'data': data})
+    
+    serializer = NotificationPreferenceSerializer(preference, data=request.data)
+    if not serializer.is_valid():
+        return Response(
+            {'error': 'Datos inválidos', 'detail': serializer.errors},
+            status=status.HTTP_400_BAD_REQUEST
+        )
+    serializer.save(user=request.user)
+    return Response({'message': 'Preferencias actualizadas', 'data': serializer.data})
+
+
 @api_view(['GET'])
 @permission_classes([IsAuthenticated])
 def notification_stats(request):
     """Obtiene estadísticas detalladas de notificaciones"""
-    user_notifications = Notification.objects.filter(user=request.user)
-    
-    stats = {
-        'total': user_notifications.count(),
-        'unread': user_notifications.filter(is_read=False).count(),
-        'read': user_notifications.filter(is_read=True).count(),
-        'by_type': {}
-    }
-    
-    # Estadísticas por tipo
-    for choice in Notification.TYPE_CHOICES:
-        type_code = choice[0]
-        type_name = choice[1]
-        count = user_notifications.filter(type=type_code).count()
-        unread_count = user_notifications.filter(type=type_code, is_read=False).count()
-        
-        stats['by_type'][type_code] = {
-            'name': type_name,
-            'total': count,
-            'unread': unread_count
-        }
+    stats = NotificationService.get_notification_stats(request.user)
     
     return Response(stats)
 
@@ -146,22 +212,16 @@ def notification_stats(request):
 @permission_classes([IsAuthenticated])
 def delete_notification(request, pk):
     """Elimina una notificación específica"""
-    try:
-        notification = Notification.objects.get(
-            pk=pk,
-            user=request.user
-        )
-        notification.delete()
-        
-        return Response({
-            'message': 'Notificación eliminada correctamente',
-            'notification_id': pk
-        })
-    except Notification.DoesNotExist:
+    if not NotificationService.delete_notification(request.user, pk):
         return Response(
             {'error': 'Notificación no encontrada'},
             status=status.HTTP_404_NOT_FOUND
         )
+    
+    return Response({
+        'message': 'Notificación eliminada correctamente',
+        'notification_id': pk
+    })
 
 
 @api_view(['POST'])
@@ -176,13 +236,113 @@ def bulk_mark_as_read(request):
             status=status.HTTP_400_BAD_REQUEST
         )
     
-    updated_count = Notification.objects.filter(
-        pk__in=notification_ids,
-        user=request.user,
-        is_read=False
-    ).update(is_read=True)
+    updated_count = NotificationService.mark_as_read(request.user, notification_ids)
     
     return Response({
         'message': f'{updated_count} notificaciones marcadas como leídas',
         'updated_count': updated_count
-    })
\ No newline at end of file
+    })
+
+
+def stream_ticket_key(ticket):
+    return f'notification_stream_ticket:{ticket}'
+
+
+@api_view(['POST'])
+@permission_classes([IsAuthenticated])
+def notification_stream_ticket(request):
+    """
+    Emite un ticket de un solo uso para abrir el stream de notificaciones.
+    EventSource no permite enviar el header Authorization y así el JWT no
+    queda en la URL (ni en los logs de acceso).
+    """
+    ticket_seconds = get_push_settings()['TICKET_SECONDS']
+    ticket = secrets.token_urlsafe(32)
+    cache.set(stream_ticket_key(ticket), request.user.id, ticket_seconds)
+    
+    return Response({
+        'message': 'Ticket de stream generado',
+        'data': {'ticket': ticket, 'expires_in': ticket_seconds}
+    })
+
+
+async def _authenticate_stream(request):
+    """ID del usuario a partir de ?ticket= o del header Authorization, o None."""
+    ticket = request.GET.get('ticket')
+    if ticket:
+        key = stream_ticket_key(ticket)
+        user_id = await cache.aget(key)
+        # Solo la primera conexión que elimina la clave usa el ticket
+        if user_id is None or not await cache.adelete(key):
+            return None
+        return user_id
+    
+    try:
+        result = await sync_to_async(CachedJWTAuthentication().authenticate)(request)
+    except (AuthenticationFailed, InvalidToken):
+        return None
+    return result[0].pk if result else None
+
+
+def _format_event(event_type, data):
+    return f"event: {event_type}\ndata: {json.dumps(data, default=str)}\n\n"
+
+
+async def notification_stream(request):
+    """
+    Stream Server-Sent Events con las notificaciones nuevas y los cambios del
+    conteo de no leídas del usuario (ver apps/notifications/realtime.py).
+    Requiere un servidor ASGI y NOTIFICATIONS_PUSH['ENABLED']; si no, responde
+    503 y el cliente sigue consultando /api/notifications/count/.
+    """
+    if request.method != 'GET':
+        return JsonResponse({'error': 'Método no permitido', 'detail': 'Use GET'}, status=405)
+    if not isinstance(request, ASGIRequest):
+        return JsonResponse(
+            {'error': 'Streaming no disponible', 'detail': 'El servidor no corre bajo ASGI'},
+            status=503
+        )
+    if not push_enabled():
+        return JsonResponse(
+            {'error': 'Streaming no disponible', 'detail': 'El push de notificaciones está desactivado'},
+            status=503
+        )
+    
+    user_id = await _authenticate_stream(request)
+    if user_id is None:
+        return JsonResponse(
+            {'error': 'No autenticado', 'detail': 'Ticket o token inválido o expirado'},
+            status=401
+        )
+    
+    push_settings = get_push_settings()
+    heartbeat_seconds = push_settings['HEARTBEAT_SECONDS']
+    max_seconds = push_settings['MAX_CONNECTION_SECONDS']
+    
+    async def events():
+        subscription = get_broker().subscribe(user_id)
+        deadline = time.monotonic() + max_seconds
+        try:
+            # El navegador reintenta a los 5s si se corta la conexión
+            yield 'retry: 5000\n\n'
+            # Conteo leído después de suscribirse: una notificación creada entre
+            # ambos pasos llega como evento en lugar de perderse
+            await subscription.ready(timeout=heartbeat_seconds)
+            unread_count = await sync_to_async(counters.get_unread_count)(user_id)
+            yield _format_event('unread_count', {'unread_count': unread_count})
+            while time.monotonic() < deadline:
+                event = await subscription.get(timeout=heartbeat_seconds)
+                if event is None:
+                    # Comentario SSE: mantiene viva la conexión a través de proxies
+                    yield ': keepalive\n\n'
+                    continue
+                yield _format_event(event['type'], event)
+        finally:
+            # También al cancelarse el generador porque el cliente cerró la conexión
+            subscription.close()
+    
+    response = StreamingHttpResponse(events(), content_type='text/event-stream')
+    response['Cache-Control'] = 'no-cache'
+    # Evita que nginx acumule el stream en su buffer
+    response['X-Accel-Buffering'] = 'no'
+    return response
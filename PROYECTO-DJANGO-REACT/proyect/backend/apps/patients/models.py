@@ -139,10 +139,35 @@ class Patient(models.Model):
         verbose_name = 'Paciente'
         verbose_name_plural = 'Pacientes'
         ordering = ['-created_at']
+        indexes = [
+            # Listado (ordenado por fecha de alta) y listado de activos
+            models.Index(fields=['-created_at'], name='patient_created_idx'),
+            models.Index(fields=['status', '-created_at'], name='patient_status_created_idx'),
+        ]
         
     def __str__(self):
         return f"{self.user.get_full_name()} - Paciente"
     
+    @staticmethod
+    def default_data_for(user):
+        """
+        Datos iniciales del perfil creado automáticamente para un usuario 'client'.
+        Usa los datos del usuario si están disponibles y valores de relleno si no.
+        """
+        from datetime import date
+        return {
+            'date_of_birth': user.date_of_birth if user.date_of_birth else date(1990, 1, 1),
+            'gender': 'O',  # Valor por defecto "Otro"
+            'phone_number': user.phone if user.phone else '+1234567890',
+            'address': user.address if user.address else 'Dirección por completar',
+            'emergency_contact_name': 'Por definir',
+            'emergency_contact_phone': '+1234567890',
+            'emergency_contact_relationship': 'Por definir',
+            'allergies': '',
+            'medical_conditions': '',
+            'medications': ''
+        }
+    
     @property
     def full_name(self):
         """Retorna el nombre completo del paciente"""
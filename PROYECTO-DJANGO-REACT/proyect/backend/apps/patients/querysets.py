@@ -0,0 +1,89 @@
+"""
+Construcción de querysets de pacientes según lo que necesita cada serializer/acción.
+
+Cada serializer (o acción del PatientViewSet) declara un `queryset_shape`:
+
+    queryset_shape = {
+        'select_related': ['user'],
+        'only': ['id', 'status', 'user__first_name', ...],
+        'annotations': ['upcoming_appointments_count', 'last_visit_date'],
+        'prefetch': ['recent_appointments'],
+    }
+
+y `shape_patient_queryset` aplica únicamente esas relaciones y anotaciones,
+evitando cargar todas las citas de cada paciente en memoria.
+"""
+
+from django.db.models import Count, IntegerField, OuterRef, Prefetch, Subquery
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+
+from apps.appointments.models import Appointment
+
+ACTIVE_APPOINTMENT_STATUSES = ['scheduled', 'confirmed']
+RECENT_APPOINTMENT_STATUSES = ['scheduled', 'confirmed', 'completed']
+RECENT_APPOINTMENTS_LIMIT = 5
+
+
+def upcoming_appointments_count():
+    """Cantidad de citas futuras activas del paciente (subconsulta correlacionada)."""
+    upcoming = Appointment.objects.filter(
+        patient=OuterRef('pk'),
+        date__gte=timezone.now().date(),
+        status__in=ACTIVE_APPOINTMENT_STATUSES
+    ).order_by().values('patient').annotate(total=Count('id')).values('total')
+    return Coalesce(Subquery(upcoming, output_field=IntegerField()), 0)
+
+
+def last_visit_date():
+    """Fecha de la última cita completada del paciente."""
+    last_visit = Appointment.objects.filter(
+        patient=OuterRef('pk'),
+        status='completed'
+    ).order_by('-date', '-time').values('date')[:1]
+    return Subquery(last_visit)
+
+
+def recent_appointments():
+    """Últimas citas del paciente, limitadas en base de datos por paciente."""
+    queryset = Appointment.objects.filter(
+        status__in=RECENT_APPOINTMENT_STATUSES
+    ).select_related(
+        'doctor__user', 'patient__user'
+    ).order_by('-date', '-time')[:RECENT_APPOINTMENTS_LIMIT]
+    return Prefetch('appointments', queryset=queryset, to_attr='recent_appointments')
+
+
+PATIENT_ANNOTATIONS = {
+    'upcoming_appointments_count': upcoming_appointments_count,
+    'last_visit_date': last_visit_date,
+}
+
+PATIENT_PREFETCHES = {
+    'recent_appointments': recent_appointments,
+}
+
+
+def shape_patient_queryset(queryset, shape):
+    """
+    Aplica al queryset las relaciones, columnas y anotaciones declaradas en `shape`.
+    """
+    if not shape:
+        return queryset.select_related('user')
+
+    if shape.get('select_related'):
+        queryset = queryset.select_related(*shape['select_related'])
+    if shape.get('only'):
+        queryset = queryset.only(*shape['only'])
+
+    annotations = {
+        name: PATIENT_ANNOTATIONS[name]() for name in shape.get('annotations', [])
+    }
+    if annotations:
+        queryset = queryset.annotate(**annotations)
+
+    prefetches = [PATIENT_PREFETCHES[name]() for name in shape.get('prefetch', [])]
+    if prefetches:
+        queryset = queryset.prefetch_related(*prefetches)
+
+    return queryset
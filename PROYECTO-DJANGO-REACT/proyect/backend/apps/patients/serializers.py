@@ -33,6 +33,12 @@ class PatientSerializer(serializers.ModelSerializer):
     # Serializer anidado para citas (se importará dinámicamente para evitar imports circulares)
     appointments = serializers.SerializerMethodField()
     
+    # Forma del queryset que necesita este serializer (ver apps/patients/querysets.py)
+    queryset_shape = {
+        'select_related': ['user'],
+        'prefetch': ['recent_appointments'],
+    }
+    
     class Meta:
         model = Patient
         fields = (
@@ -76,9 +82,12 @@ class PatientSerializer(serializers.ModelSerializer):
     def get_appointments(self, obj):
         """Retorna las citas del paciente (últimas 5 citas)"""
         from apps.appointments.serializers import AppointmentListSerializer
-        appointments = obj.appointments.filter(
-            status__in=['scheduled', 'confirmed', 'completed']
-        ).order_by('-date', '-time')[:5]
+        # Usar las citas precargadas por el viewset si están disponibles
+        appointments = getattr(obj, 'recent_appointments', None)
+        if appointments is None:
+            appointments = obj.appointments.filter(
+                status__in=['scheduled', 'confirmed', 'completed']
+            ).select_related('doctor__user', 'patient__user').order_by('-date', '-time')[:5]
         return AppointmentListSerializer(appointments, many=True).data
 
 
@@ -241,15 +250,36 @@ class PatientListSerializer(serializers.ModelSerializer):
     status_display = serializers.CharField(read_only=True)
     status_color = serializers.CharField(read_only=True)
     is_active = serializers.BooleanField(read_only=True)
+    upcoming_appointments_count = serializers.SerializerMethodField()
+    last_visit_date = serializers.SerializerMethodField()
+    
+    # Forma del queryset que necesita este serializer (ver apps/patients/querysets.py)
+    queryset_shape = {
+        'select_related': ['user'],
+        'only': [
+            'id', 'gender', 'phone_number', 'date_of_birth', 'status', 'created_at',
+            'user__first_name', 'user__last_name', 'user__email',
+        ],
+        'annotations': ['upcoming_appointments_count', 'last_visit_date'],
+    }
     
     class Meta:
         model = Patient
         fields = (
             'id', 'full_name', 'email', 'age', 'gender', 
-            'phone_number', 'status', 'status_display', 'status_color', 'is_active', 'created_at'
+            'phone_number', 'status', 'status_display', 'status_color', 'is_active',
+            'upcoming_appointments_count', 'last_visit_date', 'created_at'
         )
         read_only_fields = ('id', 'full_name', 'email', 'age', 'created_at')
     
     def get_age(self, obj):
         """Calcula la edad del paciente"""
-        return obj.age
\ No newline at end of file
+        return obj.age
+    
+    def get_upcoming_appointments_count(self, obj):
+        """Citas futuras activas (anotación del queryset; None si no se calculó)"""
+        return getattr(obj, 'upcoming_appointments_count', None)
+    
+    def get_last_visit_date(self, obj):
+        """Fecha de la última cita completada (anotación del queryset)"""
+        return getattr(obj, 'last_visit_date', None)
\ No newline at end of file
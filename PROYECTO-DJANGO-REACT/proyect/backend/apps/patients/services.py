@@ -0,0 +1,184 @@
+"""
+Servicios para el historial (línea de tiempo) de citas de un paciente.
+
+Las acciones medical_history, appointments y statistics del PatientViewSet y
+patient_history del AppointmentViewSet comparten el mismo origen de datos:
+las citas del paciente se consultan una sola vez, los desgloses se calculan
+en una única pasada y el resultado queda en caché por paciente hasta que se
+modifica alguna de sus citas.
+"""
+
+from collections import Counter
+from datetime import datetime, timedelta
+import logging
+
+from django.conf import settings
+from django.core.cache import cache
+from django.utils import timezone
+
+from apps.appointments.models import Appointment
+
+logger = logging.getLogger(__name__)
+
+TIMELINE_CACHE_KEY = 'patient_timeline:{patient_id}'
+DEFAULT_TIMELINE_CACHE_SECONDS = 300
+TOP_DOCTORS_LIMIT = 5
+
+# Columnas que necesitan AppointmentListSerializer y DoctorListSerializer
+TIMELINE_APPOINTMENT_FIELDS = (
+    'id', 'patient_id', 'doctor_id', 'date', 'time', 'status', 'reason',
+    'created_at', 'updated_at',
+    'doctor__id', 'doctor__specialization', 'doctor__specialty_id',
+    'doctor__years_experience', 'doctor__consultation_fee', 'doctor__status',
+    'doctor__is_available', 'doctor__work_start_time', 'doctor__work_end_time',
+    'doctor__work_days',
+    'doctor__user__id', 'doctor__user__first_name', 'doctor__user__last_name',
+    'doctor__user__email',
+)
+
+
+def _parse_date(value):
+    """Convierte 'YYYY-MM-DD' en date; retorna None si el formato no es válido."""
+    if not value:
+        return None
+    try:
+        return datetime.strptime(value, '%Y-%m-%d').date()
+    except ValueError:
+        return None
+
+
+class PatientTimelineService:
+    """
+    Servicio para obtener el historial de citas y sus estadísticas por paciente.
+
+    🎯 Objetivo: Una consulta por paciente en lugar de una por cada conteo/desglose
+    💡 Concepto: Se serializa y agrega una vez, se guarda en caché y se filtra en memoria
+    """
+
+    @staticmethod
+    def cache_key(patient_id):
+        return TIMELINE_CACHE_KEY.format(patient_id=patient_id)
+
+    @staticmethod
+    def get_timeline(patient):
+        """
+        Retorna la línea de tiempo del paciente (desde caché si está disponible).
+
+        Returns:
+            dict: 'appointments' (serializadas, de la más reciente a la más antigua),
+            'by_status', 'monthly_trend', 'doctors_visited', 'total_appointments',
+            'completed_appointments', 'cancelled_appointments' y 'last_appointment'
+        """
+        key = PatientTimelineService.cache_key(patient.id)
+        timeline = cache.get(key)
+        if timeline is None:
+            timeline = PatientTimelineService.build_timeline(patient)
+            cache.set(
+                key,
+                timeline,
+                getattr(settings, 'PATIENT_TIMELINE_CACHE_SECONDS', DEFAULT_TIMELINE_CACHE_SECONDS)
+            )
+        return timeline
+
+    @staticmethod
+    def build_timeline(patient):
+        """Consulta las citas del paciente una vez y calcula todos los desgloses."""
+        from apps.appointments.serializers import AppointmentListSerializer
+
+        appointments = list(
+            Appointment.objects.filter(patient=patient)
+            .select_related('doctor__user')
+            .only(*TIMELINE_APPOINTMENT_FIELDS)
+            .order_by('-date', '-time')
+        )
+
+        twelve_months_ago = timezone.now().date() - timedelta(days=365)
+        by_status = Counter()
+        by_month = Counter()
+        by_doctor = Counter()
+        doctors = {}
+        last_appointment = None
+
+        for appointment in appointments:
+            # El paciente ya está cargado; evita unirlo en cada fila
+            appointment.patient = patient
+
+            by_status[appointment.status] += 1
+            if appointment.date >= twelve_months_ago:
+                by_month[appointment.date.strftime('%Y-%m')] += 1
+            by_doctor[appointment.doctor_id] += 1
+            if appointment.doctor_id not in doctors:
+                doctors[appointment.doctor_id] = appointment.doctor
+            if last_appointment is None and appointment.status == 'completed':
+                last_appointment = appointment.date
+
+        doctors_visited = []
+        for doctor_id, visit_count in by_doctor.most_common(TOP_DOCTORS_LIMIT):
+            doctor = doctors[doctor_id]
+            doctors_visited.append({
+                'doctor__user__first_name': doctor.user.first_name,
+                'doctor__user__last_name': doctor.user.last_name,
+                'doctor__specialization': doctor.specialization,
+                'visit_count': visit_count,
+            })
+
+        return {
+            'appointments': AppointmentListSerializer(appointments, many=True).data,
+            'by_status': [
+                {'status': status_value, 'count': by_status[status_value]}
+                for status_value in sorted(by_status)
+            ],
+            'monthly_trend': [
+                {'month': month, 'count': by_month[month]}
+                for month in sorted(by_month)
+            ],
+            'doctors_visited': doctors_visited,
+            'total_appointments': len(appointments),
+            'completed_appointments': by_status['completed'],
+            'cancelled_appointments': by_status['cancelled'],
+            'last_appointment': last_appointment,
+        }
+
+    @staticmethod
+    def filter_appointments(timeline, status_filter=None, date_from=None, date_to=None):
+        """
+        Filtra en memoria las citas serializadas de la línea de tiempo.
+
+        Args:
+            timeline: Resultado de get_timeline()
+            status_filter: Estado de la cita
+            date_from / date_to: Fechas 'YYYY-MM-DD' (se ignoran si el formato no es válido)
+
+        Returns:
+            list[dict]: Citas que cumplen los filtros, en el mismo orden
+        """
+        appointments = timeline['appointments']
+
+        if status_filter:
+            appointments = [a for a in appointments if a['status'] == status_filter]
+
+        # Las fechas serializadas están en formato ISO, comparables como texto
+        from_date = _parse_date(date_from)
+        if from_date:
+            appointments = [a for a in appointments if a['date'] >= from_date.isoformat()]
+
+        to_date = _parse_date(date_to)
+        if to_date:
+            appointments = [a for a in appointments if a['date'] <= to_date.isoformat()]
+
+        return appointments
+
+    @staticmethod
+    def invalidate(patient_id):
+        """Descarta la línea de tiempo en caché del paciente."""
+        if patient_id is None:
+            return
+        cache.delete(PatientTimelineService.cache_key(patient_id))
+        logger.debug(f"🗑️ Línea de tiempo del paciente {patient_id} invalidada")
+
+    @staticmethod
+    def invalidate_many(patient_ids):
+        """Descarta en una sola operación las líneas de tiempo de varios pacientes."""
+        keys = [PatientTimelineService.cache_key(patient_id) for patient_id in patient_ids if patient_id is not None]
+        if keys:
+            cache.delete_many(keys)
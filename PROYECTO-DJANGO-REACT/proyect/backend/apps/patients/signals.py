@@ -1,7 +1,8 @@
-from django.db.models.signals import post_save
+from django.db.models.signals import post_save, post_delete
 from django.dispatch import receiver
 from django.contrib.auth import get_user_model
 from .models import Patient
+from .services import PatientTimelineService
 import logging
 
 User = get_user_model()
@@ -24,24 +25,8 @@ def create_patient_profile(sender, instance, created, **kwargs):
         try:
             # Verificar que no exista ya un perfil de paciente
             if not hasattr(instance, 'patient_profile'):
-                # Usar fecha de nacimiento del usuario o una fecha por defecto
-                from datetime import date
-                birth_date = instance.date_of_birth if instance.date_of_birth else date(1990, 1, 1)
-                
                 # Crear perfil con datos básicos del usuario si están disponibles
-                patient_data = {
-                    'user': instance,
-                    'date_of_birth': birth_date,
-                    'gender': 'O',  # Valor por defecto "Otro"
-                    'phone_number': instance.phone if instance.phone else '+1234567890',
-                    'address': instance.address if instance.address else 'Dirección por completar',
-                    'emergency_contact_name': 'Por definir',
-                    'emergency_contact_phone': '+1234567890',
-                    'emergency_contact_relationship': 'Por definir',
-                    'allergies': '',
-                    'medical_conditions': '',
-                    'medications': ''
-                }
+                patient_data = {'user': instance, **Patient.default_data_for(instance)}
                 
                 Patient.objects.create(**patient_data)
                 logger.info(f"✅ Perfil de paciente creado automáticamente para: {instance.username} (ID: {instance.id})")
@@ -91,4 +76,17 @@ def update_patient_profile(sender, instance, created, **kwargs):
                     logger.info(f"🔄 Perfil de paciente actualizado para {instance.username}. Campos: {', '.join(updated_fields)}")
                     
         except Exception as e:
-            logger.error(f"❌ Error al actualizar perfil de paciente para {instance.username}: {str(e)}")
\ No newline at end of file
+            logger.error(f"❌ Error al actualizar perfil de paciente para {instance.username}: {str(e)}")
+
+
+@receiver(post_save, sender=Patient)
+def invalidate_timeline_on_patient_save(sender, instance, **kwargs):
+    """Los datos del paciente se incluyen en cada cita de su línea de tiempo."""
+    PatientTimelineService.invalidate(instance.pk)
+
+
+@receiver(post_save, sender='appointments.Appointment')
+@receiver(post_delete, sender='appointments.Appointment')
+def invalidate_timeline_on_appointment_change(sender, instance, **kwargs):
+    """Descarta la línea de tiempo en caché del paciente de la cita modificada."""
+    PatientTimelineService.invalidate(instance.patient_id)
@@ -23,10 +23,13 @@ from .serializers import (
     PatientStatusUpdateSerializer
 )
 from .filters import PatientFilter
+from .querysets import shape_patient_queryset
+from .services import PatientTimelineService
 from apps.appointments.models import Appointment
+from core.replicas import ReplicaReadMixin
 
 
-class PatientViewSet(viewsets.ModelViewSet):
+class PatientViewSet(ReplicaReadMixin, viewsets.ModelViewSet):
     """
     ViewSet completo para gestión de pacientes.
     
@@ -65,6 +68,9 @@ class PatientViewSet(viewsets.ModelViewSet):
     serializer_class = PatientSerializer
     permission_classes = [permissions.IsAuthenticated]
     
+    # Acciones de solo lectura servidas desde una réplica (ver core/replicas.py)
+    replica_actions = ['statistics']
+    
     # Configuración de filtros
     filter_backends = [DjangoFilterBackend, SearchFilter, OrderingFilter]
     filterset_class = PatientFilter
@@ -127,13 +133,31 @@ class PatientViewSet(viewsets.ModelViewSet):
         
         return [permission() for permission in permission_classes]
     
+    # Forma del queryset para acciones que no serializan con get_serializer_class();
+    # el resto usa el `queryset_shape` declarado en su serializer.
+    action_queryset_shapes = {
+        'destroy': {'select_related': ['user']},
+        'medical_history': {'select_related': ['user']},
+        'appointments': {'select_related': ['user']},
+        'statistics': {'select_related': ['user']},
+        'update_status': {'select_related': ['user']},
+    }
+    
+    def get_queryset_shape(self):
+        """
+        Retorna las relaciones, columnas y anotaciones que necesita la acción actual.
+        """
+        if self.action in self.action_queryset_shapes:
+            return self.action_queryset_shapes[self.action]
+        return getattr(self.get_serializer_class(), 'queryset_shape', None)
+    
     def get_queryset(self):
         """
         Retorna el queryset filtrado según los parámetros de búsqueda.
         Los administradores pueden ver todos los pacientes (incluyendo deshabilitados).
         Los usuarios regulares solo ven pacientes activos.
         """
-        queryset = Patient.objects.select_related('user').prefetch_related('appointments')
+        queryset = shape_patient_queryset(Patient.objects.all(), self.get_queryset_shape())
         
         # Filtrar por estado según el tipo de usuario
         if not (self.request.user.is_staff or self.request.user.is_superuser):
@@ -297,15 +321,7 @@ class PatientViewSet(viewsets.ModelViewSet):
         Obtener el historial médico completo del paciente.
         """
         patient = self.get_object()
-        
-        # Obtener todas las citas del paciente ordenadas por fecha
-        appointments = Appointment.objects.filter(
-            patient=patient
-        ).select_related('doctor__user').order_by('-date', '-time')
-        
-        # Serializar las citas para el historial
-        from apps.appointments.serializers import AppointmentListSerializer
-        appointments_data = AppointmentListSerializer(appointments, many=True).data
+        timeline = PatientTimelineService.get_timeline(patient)
         
         medical_history = {
             'patient_info': {
@@ -317,12 +333,12 @@ class PatientViewSet(viewsets.ModelViewSet):
                 'medications': patient.medications,
                 'medical_summary': patient.get_medical_summary()
             },
-            'appointments_history': appointments_data,
+            'appointments_history': timeline['appointments'],
             'statistics': {
-                'total_appointments': appointments.count(),
-                'completed_appointments': appointments.filter(status='completed').count(),
-                'cancelled_appointments': appointments.filter(status='cancelled').count(),
-                'last_appointment': appointments.filter(status='completed').first().date if appointments.filter(status='completed').exists() else None
+                'total_appointments': timeline['total_appointments'],
+                'completed_appointments': timeline['completed_appointments'],
+                'cancelled_appointments': timeline['cancelled_appointments'],
+                'last_appointment': timeline['last_appointment']
             }
         }
         
@@ -341,40 +357,19 @@ class PatientViewSet(viewsets.ModelViewSet):
         """
         patient = self.get_object()
         
-        # Filtros opcionales
-        status_filter = request.query_params.get('status', None)
-        date_from = request.query_params.get('date_from', None)
-        date_to = request.query_params.get('date_to', None)
-        
-        appointments = Appointment.objects.filter(patient=patient)
-        
-        if status_filter:
-            appointments = appointments.filter(status=status_filter)
-        
-        if date_from:
-            try:
-                date_from = datetime.strptime(date_from, '%Y-%m-%d').date()
-                appointments = appointments.filter(date__gte=date_from)
-            except ValueError:
-                pass
-        
-        if date_to:
-            try:
-                date_to = datetime.strptime(date_to, '%Y-%m-%d').date()
-                appointments = appointments.filter(date__lte=date_to)
-            except ValueError:
-                pass
-        
-        appointments = appointments.select_related('doctor__user').order_by('-date', '-time')
-        
-        from apps.appointments.serializers import AppointmentListSerializer
-        serializer = AppointmentListSerializer(appointments, many=True)
+        # Filtros opcionales (status, date_from, date_to) aplicados sobre la línea de tiempo
+        appointments = PatientTimelineService.filter_appointments(
+            PatientTimelineService.get_timeline(patient),
+            status_filter=request.query_params.get('status'),
+            date_from=request.query_params.get('date_from'),
+            date_to=request.query_params.get('date_to')
+        )
         
         return Response(
             {
                 'message': 'Citas obtenidas exitosamente',
-                'data': serializer.data,
-                'count': appointments.count()
+                'data': appointments,
+                'count': len(appointments)
             },
             status=status.HTTP_200_OK
         )
@@ -385,33 +380,7 @@ class PatientViewSet(viewsets.ModelViewSet):
         Obtener estadísticas del paciente.
         """
         patient = self.get_object()
-        
-        # Estadísticas de citas
-        appointments = Appointment.objects.filter(patient=patient)
-        
-        # Citas por estado
-        appointments_by_status = appointments.values('status').annotate(
-            count=Count('id')
-        ).order_by('status')
-        
-        # Citas por mes (últimos 12 meses)
-        twelve_months_ago = timezone.now().date() - timedelta(days=365)
-        monthly_appointments = appointments.filter(
-            date__gte=twelve_months_ago
-        ).extra(
-            select={'month': "strftime('%%Y-%%m', date)"}
-        ).values('month').annotate(
-            count=Count('id')
-        ).order_by('month')
-        
-        # Doctores más visitados
-        doctors_visited = appointments.values(
-            'doctor__user__first_name',
-            'doctor__user__last_name',
-            'doctor__specialization'
-        ).annotate(
-            visit_count=Count('id')
-        ).order_by('-visit_count')[:5]
+        timeline = PatientTimelineService.get_timeline(patient)
         
         statistics = {
             'patient_info': {
@@ -420,11 +389,11 @@ class PatientViewSet(viewsets.ModelViewSet):
                 'registration_date': patient.created_at.date()
             },
             'appointments_summary': {
-                'total': appointments.count(),
-                'by_status': list(appointments_by_status),
-                'monthly_trend': list(monthly_appointments)
+                'total': timeline['total_appointments'],
+                'by_status': timeline['by_status'],
+                'monthly_trend': timeline['monthly_trend']
             },
-            'doctors_visited': list(doctors_visited),
+            'doctors_visited': timeline['doctors_visited'],
             'health_summary': {
                 'blood_type': patient.blood_type,
                 'has_allergies': bool(patient.allergies),
@@ -0,0 +1,65 @@
+"""
+Versión async del resumen del dashboard (ver core/async_api.py), en
+/api/async/reports/dashboard/summary/ (config/async_urls.py).
+"""
+
+from datetime import timedelta
+
+from django.http import JsonResponse
+from django.utils import timezone
+
+from apps.appointments.models import Appointment
+from apps.doctors.models import Doctor
+from apps.patients.models import Patient
+from apps.users.authentication import authenticate_async
+from core.async_api import async_get_view, error_response, gather_queries
+from core.replicas import aread_from_replica
+
+
+@async_get_view
+async def dashboard_summary(request):
+    """
+    🎯 OBJETIVO: Mismo resumen que /api/reports/dashboard/summary/
+
+    💡 CONCEPTO: Los seis conteos son independientes: se lanzan a la vez
+    (desde una réplica si hay) y la petición tarda lo que el más lento.
+    """
+    user = await authenticate_async(request)
+    if user is None:
+        return error_response('No autenticado', 'Token inválido, expirado o ausente', 401)
+    if user.role not in ['admin', 'superadmin']:
+        return JsonResponse({'detail': 'No tienes permisos para ver estos reportes.'}, status=403)
+
+    today = timezone.now().date()
+    next_week = today + timedelta(days=7)
+    last_week_start = today - timedelta(days=7)
+    active_statuses = ['scheduled', 'confirmed']
+
+    async with aread_from_replica(user):
+        (
+            appointments_today,
+            pending_appointments,
+            total_patients,
+            active_doctors,
+            upcoming_appointments,
+            this_week_appointments,
+        ) = await gather_queries(
+            Appointment.objects.filter(date=today).count,
+            Appointment.objects.filter(status__in=active_statuses, date__gte=today).count,
+            Patient.objects.count,
+            Doctor.objects.filter(is_available=True).count,
+            Appointment.objects.filter(date__range=[today, next_week], status__in=active_statuses).count,
+            Appointment.objects.filter(date__range=[last_week_start, today]).count,
+        )
+
+    return JsonResponse({
+        'quick_stats': {
+            'appointments_today': appointments_today,
+            'pending_appointments': pending_appointments,
+            'total_patients': total_patients,
+            'active_doctors': active_doctors,
+        },
+        'upcoming_appointments': upcoming_appointments,
+        'weekly_trend': this_week_appointments,
+        'last_updated': timezone.now().isoformat()
+    })
@@ -3,14 +3,16 @@ from rest_framework.decorators import api_view, permission_classes
 from rest_framework.permissions import IsAuthenticated
 from rest_framework.response import Response
 from django.db.models import Count, Q, Avg
+from django.db.models.functions import TruncMonth
 from django.utils import timezone
 from django.http import HttpResponse
 from datetime import datetime, timedelta
 import csv
 from apps.appointments.models import Appointment
-from apps.doctors.models import Doctor
+from apps.doctors.models import Doctor, Specialization
 from apps.patients.models import Patient
 from core.permissions import IsAdminOrSuperAdmin, IsDoctor, IsSecretary, IsClient
+from core.replicas import use_replica
 from .serializers import (
     BasicStatsSerializer,
     AppointmentsByPeriodSerializer,
@@ -22,6 +24,7 @@ from .serializers import (
 
 @api_view(['GET'])
 @permission_classes([IsAuthenticated, IsAdminOrSuperAdmin])
+@use_replica
 def basic_stats(request):
     """
     🎯 OBJETIVO: Obtener estadísticas básicas del sistema
@@ -62,6 +65,7 @@ def basic_stats(request):
 
 @api_view(['GET'])
 @permission_classes([IsAuthenticated, IsAdminOrSuperAdmin])
+@use_replica
 def appointments_by_period(request):
     """
     🎯 OBJETIVO: Generar reporte de citas por período
@@ -117,6 +121,7 @@ def appointments_by_period(request):
 
 @api_view(['GET'])
 @permission_classes([IsAuthenticated, IsAdminOrSuperAdmin])
+@use_replica
 def popular_doctors(request):
     """
     🎯 OBJETIVO: Obtener reporte de doctores más solicitados
@@ -162,7 +167,7 @@ def popular_doctors(request):
         )
     ).filter(
         total_appointments__gt=0
-    ).order_by('-total_appointments')
+    ).select_related('user').order_by('-total_appointments')
     
     # Preparar datos para el serializer
     report_data = []
@@ -189,6 +194,7 @@ def popular_doctors(request):
 
 @api_view(['GET'])
 @permission_classes([IsAuthenticated, IsAdminOrSuperAdmin])
+@use_replica
 def cancellation_metrics(request):
     """
     🎯 OBJETIVO: Obtener métricas detalladas de cancelaciones
@@ -279,6 +285,7 @@ def cancellation_metrics(request):
 
 @api_view(['GET'])
 @permission_classes([IsAuthenticated])
+@use_replica
 def dashboard_summary(request):
     """
     🎯 OBJETIVO: Resumen ejecutivo para el dashboard
@@ -333,6 +340,7 @@ def dashboard_summary(request):
 
 @api_view(['GET'])
 @permission_classes([IsAuthenticated, IsAdminOrSuperAdmin])
+@use_replica
 def export_appointments_csv(request):
     """
     🎯 OBJETIVO: Exportar citas a formato CSV
@@ -456,6 +464,7 @@ def export_appointments_csv(request):
 
 @api_view(['GET'])
 @permission_classes([IsAuthenticated])
+@use_replica
 def superadmin_dashboard(request):
     """
     🎯 OBJETIVO: Dashboard específico para SuperAdministradores
@@ -579,6 +588,7 @@ def superadmin_dashboard(request):
 
 @api_view(['GET'])
 @permission_classes([IsAuthenticated, IsDoctor])
+@use_replica
 def doctor_dashboard(request):
     """
     🎯 OBJETIVO: Dashboard específico para doctores
@@ -688,6 +698,7 @@ def doctor_dashboard(request):
 
 @api_view(['GET'])
 @permission_classes([IsAuthenticated, IsSecretary])
+@use_replica
 def secretary_dashboard(request):
     """
     🎯 OBJETIVO: Dashboard específico para secretarias
@@ -785,8 +796,22 @@ def secretary_dashboard(request):
         )
 
 
+def _count_by_month(queryset, field, since):
+    """
+    Cuenta registros por mes desde `since` en una sola consulta agrupada.
+    Retorna {'YYYY-MM': cantidad}.
+    """
+    rows = queryset.filter(
+        **{f'{field}__gte': since}
+    ).annotate(
+        month=TruncMonth(field)
+    ).values('month').annotate(count=Count('id'))
+    return {row['month'].strftime('%Y-%m'): row['count'] for row in rows}
+
+
 @api_view(['GET'])
 @permission_classes([IsAuthenticated, IsAdminOrSuperAdmin])
+@use_replica
 def admin_dashboard(request):
     """
     🎯 OBJETIVO: Dashboard actualizado para administradores
@@ -825,7 +850,7 @@ def admin_dashboard(request):
     top_doctors = Doctor.objects.annotate(
         total_appointments=Count('appointments'),
         completed_appointments=Count('appointments', filter=Q(appointments__status='completed'))
-    ).order_by('-total_appointments')[:5]
+    ).select_related('user').order_by('-total_appointments')[:5]
     
     top_doctors_list = [
         {
@@ -841,56 +866,41 @@ def admin_dashboard(request):
     ]
     
     # Estadísticas mensuales para los últimos 6 meses
-    monthly_stats = []
+    # (una consulta agrupada por mes para cada modelo, no una por mes)
+    months = []
     for i in range(6):
         # Calcular el mes (empezando desde hace 5 meses hasta el actual)
         target_date = today.replace(day=1) - timedelta(days=32 * (5 - i))
-        target_month_start = target_date.replace(day=1)
-        
-        # Calcular el final del mes
-        if target_month_start.month == 12:
-            target_month_end = target_month_start.replace(year=target_month_start.year + 1, month=1)
-        else:
-            target_month_end = target_month_start.replace(month=target_month_start.month + 1)
-        
-        # Contar datos para ese mes
-        month_appointments = Appointment.objects.filter(
-            date__gte=target_month_start,
-            date__lt=target_month_end
-        ).count()
-        
-        month_patients = Patient.objects.filter(
-            created_at__gte=target_month_start,
-            created_at__lt=target_month_end
-        ).count()
-        
-        month_doctors = Doctor.objects.filter(
-            created_at__gte=target_month_start,
-            created_at__lt=target_month_end
-        ).count()
-        
+        months.append(target_date.replace(day=1))
+    
+    appointments_by_month = _count_by_month(Appointment.objects.all(), 'date', months[0])
+    patients_by_month = _count_by_month(Patient.objects.all(), 'created_at', months[0])
+    doctors_by_month = _count_by_month(Doctor.objects.all(), 'created_at', months[0])
+    
+    monthly_stats = []
+    for target_month_start in months:
+        month_key = target_month_start.strftime('%Y-%m')
         monthly_stats.append({
-            'month': target_month_start.strftime('%Y-%m'),
-            'appointments': month_appointments,
-            'patients': month_patients,
-            'doctors': month_doctors,
+            'month': month_key,
+            'appointments': appointments_by_month.get(month_key, 0),
+            'patients': patients_by_month.get(month_key, 0),
+            'doctors': doctors_by_month.get(month_key, 0),
             'revenue': 0  # Placeholder para futura implementación
         })
     
-    # Estadísticas por especialización
-    specialization_stats = []
-    specializations = Doctor.objects.values_list('specialization', flat=True).distinct()
-    for spec in specializations:
-        if spec:  # Evitar valores None
-            doctors_count = Doctor.objects.filter(specialization=spec).count()
-            appointments_count = Appointment.objects.filter(doctor__specialization=spec).count()
-            specialization_stats.append({
-                'specialization': spec,
-                'count': appointments_count,  # Campo requerido por el PieChart
-                'doctors_count': doctors_count,
-                'appointments_count': appointments_count,
-                'revenue': 0  # Placeholder
-            })
+    # Estadísticas por especialización (contadores desnormalizados del catálogo)
+    specialization_stats = [
+        {
+            'specialization': spec.name,
+            'count': spec.appointments_count,  # Campo requerido por el PieChart
+            'doctors_count': spec.doctors_count,
+            'appointments_count': spec.appointments_count,
+            'revenue': 0  # Placeholder
+        }
+        for spec in Specialization.objects.filter(doctors_count__gt=0).only(
+            'name', 'doctors_count', 'appointments_count'
+        )
+    ]
     
     # 📊 Estructura plana compatible con AdminDashboardStats
     stats = {
@@ -947,6 +957,7 @@ def admin_dashboard(request):
 
 @api_view(['GET'])
 @permission_classes([IsAuthenticated, IsClient])
+@use_replica
 def client_dashboard(request):
     """
     🎯 OBJETIVO: Dashboard específico para clientes/pacientes
@@ -1036,7 +1047,7 @@ def client_dashboard(request):
             appointments__patient=patient
         ).annotate(
             visit_count=Count('appointments')
-        ).order_by('-visit_count')[:3]
+        ).select_related('user').order_by('-visit_count')[:3]
         
         stats['frequent_doctors'] = [
             {
@@ -1064,6 +1075,7 @@ def client_dashboard(request):
 
 @api_view(['GET'])
 @permission_classes([IsAuthenticated, IsAdminOrSuperAdmin])
+@use_replica
 def export_patients_csv(request):
     """
     🎯 OBJETIVO: Exportar pacientes a formato CSV
@@ -1121,6 +1133,7 @@ def export_patients_csv(request):
 
 @api_view(['GET'])
 @permission_classes([IsAuthenticated, IsAdminOrSuperAdmin])
+@use_replica
 def export_doctors_csv(request):
     """
     🎯 OBJETIVO: Exportar doctores a formato CSV
@@ -1176,6 +1189,7 @@ def export_doctors_csv(request):
 
 @api_view(['GET'])
 @permission_classes([IsAuthenticated, IsAdminOrSuperAdmin])
+@use_replica
 def export_full_report_csv(request):
     """
     🎯 OBJETIVO: Exportar reporte completo del sistema
@@ -1212,20 +1226,31 @@ def export_full_report_csv(request):
     writer.writerow(['CITAS POR MES (ÚLTIMOS 6 MESES)'])
     writer.writerow(['Mes', 'Total Citas', 'Completadas', 'Canceladas'])
     
-    for i in range(6):
-        month_start = (today.replace(day=1) - timedelta(days=i*30)).replace(day=1)
-        next_month = (month_start + timedelta(days=32)).replace(day=1)
-        
-        month_appointments = Appointment.objects.filter(
-            date__gte=month_start,
-            date__lt=next_month
+    months = [
+        (today.replace(day=1) - timedelta(days=i*30)).replace(day=1)
+        for i in range(6)
+    ]
+    monthly_counts = {
+        item['month'].strftime('%Y-%m'): item
+        for item in Appointment.objects.filter(
+            date__gte=months[-1]
+        ).annotate(
+            month=TruncMonth('date')
+        ).values('month').annotate(
+            total=Count('id'),
+            completed=Count('id', filter=Q(status='completed')),
+            cancelled=Count('id', filter=Q(status='cancelled'))
         )
-        
+    }
+    
+    for month_start in months:
+        month_key = month_start.strftime('%Y-%m')
+        counts = monthly_counts.get(month_key, {})
         writer.writerow([
-            month_start.strftime('%Y-%m'),
-            month_appointments.count(),
-            month_appointments.filter(status='completed').count(),
-            month_appointments.filter(status='cancelled').count()
+            month_key,
+            counts.get('total', 0),
+            counts.get('completed', 0),
+            counts.get('cancelled', 0)
         ])
     
     writer.writerow([''])
@@ -1235,9 +1260,9 @@ def export_full_report_csv(request):
     writer.writerow(['Doctor', 'Especialización', 'Total Citas', 'Citas Completadas'])
     
     top_doctors = Doctor.objects.annotate(
-        total_appointments=Count('appointment'),
-        completed_appointments=Count('appointment', filter=Q(appointment__status='completed'))
-    ).order_by('-total_appointments')[:5]
+        total_appointments=Count('appointments'),
+        completed_appointments=Count('appointments', filter=Q(appointments__status='completed'))
+    ).select_related('user').order_by('-total_appointments')[:5]
     
     for doctor in top_doctors:
         writer.writerow([
@@ -0,0 +1,146 @@
+"""
+Contexto de autenticación cacheado por usuario.
+
+Guarda en cache, por ID de usuario, la fila de User (sin el hash de la
+contraseña) junto con el rol, los IDs de perfil (doctor, paciente,
+secretaria) y los permisos de secretaria. Con eso:
+
+- CachedJWTAuthentication (apps/users/authentication.py) reconstruye
+  request.user sin consultar la base de datos.
+- Los permisos y vistas comparan IDs (`request.user.auth_context.doctor_id`)
+  en lugar de cargar user.doctor / user.patient_profile / user.secretary_profile.
+
+La entrada se invalida con las señales de User, Doctor, Patient y
+SecretaryProfile (apps/users/signals.py). AUTH_CONTEXT_VERSION forma parte
+de la clave: subirlo descarta todas las entradas si cambia su estructura.
+
+Configuración:
+    AUTH_CONTEXT_CACHE_SECONDS = 300
+"""
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import router
+
+User = get_user_model()
+
+AUTH_CONTEXT_VERSION = 1
+DEFAULT_AUTH_CONTEXT_CACHE_SECONDS = 300
+
+# El hash de la contraseña nunca se guarda en cache; queda diferido en la instancia
+USER_FIELDS = tuple(
+    field.attname for field in User._meta.concrete_fields
+    if field.attname != 'password'
+)
+
+PROFILE_FIELDS = {
+    'doctor_id': 'doctor__id',
+    'patient_id': 'patient_profile__id',
+    'secretary_id': 'secretary_profile__id',
+    'can_manage_appointments': 'secretary_profile__can_manage_appointments',
+    'can_manage_patients': 'secretary_profile__can_manage_patients',
+    'can_view_reports': 'secretary_profile__can_view_reports',
+}
+
+SECRETARY_PERMISSIONS = ('can_manage_appointments', 'can_manage_patients', 'can_view_reports')
+
+
+class AuthContext:
+    """Rol e IDs de perfil de un usuario."""
+
+    __slots__ = ('user_id', 'role', 'doctor_id', 'patient_id', 'secretary_id', 'secretary_permissions')
+
+    def __init__(self, user_id, role, doctor_id=None, patient_id=None,
+                 secretary_id=None, secretary_permissions=None):
+        self.user_id = user_id
+        self.role = role
+        self.doctor_id = doctor_id
+        self.patient_id = patient_id
+        self.secretary_id = secretary_id
+        self.secretary_permissions = secretary_permissions or {}
+
+    @classmethod
+    def from_data(cls, data):
+        return cls(
+            user_id=data['user']['id'],
+            role=data['user']['role'],
+            doctor_id=data['doctor_id'],
+            patient_id=data['patient_id'],
+            secretary_id=data['secretary_id'],
+            secretary_permissions=data['secretary_permissions'],
+        )
+
+    def has_secretary_permission(self, permission):
+        return self.secretary_id is not None and bool(self.secretary_permissions.get(permission))
+
+
+def get_cache_timeout():
+    return getattr(settings, 'AUTH_CONTEXT_CACHE_SECONDS', DEFAULT_AUTH_CONTEXT_CACHE_SECONDS)
+
+
+def cache_key(user_id):
+    return f'auth_context:v{AUTH_CONTEXT_VERSION}:{user_id}'
+
+
+def load_auth_context_data(user_id):
+    """Fila del usuario e IDs de perfil en una sola consulta (LEFT JOIN a cada perfil)."""
+    row = User.objects.filter(pk=user_id).values(*USER_FIELDS, *PROFILE_FIELDS.values()).first()
+    if row is None:
+        return None
+    return {
+        'user': {attname: row[attname] for attname in USER_FIELDS},
+        'doctor_id': row[PROFILE_FIELDS['doctor_id']],
+        'patient_id': row[PROFILE_FIELDS['patient_id']],
+        'secretary_id': row[PROFILE_FIELDS['secretary_id']],
+        'secretary_permissions': {
+            permission: row[PROFILE_FIELDS[permission]]
+            for permission in SECRETARY_PERMISSIONS
+            if row[PROFILE_FIELDS['secretary_id']] is not None
+        },
+    }
+
+
+def get_auth_context_data(user_id):
+    """Datos del contexto desde cache; una consulta si no están."""
+    key = cache_key(user_id)
+    data = cache.get(key)
+    if data is None:
+        data = load_auth_context_data(user_id)
+        if data is not None:
+            cache.set(key, data, get_cache_timeout())
+    return data
+
+
+def build_user(data):
+    """
+    Instancia de User a partir de los datos cacheados.
+    `password` queda diferido: se carga solo si se usa, y save() sin
+    update_fields guarda únicamente los campos cargados.
+    """
+    fields = data['user']
+    user = User.from_db(router.db_for_read(User), list(fields), list(fields.values()))
+    user._auth_context = AuthContext.from_data(data)
+    return user
+
+
+def get_auth_context(user):
+    """AuthContext de un usuario autenticado (JWT, sesión o instancia cualquiera)."""
+    context = getattr(user, '_auth_context', None)
+    if context is None:
+        data = get_auth_context_data(user.pk)
+        context = AuthContext.from_data(data) if data else AuthContext(user.pk, user.role)
+        user._auth_context = context
+    return context
+
+
+def invalidate_auth_context(user_id):
+    if user_id is not None:
+        cache.delete(cache_key(user_id))
+
+
+def invalidate_auth_contexts(user_ids):
+    """Variante en lote de invalidate_auth_context (una sola operación de cache)."""
+    keys = [cache_key(user_id) for user_id in user_ids if user_id is not None]
+    if keys:
+        cache.delete_many(keys)
@@ -0,0 +1,55 @@
+from asgiref.sync import sync_to_async
+from django.utils.translation import gettext_lazy as _
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import AuthenticationFailed, InvalidToken
+from rest_framework_simplejwt.settings import api_settings
+
+from .auth_context import build_user, get_auth_context_data
+
+
+class CachedJWTAuthentication(JWTAuthentication):
+    """
+    JWTAuthentication que obtiene el usuario del contexto de autenticación
+    cacheado (ver apps/users/auth_context.py) en lugar de consultar User
+    en cada petición.
+    """
+
+    def get_user(self, validated_token):
+        # La verificación de revocación compara el hash de la contraseña, que no se cachea;
+        # la cache está indexada por pk
+        if api_settings.CHECK_REVOKE_TOKEN or api_settings.USER_ID_FIELD != 'id':
+            return super().get_user(validated_token)
+
+        try:
+            user_id = validated_token[api_settings.USER_ID_CLAIM]
+        except KeyError as e:
+            raise InvalidToken(_('Token contained no recognizable user identification')) from e
+
+        data = get_auth_context_data(user_id)
+        if data is None:
+            raise AuthenticationFailed(_('User not found'), code='user_not_found')
+
+        user = build_user(data)
+        if api_settings.CHECK_USER_IS_ACTIVE and not user.is_active:
+            raise AuthenticationFailed(_('User is inactive'), code='user_inactive')
+        return user
+
+
+def authenticate_request(request):
+    """
+    Usuario del header Authorization fuera de DRF (middleware), o None si
+    falta o es inválido.
+    """
+    try:
+        result = CachedJWTAuthentication().authenticate(request)
+    except (AuthenticationFailed, InvalidToken):
+        return None
+    return result[0] if result else None
+
+
+async def authenticate_async(request):
+    """
+    Usuario del header Authorization para vistas async (fuera de DRF), o
+    None si falta o es inválido.
+    """
+    return await sync_to_async(authenticate_request)(request)
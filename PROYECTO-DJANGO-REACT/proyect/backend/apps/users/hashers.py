@@ -0,0 +1,15 @@
+from django.conf import settings
+from django.contrib.auth.hashers import PBKDF2PasswordHasher
+
+
+class ConfigurablePBKDF2PasswordHasher(PBKDF2PasswordHasher):
+    """
+    PBKDF2-SHA256 con iteraciones definidas en settings.PASSWORD_HASHER_ITERATIONS.
+
+    Conserva el algoritmo 'pbkdf2_sha256', así que verifica los hashes existentes;
+    si el costo cambia, check_password() vuelve a generar el hash en el siguiente login.
+    """
+
+    @property
+    def iterations(self):
+        return getattr(settings, 'PASSWORD_HASHER_ITERATIONS', PBKDF2PasswordHasher.iterations)
@@ -0,0 +1,548 @@
+"""
+Importación masiva de usuarios (clientes, doctores y secretarios/as) desde CSV o JSONL.
+
+El alta uno a uno (UserRegistrationView, admin, generate_test_data) calcula
+el hash de la contraseña en el proceso de la petición y dispara varios
+receivers post_save por usuario (perfil de paciente, perfil de secretaria,
+contadores de especialidad, bloques de horario, contexto de autenticación,
+auditoría), cada uno con sus propias consultas. Aquí:
+
+- Las filas se leen en streaming y se procesan en lotes de CHUNK_SIZE.
+- Cada lote se valida con los campos del modelo (clean_fields, sin
+  consultas) y con una consulta por lote para cada clave única
+  (username, email, licencia médica, employee_id).
+- Los hashes de contraseña se calculan en un pool de procesos.
+- User, Patient, Doctor, SecretaryProfile y DoctorScheduleBlock se insertan
+  con bulk_create, que no envía señales; sus efectos se aplican en bloque
+  (valores por defecto de los perfiles, catálogo y contadores de
+  especialidades, invalidación de caches y un registro de auditoría por lote).
+- Los errores se reportan por fila; un lote con errores de integridad
+  (p. ej. otro proceso creó el mismo email) se revierte completo.
+
+Columnas reconocidas (las vacías se ignoran):
+    username, email, first_name, last_name, role (client|doctor|secretary),
+    phone, date_of_birth, address, is_active
+    password        contraseña en texto plano (se valida y se hashea)
+    password_hash   hash ya calculado en formato Django (migraciones)
+    Sin password ni password_hash el usuario queda con contraseña
+    inutilizable y debe usar la recuperación de contraseña.
+    client:    gender, blood_type, allergies, medical_conditions, medications,
+               emergency_contact_name, emergency_contact_phone,
+               emergency_contact_relationship
+    doctor:    medical_license, specialization, years_experience,
+               consultation_fee, bio, work_start_time, work_end_time,
+               work_days (lista JSON o días separados por coma)
+    secretary: employee_id, department, shift_start, shift_end, hire_date,
+               can_manage_appointments, can_manage_patients, can_view_reports
+
+Configuración (settings.USER_IMPORT):
+    'CHUNK_SIZE': 500
+    'WORKERS': None               # procesos para hashear en import_users (None = CPUs);
+                                  # el endpoint HTTP siempre usa un solo proceso
+    'MAX_REPORTED_ERRORS': 1000   # errores incluidos en la respuesta del endpoint
+    'MAX_UPLOAD_BYTES': 10 MB     # tamaño máximo del archivo subido al endpoint
+    'MAX_ROWS': 5000              # filas máximas por archivo subido al endpoint
+
+El endpoint solo valida en la petición (dry_run); la importación real se
+encola en Celery (apps/users/tasks.import_users_file) porque hashear miles de
+contraseñas supera el timeout del worker web. Para archivos más grandes usar
+el comando import_users.
+"""
+
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
+import csv
+import io
+import json
+import logging
+import os
+import secrets
+import time
+
+from django.apps import apps as django_apps
+from django.conf import settings
+from django.contrib.auth.hashers import (
+    UNUSABLE_PASSWORD_PREFIX,
+    UNUSABLE_PASSWORD_SUFFIX_LENGTH,
+    identify_hasher,
+    make_password,
+)
+from django.contrib.auth.password_validation import validate_password
+from django.core.exceptions import ValidationError
+from django.db import IntegrityError, transaction
+
+from apps.core.logging_hooks import AuditLogger
+from apps.doctors.models import Doctor, DoctorScheduleBlock, Specialization, normalize_specialization_name
+from apps.patients.models import Patient
+from apps.patients.services import PatientTimelineService
+
+from .auth_context import invalidate_auth_contexts
+from .models import SecretaryProfile, User
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_IMPORT_SETTINGS = {
+    'CHUNK_SIZE': 500,
+    'WORKERS': None,
+    'MAX_REPORTED_ERRORS': 1000,
+    'MAX_UPLOAD_BYTES': 10 * 1024 * 1024,
+    'MAX_ROWS': 5000,
+}
+
+IMPORTABLE_ROLES = ('client', 'doctor', 'secretary')
+
+USER_FIELDS = ('username', 'email', 'first_name', 'last_name', 'role', 'phone', 'date_of_birth', 'address', 'is_active')
+PATIENT_FIELDS = (
+    'gender', 'blood_type', 'allergies', 'medical_conditions', 'medications',
+    'emergency_contact_name', 'emergency_contact_phone', 'emergency_contact_relationship',
+)
+DOCTOR_FIELDS = (
+    'medical_license', 'specialization', 'years_experience', 'consultation_fee', 'bio',
+    'work_start_time', 'work_end_time', 'work_days',
+)
+SECRETARY_FIELDS = (
+    'employee_id', 'department', 'shift_start', 'shift_end', 'hire_date',
+    'can_manage_appointments', 'can_manage_patients', 'can_view_reports',
+)
+BOOLEAN_FIELDS = ('is_active', 'can_manage_appointments', 'can_manage_patients', 'can_view_reports')
+TRUE_VALUES = ('1', 'true', 't', 'yes', 'y', 'si', 'sí')
+FALSE_VALUES = ('0', 'false', 'f', 'no', 'n')
+
+
+def get_import_settings():
+    import_settings = dict(DEFAULT_IMPORT_SETTINGS)
+    import_settings.update(getattr(settings, 'USER_IMPORT', {}))
+    return import_settings
+
+
+def detect_format(filename, default='csv'):
+    """Formato según la extensión del archivo ('.jsonl'/'.ndjson' -> jsonl)."""
+    if filename and filename.lower().endswith(('.jsonl', '.ndjson')):
+        return 'jsonl'
+    return default
+
+
+def read_rows(stream, file_format='csv'):
+    """
+    Itera (número de fila, datos, error) sobre un stream de texto sin cargarlo
+    completo en memoria. `datos` es None cuando la fila no se pudo leer.
+    """
+    if file_format == 'jsonl':
+        for line_number, line in enumerate(stream, start=1):
+            if not line.strip():
+                continue
+            try:
+                data = json.loads(line)
+            except ValueError as e:
+                yield line_number, None, f'JSON inválido: {e}'
+                continue
+            if not isinstance(data, dict):
+                yield line_number, None, 'Cada línea debe ser un objeto JSON'
+                continue
+            yield line_number, data, None
+    elif file_format == 'csv':
+        reader = csv.DictReader(stream)
+        for data in reader:
+            # La fila 1 es el encabezado
+            yield reader.line_num, data, None
+    else:
+        raise ValueError(f'Formato no soportado: {file_format}')
+
+
+def count_rows(stream, file_format='csv', limit=None):
+    """
+    Cuenta las filas de datos del stream; con `limit` deja de leer al pasar
+    el límite (retorna limit + 1).
+    """
+    total = 0
+    for _ in read_rows(stream, file_format):
+        total += 1
+        if limit is not None and total > limit:
+            break
+    return total
+
+
+def open_upload(uploaded_file):
+    """Stream de texto sobre un archivo subido (acepta BOM de Excel)."""
+    return io.TextIOWrapper(uploaded_file, encoding='utf-8-sig', newline='')
+
+
+def _init_hash_worker():
+    # Con el método 'spawn' el proceso hijo no hereda la configuración de Django
+    if not django_apps.ready:
+        import django
+        django.setup()
+
+
+def _clean_value(field, value):
+    if field in ('password', 'password_hash'):
+        # Los espacios forman parte de la contraseña
+        return value if value else None
+    if isinstance(value, str):
+        value = value.strip()
+        if value == '':
+            return None
+        if field in BOOLEAN_FIELDS:
+            lowered = value.lower()
+            if lowered in TRUE_VALUES:
+                return True
+            if lowered in FALSE_VALUES:
+                return False
+        if field == 'work_days' and not value.startswith('['):
+            return [day.strip().lower() for day in value.split(',') if day.strip()]
+        if field == 'work_days':
+            try:
+                return json.loads(value)
+            except ValueError:
+                return value
+    return value
+
+
+def _pick(data, fields):
+    picked = {}
+    for field in fields:
+        value = _clean_value(field, data.get(field))
+        if value is not None:
+            picked[field] = value
+    return picked
+
+
+def _add_errors(errors, error):
+    if hasattr(error, 'error_dict'):
+        for field, messages in error.message_dict.items():
+            errors.setdefault(field, []).extend(messages)
+    else:
+        errors.setdefault('non_field_errors', []).extend(error.messages)
+
+
+class PendingRow:
+    """Fila validada a la espera de hash e inserción."""
+
+    __slots__ = ('line_number', 'user', 'profile', 'password', 'password_hash')
+
+    def __init__(self, line_number, user, profile, password, password_hash):
+        self.line_number = line_number
+        self.user = user
+        self.profile = profile
+        self.password = password
+        self.password_hash = password_hash
+
+
+class UserImporter:
+    """
+    Importa usuarios y sus perfiles por lotes.
+
+    🎯 Objetivo: Miles de filas por segundo en lugar de una inserción y varias señales por usuario
+    💡 Concepto: Validación y unicidad por lote, hashes en paralelo, bulk_create y efectos de señales en bloque
+    """
+
+    def __init__(self, chunk_size=None, workers=None, dry_run=False, actor=None, max_errors=None):
+        import_settings = get_import_settings()
+        self.chunk_size = chunk_size or import_settings['CHUNK_SIZE']
+        self.workers = workers if workers is not None else (import_settings['WORKERS'] or os.cpu_count() or 1)
+        self.dry_run = dry_run
+        self.actor = actor
+        self.max_errors = max_errors
+
+        self.total_rows = 0
+        self.created = 0
+        self.created_by_role = Counter()
+        self.failed = 0
+        self.errors = []
+        self.elapsed_seconds = 0.0
+
+        # Claves únicas vistas en el archivo, para detectar duplicados entre lotes
+        self._seen = {'username': set(), 'email': set(), 'medical_license': set(), 'employee_id': set()}
+        self._specializations = {}
+        self._pool = None
+
+    # ------------------------------------------------------------------
+    # API pública
+    # ------------------------------------------------------------------
+
+    def run(self, rows, progress=None):
+        """
+        Procesa un iterable de (número de fila, datos, error) como el que produce
+        read_rows(). `progress(importer)` se llama al terminar cada lote.
+        """
+        start = time.perf_counter()
+        try:
+            chunk = []
+            for row in rows:
+                chunk.append(row)
+                if len(chunk) >= self.chunk_size:
+                    self._process_chunk(chunk)
+                    chunk = []
+                    if progress:
+                        progress(self)
+            if chunk:
+                self._process_chunk(chunk)
+                if progress:
+                    progress(self)
+        finally:
+            if self._pool is not None:
+                self._pool.shutdown()
+                self._pool = None
+            self.elapsed_seconds = time.perf_counter() - start
+        return self.summary()
+
+    def summary(self):
+        self.errors.sort(key=lambda error: error['row'])
+        errors = self.errors if self.max_errors is None else self.errors[:self.max_errors]
+        return {
+            'dry_run': self.dry_run,
+            'total_rows': self.total_rows,
+            'created': self.created,
+            'created_by_role': dict(self.created_by_role),
+            'failed': self.failed,
+            'elapsed_seconds': round(self.elapsed_seconds, 3),
+            'rows_per_second': round(self.total_rows / self.elapsed_seconds, 1) if self.elapsed_seconds else None,
+            'errors': errors,
+            'errors_truncated': len(errors) < len(self.errors),
+        }
+
+    # ------------------------------------------------------------------
+    # Validación
+    # ------------------------------------------------------------------
+
+    def _fail(self, line_number, data, errors):
+        self.failed += 1
+        self.errors.append({
+            'row': line_number,
+            'username': (data or {}).get('username'),
+            'email': (data or {}).get('email'),
+            'errors': errors,
+        })
+
+    def _build_row(self, line_number, data):
+        """Construye y valida (sin consultas) el usuario y su perfil de una fila."""
+        errors = {}
+        user_data = _pick(data, USER_FIELDS)
+        user_data.setdefault('role', 'client')
+        if user_data['role'] not in IMPORTABLE_ROLES:
+            errors['role'] = [f"Rol no permitido para importación: '{user_data['role']}'"]
+        if 'email' in user_data:
+            user_data['email'] = User.objects.normalize_email(user_data['email'])
+        if 'username' in user_data:
+            user_data['username'] = User.normalize_username(user_data['username'])
+
+        user = User(**user_data)
+        try:
+            user.clean_fields(exclude=['password'])
+        except ValidationError as e:
+            _add_errors(errors, e)
+
+        password = _clean_value('password', data.get('password'))
+        password_hash = _clean_value('password_hash', data.get('password_hash'))
+        if password is not None:
+            try:
+                validate_password(password, user=user)
+            except ValidationError as e:
+                errors.setdefault('password', []).extend(e.messages)
+        elif password_hash is not None:
+            try:
+                identify_hasher(password_hash)
+            except ValueError:
+                errors.setdefault('password_hash', []).append('Formato de hash no reconocido.')
+
+        profile = None
+        if user.role == 'client':
+            profile = Patient(user=user, **{**Patient.default_data_for(user), **_pick(data, PATIENT_FIELDS)})
+            exclude = ['user']
+        elif user.role == 'doctor':
+            doctor_data = _pick(data, DOCTOR_FIELDS)
+            if 'specialization' in doctor_data:
+                doctor_data['specialization'] = normalize_specialization_name(doctor_data['specialization'])
+            profile = Doctor(user=user, **doctor_data)
+            # work_days vacío es válido: se usan los días por defecto de la clínica
+            exclude = ['user', 'specialty'] if profile.work_days else ['user', 'specialty', 'work_days']
+        elif user.role == 'secretary':
+            # Sin employee_id en la fila se genera tras insertar al usuario
+            secretary_data = {**SecretaryProfile.default_data_for(user), **_pick(data, SECRETARY_FIELDS)}
+            profile = SecretaryProfile(user=user, **secretary_data)
+            exclude = ['user'] if profile.employee_id else ['user', 'employee_id']
+        if profile is not None:
+            try:
+                profile.clean_fields(exclude=exclude)
+            except ValidationError as e:
+                _add_errors(errors, e)
+
+        return PendingRow(line_number, user, profile, password, password_hash), errors
+
+    def _unique_values(self, pending):
+        values = {
+            'username': [row.user.username for row in pending],
+            'email': [row.user.email for row in pending],
+            'medical_license': [
+                row.profile.medical_license for row in pending if isinstance(row.profile, Doctor)
+            ],
+            'employee_id': [
+                row.profile.employee_id for row in pending
+                if isinstance(row.profile, SecretaryProfile) and row.profile.employee_id
+            ],
+        }
+        return values
+
+    def _existing_values(self, values):
+        """Una consulta por clave única para todo el lote."""
+        lookups = {
+            'username': (User.objects, 'username'),
+            'email': (User.objects, 'email'),
+            'medical_license': (Doctor.objects, 'medical_license'),
+            'employee_id': (SecretaryProfile.objects, 'employee_id'),
+        }
+        existing = {}
+        for key, (manager, field) in lookups.items():
+            existing[key] = set(
+                manager.filter(**{f'{field}__in': values[key]}).values_list(field, flat=True)
+            ) if values[key] else set()
+        return existing
+
+    def _validate_chunk(self, chunk):
+        pending = []
+        for line_number, data, read_error in chunk:
+            self.total_rows += 1
+            if read_error:
+                self._fail(line_number, data, {'non_field_errors': [read_error]})
+                continue
+            row, errors = self._build_row(line_number, data)
+            if errors:
+                self._fail(line_number, data, errors)
+            else:
+                pending.append((row, data))
+
+        existing = self._existing_values(self._unique_values([row for row, _ in pending]))
+        valid = []
+        for row, data in pending:
+            keys = {'username': row.user.username, 'email': row.user.email}
+            if isinstance(row.profile, Doctor):
+                keys['medical_license'] = row.profile.medical_license
+            elif isinstance(row.profile, SecretaryProfile) and row.profile.employee_id:
+                keys['employee_id'] = row.profile.employee_id
+
+            errors = {}
+            for key, value in keys.items():
+                if value in existing[key]:
+                    errors[key] = [f'Ya existe un registro con {key} = {value}.']
+                elif value in self._seen[key]:
+                    errors[key] = [f'Valor duplicado en el archivo: {value}.']
+            if errors:
+                self._fail(row.line_number, data, errors)
+                continue
+            for key, value in keys.items():
+                self._seen[key].add(value)
+            valid.append(row)
+        return valid
+
+    # ------------------------------------------------------------------
+    # Inserción
+    # ------------------------------------------------------------------
+
+    def _hash_passwords(self, rows):
+        plain = [row for row in rows if row.password is not None]
+        if self.workers > 1 and len(plain) > 1:
+            if self._pool is None:
+                self._pool = ProcessPoolExecutor(max_workers=self.workers, initializer=_init_hash_worker)
+            chunksize = max(1, len(plain) // (self.workers * 4))
+            hashes = self._pool.map(make_password, [row.password for row in plain], chunksize=chunksize)
+        else:
+            hashes = map(make_password, [row.password for row in plain])
+        for row, password_hash in zip(plain, hashes):
+            row.password_hash = password_hash
+        for row in rows:
+            # Equivalente a make_password(None) sin pasar por get_random_string
+            row.user.password = row.password_hash or (
+                UNUSABLE_PASSWORD_PREFIX + secrets.token_hex(UNUSABLE_PASSWORD_SUFFIX_LENGTH // 2)
+            )
+            row.password = None
+
+    def _resolve_specializations(self, doctors):
+        """
+        Catálogo de especialidades por nombre, con el mismo criterio que Doctor.save().
+        Se llama fuera de la transacción del lote: si el lote se revierte, las
+        especialidades creadas siguen existiendo y el cache no queda con IDs inválidos.
+        """
+        names = {doctor.specialization for doctor in doctors} - set(self._specializations)
+        for name in names:
+            self._specializations[name] = Specialization.get_or_create_from_name(name)
+        for doctor in doctors:
+            specialty = self._specializations[doctor.specialization]
+            if specialty is not None:
+                doctor.specialty = specialty
+                doctor.specialization = specialty.name
+
+    def _insert_chunk(self, rows):
+        users = User.objects.bulk_create([row.user for row in rows])
+        if users and users[0].pk is None:
+            # Motores sin RETURNING: recuperar los IDs por username
+            ids = dict(User.objects.filter(
+                username__in=[user.username for user in users]
+            ).values_list('username', 'id'))
+            for user in users:
+                user.pk = ids[user.username]
+
+        patients, doctors, secretaries = [], [], []
+        for row in rows:
+            profile = row.profile
+            if profile is None:
+                continue
+            profile.user = row.user
+            if isinstance(profile, Patient):
+                patients.append(profile)
+            elif isinstance(profile, Doctor):
+                doctors.append(profile)
+            else:
+                if not profile.employee_id:
+                    profile.employee_id = SecretaryProfile.default_data_for(row.user)['employee_id']
+                secretaries.append(profile)
+
+        Patient.objects.bulk_create(patients)
+        SecretaryProfile.objects.bulk_create(secretaries)
+        if doctors:
+            Doctor.objects.bulk_create(doctors)
+            DoctorScheduleBlock.objects.bulk_create(
+                [block for doctor in doctors for block in doctor.build_schedule_blocks()]
+            )
+            for specialty_id, total in Counter(doctor.specialty_id for doctor in doctors).items():
+                Specialization.adjust_counters(specialty_id, doctors=total)
+
+        # Efectos de los receivers post_save omitidos por bulk_create
+        invalidate_auth_contexts([user.pk for user in users])
+        PatientTimelineService.invalidate_many([patient.pk for patient in patients])
+        roles = Counter(user.role for user in users)
+        AuditLogger.log_action(
+            action="USER_BULK_CREATED",
+            user=self.actor,
+            model_name="User",
+            details=(
+                f"{len(users)} usuarios (IDs {users[0].pk}-{users[-1].pk}), "
+                + ", ".join(f"{role}: {total}" for role, total in sorted(roles.items()))
+            )
+        )
+        return roles
+
+    def _process_chunk(self, chunk):
+        rows = self._validate_chunk(chunk)
+        if not rows:
+            return
+        if self.dry_run:
+            self.created_by_role.update(row.user.role for row in rows)
+            self.created += len(rows)
+            return
+
+        self._hash_passwords(rows)
+        self._resolve_specializations([row.profile for row in rows if isinstance(row.profile, Doctor)])
+        try:
+            with transaction.atomic():
+                roles = self._insert_chunk(rows)
+        except IntegrityError as e:
+            logger.error(f"❌ Lote de importación revertido ({len(rows)} filas): {e}")
+            for row in rows:
+                self._fail(row.line_number, {'username': row.user.username, 'email': row.user.email}, {
+                    'non_field_errors': [f'Lote revertido por error de integridad: {e}']
+                })
+            return
+
+        self.created += len(rows)
+        self.created_by_role.update(roles)
+        logger.info(f"📥 Lote importado: {len(rows)} usuarios ({self.total_rows} filas procesadas)")
@@ -0,0 +1,105 @@
+"""
+Bloqueo de login por intentos fallidos, guardado en cache.
+
+Cada intento fallido incrementa un contador por identificador (email o
+usuario, en minúsculas) y otro por IP. Al llegar al máximo dentro de
+WINDOW_SECONDS, la clave queda bloqueada durante LOCKOUT_SECONDS y el login
+se rechaza sin consultar la base de datos ni calcular el hash. Un login
+exitoso reinicia el contador del identificador.
+
+Configuración (settings.LOGIN_LOCKOUT):
+    'ENABLED': True
+    'MAX_ATTEMPTS': 5          # por email/usuario
+    'IP_MAX_ATTEMPTS': 50      # por IP (varios usuarios desde el mismo origen)
+    'WINDOW_SECONDS': 900
+    'LOCKOUT_SECONDS': 900
+"""
+
+import hashlib
+import logging
+import math
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+
+from core.network import get_client_ip
+
+logger = logging.getLogger('security')
+
+DEFAULT_LOCKOUT_SETTINGS = {
+    'ENABLED': True,
+    'MAX_ATTEMPTS': 5,
+    'IP_MAX_ATTEMPTS': 50,
+    'WINDOW_SECONDS': 900,
+    'LOCKOUT_SECONDS': 900,
+}
+
+
+def get_lockout_settings():
+    lockout_settings = dict(DEFAULT_LOCKOUT_SETTINGS)
+    lockout_settings.update(getattr(settings, 'LOGIN_LOCKOUT', {}))
+    return lockout_settings
+
+
+def get_lockout_ip(request):
+    """IP del cliente para el contador por IP (ver core/network.py: TRUSTED_PROXY_COUNT)."""
+    return get_client_ip(request)
+
+
+def _subjects(identifier, ip_address, lockout_settings):
+    """[(clave base, máximo de intentos)] para el identificador y la IP."""
+    subjects = []
+    if identifier:
+        digest = hashlib.sha256(identifier.strip().lower().encode()).hexdigest()[:32]
+        subjects.append((f'login_lockout:id:{digest}', lockout_settings['MAX_ATTEMPTS']))
+    if ip_address:
+        subjects.append((f'login_lockout:ip:{ip_address}', lockout_settings['IP_MAX_ATTEMPTS']))
+    return subjects
+
+
+def get_lockout_remaining(identifier, ip_address=None):
+    """Segundos de bloqueo restantes (0 si se puede intentar el login)."""
+    lockout_settings = get_lockout_settings()
+    if not lockout_settings['ENABLED']:
+        return 0
+    lock_keys = [f'{key}:locked' for key, _ in _subjects(identifier, ip_address, lockout_settings)]
+    locked_until = max(cache.get_many(lock_keys).values(), default=0)
+    return max(0, math.ceil(locked_until - time.time()))
+
+
+def register_failure(identifier, ip_address=None):
+    """
+    Registra un intento fallido. Retorna los segundos de bloqueo si este
+    intento alcanzó el máximo, o 0.
+    """
+    lockout_settings = get_lockout_settings()
+    if not lockout_settings['ENABLED']:
+        return 0
+
+    lockout_seconds = lockout_settings['LOCKOUT_SECONDS']
+    retry_after = 0
+    for key, max_attempts in _subjects(identifier, ip_address, lockout_settings):
+        counter_key = f'{key}:failures'
+        cache.add(counter_key, 0, lockout_settings['WINDOW_SECONDS'])
+        try:
+            failures = cache.incr(counter_key)
+        except ValueError:
+            # La clave expiró entre add e incr
+            cache.set(counter_key, 1, lockout_settings['WINDOW_SECONDS'])
+            failures = 1
+        if failures >= max_attempts:
+            cache.set(f'{key}:locked', time.time() + lockout_seconds, lockout_seconds)
+            cache.delete(counter_key)
+            retry_after = lockout_seconds
+            logger.warning(f"🔒 Login bloqueado por {lockout_seconds}s tras {failures} intentos fallidos ({key})")
+    return retry_after
+
+
+def reset_failures(identifier):
+    """Reinicia el contador del identificador tras un login exitoso."""
+    lockout_settings = get_lockout_settings()
+    if not lockout_settings['ENABLED']:
+        return
+    for key, _ in _subjects(identifier, None, lockout_settings):
+        cache.delete(f'{key}:failures')
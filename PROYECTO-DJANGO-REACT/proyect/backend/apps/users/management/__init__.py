@@ -0,0 +1 @@
+# Management commands for users app
\ No newline at end of file
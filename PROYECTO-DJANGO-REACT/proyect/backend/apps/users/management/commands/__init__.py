@@ -0,0 +1 @@
+# Custom management commands
\ No newline at end of file
@@ -0,0 +1,112 @@
+"""
+Comando para medir el rendimiento del login (CustomTokenObtainPairView).
+
+Crea usuarios temporales, ejecuta logins exitosos y fallidos y reporta
+logins por segundo, latencia (p50/p95/máx) y consultas SQL por login, una
+ronda por cada costo de hash indicado. Todo corre dentro de una transacción
+que se revierte al final y con el bloqueo por intentos fallidos desactivado.
+
+Uso:
+    python manage.py benchmark_login
+    python manage.py benchmark_login --logins 500 --users 50
+    python manage.py benchmark_login --hasher-iterations 100000 390000 720000
+"""
+
+import statistics
+import time
+
+from django.conf import settings
+from django.contrib.auth.hashers import make_password
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+from django.test.utils import CaptureQueriesContext, override_settings
+from rest_framework.test import APIRequestFactory
+
+from apps.users.models import User
+from apps.users.views import CustomTokenObtainPairView
+
+PASSWORD = 'Benchmark-Login-1'
+
+
+class _Rollback(Exception):
+    pass
+
+
+class Command(BaseCommand):
+    help = 'Mide logins por segundo, latencia y consultas por login'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--users', type=int, default=20, help='Usuarios temporales (default: 20)')
+        parser.add_argument('--logins', type=int, default=100, help='Logins exitosos por ronda (default: 100)')
+        parser.add_argument('--failures', type=int, default=20, help='Logins con contraseña incorrecta por ronda (default: 20)')
+        parser.add_argument(
+            '--hasher-iterations',
+            type=int,
+            nargs='+',
+            help='Costos de PBKDF2 a comparar (default: PASSWORD_HASHER_ITERATIONS)'
+        )
+
+    def handle(self, *args, **options):
+        costs = options['hasher_iterations'] or [settings.PASSWORD_HASHER_ITERATIONS]
+        lockout_disabled = dict(getattr(settings, 'LOGIN_LOCKOUT', {}), ENABLED=False)
+
+        self.stdout.write(f"🔐 Benchmark de login: {options['logins']} exitosos + {options['failures']} fallidos por ronda\n")
+        for iterations in costs:
+            with override_settings(PASSWORD_HASHER_ITERATIONS=iterations, LOGIN_LOCKOUT=lockout_disabled):
+                try:
+                    with transaction.atomic():
+                        self.run_round(iterations, options)
+                        raise _Rollback()
+                except _Rollback:
+                    pass
+
+    def run_round(self, iterations, options):
+        password_hash = make_password(PASSWORD)
+        users = User.objects.bulk_create([
+            User(
+                username=f'bench_login_{i}',
+                email=f'bench_login_{i}@example.com',
+                password=password_hash,
+                role='client'
+            )
+            for i in range(options['users'])
+        ])
+
+        factory = APIRequestFactory()
+        view = CustomTokenObtainPairView.as_view()
+
+        def login(index, password):
+            request = factory.post(
+                '/api/users/auth/login/',
+                {'email_or_username': users[index % len(users)].email, 'password': password},
+                format='json'
+            )
+            start = time.perf_counter()
+            with CaptureQueriesContext(connection) as queries:
+                response = view(request)
+            return (time.perf_counter() - start) * 1000, len(queries), response.status_code
+
+        success = [login(i, PASSWORD) for i in range(options['logins'])]
+        failed = [login(i, PASSWORD + 'x') for i in range(options['failures'])]
+
+        self.stdout.write(self.style.MIGRATE_HEADING(f"PBKDF2 {iterations} iteraciones"))
+        self.report('exitosos', success, expected_status=200)
+        self.report('fallidos', failed, expected_status=401)
+
+    def report(self, label, results, expected_status):
+        if not results:
+            return
+        durations = sorted(duration for duration, _, _ in results)
+        queries = [count for _, count, _ in results]
+        unexpected = sum(1 for _, _, status_code in results if status_code != expected_status)
+        total_seconds = sum(durations) / 1000
+
+        self.stdout.write(
+            f"  {label:<9} {len(results) / total_seconds:8.1f} logins/s | "
+            f"p50 {statistics.median(durations):7.1f}ms | "
+            f"p95 {durations[int(len(durations) * 0.95) - 1]:7.1f}ms | "
+            f"máx {durations[-1]:7.1f}ms | "
+            f"{statistics.mean(queries):.1f} consultas/login"
+        )
+        if unexpected:
+            self.stdout.write(self.style.WARNING(f"  ⚠️ {unexpected} respuestas con estado distinto de {expected_status}"))
@@ -0,0 +1,82 @@
+"""
+Comando para importar usuarios, pacientes, doctores y secretarios/as de forma masiva.
+
+Lee el archivo en streaming (CSV con encabezado o JSONL, un objeto por línea),
+valida e inserta por lotes y reporta los errores por número de fila. Las
+columnas reconocidas están descritas en apps/users/importers.py.
+
+Uso:
+    python manage.py import_users usuarios.csv
+    python manage.py import_users usuarios.jsonl --chunk-size 1000 --workers 8
+    python manage.py import_users usuarios.csv --dry-run --report errores.json
+    cat usuarios.jsonl | python manage.py import_users - --format jsonl
+"""
+
+import json
+import sys
+
+from django.core.management.base import BaseCommand, CommandError
+
+from apps.users.importers import UserImporter, detect_format, read_rows
+
+ERRORS_SHOWN = 20
+
+
+class Command(BaseCommand):
+    help = 'Importa usuarios y sus perfiles desde un archivo CSV o JSONL'
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help="Archivo a importar ('-' para leer de stdin)")
+        parser.add_argument('--format', choices=['csv', 'jsonl'], help='Formato del archivo (default: según la extensión)')
+        parser.add_argument('--chunk-size', type=int, help='Filas por lote (default: USER_IMPORT["CHUNK_SIZE"])')
+        parser.add_argument('--workers', type=int, help='Procesos para hashear contraseñas (default: USER_IMPORT["WORKERS"] o CPUs)')
+        parser.add_argument('--dry-run', action='store_true', help='Solo validar, sin crear registros')
+        parser.add_argument('--report', help='Guardar el resultado completo (con todos los errores) en un archivo JSON')
+
+    def handle(self, *args, **options):
+        path = options['path']
+        file_format = options['format'] or detect_format(path)
+        importer = UserImporter(
+            chunk_size=options['chunk_size'],
+            workers=options['workers'],
+            dry_run=options['dry_run'],
+        )
+
+        mode = 'validación (dry-run)' if options['dry_run'] else 'importación'
+        self.stdout.write(f"📥 Iniciando {mode} de {path} ({file_format}, lotes de {importer.chunk_size}, {importer.workers} procesos)")
+
+        try:
+            if path == '-':
+                result = importer.run(read_rows(sys.stdin, file_format), progress=self.progress)
+            else:
+                with open(path, newline='', encoding='utf-8-sig') as stream:
+                    result = importer.run(read_rows(stream, file_format), progress=self.progress)
+        except OSError as e:
+            raise CommandError(f'No se pudo leer el archivo: {e}')
+
+        if options['report']:
+            with open(options['report'], 'w', encoding='utf-8') as report:
+                json.dump(result, report, ensure_ascii=False, indent=2)
+
+        self.print_summary(result, options['report'])
+
+    def progress(self, importer):
+        self.stdout.write(f"  {importer.total_rows} filas procesadas, {importer.created} creadas, {importer.failed} con errores")
+
+    def print_summary(self, result, report_path):
+        verb = 'válidas' if result['dry_run'] else 'creadas'
+        roles = ', '.join(f"{role}: {total}" for role, total in sorted(result['created_by_role'].items())) or '-'
+        self.stdout.write(self.style.SUCCESS(
+            f"✅ {result['created']} filas {verb} de {result['total_rows']} ({roles}) "
+            f"en {result['elapsed_seconds']}s ({result['rows_per_second'] or 0} filas/s)"
+        ))
+
+        if not result['failed']:
+            return
+        self.stdout.write(self.style.WARNING(f"⚠️ {result['failed']} filas con errores"))
+        for error in result['errors'][:ERRORS_SHOWN]:
+            messages = '; '.join(f"{field}: {' '.join(field_messages)}" for field, field_messages in error['errors'].items())
+            self.stdout.write(f"  fila {error['row']} ({error['username'] or error['email'] or '-'}): {messages}")
+        if result['failed'] > ERRORS_SHOWN:
+            hint = f" (ver {report_path})" if report_path else ' (use --report para obtener el detalle completo)'
+            self.stdout.write(f"  ... {result['failed'] - ERRORS_SHOWN} errores más{hint}")
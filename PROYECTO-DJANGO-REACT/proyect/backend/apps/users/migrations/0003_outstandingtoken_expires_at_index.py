@@ -0,0 +1,26 @@
+# Generated by Django 5.0.1 on 2026-10-19 09:00
+
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+    """
+    Índice sobre token_blacklist_outstandingtoken.expires_at para la depuración
+    periódica de tokens expirados (apps/users/tasks.py). La tabla pertenece a
+    simplejwt, así que el índice se crea con SQL.
+    """
+
+    dependencies = [
+        ('users', '0002_add_secretary_fields'),
+        ('token_blacklist', '0013_alter_blacklistedtoken_options_and_more'),
+    ]
+
+    operations = [
+        migrations.RunSQL(
+            sql=(
+                'CREATE INDEX IF NOT EXISTS token_blacklist_outstandingtoken_expires_at_idx '
+                'ON token_blacklist_outstandingtoken (expires_at);'
+            ),
+            reverse_sql='DROP INDEX IF EXISTS token_blacklist_outstandingtoken_expires_at_idx;',
+        ),
+    ]
@@ -107,6 +107,15 @@ class User(AbstractUser):
         """
         return self.role == 'secretary'
 
+    @property
+    def auth_context(self):
+        """
+        Rol e IDs de perfil cacheados (ver apps/users/auth_context.py).
+        Evita cargar doctor / patient_profile / secretary_profile para comparar IDs.
+        """
+        from .auth_context import get_auth_context
+        return get_auth_context(self)
+
 
 class PasswordResetToken(models.Model):
     """
@@ -327,6 +336,25 @@ class SecretaryProfile(models.Model):
     def __str__(self):
         return f"Secretario/a: {self.user.get_full_name()} - {self.department}"
     
+    @staticmethod
+    def default_data_for(user):
+        """
+        Datos iniciales del perfil creado automáticamente para un usuario 'secretary'.
+        El employee_id se genera a partir del ID del usuario (si ya fue guardado).
+        """
+        data = {
+            'department': 'Administración',  # Departamento por defecto
+            'shift_start': '08:00',  # Turno por defecto 8:00 AM
+            'shift_end': '17:00',    # Turno por defecto 5:00 PM
+            'can_manage_appointments': True,
+            'can_manage_patients': True,
+            'can_view_reports': False,  # Por defecto no puede ver reportes
+            'hire_date': None  # Se puede establecer después
+        }
+        if user.pk is not None:
+            data['employee_id'] = f"SEC{user.pk:04d}"
+        return data
+    
     def get_full_name(self):
         """
         Retorna el nombre completo del secretario/a.
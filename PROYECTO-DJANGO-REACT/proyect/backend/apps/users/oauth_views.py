@@ -8,7 +8,7 @@ from rest_framework import status
 from rest_framework.decorators import api_view, permission_classes
 from rest_framework.permissions import AllowAny
 from rest_framework.response import Response
-from rest_framework_simplejwt.tokens import RefreshToken
+from .tokens import CachedBlacklistRefreshToken
 from google.auth.transport import requests as google_requests
 from google.oauth2 import id_token
 
@@ -112,7 +112,7 @@ def google_auth(request):
                 user.save()
         
         # Generar tokens JWT
-        refresh = RefreshToken.for_user(user)
+        refresh = CachedBlacklistRefreshToken.for_user(user)
         access_token = refresh.access_token
         
         # Preparar respuesta
@@ -4,6 +4,8 @@ Permisos personalizados para la aplicación de usuarios.
 
 from rest_framework import permissions
 
+from core.permissions import is_object_owner
+
 
 class IsSecretary(permissions.BasePermission):
     """
@@ -31,7 +33,7 @@ class IsSecretary(permissions.BasePermission):
         
         # Si el objeto tiene un campo 'user', verificar que sea el usuario actual
         if hasattr(obj, 'user'):
-            return obj.user == request.user
+            return is_object_owner(obj, request.user)
         
         # Si el objeto es el usuario mismo
         if hasattr(obj, 'id') and hasattr(request.user, 'id'):
@@ -66,7 +68,7 @@ class IsDoctor(permissions.BasePermission):
         
         # Si el objeto tiene un campo 'user', verificar que sea el usuario actual
         if hasattr(obj, 'user'):
-            return obj.user == request.user
+            return is_object_owner(obj, request.user)
         
         # Si el objeto es el usuario mismo
         if hasattr(obj, 'id') and hasattr(request.user, 'id'):
@@ -101,7 +103,7 @@ class IsPatient(permissions.BasePermission):
         
         # Si el objeto tiene un campo 'user', verificar que sea el usuario actual
         if hasattr(obj, 'user'):
-            return obj.user == request.user
+            return is_object_owner(obj, request.user)
         
         # Si el objeto es el usuario mismo
         if hasattr(obj, 'id') and hasattr(request.user, 'id'):
@@ -126,7 +128,7 @@ class IsOwnerOrReadOnly(permissions.BasePermission):
         
         # Permisos de escritura solo para el propietario del objeto
         if hasattr(obj, 'user'):
-            return obj.user == request.user
+            return is_object_owner(obj, request.user)
         
         return obj == request.user
 
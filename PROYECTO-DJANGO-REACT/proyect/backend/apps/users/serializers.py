@@ -1,6 +1,5 @@
-from rest_framework import serializers
+from rest_framework import exceptions, serializers
 from rest_framework_simplejwt.serializers import TokenObtainPairSerializer
-from rest_framework_simplejwt.tokens import RefreshToken
 from django.contrib.auth.password_validation import validate_password
 from django.contrib.auth import authenticate
 from django.core.mail import send_mail
@@ -8,7 +7,9 @@ from django.template.loader import render_to_string
 from django.utils.html import strip_tags
 from django.conf import settings
 from django.utils import timezone
+from .lockout import get_lockout_ip, get_lockout_remaining, register_failure, reset_failures
 from .models import User, PasswordResetToken, SecretaryProfile
+from .tokens import CachedBlacklistRefreshToken
 
 
 class CustomTokenObtainPairSerializer(serializers.Serializer):
@@ -20,117 +21,87 @@ class CustomTokenObtainPairSerializer(serializers.Serializer):
     password = serializers.CharField(write_only=True)
     
     def validate(self, attrs):
-        try:
-            email_or_username = attrs.get('email_or_username')
-            password = attrs.get('password')
-            
-            print(f"Debug - attrs recibidos: {attrs}")
-            print(f"Debug - email_or_username: {email_or_username}")
-            print(f"Debug - password: {password}")
-            
-            if email_or_username and password:
-                # Debug: imprimir información
-                print(f"Intentando autenticar: {email_or_username}")
-                print(f"Request en context: {self.context.get('request')}")
-                
-                # 🔍 Primero verificar si el usuario existe con esas credenciales
-                from django.contrib.auth import get_user_model
-                from django.contrib.auth.hashers import check_password
-                
-                User = get_user_model()
-                user = None
-                
-                # Buscar usuario por email o username
-                try:
-                    if '@' in email_or_username:
-                        user_candidate = User.objects.get(email=email_or_username)
-                    else:
-                        user_candidate = User.objects.get(username=email_or_username)
-                    
-                    # Verificar contraseña
-                    if check_password(password, user_candidate.password):
-                        user = user_candidate
-                        print(f"✅ Credenciales válidas para: {user.email}")
-                    else:
-                        print(f"❌ Contraseña incorrecta para: {email_or_username}")
-                        
-                except User.DoesNotExist:
-                    print(f"❌ Usuario no encontrado: {email_or_username}")
-                
-                print(f"Resultado de validación: {user}")
-                
-                if user:
-                    # ✅ Credenciales válidas - ahora validar estados
-                    if not user.is_active:
-                        raise serializers.ValidationError(
-                            'La cuenta de usuario está desactivada.'
-                        )
-                    
-                    # 🔒 Validar si es un doctor y si puede acceder al sistema
-                    if user.role == 'doctor':
-                        try:
-                            from apps.doctors.models import Doctor
-                            doctor = Doctor.objects.get(user=user)
-                            if not doctor.can_access_system:
-                                raise serializers.ValidationError(
-                                    'Cuenta deshabilitada: Su acceso como doctor ha sido suspendido. Contacte al administrador del sistema.'
-                                )
-                        except Doctor.DoesNotExist:
-                            raise serializers.ValidationError(
-                                'No se encontró el perfil de doctor asociado.'
-                            )
-                    
-                    print("Debug - Generando tokens...")
-                    # Generar tokens manualmente
-                    refresh = RefreshToken.for_user(user)
-                    access_token = refresh.access_token
-                    
-                    print(f"Debug - Refresh token: {type(refresh)}")
-                    print(f"Debug - Access token: {type(access_token)}")
-                    
-                    # Preparar la respuesta con tokens y datos del usuario
-                    user_data = {
-                        'id': user.id,
-                        'username': user.username,
-                        'email': user.email,
-                        'first_name': user.first_name,
-                        'last_name': user.last_name,
-                        'role': user.role,
-                        'is_staff': user.is_staff,
-                        'is_superuser': user.is_superuser,
-                    }
-                    
-                    # Si el usuario es un paciente, incluir el patient_profile_id
-                    if user.role == 'client':
-                        try:
-                            from apps.patients.models import Patient
-                            patient_profile = Patient.objects.get(user=user)
-                            user_data['patient_profile_id'] = patient_profile.id
-                        except Patient.DoesNotExist:
-                            # Si no tiene perfil de paciente, no incluir el campo
-                            pass
-                    
-                    data = {
-                        'refresh': str(refresh),
-                        'access': str(access_token),
-                        'user': user_data
-                    }
-                    
-                    print(f"Debug - Data preparada: {data}")
-                    return data
-                else:
-                    raise serializers.ValidationError(
-                        'Credenciales inválidas. Verifique su email/usuario y contraseña.'
-                    )
-            else:
-                raise serializers.ValidationError(
-                    'Debe proporcionar email/usuario y contraseña.'
-                )
-        except Exception as e:
-            print(f"❌ Error en validación: {str(e)}")
+        email_or_username = attrs.get('email_or_username')
+        password = attrs.get('password')
+        
+        if not email_or_username or not password:
+            raise serializers.ValidationError(
+                'Debe proporcionar email/usuario y contraseña.'
+            )
+        
+        request = self.context.get('request')
+        ip_address = get_lockout_ip(request) if request is not None else None
+        
+        # 🔒 Rechazar sin tocar la base de datos si la cuenta o la IP están bloqueadas
+        retry_after = get_lockout_remaining(email_or_username, ip_address)
+        if retry_after:
+            raise exceptions.Throttled(wait=retry_after)
+        
+        user = self.get_user(email_or_username)
+        
+        if user is None:
+            # Calcular un hash igualmente para no revelar si el usuario existe
+            User().set_password(password)
+        if user is None or not user.check_password(password):
+            retry_after = register_failure(email_or_username, ip_address)
+            if retry_after:
+                raise exceptions.Throttled(wait=retry_after)
             raise serializers.ValidationError(
-                'Error en la autenticación. Intente nuevamente.'
+                'Credenciales inválidas. Verifique su email/usuario y contraseña.'
             )
+        
+        reset_failures(email_or_username)
+        
+        # ✅ Credenciales válidas - ahora validar estados
+        if not user.is_active:
+            raise serializers.ValidationError(
+                'La cuenta de usuario está desactivada.'
+            )
+        
+        # 🔒 Validar si es un doctor y si puede acceder al sistema
+        if user.role == 'doctor':
+            doctor = getattr(user, 'doctor', None)
+            if doctor is None:
+                raise serializers.ValidationError(
+                    'No se encontró el perfil de doctor asociado.'
+                )
+            if not doctor.can_access_system:
+                raise serializers.ValidationError(
+                    'Cuenta deshabilitada: Su acceso como doctor ha sido suspendido. Contacte al administrador del sistema.'
+                )
+        
+        refresh = CachedBlacklistRefreshToken.for_user(user)
+        
+        # Preparar la respuesta con tokens y datos del usuario
+        user_data = {
+            'id': user.id,
+            'username': user.username,
+            'email': user.email,
+            'first_name': user.first_name,
+            'last_name': user.last_name,
+            'role': user.role,
+            'is_staff': user.is_staff,
+            'is_superuser': user.is_superuser,
+        }
+        
+        # Si el usuario es un paciente, incluir el patient_profile_id
+        if user.role == 'client':
+            patient_profile = getattr(user, 'patient_profile', None)
+            if patient_profile is not None:
+                user_data['patient_profile_id'] = patient_profile.id
+        
+        return {
+            'refresh': str(refresh),
+            'access': str(refresh.access_token),
+            'user': user_data
+        }
+    
+    def get_user(self, email_or_username):
+        """
+        Usuario con sus perfiles de doctor y paciente en una sola consulta.
+        """
+        lookup = {'email': email_or_username} if '@' in email_or_username else {'username': email_or_username}
+        return User.objects.select_related('doctor', 'patient_profile').filter(**lookup).first()
 
 
 class SecretaryCreateSerializer(serializers.ModelSerializer):
@@ -6,7 +6,10 @@ Maneja la creación automática de perfiles según el rol del usuario.
 from django.db.models.signals import post_save, post_delete
 from django.dispatch import receiver
 from django.contrib.auth import get_user_model
+from rest_framework_simplejwt.token_blacklist.models import BlacklistedToken
 from .models import SecretaryProfile
+from .auth_context import invalidate_auth_context
+from .tokens import mark_blacklisted
 import logging
 
 User = get_user_model()
@@ -20,20 +23,8 @@ def create_secretary_profile(sender, instance, created, **kwargs):
     """
     if created and instance.role == 'secretary':
         try:
-            # Generar employee_id único basado en el ID del usuario
-            employee_id = f"SEC{instance.id:04d}"
-            
-            SecretaryProfile.objects.create(
-                user=instance,
-                employee_id=employee_id,
-                department='Administración',  # Departamento por defecto
-                shift_start='08:00',  # Turno por defecto 8:00 AM
-                shift_end='17:00',    # Turno por defecto 5:00 PM
-                can_manage_appointments=True,
-                can_manage_patients=True,
-                can_view_reports=False,  # Por defecto no puede ver reportes
-                hire_date=None  # Se puede establecer después
-            )
+            # employee_id único basado en el ID del usuario y turno por defecto
+            SecretaryProfile.objects.create(user=instance, **SecretaryProfile.default_data_for(instance))
             
             logger.info(f"✅ SecretaryProfile creado para usuario: {instance.username} (ID: {instance.id})")
             
@@ -104,4 +95,32 @@ def delete_secretary_profile(sender, instance, **kwargs):
     El SecretaryProfile se elimina automáticamente por CASCADE, pero podemos hacer logging.
     """
     if instance.role == 'secretary':
-        logger.info(f"🗑️ Usuario secretary eliminado: {instance.username} (ID: {instance.id})")
\ No newline at end of file
+        logger.info(f"🗑️ Usuario secretary eliminado: {instance.username} (ID: {instance.id})")
+
+
+@receiver(post_save, sender=User)
+@receiver(post_delete, sender=User)
+def invalidate_auth_context_on_user_change(sender, instance, **kwargs):
+    """El contexto de autenticación cacheado incluye la fila del usuario."""
+    invalidate_auth_context(instance.pk)
+
+
+@receiver(post_save, sender=SecretaryProfile)
+@receiver(post_delete, sender=SecretaryProfile)
+@receiver(post_save, sender='doctors.Doctor')
+@receiver(post_delete, sender='doctors.Doctor')
+@receiver(post_save, sender='patients.Patient')
+@receiver(post_delete, sender='patients.Patient')
+def invalidate_auth_context_on_profile_change(sender, instance, **kwargs):
+    """Los IDs de perfil y permisos de secretaria forman parte del contexto."""
+    invalidate_auth_context(instance.user_id)
+
+
+@receiver(post_save, sender=BlacklistedToken)
+def cache_blacklisted_token(sender, instance, created, **kwargs):
+    """
+    Refleja en cache los tokens agregados a la blacklist por cualquier vía
+    (rotación, logout o admin) para que el refresh no consulte la base de datos.
+    """
+    if created:
+        mark_blacklisted(instance.token.jti, instance.token.expires_at.timestamp())
@@ -0,0 +1,74 @@
+import logging
+
+from celery import shared_task
+from django.core.files.storage import default_storage
+from django.utils import timezone
+from rest_framework_simplejwt.token_blacklist.models import OutstandingToken
+
+from .importers import UserImporter, get_import_settings, open_upload, read_rows
+from .models import PasswordResetToken, User
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_PRUNE_BATCH_SIZE = 5000
+
+
+def delete_in_batches(queryset, batch_size=DEFAULT_PRUNE_BATCH_SIZE):
+    """
+    Elimina las filas del queryset en lotes por pk para no mantener un
+    bloqueo largo sobre la tabla. Retorna la cantidad de filas eliminadas.
+    """
+    deleted = 0
+    while True:
+        pks = list(queryset.order_by('pk').values_list('pk', flat=True)[:batch_size])
+        if not pks:
+            return deleted
+        deleted += queryset.model.objects.filter(pk__in=pks).delete()[0]
+
+
+@shared_task
+def prune_expired_tokens(batch_size=DEFAULT_PRUNE_BATCH_SIZE):
+    """
+    Elimina refresh tokens expirados (OutstandingToken y, en cascada, su
+    BlacklistedToken) y tokens de recuperación de contraseña expirados.
+    Un token expirado ya es rechazado por su firma, así que su fila no aporta nada.
+    """
+    now = timezone.now()
+    tokens_deleted = delete_in_batches(
+        OutstandingToken.objects.filter(expires_at__lte=now), batch_size
+    )
+    reset_tokens_deleted = PasswordResetToken.cleanup_expired()
+    logger.info(
+        f"🧹 Tokens depurados: {tokens_deleted} JWT (outstanding + blacklist), "
+        f"{reset_tokens_deleted} de recuperación de contraseña"
+    )
+    return {
+        'jwt_tokens_deleted': tokens_deleted,
+        'password_reset_tokens_deleted': reset_tokens_deleted,
+    }
+
+
+@shared_task
+def import_users_file(path, file_format='csv', actor_id=None):
+    """
+    Importa un archivo que UserImportView guardó en default_storage y lo
+    elimina al terminar. El resumen (con los errores por fila) queda como
+    resultado de la tarea.
+    """
+    actor = User.objects.filter(pk=actor_id).first() if actor_id else None
+    # workers=1: los procesos del worker de Celery no crean otro pool (import_users para archivos grandes)
+    importer = UserImporter(
+        workers=1,
+        actor=actor,
+        max_errors=get_import_settings()['MAX_REPORTED_ERRORS']
+    )
+    try:
+        with default_storage.open(path, 'rb') as uploaded_file:
+            result = importer.run(read_rows(open_upload(uploaded_file), file_format))
+    finally:
+        default_storage.delete(path)
+    logger.info(
+        f"📥 Importación de {path} completada: {result['created']} usuarios creados, "
+        f"{result['failed']} filas con errores"
+    )
+    return result
@@ -1,3 +1,264 @@
-from django.test import TestCase
+import tempfile
+from unittest import mock
 
-# Create your tests here.
+from django.conf import settings
+from django.core.cache import cache
+from django.core.files.storage import default_storage
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.test import RequestFactory, SimpleTestCase, TestCase, override_settings
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.token_blacklist.models import BlacklistedToken, OutstandingToken
+from rest_framework_simplejwt.tokens import AccessToken
+
+from apps.core.querycount import assert_max_repeated_queries
+from core.network import get_client_ip
+
+from .auth_context import get_auth_context_data
+from .models import User
+from .tasks import import_users_file
+from .tokens import CachedBlacklistRefreshToken, blacklist_cache_key, is_blacklisted
+
+FAST_HASHERS = ['django.contrib.auth.hashers.MD5PasswordHasher']
+AUDIT_DISABLED = {'ENABLED': False}
+
+
+@override_settings(PASSWORD_HASHERS=FAST_HASHERS, AUDIT_SETTINGS=AUDIT_DISABLED)
+class CachedJWTAuthenticationTests(TestCase):
+    """Autenticación con el contexto cacheado (apps/users/auth_context.py)."""
+
+    url = '/api/notifications/count/'
+
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(
+            username='paciente', email='paciente@example.com', password='Clave-segura-123', role='client'
+        )
+        self.client = APIClient()
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {AccessToken.for_user(self.user)}')
+
+    def test_authenticated_request_uses_cached_context(self):
+        self.assertEqual(self.client.get(self.url).status_code, 200)
+        self.assertIsNotNone(get_auth_context_data(self.user.pk))
+
+        with self.assertNumQueries(0):
+            get_auth_context_data(self.user.pk)
+
+    def test_deactivated_user_rejected_after_cache_invalidation(self):
+        self.assertEqual(self.client.get(self.url).status_code, 200)
+
+        # El post_save de User invalida el contexto cacheado
+        self.user.is_active = False
+        self.user.save()
+
+        response = self.client.get(self.url)
+        self.assertEqual(response.status_code, 401)
+
+    def test_deleted_user_rejected(self):
+        self.assertEqual(self.client.get(self.url).status_code, 200)
+
+        self.user.delete()
+
+        self.assertEqual(self.client.get(self.url).status_code, 401)
+
+
+@override_settings(PASSWORD_HASHERS=FAST_HASHERS, AUDIT_SETTINGS=AUDIT_DISABLED)
+class LoginLockoutTests(TestCase):
+    """Bloqueo de login por intentos fallidos (apps/users/lockout.py)."""
+
+    url = '/api/users/auth/login/'
+    password = 'Clave-segura-123'
+
+    def setUp(self):
+        cache.clear()
+        User.objects.create_user(
+            username='cliente', email='cliente@example.com', password=self.password, role='client'
+        )
+        self.client = APIClient()
+
+    def login(self, password, email='cliente@example.com', **extra):
+        return self.client.post(
+            self.url, {'email_or_username': email, 'password': password}, format='json', **extra
+        )
+
+    @override_settings(LOGIN_LOCKOUT=dict(settings.LOGIN_LOCKOUT, MAX_ATTEMPTS=3))
+    def test_lockout_after_max_attempts_sets_retry_after(self):
+        self.assertEqual(self.login('incorrecta').status_code, 401)
+        self.assertEqual(self.login('incorrecta').status_code, 401)
+
+        response = self.login('incorrecta')
+        self.assertEqual(response.status_code, 429)
+        self.assertEqual(int(response['Retry-After']), settings.LOGIN_LOCKOUT['LOCKOUT_SECONDS'])
+
+        # Bloqueada aunque la contraseña sea correcta
+        response = self.login(self.password)
+        self.assertEqual(response.status_code, 429)
+        self.assertIn('Retry-After', response)
+
+    @override_settings(LOGIN_LOCKOUT=dict(settings.LOGIN_LOCKOUT, MAX_ATTEMPTS=3))
+    def test_successful_login_resets_failures(self):
+        self.login('incorrecta')
+        self.login('incorrecta')
+        self.assertEqual(self.login(self.password).status_code, 200)
+
+        self.assertEqual(self.login('incorrecta').status_code, 401)
+        self.assertEqual(self.login('incorrecta').status_code, 401)
+
+    @override_settings(LOGIN_LOCKOUT=dict(settings.LOGIN_LOCKOUT, MAX_ATTEMPTS=100, IP_MAX_ATTEMPTS=3))
+    def test_ip_lockout_ignores_spoofed_forwarded_for(self):
+        for attempt in range(2):
+            response = self.login('incorrecta', email=f'otro{attempt}@example.com', HTTP_X_FORWARDED_FOR=f'203.0.113.{attempt}')
+            self.assertEqual(response.status_code, 401)
+
+        response = self.login('incorrecta', email='otro9@example.com', HTTP_X_FORWARDED_FOR='203.0.113.9')
+        self.assertEqual(response.status_code, 429)
+
+
+class ClientIpTests(SimpleTestCase):
+    """IP del cliente según TRUSTED_PROXY_COUNT (core/network.py)."""
+
+    def request(self, forwarded_for=None):
+        extra = {'REMOTE_ADDR': '10.0.0.1'}
+        if forwarded_for is not None:
+            extra['HTTP_X_FORWARDED_FOR'] = forwarded_for
+        return RequestFactory().get('/', **extra)
+
+    @override_settings(TRUSTED_PROXY_COUNT=0)
+    def test_without_trusted_proxies_uses_remote_addr(self):
+        self.assertEqual(get_client_ip(self.request('198.51.100.7, 203.0.113.5')), '10.0.0.1')
+
+    @override_settings(TRUSTED_PROXY_COUNT=1)
+    def test_one_proxy_uses_last_hop(self):
+        self.assertEqual(get_client_ip(self.request('198.51.100.7, 203.0.113.5')), '203.0.113.5')
+
+    @override_settings(TRUSTED_PROXY_COUNT=2)
+    def test_two_proxies_skip_client_supplied_entries(self):
+        request = self.request('1.2.3.4, 198.51.100.7, 203.0.113.5')
+        self.assertEqual(get_client_ip(request), '198.51.100.7')
+
+    @override_settings(TRUSTED_PROXY_COUNT=2)
+    def test_fewer_hops_than_proxies_falls_back_to_remote_addr(self):
+        self.assertEqual(get_client_ip(self.request('203.0.113.5')), '10.0.0.1')
+        self.assertEqual(get_client_ip(self.request()), '10.0.0.1')
+
+
+@override_settings(PASSWORD_HASHERS=FAST_HASHERS, AUDIT_SETTINGS=AUDIT_DISABLED)
+class RefreshTokenBlacklistTests(TestCase):
+    """Blacklist de refresh tokens con cache (apps/users/tokens.py)."""
+
+    url = '/api/users/auth/refresh/'
+
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(
+            username='cliente', email='cliente@example.com', password='Clave-segura-123', role='client'
+        )
+        self.client = APIClient()
+
+    def refresh(self, token):
+        return self.client.post(self.url, {'refresh': str(token)}, format='json')
+
+    def test_rotated_refresh_token_cannot_be_reused(self):
+        token = CachedBlacklistRefreshToken.for_user(self.user)
+
+        response = self.refresh(token)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(self.refresh(response.data['data']['refresh']).status_code, 200)
+
+        self.assertEqual(self.refresh(token).status_code, 401)
+
+    def test_logout_blacklists_refresh_token(self):
+        token = CachedBlacklistRefreshToken.for_user(self.user)
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {token.access_token}')
+
+        response = self.client.post('/api/users/auth/logout/', {'refresh_token': str(token)}, format='json')
+        self.assertEqual(response.status_code, 200)
+
+        self.assertEqual(self.refresh(token).status_code, 401)
+
+    def test_token_blacklisted_elsewhere_is_rejected(self):
+        token = CachedBlacklistRefreshToken.for_user(self.user)
+        # Con LocMemCache el estado "vigente" no se cachea: otro proceso no podría reemplazarlo
+        self.assertFalse(is_blacklisted(token['jti'], token['exp']))
+        self.assertIsNone(cache.get(blacklist_cache_key(token['jti'])))
+
+        # Blacklist hecho en otro proceso: su señal no llega a este cache
+        outstanding = OutstandingToken.objects.get(jti=token['jti'])
+        BlacklistedToken.objects.create(token=outstanding)
+        cache.delete(blacklist_cache_key(token['jti']))
+
+        self.assertEqual(self.refresh(token).status_code, 401)
+
+
+@override_settings(PASSWORD_HASHERS=FAST_HASHERS, AUDIT_SETTINGS=AUDIT_DISABLED)
+class UserListQueryTests(TestCase):
+    """Listados de usuarios sin consultas N+1 (apps/core/querycount.py)."""
+
+    def setUp(self):
+        cache.clear()
+        admin = User.objects.create_user(
+            username='admin', email='admin@example.com', password='Clave-segura-123', role='admin', is_staff=True
+        )
+        for index in range(12):
+            User.objects.create_user(
+                username=f'usuario{index}', email=f'usuario{index}@example.com',
+                password='Clave-segura-123', role=('client', 'secretary')[index % 2]
+            )
+        self.client = APIClient()
+        self.client.force_authenticate(admin)
+
+    def test_user_list_has_no_repeated_queries(self):
+        for url in ('/api/users/users/', '/api/users/secretaries/'):
+            with self.subTest(url=url), assert_max_repeated_queries(threshold=3):
+                response = self.client.get(url)
+            self.assertEqual(response.status_code, 200)
+
+
+@override_settings(PASSWORD_HASHERS=FAST_HASHERS, AUDIT_SETTINGS=AUDIT_DISABLED, MEDIA_ROOT=tempfile.gettempdir())
+class UserImportViewTests(TestCase):
+    """Límites y encolado de admin/import/ (apps/users/importers.py)."""
+
+    url = '/api/users/admin/import/'
+
+    def setUp(self):
+        cache.clear()
+        admin = User.objects.create_user(
+            username='admin', email='admin@example.com', password='Clave-segura-123', role='admin', is_staff=True
+        )
+        self.client = APIClient()
+        self.client.force_authenticate(admin)
+
+    def upload(self, rows, **data):
+        content = 'username,email,role\n' + ''.join(
+            f'importado{index},importado{index}@example.com,client\n' for index in range(rows)
+        )
+        data['file'] = SimpleUploadedFile('usuarios.csv', content.encode(), content_type='text/csv')
+        return self.client.post(self.url, data, format='multipart')
+
+    @override_settings(USER_IMPORT=dict(settings.USER_IMPORT, MAX_ROWS=3))
+    def test_rejects_too_many_rows(self):
+        response = self.upload(4, dry_run='true')
+        self.assertEqual(response.status_code, 413)
+        self.assertFalse(User.objects.filter(username__startswith='importado').exists())
+
+    @override_settings(USER_IMPORT=dict(settings.USER_IMPORT, MAX_UPLOAD_BYTES=64))
+    def test_rejects_large_file(self):
+        self.assertEqual(self.upload(5).status_code, 413)
+
+    def test_dry_run_validates_in_request(self):
+        response = self.upload(3, dry_run='true')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['data']['created'], 3)
+        self.assertFalse(User.objects.filter(username__startswith='importado').exists())
+
+    def test_import_is_queued(self):
+        with mock.patch.object(import_users_file, 'delay') as delay:
+            delay.return_value.id = 'tarea-1'
+            response = self.upload(3)
+        self.assertEqual(response.status_code, 202)
+        self.assertEqual(response.data['data'], {'task_id': 'tarea-1', 'total_rows': 3})
+
+        path, file_format, actor_id = delay.call_args.args
+        result = import_users_file(path, file_format, actor_id)
+        self.assertEqual(result['created'], 3)
+        self.assertEqual(User.objects.filter(username__startswith='importado').count(), 3)
+        self.assertFalse(default_storage.exists(path))
@@ -0,0 +1,154 @@
+"""
+Refresh tokens con consulta de blacklist respaldada por cache.
+
+simplejwt consulta BlacklistedToken en cada refresh y carga el User tres
+veces (validación, blacklist() y outstand()). Aquí:
+
+- El estado de cada jti se guarda en cache hasta que el token expira:
+  True = en blacklist, False = emitido y vigente. Una clave ausente (cache
+  reiniciado, token emitido antes de este cambio) se resuelve con la base de
+  datos, así que el cache nunca es la única fuente de verdad.
+- `False` se escribe con cache.add y `True` con cache.set (también desde la
+  señal post_save de BlacklistedToken, que cubre el admin), de modo que una
+  lectura concurrente nunca sobrescribe un blacklist.
+- `False` solo se guarda si el cache es compartido entre procesos (Redis): con
+  LocMemCache la señal de otro proceso no podría reemplazarlo y un refresh
+  token rotado seguiría siendo válido hasta que venza la clave. En ese caso
+  cada refresh consulta BlacklistedToken.
+- OutstandingToken se crea con user_id tomado del payload, sin cargar User.
+- CachedTokenRefreshSerializer valida is_active con el contexto de
+  autenticación cacheado (apps/users/auth_context.py).
+"""
+
+import time
+
+from django.core.cache import DEFAULT_CACHE_ALIAS, cache, caches
+from django.core.cache.backends.dummy import DummyCache
+from django.core.cache.backends.locmem import LocMemCache
+from django.utils.translation import gettext_lazy as _
+from rest_framework_simplejwt.exceptions import AuthenticationFailed, TokenError
+from rest_framework_simplejwt.serializers import TokenRefreshSerializer
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.token_blacklist.models import BlacklistedToken, OutstandingToken
+from rest_framework_simplejwt.tokens import RefreshToken
+from rest_framework_simplejwt.utils import datetime_from_epoch
+
+from .auth_context import build_user, get_auth_context_data
+
+
+def blacklist_cache_key(jti):
+    return f'token_blacklist:{jti}'
+
+
+def _remaining_seconds(exp):
+    return max(1, int(exp - time.time()))
+
+
+def mark_blacklisted(jti, exp):
+    cache.set(blacklist_cache_key(jti), True, _remaining_seconds(exp))
+
+
+def is_shared_cache():
+    """El cache por defecto lo ven todos los procesos (no es memoria local)."""
+    return not isinstance(caches[DEFAULT_CACHE_ALIAS], (LocMemCache, DummyCache))
+
+
+def mark_outstanding(jti, exp):
+    if is_shared_cache():
+        cache.add(blacklist_cache_key(jti), False, _remaining_seconds(exp))
+
+
+def is_blacklisted(jti, exp):
+    blacklisted = cache.get(blacklist_cache_key(jti))
+    if blacklisted is None:
+        blacklisted = BlacklistedToken.objects.filter(token__jti=jti).exists()
+        if blacklisted:
+            mark_blacklisted(jti, exp)
+        else:
+            mark_outstanding(jti, exp)
+    return blacklisted
+
+
+class CachedBlacklistRefreshToken(RefreshToken):
+    """RefreshToken cuya verificación de blacklist se resuelve normalmente en cache."""
+
+    def check_blacklist(self):
+        if is_blacklisted(self.payload[api_settings.JTI_CLAIM], self.payload['exp']):
+            raise TokenError(_('Token is blacklisted'))
+
+    def _outstanding_token(self):
+        return OutstandingToken.objects.get_or_create(
+            jti=self.payload[api_settings.JTI_CLAIM],
+            defaults={
+                'user_id': self.payload.get(api_settings.USER_ID_CLAIM),
+                'created_at': self.current_time,
+                'token': str(self),
+                'expires_at': datetime_from_epoch(self.payload['exp']),
+            },
+        )
+
+    def blacklist(self):
+        token, _ = self._outstanding_token()
+        blacklisted = BlacklistedToken.objects.get_or_create(token=token)
+        mark_blacklisted(token.jti, self.payload['exp'])
+        return blacklisted
+
+    def outstand(self, new=False):
+        """
+        Registra el token como emitido. Con new=True (jti recién generado en la
+        rotación) se inserta directamente, sin buscarlo antes.
+        """
+        if new:
+            outstanding = (OutstandingToken.objects.create(
+                jti=self.payload[api_settings.JTI_CLAIM],
+                user_id=self.payload.get(api_settings.USER_ID_CLAIM),
+                created_at=self.current_time,
+                token=str(self),
+                expires_at=datetime_from_epoch(self.payload['exp']),
+            ), True)
+        else:
+            outstanding = self._outstanding_token()
+        mark_outstanding(self.payload[api_settings.JTI_CLAIM], self.payload['exp'])
+        return outstanding
+
+    @classmethod
+    def for_user(cls, user):
+        token = super().for_user(user)
+        mark_outstanding(token[api_settings.JTI_CLAIM], token['exp'])
+        return token
+
+
+class CachedTokenRefreshSerializer(TokenRefreshSerializer):
+    """
+    Refresh con rotación donde la blacklist y el usuario salen del cache:
+    un refresh típico solo escribe (blacklist del token anterior y alta del nuevo).
+    """
+
+    token_class = CachedBlacklistRefreshToken
+
+    def validate(self, attrs):
+        refresh = self.token_class(attrs['refresh'])
+
+        user_id = refresh.payload.get(api_settings.USER_ID_CLAIM, None)
+        if user_id:
+            data = get_auth_context_data(user_id)
+            if data is None or not api_settings.USER_AUTHENTICATION_RULE(build_user(data)):
+                raise AuthenticationFailed(
+                    self.error_messages['no_active_account'],
+                    'no_active_account',
+                )
+
+        data = {'access': str(refresh.access_token)}
+
+        if api_settings.ROTATE_REFRESH_TOKENS:
+            if api_settings.BLACKLIST_AFTER_ROTATION:
+                refresh.blacklist()
+
+            refresh.set_jti()
+            refresh.set_exp()
+            refresh.set_iat()
+            refresh.outstand(new=True)
+
+            data['refresh'] = str(refresh)
+
+        return data
@@ -11,6 +11,8 @@ from .views import (
     UserRegistrationView,
     UserProfileView,
     ChangePasswordView,
+    UserImportView,
+    UserImportStatusView,
     UserListView,
     UserDetailView,
     user_info,
@@ -69,6 +71,8 @@ urlpatterns = [
     # Admin URLs para selección de tipo de usuario
     path('admin/select-type/', UserTypeSelectionView.as_view(), name='user_select_type'),
     path('admin/create/<str:user_type>/', create_user_by_type, name='create_user_by_type'),
+    path('admin/import/', UserImportView.as_view(), name='user_import'),
+    path('admin/import/<str:task_id>/', UserImportStatusView.as_view(), name='user_import_status'),
 ]
 
 """
@@ -1,17 +1,24 @@
+import uuid
+
 from rest_framework import status, generics, permissions, viewsets
 from rest_framework.decorators import api_view, permission_classes, action
+from rest_framework.exceptions import Throttled, ValidationError
+from rest_framework.parsers import FormParser, MultiPartParser
 from rest_framework.response import Response
 from rest_framework.views import APIView
 from rest_framework_simplejwt.views import TokenObtainPairView, TokenRefreshView
-from rest_framework_simplejwt.tokens import RefreshToken
 from rest_framework_simplejwt.exceptions import TokenError, InvalidToken
 from django.contrib.auth import logout
+from django.core.files.storage import default_storage
 from django.utils.decorators import method_decorator
 from django.views.decorators.csrf import csrf_exempt
 from django.utils import timezone
 from django.db.models import Q
 
 from .models import User, PasswordResetToken, SecretaryProfile
+from .tasks import import_users_file
+from .tokens import CachedBlacklistRefreshToken
+from .importers import UserImporter, count_rows, detect_format, get_import_settings, open_upload, read_rows
 from .serializers import (
     CustomTokenObtainPairSerializer,
     UserRegistrationSerializer,
@@ -42,10 +49,17 @@ class CustomTokenObtainPairView(TokenObtainPairView):
         
         try:
             serializer.is_valid(raise_exception=True)
-        except Exception as e:
-            # Debug: imprimir el error completo
-            print(f"Error en login: {type(e).__name__}: {str(e)}")
-            print(f"Datos recibidos: {request.data}")
+        except Throttled as e:
+            # Bloqueo por intentos fallidos (ver apps/users/lockout.py)
+            return Response(
+                {
+                    'error': 'Cuenta bloqueada temporalmente',
+                    'detail': f'Demasiados intentos fallidos. Intente nuevamente en {e.wait} segundos.'
+                },
+                status=status.HTTP_429_TOO_MANY_REQUESTS,
+                headers={'Retry-After': str(e.wait)}
+            )
+        except ValidationError as e:
             return Response(
                 {
                     'error': 'Credenciales inválidas',
@@ -103,7 +117,7 @@ class LogoutView(APIView):
             refresh_token = request.data.get('refresh_token')
             
             if refresh_token:
-                token = RefreshToken(refresh_token)
+                token = CachedBlacklistRefreshToken(refresh_token)
                 token.blacklist()
             
             # Cerrar sesión de Django (si se usa session authentication)
@@ -141,7 +155,7 @@ class UserRegistrationView(generics.CreateAPIView):
         user = serializer.save()
         
         # Generar tokens para el usuario recién creado
-        refresh = RefreshToken.for_user(user)
+        refresh = CachedBlacklistRefreshToken.for_user(user)
         
         return Response(
             {
@@ -217,6 +231,110 @@ class ChangePasswordView(APIView):
         )
 
 
+class UserImportView(APIView):
+    """
+    Vista para importar usuarios y sus perfiles desde un archivo CSV o JSONL.
+    Solo para administradores. Ver apps/users/importers.py para las columnas.
+    
+    La validación (dry_run) se responde en la petición; la importación real
+    se encola en Celery y se consulta en UserImportStatusView.
+    """
+    permission_classes = [permissions.IsAuthenticated, IsAdminOrSuperAdmin]
+    parser_classes = [MultiPartParser, FormParser]
+    
+    def post(self, request):
+        """
+        Importar el archivo enviado en el campo 'file'.
+        Parámetros opcionales: 'format' (csv|jsonl) y 'dry_run' (solo validar).
+        """
+        uploaded_file = request.FILES.get('file')
+        if uploaded_file is None:
+            return Response(
+                {'error': 'Archivo requerido', 'detail': "Envíe el archivo en el campo 'file'"},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        
+        file_format = request.data.get('format') or detect_format(uploaded_file.name)
+        if file_format not in ('csv', 'jsonl'):
+            return Response(
+                {'error': 'Formato no soportado', 'detail': "Use 'csv' o 'jsonl'"},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        
+        import_settings = get_import_settings()
+        if uploaded_file.size > import_settings['MAX_UPLOAD_BYTES']:
+            return Response(
+                {
+                    'error': 'Archivo demasiado grande',
+                    'detail': f"El máximo es {import_settings['MAX_UPLOAD_BYTES']} bytes; use el comando import_users"
+                },
+                status=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE
+            )
+        
+        stream = open_upload(uploaded_file)
+        total_rows = count_rows(stream, file_format, limit=import_settings['MAX_ROWS'])
+        if total_rows > import_settings['MAX_ROWS']:
+            return Response(
+                {
+                    'error': 'Demasiadas filas',
+                    'detail': f"El máximo es {import_settings['MAX_ROWS']} filas por archivo; use el comando import_users"
+                },
+                status=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE
+            )
+        
+        dry_run = str(request.data.get('dry_run', '')).lower() in ('1', 'true', 'yes')
+        if dry_run:
+            # Validar no hashea contraseñas: cabe en la petición
+            stream.seek(0)
+            importer = UserImporter(
+                workers=1,
+                dry_run=True,
+                actor=request.user,
+                max_errors=import_settings['MAX_REPORTED_ERRORS']
+            )
+            result = importer.run(read_rows(stream, file_format))
+            return Response(
+                {
+                    'message': f"Validación completada: {result['created']} filas válidas, {result['failed']} con errores",
+                    'data': result
+                },
+                status=status.HTTP_200_OK
+            )
+        
+        # Soltar el wrapper de texto sin cerrar el archivo subido
+        stream.detach()
+        uploaded_file.seek(0)
+        path = default_storage.save(f'imports/users/{uuid.uuid4().hex}.{file_format}', uploaded_file)
+        task = import_users_file.delay(path, file_format, request.user.pk)
+        return Response(
+            {
+                'message': f'Importación de {total_rows} filas encolada',
+                'data': {'task_id': task.id, 'total_rows': total_rows}
+            },
+            status=status.HTTP_202_ACCEPTED
+        )
+
+
+class UserImportStatusView(APIView):
+    """
+    Estado de una importación encolada por UserImportView; al terminar
+    incluye el resumen de UserImporter (usuarios creados y errores por fila).
+    """
+    permission_classes = [permissions.IsAuthenticated, IsAdminOrSuperAdmin]
+    
+    def get(self, request, task_id):
+        task = import_users_file.AsyncResult(task_id)
+        data = {'task_id': task_id, 'status': task.status}
+        if task.successful():
+            data['result'] = task.result
+        elif task.failed():
+            data['detail'] = str(task.result)
+        return Response(
+            {'message': 'Estado de la importación', 'data': data},
+            status=status.HTTP_200_OK
+        )
+
+
 @api_view(['GET'])
 @permission_classes([permissions.AllowAny])
 def csrf_token_view(request):
@@ -249,7 +367,8 @@ class SecretaryViewSet(viewsets.ModelViewSet):
     - GET /api/secretaries/appointments/ - Listar citas
     - POST /api/secretaries/appointments/ - Crear nueva cita
     """
-    queryset = SecretaryProfile.objects.all()
+    # UserSerializer anidado: usuario y perfil de paciente en la misma consulta
+    queryset = SecretaryProfile.objects.select_related('user', 'user__patient_profile')
     serializer_class = SecretaryProfileSerializer
     permission_classes = [permissions.IsAuthenticated]
     
@@ -666,11 +785,11 @@ class UserListView(generics.ListAPIView):
         
         # Solo superadmin puede ver todos los usuarios
         if user.is_superuser or user.role == 'superadmin':
-            return User.objects.all().order_by('-created_at')
+            return User.objects.select_related('patient_profile').order_by('-created_at')
         
         # Admin puede ver usuarios que no sean superadmin
         elif user.is_staff or user.role == 'admin':
-            return User.objects.exclude(
+            return User.objects.select_related('patient_profile').exclude(
                 role='superadmin'
             ).exclude(
                 is_superuser=True
@@ -843,7 +962,8 @@ class UserViewSet(viewsets.ModelViewSet):
         """
         Retorna el queryset filtrado según los parámetros de búsqueda.
         """
-        queryset = User.objects.all()
+        # patient_profile se lee en UserSerializer para cada usuario
+        queryset = User.objects.select_related('patient_profile')
         
         # Filtro por búsqueda general
         search = self.request.query_params.get('search', None)
@@ -0,0 +1,30 @@
+"""
+Lecturas async, montadas en /api/async/ (ver core/async_api.py).
+
+Responden igual que sus equivalentes DRF. Funcionan bajo WSGI, pero están
+pensadas para correr bajo ASGI (uvicorn): en producción el proxy envía
+/api/async/ a los workers uvicorn y el resto de /api/ a los workers WSGI.
+"""
+
+from django.urls import path
+
+from apps.doctors import async_views as doctor_views
+from apps.notifications import async_views as notification_views
+from apps.reports import async_views as report_views
+
+app_name = 'async_api'
+
+urlpatterns = [
+    # Directorio público de doctores (= /api/doctors/public/)
+    path('doctors/public/', doctor_views.public_doctors_list, name='doctor-public-list'),
+    # Horarios disponibles (= /api/doctors/public/{id}/available-slots/)
+    path(
+        'doctors/public/<int:pk>/available-slots/',
+        doctor_views.available_slots,
+        name='doctor-available-slots'
+    ),
+    # Conteo de no leídas (= /api/notifications/count/)
+    path('notifications/count/', notification_views.notification_count, name='notification-count'),
+    # Resumen del dashboard (= /api/reports/dashboard/summary/)
+    path('reports/dashboard/summary/', report_views.dashboard_summary, name='dashboard-summary'),
+]
@@ -1,7 +1,10 @@
 """Celery configuration for Django project."""
 
 import os
+import time
 from celery import Celery
+from celery.signals import task_prerun, task_postrun
+from celery.schedules import crontab
 from django.conf import settings
 
 # Set the default Django settings module for the 'celery' program.
@@ -29,6 +32,23 @@ app.conf.update(
     result_expires=3600,
 )
 
+# Duración de tareas para el endpoint /metrics
+_task_started_at = {}
+
+
+@task_prerun.connect
+def record_task_start(task_id=None, **kwargs):
+    _task_started_at[task_id] = time.perf_counter()
+
+
+@task_postrun.connect
+def record_task_duration(task_id=None, task=None, state=None, **kwargs):
+    started_at = _task_started_at.pop(task_id, None)
+    if started_at is not None and task is not None:
+        from apps.core.metrics import observe_task
+        observe_task(task.name, state, time.perf_counter() - started_at)
+
+
 @app.task(bind=True)
 def debug_task(self):
     """Debug task for testing Celery configuration."""
@@ -46,6 +66,34 @@ app.conf.beat_schedule = {
         'task': 'config.celery.test_celery',
         'schedule': 30.0,
     },
+    'ensure-audit-partitions-daily': {
+        'task': 'core.tasks.ensure_audit_partitions',
+        'schedule': crontab(hour=1, minute=0),
+    },
+    'apply-audit-retention-daily': {
+        'task': 'core.tasks.apply_audit_retention',
+        'schedule': crontab(hour=2, minute=0),
+    },
+    'prune-expired-tokens-daily': {
+        'task': 'apps.users.tasks.prune_expired_tokens',
+        'schedule': crontab(hour=3, minute=0),
+    },
+    'reconcile-notification-counters-hourly': {
+        'task': 'apps.notifications.tasks.reconcile_notification_counters',
+        'schedule': crontab(minute=15),
+    },
+    'rebuild-specialization-counters-daily': {
+        'task': 'apps.doctors.tasks.rebuild_specialization_counters',
+        'schedule': crontab(hour=3, minute=30),
+    },
+    'apply-notification-retention-daily': {
+        'task': 'apps.notifications.tasks.apply_notification_retention',
+        'schedule': crontab(hour=4, minute=0),
+    },
+    'deliver-pending-notifications-every-minute': {
+        'task': 'apps.notifications.tasks.deliver_pending_notifications',
+        'schedule': 60.0,
+    },
 }
 
 app.conf.timezone = 'UTC'
@@ -346,44 +346,9 @@ GOOGLE_OAUTH2_CLIENT_SECRET = config('GOOGLE_OAUTH2_CLIENT_SECRET', default='you
 # CONFIGURACIÓN DEL MIDDLEWARE DE ROLES
 # ===================================
 
-# Rate Limiting Configuration
-RATE_LIMIT_SETTINGS = {
-    'admin': {
-        'requests_per_minute': 1000,  # Administradores tienen límite alto
-        'requests_per_hour': 10000,
-    },
-    'doctor': {
-        'requests_per_minute': 200,   # Doctores tienen límite moderado
-        'requests_per_hour': 2000,
-    },
-    'secretary': {
-        'requests_per_minute': 100,   # Secretarias tienen límite moderado
-        'requests_per_hour': 1000,
-    },
-    'patient': {
-        'requests_per_minute': 50,    # Pacientes tienen límite más bajo
-        'requests_per_hour': 500,
-    },
-    'anonymous': {
-        'requests_per_minute': 10,    # Usuarios anónimos muy limitados
-        'requests_per_hour': 100,
-    }
-}
+# Rate Limiting Configuration: ver RATE_LIMIT_SETTINGS en config/settings/base.py
 
-# Audit Trail Configuration
-AUDIT_SETTINGS = {
-    'ENABLED': True,
-    'LOG_ANONYMOUS_USERS': True,
-    'LOG_GET_REQUESTS': False,  # No loggear GET requests por defecto
-    'LOG_SENSITIVE_DATA': False,  # No loggear datos sensibles
-    'SENSITIVE_FIELDS': [
-        'password', 'token', 'secret', 'key', 'auth',
-        'credit_card', 'ssn', 'social_security'
-    ],
-    'CRITICAL_ACTIONS': ['delete', 'create', 'update'],
-    'CRITICAL_RESOURCES': ['users', 'admin', 'system', 'permissions'],
-    'RETENTION_DAYS': 90,  # Mantener logs por 90 días
-}
+# Audit Trail Configuration: ver AUDIT_SETTINGS en config/settings/base.py
 
 # Security Headers Configuration
 SECURITY_HEADERS = {
@@ -395,6 +360,8 @@ SECURITY_HEADERS = {
     'Content-Security-Policy': "default-src 'self'; script-src 'self' 'unsafe-inline'; style-src 'self' 'unsafe-inline';",
 }
 
+# Performance Profiling Configuration: ver PROFILING en config/settings/base.py
+
 # Middleware Logging Configuration
 MIDDLEWARE_LOGGING = {
     'LOG_REQUESTS': True,
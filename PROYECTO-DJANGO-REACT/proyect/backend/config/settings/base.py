@@ -35,6 +35,7 @@ INSTALLED_APPS = [
     'dj_rest_auth.registration',
     
     # Local apps
+    'core',  # Auditoría, métricas de sistema y particiones (core/)
     'apps.core',
     'apps.users',
     'apps.patients.apps.PatientsConfig',
@@ -45,12 +46,17 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    'apps.core.middleware.MetricsMiddleware',
+    'core.middleware.ReplicaPinningMiddleware',
     'corsheaders.middleware.CorsMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
     'django.contrib.auth.middleware.AuthenticationMiddleware',
+    'core.middleware.RoleBasedRateLimitMiddleware',  # Rate limiting por rol
+    'core.middleware.RoleBasedLoggingMiddleware',  # Auditoría por rol (ver core/audit.py)
+    'core.middleware.ProfilingMiddleware',  # Métricas de rendimiento por vista (ver core/profiling.py)
     'allauth.account.middleware.AccountMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
@@ -76,6 +82,26 @@ TEMPLATES = [
 
 WSGI_APPLICATION = 'config.wsgi.application'
 
+# Réplicas de lectura (ver core/replicas.py): los alias se agregan a DATABASES
+# en development.py / production.py; sin réplicas todo va a 'default'
+DATABASE_ROUTERS = ['core.replicas.ReplicaRouter']
+
+DATABASE_REPLICAS = {
+    'ALIASES': [],
+    'STICKY_SECONDS': config('DB_REPLICA_STICKY_SECONDS', default=15, cast=int),
+}
+
+# Vistas async de /api/async/ (ver core/async_api.py): consultas independientes
+# en paralelo, cada hilo del pool con su conexión a la base de datos
+ASYNC_API = {
+    'PARALLEL_QUERIES': config('ASYNC_API_PARALLEL_QUERIES', default=True, cast=bool),
+    # Límite de concurrencia por proceso ASGI: como máximo MAX_WORKERS consultas
+    # de gather_queries a la vez (las demás esperan en cola) y MAX_WORKERS
+    # conexiones. Con DB_POOL_MODE=pool se acota a DB_POOL_MAX_SIZE - 1.
+    # MAX_WORKERS x workers ASGI debe caber en max_connections de PostgreSQL.
+    'MAX_WORKERS': config('ASYNC_API_MAX_WORKERS', default=8, cast=int),
+}
+
 # Password validation
 AUTH_PASSWORD_VALIDATORS = [
     {
@@ -92,6 +118,32 @@ AUTH_PASSWORD_VALIDATORS = [
     },
 ]
 
+# Password hashing
+# PBKDF2 con costo configurable (ver apps/users/hashers.py). Al cambiar las
+# iteraciones, cada hash se regenera en el siguiente login del usuario.
+PASSWORD_HASHERS = [
+    'apps.users.hashers.ConfigurablePBKDF2PasswordHasher',
+    'django.contrib.auth.hashers.PBKDF2SHA1PasswordHasher',
+    'django.contrib.auth.hashers.Argon2PasswordHasher',
+    'django.contrib.auth.hashers.BCryptSHA256PasswordHasher',
+    'django.contrib.auth.hashers.ScryptPasswordHasher',
+]
+PASSWORD_HASHER_ITERATIONS = config('PASSWORD_HASHER_ITERATIONS', default=720000, cast=int)
+
+# Bloqueo de login por intentos fallidos (ver apps/users/lockout.py)
+LOGIN_LOCKOUT = {
+    'ENABLED': True,
+    'MAX_ATTEMPTS': config('LOGIN_LOCKOUT_MAX_ATTEMPTS', default=5, cast=int),
+    'IP_MAX_ATTEMPTS': 50,
+    'WINDOW_SECONDS': 900,
+    'LOCKOUT_SECONDS': config('LOGIN_LOCKOUT_SECONDS', default=900, cast=int),
+}
+
+# Proxies propios delante de Django (nginx, balanceador) para la IP del cliente
+# en rate limiting, bloqueo de login y auditoría (ver core/network.py);
+# 0 = REMOTE_ADDR, X-Forwarded-For se ignora
+TRUSTED_PROXY_COUNT = config('TRUSTED_PROXY_COUNT', default=0, cast=int)
+
 # Internationalization
 LANGUAGE_CODE = 'en-us'
 TIME_ZONE = 'UTC'
@@ -114,7 +166,7 @@ AUTH_USER_MODEL = 'users.User'
 # Django REST Framework configuration
 REST_FRAMEWORK = {
     'DEFAULT_AUTHENTICATION_CLASSES': [
-        'rest_framework_simplejwt.authentication.JWTAuthentication',
+        'apps.users.authentication.CachedJWTAuthentication',
         'rest_framework.authentication.SessionAuthentication',
     ],
     'DEFAULT_PERMISSION_CLASSES': [
@@ -171,13 +223,99 @@ SIMPLE_JWT = {
     'SLIDING_TOKEN_REFRESH_LIFETIME': timedelta(days=1),
     
     'TOKEN_OBTAIN_SERIALIZER': 'rest_framework_simplejwt.serializers.TokenObtainPairSerializer',
-    'TOKEN_REFRESH_SERIALIZER': 'rest_framework_simplejwt.serializers.TokenRefreshSerializer',
+    # Blacklist y usuario desde cache en el refresh (ver apps/users/tokens.py)
+    'TOKEN_REFRESH_SERIALIZER': 'apps.users.tokens.CachedTokenRefreshSerializer',
     'TOKEN_VERIFY_SERIALIZER': 'rest_framework_simplejwt.serializers.TokenVerifySerializer',
     'TOKEN_BLACKLIST_SERIALIZER': 'rest_framework_simplejwt.serializers.TokenBlacklistSerializer',
     'SLIDING_TOKEN_OBTAIN_SERIALIZER': 'rest_framework_simplejwt.serializers.TokenObtainSlidingSerializer',
     'SLIDING_TOKEN_REFRESH_SERIALIZER': 'rest_framework_simplejwt.serializers.TokenRefreshSlidingSerializer',
 }
 
+# Contexto de autenticación (rol e IDs de perfil) cacheado por usuario,
+# ver apps/users/auth_context.py
+AUTH_CONTEXT_CACHE_SECONDS = config('AUTH_CONTEXT_CACHE_SECONDS', default=300, cast=int)
+
+# Copia en cache de los contadores de notificaciones (ver apps/notifications/counters.py)
+NOTIFICATION_COUNTER_CACHE_SECONDS = config('NOTIFICATION_COUNTER_CACHE_SECONDS', default=60, cast=int)
+
+# Notificaciones masivas (ver NotificationService.create_bulk_notifications):
+# filas por lote y tamaño de audiencia a partir del cual se envían con Celery
+NOTIFICATIONS_BULK = {
+    'BATCH_SIZE': config('NOTIFICATIONS_BULK_BATCH_SIZE', default=1000, cast=int),
+    'ASYNC_THRESHOLD': config('NOTIFICATIONS_BULK_ASYNC_THRESHOLD', default=1000, cast=int),
+}
+
+# Retención de notificaciones leídas (ver apps/notifications/retention.py):
+# días por tipo antes de pasarlas a NotificationArchive (None = sin límite)
+NOTIFICATIONS_RETENTION = {
+    'BATCH_SIZE': 2000,
+    'DEFAULT_TTL_DAYS': config('NOTIFICATIONS_TTL_DAYS', default=90, cast=int),
+    'TTL_DAYS': {
+        'reminder': 30,
+        'system': 60,
+        'appointment': 180,
+        'result': 365,
+    },
+    'UNREAD_TTL_DAYS': None,
+    'COMPACT_AFTER_HOURS': 24,
+}
+
+# Entrega por canales externos (ver apps/notifications/delivery.py): tipos que
+# además de in-app salen por email/SMS, canales por defecto y un worker por canal
+NOTIFICATIONS_DELIVERY = {
+    'ENABLED': config('NOTIFICATIONS_DELIVERY_ENABLED', default=True, cast=bool),
+    'ROUTED_TYPES': ['appointment', 'reminder', 'result'],
+    'DEFAULT_CHANNELS': ['email'],
+    'CLAIM_TIMEOUT_SECONDS': 300,
+    'CHANNELS': {
+        'email': {
+            'BACKEND': 'apps.notifications.channels.EmailChannel',
+            'BATCH_SIZE': config('NOTIFICATIONS_EMAIL_BATCH_SIZE', default=100, cast=int),
+            'MAX_ATTEMPTS': 5,
+            'RETRY_SECONDS': 60,
+        },
+        'sms': {
+            'BACKEND': config('NOTIFICATIONS_SMS_BACKEND', default='apps.notifications.channels.LocalSMSChannel'),
+            'BATCH_SIZE': 200,
+            'MAX_ATTEMPTS': 3,
+            'RETRY_SECONDS': 120,
+        },
+    },
+}
+
+# Renderizado de emails (ver apps/notifications/rendering.py): plantillas
+# compiladas al arrancar cada worker y tamaño de la memoización por proceso
+EMAIL_RENDERING = {
+    'PRELOAD': [
+        'emails/notification.html',
+        'emails/appointment_confirmation.html',
+        'emails/appointment_reminder.html',
+        'emails/appointment_cancellation.html',
+    ],
+    'MEMO_SIZE': config('EMAIL_RENDERING_MEMO_SIZE', default=5000, cast=int),
+}
+
+# Push de notificaciones por Server-Sent Events (ver apps/notifications/realtime.py).
+# InProcessBroker solo entrega eventos publicados en el mismo proceso; con
+# varios workers ASGI o Celery usar RedisBroker.
+NOTIFICATIONS_PUSH = {
+    # False: sin push (no se serializan eventos) y /api/notifications/stream/ responde 503
+    'ENABLED': config('NOTIFICATIONS_PUSH_ENABLED', default=True, cast=bool),
+    'BACKEND': 'apps.notifications.realtime.InProcessBroker',
+    'REDIS_URL': config('NOTIFICATIONS_REDIS_URL', default='redis://127.0.0.1:6379/2'),
+    'HEARTBEAT_SECONDS': 25,
+}
+
+# Importación masiva de usuarios (ver apps/users/importers.py)
+USER_IMPORT = {
+    'CHUNK_SIZE': config('USER_IMPORT_CHUNK_SIZE', default=500, cast=int),
+    'WORKERS': config('USER_IMPORT_WORKERS', default=None, cast=lambda v: int(v) if v else None),
+    'MAX_REPORTED_ERRORS': 1000,
+    # Límites del endpoint admin/import/ (archivos más grandes: manage.py import_users)
+    'MAX_UPLOAD_BYTES': config('USER_IMPORT_MAX_UPLOAD_BYTES', default=10 * 1024 * 1024, cast=int),
+    'MAX_ROWS': config('USER_IMPORT_MAX_ROWS', default=5000, cast=int),
+}
+
 # =============================================================================
 # CELERY CONFIGURATION
 # =============================================================================
@@ -229,6 +367,89 @@ EMAIL_SUBJECT_PREFIX = '[Citas Médicas] '
 EMAIL_TIMEOUT = 60  # segundos
 EMAIL_USE_LOCALTIME = True
 
+# =============================================================================
+# CALENDARIO DE CIERRES (feriados y cierres de la clínica)
+# =============================================================================
+
+CLOSURE_CALENDAR = {
+    # Archivo JSON con feriados fijos y movibles por año
+    'HOLIDAYS_FILE': BASE_DIR / 'apps' / 'appointments' / 'data' / 'holidays.json',
+    # Segundos que un año compilado permanece en memoria antes de recompilarse
+    'CACHE_SECONDS': 60,
+}
+
+# =============================================================================
+# MÉTRICAS (endpoint /metrics en formato Prometheus, ver apps/core/metrics.py)
+# =============================================================================
+
+# Token requerido en `Authorization: Bearer <token>`; vacío = /metrics solo con DEBUG=True
+METRICS_AUTH_TOKEN = config('METRICS_AUTH_TOKEN', default='')
+
+# =============================================================================
+# MIDDLEWARE DE ROLES (ver core/middleware.py)
+# =============================================================================
+
+# Rate limiting por rol (motores en core/ratelimit.py); límites por ventana
+RATE_LIMIT_SETTINGS = {
+    'ENABLED': config('RATE_LIMIT_ENABLED', default=True, cast=bool),
+    'ALGORITHM': config('RATE_LIMIT_ALGORITHM', default='sliding_window'),  # o 'token_bucket'
+    'WINDOW_SECONDS': 60,
+    'CACHE_ALIAS': 'default',  # None -> locmem del proceso (tests)
+    'EXEMPT_PATHS': [
+        '/api/users/auth/login/',  # tiene su propio bloqueo (LOGIN_LOCKOUT)
+        '/api/users/auth/refresh/',
+        '/api/status/',
+        '/metrics/',
+        '/admin/',
+    ],
+    'RATE_LIMITS': {
+        'client': 60,
+        'doctor': 120,
+        'secretary': 180,
+        'admin': 300,
+        'superadmin': 500,
+        'anonymous': 20,
+    },
+}
+
+# Auditoría (RoleBasedLoggingMiddleware): las entradas se escriben por lotes
+# fuera de la petición (SINK, ver core/audit.py)
+AUDIT_SETTINGS = {
+    'ENABLED': config('AUDIT_ENABLED', default=True, cast=bool),
+    'LOG_ANONYMOUS_USERS': True,
+    'LOG_GET_REQUESTS': False,  # No loggear GET requests por defecto
+    'LOG_SENSITIVE_DATA': False,  # No loggear datos sensibles
+    'SENSITIVE_FIELDS': [
+        'password', 'token', 'secret', 'key', 'auth',
+        'credit_card', 'ssn', 'social_security'
+    ],
+    'CRITICAL_ACTIONS': ['delete', 'create', 'update'],
+    'CRITICAL_RESOURCES': ['users', 'admin', 'system', 'permissions'],
+    'RETENTION_DAYS': 90,  # Mantener logs por 90 días
+    'PARTITIONS_AHEAD': 3,  # Meses de particiones creadas por adelantado (PostgreSQL)
+    'ARCHIVE_ENABLED': config('AUDIT_ARCHIVE_ENABLED', default=False, cast=bool),  # JSONL.gz antes de eliminar
+    'ARCHIVE_DIR': BASE_DIR / 'audit_archive',
+    'SINK': {
+        'MODE': config('AUDIT_SINK_MODE', default='thread'),  # 'thread', 'celery' o 'sync' (tests)
+        'BATCH_SIZE': 100,
+        'FLUSH_INTERVAL': 2.0,   # segundos
+        'MAX_QUEUE_SIZE': 10000,
+    },
+}
+
+# Perfilado por petición (ProfilingMiddleware, ver core/profiling.py); activo
+# por defecto solo en development.py
+PROFILING = {
+    'ENABLED': config('PROFILING_ENABLED', default=False, cast=bool),
+    'SAMPLE_RATE': config('PROFILING_SAMPLE_RATE', default=1.0, cast=float),  # 0.0 - 1.0
+    'FLUSH_INTERVAL': 60,    # Segundos entre escrituras a SystemMetrics
+    'SLOW_REQUEST_MS': 1000,
+    'TOP_SQL': 5,            # Consultas más lentas incluidas en el log de peticiones lentas
+    'SERVER_TIMING': True,
+    # Reemplaza Serializer.data de DRF en todo el proceso: solo si se activa explícitamente
+    'SERIALIZER_TIMING': config('PROFILING_SERIALIZER_TIMING', default=False, cast=bool),
+}
+
 # Frontend URL Configuration
 FRONTEND_URL = 'http://localhost:5173'  # URL del frontend React (Vite)
 
@@ -20,6 +20,39 @@ DATABASES = {
     }
 }
 
+# Réplica de lectura local: un segundo archivo SQLite, copiado desde el primario
+# con `python manage.py db_replicas --sync` (ver core/replicas.py)
+if config('DB_SQLITE_REPLICA', default=False, cast=bool):
+    DATABASES['replica_1'] = {
+        'ENGINE': 'django.db.backends.sqlite3',
+        'NAME': BASE_DIR / 'db_replica.sqlite3',
+        'TEST': {'MIRROR': 'default'},
+    }
+    DATABASE_REPLICAS = {**DATABASE_REPLICAS, 'ALIASES': ['replica_1']}
+
+# Cache local que cuenta hits/misses para el perfilado y /metrics (ver core/profiling.py)
+CACHES = {
+    'default': {
+        'BACKEND': 'core.profiling.ProfiledLocMemCache',
+    }
+}
+
+# Perfilado por petición activo en desarrollo (header Server-Timing)
+PROFILING = dict(
+    PROFILING,
+    ENABLED=config('PROFILING_ENABLED', default=True, cast=bool),
+)
+
+# Detector de consultas N+1 / lentas (ver apps/core/querycount.py)
+MIDDLEWARE = MIDDLEWARE + ['apps.core.middleware.QueryInspectorMiddleware']
+
+QUERY_INSPECTOR = {
+    'ENABLED': DEBUG,
+    'THRESHOLD': 5,
+    'SLOW_QUERY_MS': 100,
+    'RAISE': config('QUERY_INSPECTOR_RAISE', default=False, cast=bool),
+}
+
 # Development-specific settings
 INTERNAL_IPS = [
     '127.0.0.1',
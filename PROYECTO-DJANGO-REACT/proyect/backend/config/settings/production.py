@@ -31,9 +31,62 @@ DATABASES = {
         'PASSWORD': config('DB_PASSWORD'),
         'HOST': config('DB_HOST', default='localhost'),
         'PORT': config('DB_PORT', default='5432'),
+        # Conexión persistente por hilo/proceso: sin esto cada petición y cada
+        # tarea de Celery abre una conexión nueva
+        'CONN_MAX_AGE': config('DB_CONN_MAX_AGE', default=60, cast=int),
+        # Verifica la conexión reutilizada al comenzar cada petición/tarea
+        'CONN_HEALTH_CHECKS': config('DB_CONN_HEALTH_CHECKS', default=True, cast=bool),
     }
 }
 
+if 'postgresql' in DATABASES['default']['ENGINE']:
+    DATABASES['default']['OPTIONS'] = {
+        'connect_timeout': config('DB_CONNECT_TIMEOUT', default=5, cast=int),
+        'application_name': config('DB_APPLICATION_NAME', default='lifetrack'),
+    }
+
+# Modo de conexión a PostgreSQL:
+# - persistent: conexiones persistentes por hilo (CONN_MAX_AGE), el default.
+# - pool: pool de psycopg 3 por proceso (core/backends/postgresql_pool), para
+#   muchos hilos/workers ASGI; requiere psycopg[binary,pool] en lugar de psycopg2.
+# - pgbouncer: detrás de PgBouncer en modo transaction. Sin cursores del servidor
+#   (los grandes .iterator() paginan con core.db.iterate_in_chunks); la zona
+#   horaria de la base debe ser UTC porque un SET de sesión no sobrevive al pooler.
+DB_POOL_MODE = config('DB_POOL_MODE', default='persistent')
+
+if DB_POOL_MODE == 'pool':
+    DATABASES['default'].update({
+        'ENGINE': 'core.backends.postgresql_pool',
+        'CONN_MAX_AGE': 0,
+    })
+    DATABASES['default'].setdefault('OPTIONS', {})['pool'] = {
+        'min_size': config('DB_POOL_MIN_SIZE', default=2, cast=int),
+        'max_size': config('DB_POOL_MAX_SIZE', default=10, cast=int),
+        'timeout': config('DB_POOL_TIMEOUT', default=10, cast=int),
+    }
+elif DB_POOL_MODE == 'pgbouncer':
+    DATABASES['default']['DISABLE_SERVER_SIDE_CURSORS'] = True
+
+# Réplicas de lectura (ver core/replicas.py): mismas credenciales que el
+# primario, un alias replica_N por host de DB_REPLICA_HOSTS ("host" o "host:puerto").
+# DB_REPLICA_NAME permite probar con una segunda base en el mismo servidor.
+DB_REPLICA_HOSTS = config('DB_REPLICA_HOSTS', default='', cast=lambda v: [s.strip() for s in v.split(',') if s.strip()])
+
+for index, replica_host in enumerate(DB_REPLICA_HOSTS, start=1):
+    replica_host, _, replica_port = replica_host.partition(':')
+    DATABASES[f'replica_{index}'] = {
+        **DATABASES['default'],
+        'NAME': config('DB_REPLICA_NAME', default=DATABASES['default']['NAME']),
+        'HOST': replica_host,
+        'PORT': replica_port or DATABASES['default']['PORT'],
+        'TEST': {'MIRROR': 'default'},
+    }
+
+DATABASE_REPLICAS = {
+    **DATABASE_REPLICAS,
+    'ALIASES': [alias for alias in DATABASES if alias.startswith('replica_')],
+}
+
 # Security settings for production
 SECURE_BROWSER_XSS_FILTER = True
 SECURE_CONTENT_TYPE_NOSNIFF = True
@@ -102,11 +155,24 @@ LOGGING = {
 # Cache configuration for production
 CACHES = {
     'default': {
-        'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+        # RedisCache que además cuenta hits/misses para /metrics
+        'BACKEND': 'core.profiling.ProfiledRedisCache',
         'LOCATION': config('REDIS_URL', default='redis://127.0.0.1:6379/1'),
     }
 }
 
+# Notificaciones en tiempo real entre workers ASGI y Celery
+NOTIFICATIONS_PUSH = dict(
+    NOTIFICATIONS_PUSH,
+    BACKEND='apps.notifications.realtime.RedisBroker',
+)
+
+# Perfilado (desactivado salvo PROFILING_ENABLED=True): solo una fracción de las peticiones
+PROFILING = dict(
+    PROFILING,
+    SAMPLE_RATE=config('PROFILING_SAMPLE_RATE', default=0.1, cast=float),
+)
+
 # JWT Configuration for production
 from datetime import timedelta
 
@@ -146,5 +212,4 @@ CELERY_RESULT_SERIALIZER = 'json'
 CELERY_TIMEZONE = 'UTC'
 
 # Performance optimizations
-CONN_MAX_AGE = 60
 DATA_UPLOAD_MAX_MEMORY_SIZE = 5242880  # 5MB
\ No newline at end of file
@@ -23,7 +23,7 @@ from drf_spectacular.views import (
     SpectacularRedocView,
     SpectacularSwaggerView,
 )
-from apps.core.views import api_documentation, api_status
+from apps.core.views import api_documentation, api_status, metrics
 
 urlpatterns = [
     path('admin/', admin.site.urls),
@@ -33,6 +33,7 @@ urlpatterns = [
     path('api/docs/', api_documentation, name='swagger-ui'),
     path('api/redoc/', SpectacularRedocView.as_view(url_name='schema'), name='redoc'),
     path('api/status/', api_status, name='api-status'),
+    path('metrics/', metrics, name='metrics'),
     
     # Authentication URLs
     path('api/auth/', include('dj_rest_auth.urls')),
@@ -46,6 +47,9 @@ urlpatterns = [
     path('api/appointments/', include('apps.appointments.urls')),
     path('api/reports/', include('apps.reports.urls')),
     path('api/notifications/', include('apps.notifications.urls')),
+    
+    # Lecturas async para los workers ASGI (uvicorn)
+    path('api/async/', include('config.async_urls')),
 ]
 
 # Servir archivos media en desarrollo
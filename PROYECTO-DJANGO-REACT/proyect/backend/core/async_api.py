@@ -0,0 +1,129 @@
+"""Soporte para las vistas de lectura async (servidas por uvicorn bajo ASGI).
+
+Las vistas DRF son síncronas: bajo WSGI cada petición ocupa un hilo del
+worker mientras espera a la base de datos y al cache. Las vistas async de
+config/async_urls.py (/api/async/...) liberan el event loop durante esas
+esperas y lanzan sus consultas independientes a la vez con `gather_queries`.
+
+El ORM async de Django (acount, afirst, ...) corre cada consulta con
+sync_to_async en el hilo de la petición: no bloquea el event loop, pero las
+consultas de una misma petición se ejecutan una detrás de otra sobre la misma
+conexión; además, bajo ASGI cada petición tiene su propio contexto de
+conexiones, así que CONN_MAX_AGE no las reutiliza entre peticiones.
+`gather_queries` ejecuta cada función en un pool de hilos propio, cada hilo
+con su conexión (persistente según CONN_MAX_AGE, cerrada con
+close_if_unusable_or_obsolete igual que en un worker de Celery), con el
+estado de core/replicas.py de la petición y una copia de su contexto (el
+perfil de core/profiling.py registra también esas consultas).
+
+Configuración (settings.ASYNC_API):
+    'PARALLEL_QUERIES': True   # False = ORM async en el hilo de la petición
+    'MAX_WORKERS': 8           # hilos (y conexiones a la base) por proceso
+
+Límite de concurrencia: cada proceso ASGI ejecuta a la vez como máximo
+MAX_WORKERS funciones de gather_queries, sumando todas sus peticiones; el
+resto espera turno en la cola del pool. Con DB_POOL_MODE=pool el pool de
+hilos no supera max_size - 1 del pool de conexiones del proceso (una queda
+para el hilo de la petición). Con conexiones persistentes, MAX_WORKERS x
+workers ASGI debe caber en max_connections de PostgreSQL junto con los
+workers WSGI y Celery.
+
+Benchmark: python manage.py benchmark_async_views
+"""
+
+import asyncio
+import contextvars
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from functools import wraps
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.db import connections
+from django.http import JsonResponse
+
+from .replicas import get_state, routing_state
+
+DEFAULT_ASYNC_API_SETTINGS = {
+    'PARALLEL_QUERIES': True,
+    'MAX_WORKERS': 8,
+}
+
+_executor = None
+_executor_lock = threading.Lock()
+
+
+def get_async_api_settings():
+    async_settings = dict(DEFAULT_ASYNC_API_SETTINGS)
+    async_settings.update(getattr(settings, 'ASYNC_API', {}))
+    return async_settings
+
+
+def get_max_workers():
+    """Hilos del pool: MAX_WORKERS acotado por el pool de conexiones del proceso, si hay uno."""
+    max_workers = get_async_api_settings()['MAX_WORKERS']
+    connection_pool = settings.DATABASES['default'].get('OPTIONS', {}).get('pool')
+    if isinstance(connection_pool, dict) and connection_pool.get('max_size'):
+        # Más hilos que conexiones solo agregaría esperas dentro del pool de psycopg
+        max_workers = min(max_workers, max(connection_pool['max_size'] - 1, 1))
+    return max_workers
+
+
+def get_executor():
+    """Pool de hilos de consultas del proceso."""
+    global _executor
+    if _executor is None:
+        with _executor_lock:
+            if _executor is None:
+                _executor = ThreadPoolExecutor(
+                    max_workers=get_max_workers(),
+                    thread_name_prefix='async-queries'
+                )
+    return _executor
+
+
+def _run_query(function, state):
+    # Las conexiones son por hilo aunque se copie el contexto: el hilo usa las suyas
+    with routing_state(state):
+        try:
+            return function()
+        finally:
+            for connection in connections.all(initialized_only=True):
+                connection.close_if_unusable_or_obsolete()
+
+
+async def gather_queries(*functions):
+    """
+    Ejecuta funciones síncronas de solo lectura independientes entre sí (sin
+    escrituras ni transacciones) y retorna sus resultados en el mismo orden.
+
+        appointments_today, total_patients = await gather_queries(
+            lambda: Appointment.objects.filter(date=today).count(),
+            Patient.objects.count,
+        )
+    """
+    if not get_async_api_settings()['PARALLEL_QUERIES']:
+        return [await sync_to_async(function)() for function in functions]
+
+    loop = asyncio.get_running_loop()
+    executor = get_executor()
+    state = get_state()
+    # run_in_executor no copia el contexto; un Context no se puede usar en dos hilos a la vez
+    return list(await asyncio.gather(*(
+        loop.run_in_executor(executor, contextvars.copy_context().run, _run_query, function, state)
+        for function in functions
+    )))
+
+
+def error_response(error, detail, status):
+    return JsonResponse({'error': error, 'detail': detail}, status=status)
+
+
+def async_get_view(view_func):
+    """Solo GET (y HEAD) para las vistas async; el resto responde 405 en JSON."""
+    @wraps(view_func)
+    async def wrapper(request, *args, **kwargs):
+        if request.method not in ('GET', 'HEAD'):
+            return error_response('Método no permitido', 'Use GET', 405)
+        return await view_func(request, *args, **kwargs)
+    return wrapper
@@ -0,0 +1,185 @@
+"""Escritura de logs de auditoría fuera del camino crítico de la petición.
+
+RoleBasedLoggingMiddleware arma un diccionario con los campos del AuditLog y lo
+entrega a `audit_sink`. El sink lo guarda en una cola acotada en memoria y un
+hilo en segundo plano la vacía con `bulk_create`, al juntar BATCH_SIZE entradas
+o cada FLUSH_INTERVAL segundos.
+
+Modos (settings.AUDIT_SETTINGS['SINK']['MODE']):
+    'thread': hilo de fondo del proceso (por defecto)
+    'celery': el hilo de fondo envía cada lote a la tarea core.tasks.write_audit_logs
+    'sync':   escribe inmediatamente (tests)
+
+Si la cola está llena la entrada se descarta y se cuenta en `dropped`;
+la petición nunca espera por la auditoría.
+"""
+
+import atexit
+import logging
+import queue
+import threading
+
+from django.conf import settings
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+audit_logger = logging.getLogger('audit')
+
+DEFAULT_SINK_SETTINGS = {
+    'MODE': 'thread',
+    'BATCH_SIZE': 100,
+    'FLUSH_INTERVAL': 2.0,
+    'MAX_QUEUE_SIZE': 10000,
+}
+
+
+def get_sink_settings():
+    sink_settings = dict(DEFAULT_SINK_SETTINGS)
+    sink_settings.update(getattr(settings, 'AUDIT_SETTINGS', {}).get('SINK', {}))
+    return sink_settings
+
+
+def write_entries(entries):
+    """Inserta un lote de entradas (diccionarios de campos) con bulk_create."""
+    from .models import AuditLog
+
+    logs = []
+    for entry in entries:
+        entry = dict(entry)
+        if isinstance(entry.get('timestamp'), str):
+            entry['timestamp'] = parse_datetime(entry['timestamp'])
+        logs.append(AuditLog(**entry))
+    AuditLog.objects.bulk_create(logs, batch_size=len(logs) or None)
+    return len(logs)
+
+
+class AuditSink:
+    """
+    Buffer acotado de entradas de auditoría con escritura por lotes.
+
+    🎯 Objetivo: Sacar el INSERT de auditoría del tiempo de respuesta
+    💡 Concepto: Productor (middleware) -> cola acotada -> consumidor (hilo) -> bulk_create
+    """
+
+    def __init__(self, mode=None, batch_size=None, flush_interval=None, max_queue_size=None):
+        sink_settings = get_sink_settings()
+        self.mode = mode or sink_settings['MODE']
+        self.batch_size = batch_size or sink_settings['BATCH_SIZE']
+        self.flush_interval = flush_interval or sink_settings['FLUSH_INTERVAL']
+        self.queue = queue.Queue(maxsize=max_queue_size or sink_settings['MAX_QUEUE_SIZE'])
+
+        self.stats = {'enqueued': 0, 'written': 0, 'dropped': 0, 'flushes': 0, 'failures': 0}
+        self._stats_lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._thread = None
+        self._thread_lock = threading.Lock()
+
+    # ------------------------------------------------------------------
+    # Productor
+    # ------------------------------------------------------------------
+
+    def submit(self, entry):
+        """
+        Agrega una entrada de auditoría (diccionario de campos de AuditLog).
+
+        Returns:
+            bool: False si la entrada se descartó por falta de espacio
+        """
+        entry.setdefault('timestamp', timezone.now())
+
+        if self.mode == 'sync':
+            self._write([entry])
+            return True
+
+        try:
+            self.queue.put_nowait(entry)
+        except queue.Full:
+            dropped = self._count('dropped')
+            # Evitar inundar el log: avisar en el primer descarte y cada 1000
+            if dropped == 1 or dropped % 1000 == 0:
+                audit_logger.warning(f"Audit queue full, {dropped} entries dropped so far")
+            return False
+
+        self._count('enqueued')
+        self._ensure_worker()
+        if self.queue.qsize() >= self.batch_size:
+            self._wakeup.set()
+        return True
+
+    # ------------------------------------------------------------------
+    # Consumidor
+    # ------------------------------------------------------------------
+
+    def flush(self):
+        """Vacía la cola completa en lotes de BATCH_SIZE. Retorna las entradas procesadas."""
+        processed = 0
+        with self._flush_lock:
+            while True:
+                batch = []
+                while len(batch) < self.batch_size:
+                    try:
+                        batch.append(self.queue.get_nowait())
+                    except queue.Empty:
+                        break
+                if not batch:
+                    break
+                self._write(batch)
+                processed += len(batch)
+        return processed
+
+    def _write(self, batch):
+        try:
+            if self.mode == 'celery':
+                from .tasks import write_audit_logs
+                write_audit_logs.delay([
+                    dict(entry, timestamp=entry['timestamp'].isoformat()) for entry in batch
+                ])
+            else:
+                write_entries(batch)
+            self._count('written', len(batch))
+            self._count('flushes')
+        except Exception as e:
+            # No reintentar: un lote inválido no debe bloquear los siguientes
+            self._count('failures')
+            self._count('dropped', len(batch))
+            audit_logger.error(f"Error writing {len(batch)} audit logs: {str(e)}")
+
+    def _ensure_worker(self):
+        if self._thread is not None and self._thread.is_alive():
+            return
+        with self._thread_lock:
+            if self._thread is not None and self._thread.is_alive():
+                return
+            self._thread = threading.Thread(target=self._run, name='audit-sink', daemon=True)
+            self._thread.start()
+
+    def _run(self):
+        from django.db import close_old_connections
+
+        while True:
+            self._wakeup.wait(self.flush_interval)
+            self._wakeup.clear()
+            try:
+                self.flush()
+            finally:
+                # El hilo no pasa por el ciclo request/response de Django
+                close_old_connections()
+
+    def _count(self, name, amount=1):
+        with self._stats_lock:
+            self.stats[name] += amount
+            return self.stats[name]
+
+    def get_stats(self):
+        """Contadores del sink más el tamaño actual de la cola."""
+        with self._stats_lock:
+            stats = dict(self.stats)
+        stats['queued'] = self.queue.qsize()
+        return stats
+
+
+audit_sink = AuditSink()
+
+# Escribir lo pendiente al terminar el proceso (los hilos daemon no esperan)
+atexit.register(audit_sink.flush)
@@ -0,0 +1,112 @@
+"""Backend de PostgreSQL con pool de conexiones de psycopg 3 (psycopg_pool).
+
+Django 5.0 no trae pool propio: con CONN_MAX_AGE cada hilo mantiene su
+conexión abierta, aunque esté inactivo. Con este backend cada proceso tiene un
+pool por alias de DATABASES; la conexión se toma al comenzar la petición (o la
+tarea de Celery) y se devuelve al pool al terminar, así N hilos comparten
+max_size conexiones.
+
+Configuración (production.py con DB_POOL_MODE=pool):
+    'ENGINE': 'core.backends.postgresql_pool',
+    'CONN_MAX_AGE': 0,   # el pool reemplaza a las conexiones persistentes
+    'OPTIONS': {'pool': {'min_size': 2, 'max_size': 10, 'timeout': 10}}
+
+Requiere psycopg[binary,pool] >= 3.1 en lugar de psycopg2.
+"""
+
+import os
+import threading
+
+from django.core.exceptions import ImproperlyConfigured
+from django.db.backends.base.base import NO_DB_ALIAS
+from django.db.backends.postgresql import base
+from django.db.backends.postgresql.psycopg_any import IsolationLevel, is_psycopg3
+
+DEFAULT_POOL_OPTIONS = {
+    'min_size': 2,
+    'max_size': 10,
+    # Segundos esperando una conexión libre antes de fallar
+    'timeout': 10,
+    # Conexiones inactivas más de este tiempo se cierran (hasta min_size)
+    'max_idle': 300,
+}
+
+
+class DatabaseWrapper(base.DatabaseWrapper):
+    # {(pid, alias): ConnectionPool}; el pid evita reutilizar un pool heredado
+    # por fork (workers de gunicorn o Celery con preload)
+    _pools = {}
+    _pools_lock = threading.Lock()
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._pooled_connection = False
+
+    @property
+    def pool_options(self):
+        return {**DEFAULT_POOL_OPTIONS, **self.settings_dict['OPTIONS'].get('pool', {})}
+
+    def get_pool(self, conn_params):
+        key = (os.getpid(), self.alias)
+        pool = self._pools.get(key)
+        if pool is None:
+            with self._pools_lock:
+                pool = self._pools.get(key)
+                if pool is None:
+                    pool = self._pools[key] = self.create_pool(conn_params)
+        return pool
+
+    def create_pool(self, conn_params):
+        if not is_psycopg3:
+            raise ImproperlyConfigured("core.backends.postgresql_pool requiere psycopg 3 (psycopg[pool])")
+        try:
+            from psycopg_pool import ConnectionPool
+        except ImportError as e:
+            raise ImproperlyConfigured(f"core.backends.postgresql_pool requiere psycopg_pool: {e}")
+
+        options = self.pool_options
+        pool_kwargs = {
+            'kwargs': conn_params,
+            'min_size': options['min_size'],
+            'max_size': options['max_size'],
+            'timeout': options['timeout'],
+            'max_idle': options['max_idle'],
+            'name': f"lifetrack-{self.alias}",
+            'open': True,
+        }
+        if hasattr(ConnectionPool, 'check_connection'):
+            # psycopg_pool >= 3.2: verifica la conexión al entregarla (como CONN_HEALTH_CHECKS)
+            pool_kwargs['check'] = ConnectionPool.check_connection
+        return ConnectionPool(**pool_kwargs)
+
+    def get_connection_params(self):
+        conn_params = super().get_connection_params()
+        conn_params.pop('pool', None)
+        return conn_params
+
+    def get_new_connection(self, conn_params):
+        # La conexión sin base (creación de la base de tests, etc.) no usa el pool
+        if self.alias == NO_DB_ALIAS:
+            self._pooled_connection = False
+            return super().get_new_connection(conn_params)
+
+        connection = self.get_pool(conn_params).getconn()
+        self._pooled_connection = True
+        isolation_level = self.settings_dict['OPTIONS'].get('isolation_level')
+        if isolation_level is None:
+            self.isolation_level = IsolationLevel.READ_COMMITTED
+        else:
+            self.isolation_level = IsolationLevel(isolation_level)
+            connection.isolation_level = self.isolation_level
+        return connection
+
+    def _close(self):
+        if self.connection is None or not self._pooled_connection:
+            return super()._close()
+        # putconn hace rollback de una transacción abierta antes de reutilizarla
+        with self.wrap_database_errors:
+            self.get_pool(None).putconn(self.connection)
+
+    def get_pool_stats(self):
+        pool = self._pools.get((os.getpid(), self.alias))
+        return pool.get_stats() if pool is not None else {}
@@ -0,0 +1,38 @@
+"""Utilidades de acceso a la base de datos según el modo de conexión.
+
+Detrás de PgBouncer en modo transaction (DB_POOL_MODE=pgbouncer en
+production.py) los cursores del servidor están deshabilitados
+(DISABLE_SERVER_SIDE_CURSORS): un cursor con nombre no sobrevive entre
+transacciones de distintas conexiones del pooler. En ese modo
+`queryset.iterator()` trae todo el resultado de una vez, así que los
+recorridos grandes paginan por clave con `iterate_in_chunks`.
+"""
+
+from django.db import connections
+
+
+def server_side_cursors_enabled(alias='default'):
+    return not connections[alias].settings_dict.get('DISABLE_SERVER_SIDE_CURSORS', False)
+
+
+def iterate_in_chunks(queryset, chunk_size, key='id'):
+    """
+    Recorre un queryset .values() por lotes de `chunk_size` filas.
+
+    Con cursores del servidor usa .iterator(); sin ellos pagina por `key`
+    (keyset: WHERE key > último ORDER BY key LIMIT chunk_size), que debe ser
+    único y formar parte de los valores.
+    """
+    if server_side_cursors_enabled(queryset.db):
+        yield from queryset.iterator(chunk_size=chunk_size)
+        return
+
+    queryset = queryset.order_by(key)
+    last = None
+    while True:
+        page = queryset if last is None else queryset.filter(**{f'{key}__gt': last})
+        rows = list(page[:chunk_size])
+        if not rows:
+            return
+        yield from rows
+        last = rows[-1][key]
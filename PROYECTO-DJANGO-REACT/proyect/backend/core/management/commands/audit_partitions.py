@@ -0,0 +1,46 @@
+from django.core.management.base import BaseCommand
+from core.partitions import (
+    apply_retention,
+    ensure_partitions,
+    get_partition_settings,
+    is_partitioning_supported,
+    list_partitions,
+)
+
+
+class Command(BaseCommand):
+    help = 'Crea las particiones mensuales de audit_logs y aplica la política de retención'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--months-ahead', type=int, help='Meses de particiones a crear por adelantado')
+        parser.add_argument('--retention-days', type=int, help='Días de auditoría a conservar')
+        parser.add_argument('--archive', action='store_true', help='Exportar a JSONL.gz antes de eliminar')
+        parser.add_argument('--archive-dir', help='Directorio de los archivos exportados')
+        parser.add_argument('--dry-run', action='store_true', help='Mostrar lo que se eliminaría sin eliminar')
+
+    def handle(self, *args, **options):
+        partition_settings = get_partition_settings()
+
+        if is_partitioning_supported():
+            self.stdout.write("🗂️ Asegurando particiones de audit_logs...")
+            ensure_partitions(months_ahead=options['months_ahead'])
+            for name in list_partitions():
+                self.stdout.write(f"   - {name}")
+        else:
+            self.stdout.write("ℹ️ El motor de base de datos no soporta particiones; se borrará por rango")
+
+        result = apply_retention(
+            retention_days=options['retention_days'],
+            archive=options['archive'] or partition_settings['ARCHIVE_ENABLED'],
+            archive_dir=options['archive_dir'],
+            dry_run=options['dry_run'],
+        )
+
+        prefix = "🔍 [dry-run] " if options['dry_run'] else "🧹 "
+        self.stdout.write(f"{prefix}Corte de retención: {result['cutoff']:%Y-%m-%d %H:%M}")
+        self.stdout.write(f"{prefix}Particiones eliminadas: {', '.join(result['dropped_partitions']) or 'ninguna'}")
+        self.stdout.write(f"{prefix}Filas eliminadas: {result['deleted_rows']}")
+        for path in result['archives']:
+            self.stdout.write(f"📦 Archivo generado: {path}")
+
+        self.stdout.write(self.style.SUCCESS("\n✅ Retención de auditoría completada!"))
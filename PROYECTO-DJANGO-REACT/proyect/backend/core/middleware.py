@@ -4,24 +4,41 @@ Este módulo contiene middleware para:
 1. Logging de acciones por rol
 2. Rate limiting por rol
 3. Audit trail para acciones administrativas
+4. Perfilado de rendimiento por petición
+5. Read-your-writes con réplicas de lectura
 """
 
 import json
 import time
+import random
 import logging
 from datetime import datetime, timedelta
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction, sync_to_async
 from django.core.cache import cache
 from django.http import JsonResponse
 from django.utils.deprecation import MiddlewareMixin
 from django.contrib.auth import get_user_model
 from django.conf import settings
-from .models import AuditLog
+from .audit import audit_sink
+from .network import get_client_ip
+from apps.core.metrics import observe_rate_limit_rejection
+from .ratelimit import get_limiter, DEFAULT_WINDOW_SECONDS
+from .replicas import pin_to_primary, routing_state
+from .profiling import (
+    end_profile,
+    get_profiling_settings,
+    install_query_timing,
+    install_serializer_timing,
+    metrics_aggregator,
+    start_profile,
+)
 
 User = get_user_model()
 
 # Configurar logger específico para auditoría
 audit_logger = logging.getLogger('audit')
 action_logger = logging.getLogger('actions')
+performance_logger = logging.getLogger('performance')
 
 # Obtener configuraciones desde settings
 def get_rate_limit_settings():
@@ -36,6 +53,9 @@ def get_security_headers():
 def get_middleware_logging_settings():
     return getattr(settings, 'MIDDLEWARE_LOGGING', {})
 
+def get_rate_limit_window(rate_limit_settings):
+    return rate_limit_settings.get('WINDOW_SECONDS', DEFAULT_WINDOW_SECONDS)
+
 
 class RoleBasedLoggingMiddleware(MiddlewareMixin):
     """
@@ -89,6 +109,10 @@ class RoleBasedLoggingMiddleware(MiddlewareMixin):
         if not audit_settings.get('ENABLED', True):
             return response
             
+        # Verificar si loggear requests GET (también anónimos: directorio público, slots)
+        if request.method == 'GET' and not audit_settings.get('LOG_GET_REQUESTS', False):
+            return response
+            
         # Determinar si loggear usuarios anónimos
         if not hasattr(request, 'user') or not request.user.is_authenticated:
             if audit_settings.get('LOG_ANONYMOUS_USERS', True):
@@ -97,10 +121,6 @@ class RoleBasedLoggingMiddleware(MiddlewareMixin):
             
         user_role = getattr(request.user, 'role', None)
         
-        # Verificar si loggear requests GET
-        if request.method == 'GET' and not audit_settings.get('LOG_GET_REQUESTS', False):
-            return response
-            
         # Verificar si esta acción debe ser loggeada para este rol
         if self.should_log_action(request.path, user_role, audit_settings):
             self.create_audit_log(request, response)
@@ -147,23 +167,23 @@ class RoleBasedLoggingMiddleware(MiddlewareMixin):
                 except (json.JSONDecodeError, UnicodeDecodeError):
                     request_data = {'error': 'Could not parse request data'}
 
-            # Crear log de auditoría
-            AuditLog.objects.create(
-                user=request.user,
-                action=self.get_action_name(request),
-                resource=self.get_resource_name(request.path),
-                resource_id=self.get_resource_id(request.path),
-                method=request.method,
-                path=request.path,
-                ip_address=request.audit_data['ip_address'],
-                user_agent=request.audit_data['user_agent'],
-                request_data=request_data,
-                response_status=response.status_code,
-            )
+            # Encolar el log de auditoría (se escribe por lotes fuera de la petición)
+            audit_sink.submit({
+                'user_id': request.user.id if request.user.is_authenticated else None,
+                'action': self.get_action_name(request),
+                'resource': self.get_resource_name(request.path),
+                'resource_id': self.get_resource_id(request.path),
+                'method': request.method,
+                'path': request.path[:500],
+                'ip_address': request.audit_data['ip_address'],
+                'user_agent': request.audit_data['user_agent'],
+                'request_data': request_data,
+                'response_status': response.status_code,
+            })
             
             # Log adicional para el sistema de logging
             action_logger.info(
-                f"User {request.user.username} ({request.user.role}) "
+                f"User {request.user.username or 'anonymous'} ({getattr(request.user, 'role', 'anonymous')}) "
                 f"performed {request.method} on {request.path} "
                 f"from {request.audit_data['ip_address']} "
                 f"- Status: {response.status_code}"
@@ -222,26 +242,25 @@ class RoleBasedLoggingMiddleware(MiddlewareMixin):
 
     def get_client_ip(self, request):
         """
-        Obtener la IP real del cliente considerando proxies.
+        Obtener la IP del cliente (ver core/network.py: TRUSTED_PROXY_COUNT).
         """
-        x_forwarded_for = request.META.get('HTTP_X_FORWARDED_FOR')
-        if x_forwarded_for:
-            ip = x_forwarded_for.split(',')[0]
-        else:
-            ip = request.META.get('REMOTE_ADDR')
-        return ip
+        return get_client_ip(request)
 
 
 class RoleBasedRateLimitMiddleware(MiddlewareMixin):
     """
     Middleware para implementar rate limiting basado en roles.
+    
+    El conteo lo hace el motor configurado en RATE_LIMIT_SETTINGS['ALGORITHM']
+    (ver core/ratelimit.py) y cada respuesta incluye los headers X-RateLimit-*.
     """
     
-    # Endpoints que no tienen rate limiting
+    # Endpoints que no tienen rate limiting (el login tiene su propio bloqueo)
     EXEMPT_PATHS = [
-        '/api/auth/login/',
-        '/api/auth/refresh/',
-        '/api/health/',
+        '/api/users/auth/login/',
+        '/api/users/auth/refresh/',
+        '/api/status/',
+        '/metrics/',
         '/admin/',
     ]
 
@@ -264,76 +283,107 @@ class RoleBasedRateLimitMiddleware(MiddlewareMixin):
         user_role = self.get_user_role(request)
         
         # Obtener límite para el rol desde configuración
-        rate_limits = rate_limit_settings.get('RATE_LIMITS', {})
-        rate_limit = rate_limits.get(user_role, rate_limits.get('anonymous', 20))
+        rate_limit = self.get_rate_limit(rate_limit_settings, user_role)
         
         # Crear clave única para el cache
         cache_key = self.get_cache_key(request, user_role)
         
-        # Verificar rate limit
-        if self.is_rate_limited(cache_key, rate_limit):
-            return JsonResponse({
+        # Registrar la petición en el motor
+        result = self.hit_rate_limit(cache_key, rate_limit, rate_limit_settings)
+        request.rate_limit_result = result
+        if not result.allowed:
+            observe_rate_limit_rejection(user_role)
+            if get_middleware_logging_settings().get('LOG_RATE_LIMIT_VIOLATIONS', True):
+                action_logger.warning(
+                    f"Rate limit exceeded for {cache_key} "
+                    f"(limit: {rate_limit}, retry after: {result.retry_after}s)"
+                )
+            response = JsonResponse({
                 'error': 'Rate limit exceeded',
-                'message': f'Too many requests. Limit: {rate_limit} per minute for role: {user_role}',
-                'retry_after': 60
+                'message': f'Too many requests. Limit: {rate_limit} per {get_rate_limit_window(rate_limit_settings)} seconds for role: {user_role}',
+                'retry_after': result.retry_after
             }, status=429)
+            response['Retry-After'] = str(result.retry_after)
+            return response
 
         return None
 
+    def process_response(self, request, response):
+        """
+        Agregar los headers X-RateLimit-* con el estado del límite.
+        """
+        result = getattr(request, 'rate_limit_result', None)
+        if result is not None:
+            response['X-RateLimit-Limit'] = str(result.limit)
+            response['X-RateLimit-Remaining'] = str(result.remaining)
+            response['X-RateLimit-Reset'] = str(result.reset_after)
+        return response
+
+    def get_request_user(self, request):
+        """
+        Usuario de la sesión o del token JWT del header Authorization.
+        
+        DRF autentica el JWT recién en la vista; aquí se resuelve con el
+        contexto cacheado (sin consultar User) para no contar las peticiones
+        de la API como anónimas por IP.
+        """
+        if not hasattr(request, '_rate_limit_user'):
+            user = getattr(request, 'user', None)
+            if user is None or not user.is_authenticated:
+                user = None
+                if request.META.get('HTTP_AUTHORIZATION'):
+                    from apps.users.authentication import authenticate_request
+                    user = authenticate_request(request)
+            request._rate_limit_user = user
+        return request._rate_limit_user
+
     def get_user_role(self, request):
         """
         Obtener el rol del usuario actual.
         """
-        if hasattr(request, 'user') and request.user.is_authenticated:
-            return getattr(request.user, 'role', 'client')
+        user = self.get_request_user(request)
+        if user is not None:
+            return getattr(user, 'role', 'client')
         return 'anonymous'
 
+    def get_rate_limit(self, rate_limit_settings, user_role):
+        """
+        Obtener el límite de peticiones por ventana para el rol.
+        Acepta `RATE_LIMITS = {rol: n}` o el formato `{rol: {'requests_per_minute': n}}`.
+        """
+        rate_limits = rate_limit_settings.get('RATE_LIMITS', rate_limit_settings)
+        rate_limit = rate_limits.get(user_role, rate_limits.get('anonymous', 20))
+        if isinstance(rate_limit, dict):
+            rate_limit = rate_limit.get('requests_per_minute', 20)
+        return rate_limit
+
     def get_cache_key(self, request, user_role):
         """
         Generar clave única para el cache basada en usuario/IP y rol.
         """
-        if hasattr(request, 'user') and request.user.is_authenticated:
-            identifier = f"user_{request.user.id}"
+        user = self.get_request_user(request)
+        if user is not None:
+            identifier = f"user_{user.id}"
         else:
             identifier = f"ip_{self.get_client_ip(request)}"
         
         return f"rate_limit_{identifier}_{user_role}"
 
-    def is_rate_limited(self, cache_key, rate_limit):
-        """
-        Verificar si se ha excedido el rate limit.
+    def hit_rate_limit(self, cache_key, rate_limit, rate_limit_settings=None):
         """
-        current_time = int(time.time())
-        window_start = current_time - 60  # Ventana de 1 minuto
+        Registrar la petición en el motor de rate limiting.
         
-        # Obtener peticiones en la ventana actual
-        requests = cache.get(cache_key, [])
-        
-        # Filtrar peticiones dentro de la ventana de tiempo
-        requests = [req_time for req_time in requests if req_time > window_start]
-        
-        # Verificar si se excede el límite
-        if len(requests) >= rate_limit:
-            return True
-        
-        # Agregar la petición actual
-        requests.append(current_time)
-        
-        # Guardar en cache por 60 segundos
-        cache.set(cache_key, requests, 60)
-        
-        return False
+        Returns:
+            RateLimitResult: `allowed`, `limit`, `remaining`, `reset_after`, `retry_after`
+        """
+        limiter = get_limiter(rate_limit_settings or get_rate_limit_settings())
+        return limiter.hit(cache_key, rate_limit)
 
     def get_client_ip(self, request):
         """
-        Obtener la IP real del cliente considerando proxies.
+        Obtener la IP del cliente (ver core/network.py: TRUSTED_PROXY_COUNT).
         """
-        x_forwarded_for = request.META.get('HTTP_X_FORWARDED_FOR')
-        if x_forwarded_for:
-            ip = x_forwarded_for.split(',')[0]
-        else:
-            ip = request.META.get('REMOTE_ADDR')
-        return ip
+        return get_client_ip(request)
 
 
 class SecurityHeadersMiddleware(MiddlewareMixin):
@@ -353,4 +403,137 @@ class SecurityHeadersMiddleware(MiddlewareMixin):
             if header_value:  # Solo aplicar si el valor no está vacío
                 response[header_name] = header_value
         
-        return response
\ No newline at end of file
+        return response
+
+
+class ProfilingMiddleware:
+    """
+    Middleware para medir el rendimiento de cada vista.
+    
+    Registra tiempo total, consultas SQL, cache y serialización (ver core/profiling.py),
+    agrega el header Server-Timing y acumula histogramas por endpoint. Bajo ASGI
+    también cuenta las consultas de gather_queries (core/async_api.py).
+    """
+    
+    # Bajo ASGI no obliga a pasar las vistas async por un hilo
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+        profiling_settings = get_profiling_settings()
+        if profiling_settings['ENABLED'] and profiling_settings['SAMPLE_RATE'] > 0:
+            install_query_timing()
+            # Serializer.data se reemplaza en todo el proceso: solo si se pidió explícitamente
+            if profiling_settings['SERIALIZER_TIMING']:
+                install_serializer_timing()
+
+    def should_profile(self, profiling_settings):
+        """La petición entra en el muestreo."""
+        return profiling_settings['ENABLED'] and random.random() < profiling_settings['SAMPLE_RATE']
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        profiling_settings = get_profiling_settings()
+        if not self.should_profile(profiling_settings):
+            return self.get_response(request)
+        
+        profile, token = start_profile(profiling_settings['TOP_SQL'])
+        try:
+            response = self.get_response(request)
+        finally:
+            end_profile(token)
+        return self.finish(request, response, profile, profiling_settings)
+
+    async def __acall__(self, request):
+        profiling_settings = get_profiling_settings()
+        if not self.should_profile(profiling_settings):
+            return await self.get_response(request)
+        
+        profile, token = start_profile(profiling_settings['TOP_SQL'])
+        try:
+            response = await self.get_response(request)
+        finally:
+            end_profile(token)
+        return self.finish(request, response, profile, profiling_settings)
+
+    def finish(self, request, response, profile, profiling_settings):
+        profile.finish()
+        
+        endpoint = self.get_endpoint_name(request)
+        metrics_aggregator.record(endpoint, profile)
+        
+        if profiling_settings['SERVER_TIMING']:
+            response['Server-Timing'] = profile.server_timing()
+        
+        slow_threshold = profiling_settings.get(
+            'SLOW_REQUEST_MS',
+            get_middleware_logging_settings().get('PERFORMANCE_THRESHOLD_MS', 1000)
+        )
+        if profile.wall_ms >= slow_threshold:
+            self.log_slow_request(request, endpoint, profile)
+        
+        return response
+
+    def get_endpoint_name(self, request):
+        """
+        Nombre estable del endpoint: método + ruta del URLconf (sin IDs concretos).
+        """
+        match = getattr(request, 'resolver_match', None)
+        if match is not None:
+            route = (match.route or match.view_name).lstrip('^').rstrip('$')
+            return f"{request.method} /{route}"
+        return f"{request.method} unresolved"
+
+    def log_slow_request(self, request, endpoint, profile):
+        """
+        Registrar una petición lenta con sus consultas SQL más costosas.
+        """
+        lines = [
+            f"SLOW REQUEST {endpoint} ({request.path}) - "
+            f"{profile.wall_ms:.1f}ms total, {profile.db_queries} queries "
+            f"({profile.db_ms:.1f}ms), serializer {profile.serializer_ms:.1f}ms, "
+            f"cache hits={profile.cache_hits} misses={profile.cache_misses}"
+        ]
+        for duration, sql in profile.top_sql():
+            lines.append(f"  {duration:8.1f}ms  {sql[:500]}")
+        performance_logger.warning('\n'.join(lines))
+
+
+class ReplicaPinningMiddleware:
+    """
+    Estado de enrutamiento por petición para core.replicas.ReplicaRouter.
+    
+    Si la petición escribió en la base de datos (POST/PUT/PATCH/DELETE), el
+    usuario lee del primario durante DATABASE_REPLICAS['STICKY_SECONDS'].
+    """
+    
+    SAFE_METHODS = ('GET', 'HEAD', 'OPTIONS')
+    # Bajo ASGI no obliga a pasar las vistas async por un hilo
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        with routing_state() as state:
+            response = self.get_response(request)
+            if state.wrote and request.method not in self.SAFE_METHODS:
+                pin_to_primary(getattr(request, 'user', None))
+        return response
+
+    async def __acall__(self, request):
+        with routing_state() as state:
+            response = await self.get_response(request)
+            if state.wrote and request.method not in self.SAFE_METHODS:
+                # request.user es perezoso y puede consultar la base de datos
+                await sync_to_async(pin_to_primary)(getattr(request, 'user', None))
+        return response
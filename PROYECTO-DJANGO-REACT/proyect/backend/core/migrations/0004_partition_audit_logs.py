@@ -0,0 +1,118 @@
+# Generated by Django 5.0.1 on 2026-10-19 14:00
+
+from datetime import datetime, timezone as dt_timezone
+
+from django.conf import settings
+from django.db import migrations
+from django.utils import timezone
+
+
+# Copias congeladas de core/partitions.py: la migración no debe cambiar si el módulo cambia
+def month_start(value):
+    return datetime(value.year, value.month, 1, tzinfo=dt_timezone.utc)
+
+
+def add_months(value, months):
+    month_index = value.year * 12 + value.month - 1 + months
+    return datetime(month_index // 12, month_index % 12 + 1, 1, tzinfo=dt_timezone.utc)
+
+
+def create_partition_sql(start):
+    end = add_months(start, 1)
+    return (
+        f"CREATE TABLE IF NOT EXISTS audit_logs_p{start.year:04d}_{start.month:02d} PARTITION OF audit_logs "
+        f"FOR VALUES FROM ('{start.isoformat()}') TO ('{end.isoformat()}')"
+    )
+
+
+def partition_audit_logs(apps, schema_editor):
+    """
+    Convierte audit_logs en una tabla particionada por mes (solo PostgreSQL).
+    La clave primaria pasa a ser (id, timestamp), requisito de PostgreSQL.
+    La partición DEFAULT recibe las filas fuera de las particiones mensuales.
+    """
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+
+    user_table = apps.get_model(settings.AUTH_USER_MODEL)._meta.db_table
+    execute = schema_editor.execute
+
+    execute('ALTER TABLE audit_logs RENAME TO audit_logs_legacy')
+    execute(
+        'CREATE TABLE audit_logs (LIKE audit_logs_legacy INCLUDING DEFAULTS INCLUDING CONSTRAINTS) '
+        'PARTITION BY RANGE ("timestamp")'
+    )
+    execute('ALTER TABLE audit_logs ALTER COLUMN id DROP IDENTITY IF EXISTS')
+    execute('ALTER TABLE audit_logs ADD PRIMARY KEY (id, "timestamp")')
+
+    # Particiones para los datos existentes y los próximos meses
+    with schema_editor.connection.cursor() as cursor:
+        cursor.execute('SELECT MIN("timestamp") FROM audit_logs_legacy')
+        oldest = cursor.fetchone()[0]
+    now = timezone.now()
+    current = month_start(oldest or now)
+    last = add_months(month_start(now), 3)
+    while current <= last:
+        execute(create_partition_sql(current))
+        current = add_months(current, 1)
+    execute('CREATE TABLE IF NOT EXISTS audit_logs_default PARTITION OF audit_logs DEFAULT')
+
+    execute('INSERT INTO audit_logs SELECT * FROM audit_logs_legacy')
+    execute('DROP TABLE audit_logs_legacy')
+
+    execute('CREATE SEQUENCE audit_logs_id_seq OWNED BY audit_logs.id')
+    execute("ALTER TABLE audit_logs ALTER COLUMN id SET DEFAULT nextval('audit_logs_id_seq')")
+    execute("SELECT setval('audit_logs_id_seq', COALESCE(MAX(id), 0) + 1, false) FROM audit_logs")
+
+    execute('CREATE INDEX audit_user_time_idx ON audit_logs (user_id, "timestamp")')
+    execute('CREATE INDEX audit_resource_time_idx ON audit_logs (resource, "timestamp")')
+    execute(
+        f'ALTER TABLE audit_logs ADD CONSTRAINT audit_logs_user_id_fk_partitioned '
+        f'FOREIGN KEY (user_id) REFERENCES {user_table} (id) DEFERRABLE INITIALLY DEFERRED'
+    )
+
+
+def unpartition_audit_logs(apps, schema_editor):
+    """Vuelve a una tabla audit_logs normal con clave primaria (id)."""
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+
+    user_table = apps.get_model(settings.AUTH_USER_MODEL)._meta.db_table
+    execute = schema_editor.execute
+
+    execute('CREATE TABLE audit_logs_plain (LIKE audit_logs INCLUDING CONSTRAINTS)')
+    execute('INSERT INTO audit_logs_plain SELECT * FROM audit_logs')
+    execute('DROP TABLE audit_logs CASCADE')
+    execute('ALTER TABLE audit_logs_plain RENAME TO audit_logs')
+    execute('ALTER TABLE audit_logs ADD PRIMARY KEY (id)')
+    execute('ALTER TABLE audit_logs ALTER COLUMN id ADD GENERATED BY DEFAULT AS IDENTITY')
+    execute(
+        "SELECT setval(pg_get_serial_sequence('audit_logs', 'id'), COALESCE(MAX(id), 0) + 1, false) "
+        "FROM audit_logs"
+    )
+    execute('CREATE INDEX audit_user_time_idx ON audit_logs (user_id, "timestamp")')
+    execute('CREATE INDEX audit_resource_time_idx ON audit_logs (resource, "timestamp")')
+    execute(
+        f'ALTER TABLE audit_logs ADD CONSTRAINT audit_logs_user_id_fk '
+        f'FOREIGN KEY (user_id) REFERENCES {user_table} (id) DEFERRABLE INITIALLY DEFERRED'
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0003_auditlog_timestamp_default'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='auditlog',
+            name='audit_action_time_idx',
+        ),
+        migrations.RemoveIndex(
+            model_name='auditlog',
+            name='audit_ip_time_idx',
+        ),
+        migrations.RunPython(partition_audit_logs, unpartition_audit_logs),
+    ]
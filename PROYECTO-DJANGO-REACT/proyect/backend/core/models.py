@@ -4,11 +4,39 @@ Modelos del core del sistema.
 Este módulo contiene modelos compartidos y de auditoría.
 """
 
+from datetime import timedelta
+
 from django.db import models
+from django.utils import timezone
 from django.contrib.auth import get_user_model
 
 User = get_user_model()
 
+# Ventana por defecto de las consultas de auditoría (acota las particiones leídas)
+DEFAULT_AUDIT_QUERY_DAYS = 30
+
+
+class AuditLogQuerySet(models.QuerySet):
+    """
+    Consultas de auditoría acotadas por `timestamp`.
+    
+    En PostgreSQL `audit_logs` está particionada por mes (ver core/partitions.py);
+    filtrar siempre por rango de fechas permite descartar particiones completas.
+    """
+    
+    def between(self, start, end=None):
+        """Logs en el rango [start, end)."""
+        queryset = self.filter(timestamp__gte=start)
+        if end is not None:
+            queryset = queryset.filter(timestamp__lt=end)
+        return queryset
+    
+    def for_user(self, user, start=None, end=None):
+        """Logs de un usuario; por defecto los últimos DEFAULT_AUDIT_QUERY_DAYS días."""
+        if start is None:
+            start = timezone.now() - timedelta(days=DEFAULT_AUDIT_QUERY_DAYS)
+        return self.between(start, end).filter(user=user)
+
 
 class AuditLog(models.Model):
     """
@@ -80,21 +108,24 @@ class AuditLog(models.Model):
         help_text="Código de estado HTTP de la respuesta"
     )
     timestamp = models.DateTimeField(
-        auto_now_add=True,
+        default=timezone.now,
+        editable=False,
         verbose_name="Fecha y Hora",
         help_text="Momento en que se realizó la acción"
     )
     
+    objects = AuditLogQuerySet.as_manager()
+    
     class Meta:
         db_table = 'audit_logs'
         ordering = ['-timestamp']
         verbose_name = "Log de Auditoría"
         verbose_name_plural = "Logs de Auditoría"
+        # Cada partición mensual replica estos índices; se mantienen solo los
+        # necesarios para no encarecer cada inserción
         indexes = [
             models.Index(fields=['user', 'timestamp'], name='audit_user_time_idx'),
-            models.Index(fields=['action', 'timestamp'], name='audit_action_time_idx'),
             models.Index(fields=['resource', 'timestamp'], name='audit_resource_time_idx'),
-            models.Index(fields=['ip_address', 'timestamp'], name='audit_ip_time_idx'),
         ]
 
     def __str__(self):
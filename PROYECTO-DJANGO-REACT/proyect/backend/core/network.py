@@ -0,0 +1,22 @@
+"""IP del cliente para rate limiting, bloqueo de login y auditoría.
+
+X-Forwarded-For lo escribe el cliente: sin proxies propios (TRUSTED_PROXY_COUNT
+= 0) se usa REMOTE_ADDR. Con N proxies propios delante de Django se toma la
+entrada que agregó el más externo (la N-ésima desde el final); lo que esté
+antes en el header no es confiable.
+
+Configuración (settings.TRUSTED_PROXY_COUNT): 0
+"""
+
+from django.conf import settings
+
+
+def get_client_ip(request):
+    trusted_proxies = getattr(settings, 'TRUSTED_PROXY_COUNT', 0)
+    remote_addr = request.META.get('REMOTE_ADDR')
+    if trusted_proxies <= 0:
+        return remote_addr
+    hops = [hop.strip() for hop in request.META.get('HTTP_X_FORWARDED_FOR', '').split(',') if hop.strip()]
+    if len(hops) < trusted_proxies:
+        return remote_addr
+    return hops[-trusted_proxies]
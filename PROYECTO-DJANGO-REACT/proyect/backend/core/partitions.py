@@ -0,0 +1,290 @@
+"""Particionado mensual y retención de la tabla `audit_logs`.
+
+En PostgreSQL `audit_logs` es una tabla particionada por rango sobre
+`timestamp`, con una partición por mes (`audit_logs_pYYYY_MM`) y una partición
+DEFAULT (`audit_logs_default`) para las filas sin partición mensual, de modo
+que un INSERT nunca falla aunque el job de particiones no haya corrido:
+
+- `ensure_partitions` crea por adelantado las particiones de los próximos meses;
+  si la partición DEFAULT ya tiene filas de ese mes, las mueve a la nueva.
+- `apply_retention` elimina particiones completas cuyo mes quedó fuera de
+  RETENTION_DAYS (DETACH + DROP, sin DELETE fila por fila), archivándolas antes
+  en JSONL comprimido si ARCHIVE_ENABLED está activo. Las filas vencidas de la
+  partición DEFAULT se borran con DELETE.
+
+En otros motores (SQLite en desarrollo) no hay particiones: la retención
+archiva y borra por rango de fechas en lotes.
+
+Configuración (settings.AUDIT_SETTINGS):
+    'RETENTION_DAYS': 90
+    'PARTITIONS_AHEAD': 3
+    'ARCHIVE_ENABLED': False
+    'ARCHIVE_DIR': BASE_DIR / 'audit_archive'
+"""
+
+import gzip
+import json
+import logging
+import os
+import re
+from datetime import datetime, timedelta, timezone as dt_timezone
+
+from django.conf import settings
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import connection, transaction
+from django.utils import timezone
+
+from .db import iterate_in_chunks
+
+logger = logging.getLogger(__name__)
+
+AUDIT_TABLE = 'audit_logs'
+DEFAULT_PARTITION = 'audit_logs_default'
+PARTITION_NAME_RE = re.compile(r'^audit_logs_p(\d{4})_(\d{2})$')
+DELETE_BATCH_SIZE = 5000
+ARCHIVE_CHUNK_SIZE = 2000
+
+
+def get_partition_settings():
+    audit_settings = getattr(settings, 'AUDIT_SETTINGS', {})
+    return {
+        'RETENTION_DAYS': audit_settings.get('RETENTION_DAYS', 90),
+        'PARTITIONS_AHEAD': audit_settings.get('PARTITIONS_AHEAD', 3),
+        'ARCHIVE_ENABLED': audit_settings.get('ARCHIVE_ENABLED', False),
+        'ARCHIVE_DIR': audit_settings.get(
+            'ARCHIVE_DIR', os.path.join(settings.BASE_DIR, 'audit_archive')
+        ),
+    }
+
+
+def is_partitioning_supported(conn=None):
+    return (conn or connection).vendor == 'postgresql'
+
+
+def month_start(value):
+    """Primer instante (UTC) del mes de `value`."""
+    return datetime(value.year, value.month, 1, tzinfo=dt_timezone.utc)
+
+
+def add_months(value, months):
+    month_index = value.year * 12 + value.month - 1 + months
+    return datetime(month_index // 12, month_index % 12 + 1, 1, tzinfo=dt_timezone.utc)
+
+
+def partition_name(start):
+    return f"{AUDIT_TABLE}_p{start.year:04d}_{start.month:02d}"
+
+
+def partition_bounds(name):
+    """(inicio, fin) del mes representado por el nombre de la partición, o None."""
+    match = PARTITION_NAME_RE.match(name)
+    if not match:
+        return None
+    start = datetime(int(match.group(1)), int(match.group(2)), 1, tzinfo=dt_timezone.utc)
+    return start, add_months(start, 1)
+
+
+def create_partition_sql(start):
+    end = add_months(start, 1)
+    return (
+        f"CREATE TABLE IF NOT EXISTS {partition_name(start)} PARTITION OF {AUDIT_TABLE} "
+        f"FOR VALUES FROM ('{start.isoformat()}') TO ('{end.isoformat()}')"
+    )
+
+
+def list_partitions(conn=None):
+    """Nombres de las particiones existentes de audit_logs, ordenadas."""
+    conn = conn or connection
+    with conn.cursor() as cursor:
+        cursor.execute(
+            """
+            SELECT child.relname
+            FROM pg_inherits
+            JOIN pg_class parent ON parent.oid = pg_inherits.inhparent
+            JOIN pg_class child ON child.oid = pg_inherits.inhrelid
+            WHERE parent.relname = %s
+            ORDER BY child.relname
+            """,
+            [AUDIT_TABLE]
+        )
+        return [row[0] for row in cursor.fetchall()]
+
+
+def create_partition(start, cursor):
+    """
+    Crea la partición del mes de `start`. Si la partición DEFAULT tiene filas de
+    ese mes, PostgreSQL no permite crearla directamente: se crea como tabla
+    suelta, se le mueven las filas y se adjunta.
+    """
+    name = partition_name(start)
+    end = add_months(start, 1)
+    cursor.execute('SELECT to_regclass(%s)', [name])
+    if cursor.fetchone()[0] is not None:
+        return name
+
+    range_filter = '"timestamp" >= %s AND "timestamp" < %s'
+    cursor.execute(f'SELECT EXISTS (SELECT 1 FROM {DEFAULT_PARTITION} WHERE {range_filter})', [start, end])
+    if not cursor.fetchone()[0]:
+        cursor.execute(create_partition_sql(start))
+        return name
+
+    cursor.execute(f'CREATE TABLE {name} (LIKE {AUDIT_TABLE} INCLUDING DEFAULTS INCLUDING CONSTRAINTS)')
+    cursor.execute(f'INSERT INTO {name} SELECT * FROM {DEFAULT_PARTITION} WHERE {range_filter}', [start, end])
+    cursor.execute(f'DELETE FROM {DEFAULT_PARTITION} WHERE {range_filter}', [start, end])
+    cursor.execute(
+        f"ALTER TABLE {AUDIT_TABLE} ATTACH PARTITION {name} "
+        f"FOR VALUES FROM ('{start.isoformat()}') TO ('{end.isoformat()}')"
+    )
+    logger.info(f"Moved audit logs from {DEFAULT_PARTITION} to {name}")
+    return name
+
+
+def ensure_partitions(months_ahead=None, since=None, conn=None):
+    """
+    Crea la partición DEFAULT y las particiones mensuales desde `since`
+    (default: mes actual) hasta `months_ahead` meses en el futuro. Idempotente.
+
+    Returns:
+        list[str]: Particiones mensuales creadas o ya existentes en el rango
+    """
+    conn = conn or connection
+    if not is_partitioning_supported(conn):
+        return []
+
+    if months_ahead is None:
+        months_ahead = get_partition_settings()['PARTITIONS_AHEAD']
+    current = month_start(since or timezone.now())
+    last = add_months(month_start(timezone.now()), months_ahead)
+
+    names = []
+    with transaction.atomic(using=conn.alias):
+        with conn.cursor() as cursor:
+            cursor.execute(f"CREATE TABLE IF NOT EXISTS {DEFAULT_PARTITION} PARTITION OF {AUDIT_TABLE} DEFAULT")
+            while current <= last:
+                names.append(create_partition(current, cursor))
+                current = add_months(current, 1)
+    logger.info(f"Audit partitions ensured up to {names[-1] if names else '-'}")
+    return names
+
+
+def archive_range(start, end, archive_dir, label):
+    """
+    Exporta los logs del rango [start, end) a `<archive_dir>/<label>.jsonl.gz`.
+
+    Returns:
+        tuple[str, int]: Ruta del archivo y cantidad de filas exportadas
+    """
+    from .models import AuditLog
+
+    os.makedirs(archive_dir, exist_ok=True)
+    path = os.path.join(archive_dir, f"{label}.jsonl.gz")
+    rows = 0
+    queryset = AuditLog.objects.between(start, end).order_by().values()
+    with gzip.open(path, 'wt', encoding='utf-8') as handle:
+        for row in iterate_in_chunks(queryset, ARCHIVE_CHUNK_SIZE):
+            handle.write(json.dumps(row, cls=DjangoJSONEncoder))
+            handle.write('\n')
+            rows += 1
+    logger.info(f"Archived {rows} audit logs to {path}")
+    return path, rows
+
+
+def purge_default_partition(cutoff, archive, archive_dir, dry_run=False, conn=None):
+    """
+    Borra de la partición DEFAULT las filas anteriores a `cutoff`.
+
+    Returns:
+        tuple[int, str | None]: Filas borradas (o a borrar con dry_run) y archivo exportado
+    """
+    conn = conn or connection
+    with conn.cursor() as cursor:
+        cursor.execute('SELECT to_regclass(%s)', [DEFAULT_PARTITION])
+        if cursor.fetchone()[0] is None:
+            return 0, None
+        cursor.execute(f'SELECT COUNT(*) FROM {DEFAULT_PARTITION} WHERE "timestamp" < %s', [cutoff])
+        rows = cursor.fetchone()[0]
+        if not rows or dry_run:
+            return rows, None
+
+        path = None
+        if archive:
+            os.makedirs(archive_dir, exist_ok=True)
+            path = os.path.join(archive_dir, f"{DEFAULT_PARTITION}_{cutoff:%Y%m%d}.jsonl.gz")
+            cursor.execute(
+                f'SELECT row_to_json(t)::text FROM {DEFAULT_PARTITION} t WHERE "timestamp" < %s', [cutoff]
+            )
+            with gzip.open(path, 'wt', encoding='utf-8') as handle:
+                for (row,) in cursor:
+                    handle.write(row)
+                    handle.write('\n')
+        cursor.execute(f'DELETE FROM {DEFAULT_PARTITION} WHERE "timestamp" < %s', [cutoff])
+    logger.info(f"Deleted {rows} expired audit logs from {DEFAULT_PARTITION}")
+    return rows, path
+
+
+def drop_partition(name, conn=None):
+    """Separa y elimina una partición completa."""
+    conn = conn or connection
+    with transaction.atomic(using=conn.alias):
+        with conn.cursor() as cursor:
+            cursor.execute(f"ALTER TABLE {AUDIT_TABLE} DETACH PARTITION {name}")
+            cursor.execute(f"DROP TABLE {name}")
+    logger.info(f"Dropped audit partition {name}")
+
+
+def apply_retention(retention_days=None, archive=None, archive_dir=None, dry_run=False):
+    """
+    Aplica la política de retención de auditoría.
+
+    Returns:
+        dict: 'cutoff', 'dropped_partitions', 'deleted_rows' y 'archives'
+    """
+    from .models import AuditLog
+
+    partition_settings = get_partition_settings()
+    if retention_days is None:
+        retention_days = partition_settings['RETENTION_DAYS']
+    if archive is None:
+        archive = partition_settings['ARCHIVE_ENABLED']
+    archive_dir = archive_dir or partition_settings['ARCHIVE_DIR']
+
+    cutoff = timezone.now() - timedelta(days=retention_days)
+    result = {'cutoff': cutoff, 'dropped_partitions': [], 'deleted_rows': 0, 'archives': []}
+
+    if is_partitioning_supported():
+        # Solo se eliminan meses completos anteriores al corte
+        for name in list_partitions():
+            bounds = partition_bounds(name)
+            if bounds is None or bounds[1] > cutoff:
+                continue
+            if not dry_run:
+                if archive:
+                    result['archives'].append(archive_range(bounds[0], bounds[1], archive_dir, name)[0])
+                drop_partition(name)
+            result['dropped_partitions'].append(name)
+        deleted, path = purge_default_partition(cutoff, archive, archive_dir, dry_run)
+        result['deleted_rows'] = deleted
+        if path:
+            result['archives'].append(path)
+        return result
+
+    # Sin particiones: archivar y borrar por rango en lotes
+    oldest = AuditLog.objects.filter(timestamp__lt=cutoff).order_by('timestamp').values_list('timestamp', flat=True).first()
+    if oldest is None or dry_run:
+        if oldest is not None:
+            result['deleted_rows'] = AuditLog.objects.filter(timestamp__lt=cutoff).count()
+        return result
+
+    if archive:
+        label = f"{AUDIT_TABLE}_{oldest:%Y%m%d}_{cutoff:%Y%m%d}"
+        result['archives'].append(archive_range(oldest, cutoff, archive_dir, label)[0])
+
+    while True:
+        ids = list(
+            AuditLog.objects.filter(timestamp__lt=cutoff).values_list('id', flat=True)[:DELETE_BATCH_SIZE]
+        )
+        if not ids:
+            break
+        deleted, _ = AuditLog.objects.filter(id__in=ids).delete()
+        result['deleted_rows'] += deleted
+    return result
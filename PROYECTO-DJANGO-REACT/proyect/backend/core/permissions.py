@@ -1,6 +1,15 @@
 from rest_framework import permissions
 
 
+def is_object_owner(obj, user):
+    """
+    Indica si `obj.user` es `user` comparando user_id, sin cargar la relación.
+    """
+    if hasattr(obj, 'user_id'):
+        return obj.user_id == user.id
+    return obj.user == user
+
+
 class IsOwnerOrAdmin(permissions.BasePermission):
     """
     Permiso personalizado que permite acceso solo al propietario del objeto
@@ -14,7 +23,7 @@ class IsOwnerOrAdmin(permissions.BasePermission):
         
         # Verificar si el objeto tiene un atributo 'user' y es el propietario
         if hasattr(obj, 'user'):
-            return obj.user == request.user
+            return is_object_owner(obj, request.user)
         
         # Verificar si el objeto es el mismo usuario
         if hasattr(obj, 'id') and hasattr(request.user, 'id'):
@@ -77,7 +86,7 @@ class IsPatientOwner(permissions.BasePermission):
         
         # El paciente solo puede acceder a sus propios datos
         if hasattr(obj, 'user'):
-            return obj.user == request.user
+            return is_object_owner(obj, request.user)
         
         return False
 
@@ -95,7 +104,7 @@ class IsDoctorOwner(permissions.BasePermission):
         
         # El doctor solo puede acceder a sus propios datos
         if hasattr(obj, 'user'):
-            return obj.user == request.user
+            return is_object_owner(obj, request.user)
         
         return False
 
@@ -111,15 +120,16 @@ class IsAppointmentParticipant(permissions.BasePermission):
         if request.user.role in ['admin', 'superadmin']:
             return True
         
+        # Comparar IDs de perfil del contexto de autenticación (sin cargar obj.patient.user)
+        auth_context = request.user.auth_context
+        
         # Verificar si el usuario es el paciente de la cita
-        if hasattr(obj, 'patient') and hasattr(obj.patient, 'user'):
-            if obj.patient.user == request.user:
-                return True
+        if auth_context.patient_id and getattr(obj, 'patient_id', None) == auth_context.patient_id:
+            return True
         
         # Verificar si el usuario es el doctor de la cita
-        if hasattr(obj, 'doctor') and hasattr(obj.doctor, 'user'):
-            if obj.doctor.user == request.user:
-                return True
+        if auth_context.doctor_id and getattr(obj, 'doctor_id', None) == auth_context.doctor_id:
+            return True
         
         return False
 
@@ -288,7 +298,7 @@ class IsDoctorOwnerOrAdmin(permissions.BasePermission):
         if request.user.role == 'doctor':
             # Si el objeto es un Doctor, verificar que sea el mismo usuario
             if hasattr(obj, 'user'):
-                return obj.user == request.user
+                return is_object_owner(obj, request.user)
             # Si el objeto es directamente el usuario
             elif hasattr(obj, 'id') and hasattr(request.user, 'id'):
                 return obj.id == request.user.id
@@ -0,0 +1,387 @@
+"""Instrumentación de rendimiento por petición.
+
+ProfilingMiddleware (core/middleware.py) abre un RequestProfile por petición
+muestreada y acumula en él:
+
+1. Tiempo total de la vista.
+2. Cantidad y tiempo de consultas SQL (execute_wrapper en cada conexión).
+3. Aciertos/fallos de cache (backends ProfiledLocMemCache / ProfiledRedisCache).
+4. Tiempo de serialización de DRF (`serializer.data`).
+
+El perfil activo vive en un contextvar: lo ven los hilos de sync_to_async
+(ORM async, middleware sync bajo ASGI) y los de core.async_api.gather_queries,
+que copian el contexto de la petición. Por eso las consultas se miden con un
+execute_wrapper permanente en cada conexión (install_query_timing) y no con
+uno por petición, que solo vería las conexiones del hilo que lo registra.
+
+Los resultados se agregan en memoria por endpoint (histogramas de latencia)
+y se escriben periódicamente en SystemMetrics con bulk_create.
+
+Configuración (settings.PROFILING):
+    'ENABLED': False            # activo por defecto solo en development.py
+    'SAMPLE_RATE': 1.0          # fracción de peticiones perfiladas
+    'FLUSH_INTERVAL': 60        # segundos entre escrituras a SystemMetrics
+    'SLOW_REQUEST_MS': 1000     # umbral del log de peticiones lentas
+    'TOP_SQL': 5                # consultas más lentas incluidas en ese log
+    'SERVER_TIMING': True       # header Server-Timing en la respuesta
+    'SERIALIZER_TIMING': False  # medir serializer.data (opt-in; requiere ENABLED y SAMPLE_RATE > 0)
+"""
+
+import contextvars
+import heapq
+import logging
+import threading
+import time
+from bisect import bisect_left
+
+from django.conf import settings
+from django.core.cache.backends.locmem import LocMemCache
+from django.core.cache.backends.redis import RedisCache
+from django.db import connections
+from django.db.backends.signals import connection_created
+
+from apps.core.metrics import observe_cache
+
+logger = logging.getLogger('performance')
+
+DEFAULT_PROFILING_SETTINGS = {
+    'ENABLED': False,
+    'SAMPLE_RATE': 1.0,
+    'FLUSH_INTERVAL': 60,
+    'SLOW_REQUEST_MS': 1000,
+    'TOP_SQL': 5,
+    'SERVER_TIMING': True,
+    'SERIALIZER_TIMING': False,
+}
+
+# Límites superiores (ms) de los buckets del histograma de latencia
+LATENCY_BUCKETS_MS = (5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000, float('inf'))
+
+_current_profile = contextvars.ContextVar('current_profile', default=None)
+_missing = object()
+
+
+def get_profiling_settings():
+    profiling_settings = dict(DEFAULT_PROFILING_SETTINGS)
+    profiling_settings.update(getattr(settings, 'PROFILING', {}))
+    return profiling_settings
+
+
+def get_current_profile():
+    return _current_profile.get()
+
+
+class RequestProfile:
+    """
+    Métricas de una petición. Solo guarda las TOP_SQL consultas más lentas.
+    Las vistas async registran desde varios hilos a la vez (gather_queries).
+    """
+
+    __slots__ = (
+        'started_at', 'wall_ms', 'db_queries', 'db_ms', 'cache_hits',
+        'cache_misses', 'serializer_ms', 'top_sql_size', '_top_sql', '_sequence', '_lock',
+    )
+
+    def __init__(self, top_sql_size=5):
+        self.started_at = time.perf_counter()
+        self.wall_ms = 0.0
+        self.db_queries = 0
+        self.db_ms = 0.0
+        self.cache_hits = 0
+        self.cache_misses = 0
+        self.serializer_ms = 0.0
+        self.top_sql_size = top_sql_size
+        self._top_sql = []
+        self._sequence = 0
+        self._lock = threading.Lock()
+
+    def finish(self):
+        self.wall_ms = (time.perf_counter() - self.started_at) * 1000
+        return self
+
+    def record_query(self, sql, duration_ms):
+        with self._lock:
+            self.db_queries += 1
+            self.db_ms += duration_ms
+            if not self.top_sql_size:
+                return
+            # Heap de mínimos acotado: O(log TOP_SQL) por consulta
+            self._sequence += 1
+            entry = (duration_ms, self._sequence, sql)
+            if len(self._top_sql) < self.top_sql_size:
+                heapq.heappush(self._top_sql, entry)
+            elif duration_ms > self._top_sql[0][0]:
+                heapq.heapreplace(self._top_sql, entry)
+
+    def record_cache(self, hits, misses):
+        with self._lock:
+            self.cache_hits += hits
+            self.cache_misses += misses
+
+    def record_serializer(self, duration_ms):
+        with self._lock:
+            self.serializer_ms += duration_ms
+
+    def top_sql(self):
+        """[(duración ms, sql)] de la más lenta a la más rápida."""
+        return [(duration, sql) for duration, _, sql in sorted(self._top_sql, reverse=True)]
+
+    def server_timing(self):
+        """Valor del header Server-Timing."""
+        return ', '.join([
+            f'db;dur={self.db_ms:.1f};desc="{self.db_queries} queries"',
+            f'cache;desc="hits={self.cache_hits} misses={self.cache_misses}"',
+            f'serializer;dur={self.serializer_ms:.1f}',
+            f'total;dur={self.wall_ms:.1f}',
+        ])
+
+
+def time_query(execute, sql, params, many, context):
+    """execute_wrapper de cada conexión: registra la consulta en el perfil activo, si hay uno."""
+    profile = _current_profile.get()
+    if profile is None:
+        return execute(sql, params, many, context)
+    start = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        profile.record_query(sql, (time.perf_counter() - start) * 1000)
+
+
+def _add_query_timing(sender, connection, **kwargs):
+    if time_query not in connection.execute_wrappers:
+        # Al principio: execute_wrapper() saca el último de la lista al salir
+        connection.execute_wrappers.insert(0, time_query)
+
+
+def install_query_timing():
+    """
+    Agrega time_query a cada conexión del proceso (las nuevas, por la señal
+    connection_created, y las ya abiertas en este hilo). Sin perfil activo
+    solo cuesta leer el contextvar.
+    """
+    connection_created.connect(_add_query_timing, dispatch_uid='core.profiling.time_query')
+    for connection in connections.all(initialized_only=True):
+        _add_query_timing(None, connection)
+
+
+def start_profile(top_sql_size):
+    profile = RequestProfile(top_sql_size)
+    return profile, _current_profile.set(profile)
+
+
+def end_profile(token):
+    _current_profile.reset(token)
+
+
+# ----------------------------------------------------------------------
+# Cache
+# ----------------------------------------------------------------------
+
+class CacheProfilingMixin:
+    """
+    Cuenta aciertos/fallos de `get` y `get_many` en el perfil de la petición
+    y en la métrica cache_requests_total.
+    Se usa como BACKEND de CACHES (ProfiledLocMemCache / ProfiledRedisCache).
+    """
+
+    def get(self, key, default=None, version=None):
+        value = super().get(key, _missing, version)
+        hit = value is not _missing
+        observe_cache(hits=int(hit), misses=int(not hit))
+        profile = _current_profile.get()
+        if profile is not None:
+            profile.record_cache(hits=int(hit), misses=int(not hit))
+        return value if hit else default
+
+    def get_many(self, keys, version=None):
+        keys = list(keys)
+        values = super().get_many(keys, version)
+        observe_cache(hits=len(values), misses=len(keys) - len(values))
+        profile = _current_profile.get()
+        if profile is not None:
+            profile.record_cache(hits=len(values), misses=len(keys) - len(values))
+        return values
+
+
+class ProfiledLocMemCache(CacheProfilingMixin, LocMemCache):
+    pass
+
+
+class ProfiledRedisCache(CacheProfilingMixin, RedisCache):
+    pass
+
+
+# ----------------------------------------------------------------------
+# Serializers de DRF
+# ----------------------------------------------------------------------
+
+_serializer_timing_installed = False
+_serializer_timing_lock = threading.Lock()
+
+
+def install_serializer_timing():
+    """
+    Mide `serializer.data` de los serializers de nivel superior.
+    Los serializers anidados usan to_representation, así que no se cuentan dos veces.
+    """
+    global _serializer_timing_installed
+    with _serializer_timing_lock:
+        if _serializer_timing_installed:
+            return
+        from rest_framework import serializers
+
+        def timed(data_property):
+            def data(self):
+                profile = _current_profile.get()
+                if profile is None:
+                    return data_property.fget(self)
+                start = time.perf_counter()
+                try:
+                    return data_property.fget(self)
+                finally:
+                    profile.record_serializer((time.perf_counter() - start) * 1000)
+            return property(data)
+
+        for serializer_class in (serializers.Serializer, serializers.ListSerializer):
+            serializer_class.data = timed(serializer_class.data)
+        _serializer_timing_installed = True
+
+
+# ----------------------------------------------------------------------
+# Agregación por endpoint
+# ----------------------------------------------------------------------
+
+class EndpointStats:
+    """Histograma de latencia y acumulados de un endpoint."""
+
+    __slots__ = ('count', 'wall_ms', 'db_queries', 'db_ms', 'serializer_ms',
+                 'cache_hits', 'cache_misses', 'buckets')
+
+    def __init__(self):
+        self.count = 0
+        self.wall_ms = 0.0
+        self.db_queries = 0
+        self.db_ms = 0.0
+        self.serializer_ms = 0.0
+        self.cache_hits = 0
+        self.cache_misses = 0
+        self.buckets = [0] * len(LATENCY_BUCKETS_MS)
+
+    def add(self, profile):
+        self.count += 1
+        self.wall_ms += profile.wall_ms
+        self.db_queries += profile.db_queries
+        self.db_ms += profile.db_ms
+        self.serializer_ms += profile.serializer_ms
+        self.cache_hits += profile.cache_hits
+        self.cache_misses += profile.cache_misses
+        self.buckets[bisect_left(LATENCY_BUCKETS_MS, profile.wall_ms)] += 1
+
+    def percentile(self, fraction):
+        """Percentil estimado como el límite superior del bucket que lo contiene."""
+        target = self.count * fraction
+        seen = 0
+        for upper, amount in zip(LATENCY_BUCKETS_MS, self.buckets):
+            seen += amount
+            if seen >= target:
+                return upper
+        return LATENCY_BUCKETS_MS[-1]
+
+
+class MetricsAggregator:
+    """
+    Acumula EndpointStats en memoria y los escribe en SystemMetrics cada FLUSH_INTERVAL.
+
+    🎯 Objetivo: Ver los endpoints más costosos sin una escritura por petición
+    💡 Concepto: Agregar en memoria, persistir resúmenes periódicos con bulk_create
+    """
+
+    def __init__(self, flush_interval=None):
+        self.flush_interval = (
+            flush_interval if flush_interval is not None
+            else get_profiling_settings()['FLUSH_INTERVAL']
+        )
+        self._stats = {}
+        self._lock = threading.Lock()
+        self._last_flush = time.monotonic()
+        self._flushing = False
+
+    def record(self, endpoint, profile):
+        with self._lock:
+            stats = self._stats.get(endpoint)
+            if stats is None:
+                stats = self._stats[endpoint] = EndpointStats()
+            stats.add(profile)
+            due = (
+                not self._flushing and
+                time.monotonic() - self._last_flush >= self.flush_interval
+            )
+            if due:
+                self._flushing = True
+        if due:
+            threading.Thread(target=self._flush_in_background, name='metrics-flush', daemon=True).start()
+
+    def snapshot(self, reset=False):
+        """Copia de los acumulados actuales {endpoint: EndpointStats}."""
+        with self._lock:
+            stats = self._stats
+            if reset:
+                self._stats = {}
+                self._last_flush = time.monotonic()
+            else:
+                stats = dict(stats)
+        return stats
+
+    def _flush_in_background(self):
+        from django.db import close_old_connections
+        try:
+            self.flush()
+        finally:
+            self._flushing = False
+            close_old_connections()
+
+    def flush(self):
+        """Escribe los acumulados en SystemMetrics y reinicia los contadores."""
+        stats = self.snapshot(reset=True)
+        if not stats:
+            return 0
+
+        from .models import SystemMetrics
+
+        metrics = []
+        for endpoint, endpoint_stats in stats.items():
+            count = endpoint_stats.count
+            values = [
+                ('requests', count, 'count'),
+                ('avg_ms', endpoint_stats.wall_ms / count, 'ms'),
+                ('p50_ms', endpoint_stats.percentile(0.50), 'ms'),
+                ('p95_ms', endpoint_stats.percentile(0.95), 'ms'),
+                ('p99_ms', endpoint_stats.percentile(0.99), 'ms'),
+                ('avg_db_queries', endpoint_stats.db_queries / count, 'count'),
+                ('avg_db_ms', endpoint_stats.db_ms / count, 'ms'),
+                ('avg_serializer_ms', endpoint_stats.serializer_ms / count, 'ms'),
+                ('cache_hits', endpoint_stats.cache_hits, 'count'),
+                ('cache_misses', endpoint_stats.cache_misses, 'count'),
+            ]
+            for suffix, value, unit in values:
+                if value == float('inf'):
+                    value = LATENCY_BUCKETS_MS[-2]
+                # metric_name admite 100 caracteres: recortar el endpoint, no el sufijo
+                name = f"{endpoint[:99 - len(suffix)]}.{suffix}"
+                metrics.append(SystemMetrics(
+                    metric_name=name,
+                    metric_value=value,
+                    metric_unit=unit,
+                    category='performance'
+                ))
+
+        try:
+            SystemMetrics.objects.bulk_create(metrics)
+        except Exception as e:
+            logger.error(f"Error writing performance metrics: {str(e)}")
+            return 0
+        return len(metrics)
+
+
+metrics_aggregator = MetricsAggregator()
@@ -0,0 +1,222 @@
+"""Motores de rate limiting para RoleBasedRateLimitMiddleware.
+
+Cada motor guarda un estado de tamaño fijo por clave (contadores o un par
+tokens/timestamp), por lo que el costo de cada petición es constante sin
+importar el límite configurado para el rol:
+
+1. SlidingWindowCounterLimiter: dos contadores (ventana actual y anterior)
+   actualizados con `incr` atómico del cache.
+2. TokenBucketLimiter: cubeta de tokens; en Redis se actualiza con un script
+   Lua atómico y en otros backends bajo un lock del proceso.
+
+Configuración (settings.RATE_LIMIT_SETTINGS):
+    'ALGORITHM': 'sliding_window' | 'token_bucket'
+    'WINDOW_SECONDS': 60
+    'CACHE_ALIAS': 'default'   # None o alias inexistente -> locmem del proceso
+"""
+
+import logging
+import math
+import threading
+import time
+from collections import namedtuple
+
+from django.core.cache import caches, InvalidCacheBackendError
+from django.core.cache.backends.locmem import LocMemCache
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_WINDOW_SECONDS = 60
+DEFAULT_ALGORITHM = 'sliding_window'
+
+RateLimitResult = namedtuple(
+    'RateLimitResult', ['allowed', 'limit', 'remaining', 'reset_after', 'retry_after']
+)
+
+# Cache local usado cuando no hay un backend configurado (tests, desarrollo)
+_fallback_cache = LocMemCache('rate-limit-fallback', {})
+
+
+def get_rate_limit_cache(alias):
+    """Retorna el cache configurado o el locmem del proceso como respaldo."""
+    if not alias:
+        return _fallback_cache
+    try:
+        return caches[alias]
+    except InvalidCacheBackendError:
+        logger.warning(f"Cache '{alias}' no configurado, usando locmem para rate limiting")
+        return _fallback_cache
+
+
+def get_redis_client(cache):
+    """Cliente redis-py del backend de cache, o None si el backend no es Redis."""
+    # django.core.cache.backends.redis.RedisCache
+    backend = getattr(cache, '_cache', None)
+    if backend is not None and hasattr(backend, 'get_client'):
+        try:
+            return backend.get_client(write=True)
+        except TypeError:
+            return None
+    # django-redis
+    client = getattr(cache, 'client', None)
+    if client is not None and hasattr(client, 'get_client'):
+        return client.get_client(write=True)
+    return None
+
+
+class BaseRateLimiter:
+    """
+    Interfaz común de los motores de rate limiting.
+    """
+
+    def __init__(self, cache, window=DEFAULT_WINDOW_SECONDS):
+        self.cache = cache
+        self.window = window
+
+    def hit(self, key, limit):
+        """
+        Registra una petición para `key` y retorna un RateLimitResult.
+        """
+        raise NotImplementedError
+
+
+class SlidingWindowCounterLimiter(BaseRateLimiter):
+    """
+    Ventana deslizante aproximada con dos contadores por clave.
+
+    El conteo estimado es: actual + anterior * (fracción restante de la ventana).
+    La petición se suma con `incr` antes de decidir, así que dos workers no
+    pueden ver el mismo valor; si se rechaza, se descuenta.
+    """
+
+    def hit(self, key, limit):
+        now = time.time()
+        window_index = int(now // self.window)
+        elapsed = now - window_index * self.window
+        current_key = f"{key}:{window_index}"
+        previous_key = f"{key}:{window_index - 1}"
+
+        # La clave vive dos ventanas para poder leerse como "anterior"
+        self.cache.add(current_key, 0, self.window * 2)
+        try:
+            current = self.cache.incr(current_key)
+        except ValueError:
+            # Expiró entre add() e incr()
+            self.cache.set(current_key, 1, self.window * 2)
+            current = 1
+        previous = self.cache.get(previous_key, 0)
+
+        weight = (self.window - elapsed) / self.window
+        estimated = current + previous * weight
+        reset_after = max(1, math.ceil(self.window - elapsed))
+
+        if estimated > limit:
+            try:
+                self.cache.decr(current_key)
+            except ValueError:
+                pass
+            # Si la ventana actual aún tiene espacio, basta con esperar a que
+            # el aporte de la ventana anterior decaiga lo suficiente
+            retry_after = reset_after
+            room = limit - current
+            if previous and room >= 0:
+                retry_after = max(1, math.ceil((self.window - elapsed) - room * self.window / previous))
+            return RateLimitResult(False, limit, 0, reset_after, min(retry_after, reset_after))
+
+        remaining = max(0, int(limit - estimated))
+        return RateLimitResult(True, limit, remaining, reset_after, 0)
+
+
+class TokenBucketLimiter(BaseRateLimiter):
+    """
+    Cubeta de tokens: capacidad `limit`, recarga `limit` tokens por ventana.
+
+    Permite ráfagas de hasta `limit` peticiones y luego un ritmo constante.
+    """
+
+    LUA_SCRIPT = """
+local capacity = tonumber(ARGV[1])
+local rate = tonumber(ARGV[2])
+local now = tonumber(ARGV[3])
+local ttl = tonumber(ARGV[4])
+local state = redis.call('HMGET', KEYS[1], 'tokens', 'ts')
+local tokens = tonumber(state[1]) or capacity
+local ts = tonumber(state[2]) or now
+tokens = math.min(capacity, tokens + math.max(0, now - ts) * rate)
+local allowed = 0
+if tokens >= 1 then
+    tokens = tokens - 1
+    allowed = 1
+end
+redis.call('HSET', KEYS[1], 'tokens', tostring(tokens), 'ts', tostring(now))
+redis.call('EXPIRE', KEYS[1], ttl)
+return {allowed, tostring(tokens)}
+"""
+
+    def __init__(self, cache, window=DEFAULT_WINDOW_SECONDS):
+        super().__init__(cache, window)
+        self._lock = threading.Lock()
+        self._redis = get_redis_client(cache)
+        self._script = self._redis.register_script(self.LUA_SCRIPT) if self._redis else None
+
+    def hit(self, key, limit):
+        rate = limit / self.window
+        now = time.time()
+
+        if self._script is not None:
+            allowed, tokens = self._script(
+                keys=[self.cache.make_key(key)],
+                args=[limit, rate, now, self.window * 2]
+            )
+            allowed, tokens = bool(int(allowed)), float(tokens)
+        else:
+            allowed, tokens = self._hit_with_lock(key, limit, rate, now)
+
+        # Segundos hasta tener la cubeta llena / hasta el próximo token
+        reset_after = max(1, math.ceil((limit - tokens) / rate))
+        if allowed:
+            return RateLimitResult(True, limit, int(tokens), reset_after, 0)
+        retry_after = max(1, math.ceil((1 - tokens) / rate))
+        return RateLimitResult(False, limit, 0, reset_after, retry_after)
+
+    def _hit_with_lock(self, key, limit, rate, now):
+        """Respaldo sin Redis: atómico dentro del proceso (suficiente para locmem)."""
+        with self._lock:
+            tokens, ts = self.cache.get(key, (limit, now))
+            tokens = min(limit, tokens + max(0, now - ts) * rate)
+            allowed = tokens >= 1
+            if allowed:
+                tokens -= 1
+            self.cache.set(key, (tokens, now), self.window * 2)
+        return allowed, tokens
+
+
+LIMITER_CLASSES = {
+    'sliding_window': SlidingWindowCounterLimiter,
+    'token_bucket': TokenBucketLimiter,
+}
+
+_limiters = {}
+_limiters_lock = threading.Lock()
+
+
+def get_limiter(rate_limit_settings):
+    """
+    Retorna (y reutiliza) el motor configurado en RATE_LIMIT_SETTINGS.
+    """
+    algorithm = rate_limit_settings.get('ALGORITHM', DEFAULT_ALGORITHM)
+    window = rate_limit_settings.get('WINDOW_SECONDS', DEFAULT_WINDOW_SECONDS)
+    alias = rate_limit_settings.get('CACHE_ALIAS', 'default')
+    config_key = (algorithm, window, alias)
+
+    limiter = _limiters.get(config_key)
+    if limiter is None:
+        with _limiters_lock:
+            limiter = _limiters.get(config_key)
+            if limiter is None:
+                limiter_class = LIMITER_CLASSES.get(algorithm)
+                if limiter_class is None:
+                    raise ValueError(f"Algoritmo de rate limiting desconocido: {algorithm}")
+                limiter = limiter_class(get_rate_limit_cache(alias), window)
+                _limiters[config_key] = limiter
+    return limiter
@@ -0,0 +1,227 @@
+"""Lecturas en réplicas de la base de datos para reportes y dashboards.
+
+Las vistas de solo lectura y costosas (reportes, exportaciones, dashboards y
+las acciones de estadísticas) optan por leer de una réplica con el decorador
+`use_replica` (vistas de función) o `ReplicaReadMixin` (ViewSets). El resto
+de la aplicación sigue leyendo y escribiendo en 'default'.
+
+Read-your-writes:
+1. Dentro de una petición, después de la primera escritura todas las lecturas
+   vuelven a 'default'.
+2. Después de una petición que escribe, el usuario queda "pegado" al primario
+   durante STICKY_SECONDS (marca en el cache, la pone
+   ReplicaPinningMiddleware), para no leer datos que la réplica aún no tiene.
+
+Configuración (settings.DATABASE_REPLICAS, con DATABASE_ROUTERS =
+['core.replicas.ReplicaRouter']):
+    'ALIASES': ['replica_1', ...]   # alias de DATABASES; vacío = sin réplicas
+    'STICKY_SECONDS': 15
+"""
+
+import random
+import sqlite3
+from contextlib import asynccontextmanager, contextmanager
+from contextvars import ContextVar
+from functools import wraps
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import connections
+
+DEFAULT_REPLICA_SETTINGS = {
+    'ALIASES': [],
+    'STICKY_SECONDS': 15,
+}
+
+PRIMARY_DB = 'default'
+PIN_CACHE_KEY = 'db_primary_pin:{user_id}'
+
+
+class RoutingState:
+    """Estado de enrutamiento de la petición (o tarea) actual."""
+
+    __slots__ = ('replica', 'wrote')
+
+    def __init__(self):
+        self.replica = None
+        self.wrote = False
+
+
+_state = ContextVar('db_routing_state', default=None)
+
+
+def get_replica_settings():
+    replica_settings = dict(DEFAULT_REPLICA_SETTINGS)
+    replica_settings.update(getattr(settings, 'DATABASE_REPLICAS', {}))
+    return replica_settings
+
+
+def get_replica_aliases():
+    return [alias for alias in get_replica_settings()['ALIASES'] if alias in settings.DATABASES]
+
+
+def get_state():
+    state = _state.get()
+    if state is None:
+        state = RoutingState()
+        _state.set(state)
+    return state
+
+
+@contextmanager
+def routing_state(state=None):
+    """
+    Estado nuevo para una petición; lo usa ReplicaPinningMiddleware. Con
+    `state`, comparte el de la petición con otro hilo (core/async_api.py).
+    """
+    token = _state.set(state or RoutingState())
+    try:
+        yield _state.get()
+    finally:
+        _state.reset(token)
+
+
+def is_pinned(user):
+    if not getattr(user, 'is_authenticated', False):
+        return False
+    return bool(cache.get(PIN_CACHE_KEY.format(user_id=user.pk)))
+
+
+async def ais_pinned(user):
+    if not getattr(user, 'is_authenticated', False):
+        return False
+    return bool(await cache.aget(PIN_CACHE_KEY.format(user_id=user.pk)))
+
+
+def pin_to_primary(user):
+    """Lecturas del usuario al primario durante STICKY_SECONDS."""
+    if getattr(user, 'is_authenticated', False):
+        cache.set(PIN_CACHE_KEY.format(user_id=user.pk), True, get_replica_settings()['STICKY_SECONDS'])
+
+
+@contextmanager
+def read_from_replica(user=None):
+    """
+    Dentro del bloque, las lecturas van a una réplica (una sola por bloque,
+    para leer un estado consistente), salvo que el usuario esté pegado al
+    primario o no haya réplicas configuradas.
+    """
+    state = get_state()
+    previous = state.replica
+    aliases = get_replica_aliases()
+    if aliases and previous is None and not is_pinned(user):
+        state.replica = random.choice(aliases)
+    try:
+        yield state.replica
+    finally:
+        state.replica = previous
+
+
+@asynccontextmanager
+async def aread_from_replica(user=None):
+    """read_from_replica para vistas async (la marca del cache se lee con aget)."""
+    state = get_state()
+    previous = state.replica
+    aliases = get_replica_aliases()
+    if aliases and previous is None and not await ais_pinned(user):
+        state.replica = random.choice(aliases)
+    try:
+        yield state.replica
+    finally:
+        state.replica = previous
+
+
+def use_replica(view_func):
+    """
+    Decorador para vistas de función de solo lectura. Va debajo de
+    @api_view/@permission_classes, para que request.user ya esté autenticado.
+    """
+    @wraps(view_func)
+    def wrapper(request, *args, **kwargs):
+        with read_from_replica(getattr(request, 'user', None)):
+            return view_func(request, *args, **kwargs)
+    return wrapper
+
+
+class ReplicaReadMixin:
+    """
+    Mixin para ViewSets: las acciones de `replica_actions` leen de una réplica.
+
+        class DoctorViewSet(ReplicaReadMixin, viewsets.ModelViewSet):
+            replica_actions = ['statistics']
+    """
+
+    replica_actions = []
+    _replica_context = None
+
+    def initial(self, request, *args, **kwargs):
+        super().initial(request, *args, **kwargs)
+        if self.action in self.replica_actions:
+            self._replica_context = read_from_replica(request.user)
+            self._replica_context.__enter__()
+
+    def finalize_response(self, request, response, *args, **kwargs):
+        replica_context = self._replica_context
+        if replica_context is not None:
+            self._replica_context = None
+            replica_context.__exit__(None, None, None)
+        return super().finalize_response(request, response, *args, **kwargs)
+
+
+def replica_lag_seconds(alias):
+    """
+    Segundos de atraso de la réplica según PostgreSQL (último WAL aplicado).
+    None si el motor no lo informa o el servidor no es un standby.
+    """
+    connection = connections[alias]
+    if connection.vendor != 'postgresql':
+        return None
+    with connection.cursor() as cursor:
+        cursor.execute(
+            "SELECT EXTRACT(EPOCH FROM now() - pg_last_xact_replay_timestamp()) WHERE pg_is_in_recovery()"
+        )
+        row = cursor.fetchone()
+    return float(row[0]) if row and row[0] is not None else None
+
+
+def sync_sqlite_replica(alias):
+    """Copia el primario SQLite sobre la réplica (solo para desarrollo)."""
+    source, target = connections[PRIMARY_DB], connections[alias]
+    if source.vendor != 'sqlite' or target.vendor != 'sqlite':
+        raise ValueError(f"'{alias}' no es una réplica SQLite de un primario SQLite")
+    target.close()
+    source.ensure_connection()
+    destination = sqlite3.connect(target.settings_dict['NAME'])
+    try:
+        source.connection.backup(destination)
+    finally:
+        destination.close()
+
+
+class ReplicaRouter:
+    """
+    Router de Django: lecturas a la réplica elegida por read_from_replica,
+    todo lo demás (escrituras, migraciones, lecturas normales) a 'default'.
+    """
+
+    def db_for_read(self, model, **hints):
+        state = _state.get()
+        if state is None or state.wrote or state.replica is None:
+            return PRIMARY_DB
+        return state.replica
+
+    def db_for_write(self, model, **hints):
+        get_state().wrote = True
+        return PRIMARY_DB
+
+    def allow_relation(self, obj1, obj2, **hints):
+        databases = {PRIMARY_DB, *get_replica_aliases()}
+        if obj1._state.db in databases and obj2._state.db in databases:
+            return True
+        return None
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        # Las réplicas reciben el esquema por replicación, no por migrate
+        if db in get_replica_aliases():
+            return False
+        return None
@@ -3,10 +3,9 @@
 import time
 from celery import shared_task
 from django.core.mail import send_mail
-from django.template.loader import render_to_string
-from django.utils.html import strip_tags
 from django.conf import settings
 from django.utils import timezone
+from apps.notifications.delivery import DeliveryService
 import logging
 
 logger = logging.getLogger(__name__)
@@ -64,17 +63,42 @@ def log_system_status():
 
 @shared_task
 def cleanup_old_data():
-    """Cleanup old data - example of maintenance task."""
+    """Cleanup old data - applies the audit log retention policy."""
     logger.info("Starting cleanup of old data")
     
-    # This is a placeholder for actual cleanup logic
-    # In a real application, you would clean up old logs,
-    # expired sessions, temporary files, etc.
-    
-    cleaned_items = 0
-    logger.info(f"Cleanup completed. Removed {cleaned_items} items")
+    result = apply_audit_retention()
+    cleaned_items = result['deleted_rows']
+    logger.info(
+        f"Cleanup completed. Removed {cleaned_items} items, "
+        f"dropped {len(result['dropped_partitions'])} audit partitions"
+    )
     return f"Cleanup completed. Removed {cleaned_items} items"
 
+@shared_task
+def ensure_audit_partitions(months_ahead=None):
+    """Create the upcoming monthly audit_logs partitions (PostgreSQL only)."""
+    from .partitions import ensure_partitions
+    partitions = ensure_partitions(months_ahead=months_ahead)
+    logger.info(f"Audit partitions ready: {len(partitions)}")
+    return partitions
+
+@shared_task
+def apply_audit_retention(retention_days=None, archive=None):
+    """Drop (and optionally archive) audit logs older than RETENTION_DAYS."""
+    from .partitions import apply_retention
+    result = apply_retention(retention_days=retention_days, archive=archive)
+    logger.info(
+        f"Audit retention applied (cutoff {result['cutoff']:%Y-%m-%d}): "
+        f"{len(result['dropped_partitions'])} partitions dropped, "
+        f"{result['deleted_rows']} rows deleted, {len(result['archives'])} archives written"
+    )
+    return {
+        'cutoff': result['cutoff'].isoformat(),
+        'dropped_partitions': result['dropped_partitions'],
+        'deleted_rows': result['deleted_rows'],
+        'archives': result['archives'],
+    }
+
 @shared_task(bind=True)
 def long_running_task(self, duration=10):
     """Example of a long-running task with progress updates."""
@@ -116,10 +140,11 @@ def send_appointment_confirmation_email(appointment_data):
             - cancel_url: URL to cancel (optional)
     """
     try:
-        logger.info(f"Sending appointment confirmation to {appointment_data.get('patient_email')}")
+        logger.info(f"Queueing appointment confirmation for {appointment_data.get('patient_email')}")
         
-        # Render HTML email template
-        html_message = render_to_string('emails/appointment_confirmation.html', {
+        # La plantilla se renderiza en el worker de email, que envía por lotes
+        # con una sola conexión SMTP (ver apps/notifications/delivery.py)
+        context = {
             'patient_name': appointment_data.get('patient_name'),
             'doctor_name': appointment_data.get('doctor_name'),
             'doctor_specialty': appointment_data.get('doctor_specialty'),
@@ -132,27 +157,19 @@ def send_appointment_confirmation_email(appointment_data):
             'cancel_url': appointment_data.get('cancel_url'),
             'show_actions': appointment_data.get('show_actions', True),
             'preparation_instructions': appointment_data.get('preparation_instructions'),
-        })
-        
-        # Create plain text version
-        plain_message = strip_tags(html_message)
-        
-        # Send email
-        from django.core.mail import EmailMultiAlternatives
+        }
         
         subject = f"Confirmación de Cita - {appointment_data.get('appointment_date')}"
         
-        email = EmailMultiAlternatives(
+        DeliveryService.enqueue_email(
+            recipient=appointment_data.get('patient_email'),
             subject=subject,
-            body=plain_message,
-            from_email=settings.DEFAULT_FROM_EMAIL,
-            to=[appointment_data.get('patient_email')]
+            template='emails/appointment_confirmation.html',
+            context=context
         )
-        email.attach_alternative(html_message, "text/html")
-        email.send()
         
-        logger.info("Appointment confirmation email sent successfully")
-        return f"Confirmation email sent to {appointment_data.get('patient_email')}"
+        logger.info("Appointment confirmation email queued")
+        return f"Confirmation email queued for {appointment_data.get('patient_email')}"
         
     except Exception as e:
         logger.error(f"Failed to send appointment confirmation email: {str(e)}")
@@ -183,10 +200,11 @@ def send_appointment_reminder_email(appointment_data):
             - emergency_phone: Emergency contact phone (optional)
     """
     try:
-        logger.info(f"Sending appointment reminder to {appointment_data.get('patient_email')}")
+        logger.info(f"Queueing appointment reminder for {appointment_data.get('patient_email')}")
         
-        # Render HTML email template
-        html_message = render_to_string('emails/appointment_reminder.html', {
+        # La plantilla se renderiza en el worker de email, que envía por lotes
+        # con una sola conexión SMTP (ver apps/notifications/delivery.py)
+        context = {
             'patient_name': appointment_data.get('patient_name'),
             'doctor_name': appointment_data.get('doctor_name'),
             'doctor_specialty': appointment_data.get('doctor_specialty'),
@@ -203,27 +221,19 @@ def send_appointment_reminder_email(appointment_data):
             'cancel_url': appointment_data.get('cancel_url'),
             'show_actions': appointment_data.get('show_actions', True),
             'emergency_phone': appointment_data.get('emergency_phone'),
-        })
-        
-        # Create plain text version
-        plain_message = strip_tags(html_message)
-        
-        # Send email
-        from django.core.mail import EmailMultiAlternatives
+        }
         
         subject = f"Recordatorio de Cita - Mañana {appointment_data.get('appointment_time')}"
         
-        email = EmailMultiAlternatives(
+        DeliveryService.enqueue_email(
+            recipient=appointment_data.get('patient_email'),
             subject=subject,
-            body=plain_message,
-            from_email=settings.DEFAULT_FROM_EMAIL,
-            to=[appointment_data.get('patient_email')]
+            template='emails/appointment_reminder.html',
+            context=context
         )
-        email.attach_alternative(html_message, "text/html")
-        email.send()
         
-        logger.info("Appointment reminder email sent successfully")
-        return f"Reminder email sent to {appointment_data.get('patient_email')}"
+        logger.info("Appointment reminder email queued")
+        return f"Reminder email queued for {appointment_data.get('patient_email')}"
         
     except Exception as e:
         logger.error(f"Failed to send appointment reminder email: {str(e)}")
@@ -254,10 +264,11 @@ def send_appointment_cancellation_email(appointment_data):
             - feedback_url: URL for feedback (optional)
     """
     try:
-        logger.info(f"Sending appointment cancellation to {appointment_data.get('patient_email')}")
+        logger.info(f"Queueing appointment cancellation for {appointment_data.get('patient_email')}")
         
-        # Render HTML email template
-        html_message = render_to_string('emails/appointment_cancellation.html', {
+        # La plantilla se renderiza en el worker de email, que envía por lotes
+        # con una sola conexión SMTP (ver apps/notifications/delivery.py)
+        context = {
             'patient_name': appointment_data.get('patient_name'),
             'doctor_name': appointment_data.get('doctor_name'),
             'doctor_specialty': appointment_data.get('doctor_specialty'),
@@ -275,27 +286,19 @@ def send_appointment_cancellation_email(appointment_data):
             'contact_phone': appointment_data.get('contact_phone'),
             'contact_email': appointment_data.get('contact_email'),
             'feedback_url': appointment_data.get('feedback_url'),
-        })
-        
-        # Create plain text version
-        plain_message = strip_tags(html_message)
-        
-        # Send email
-        from django.core.mail import EmailMultiAlternatives
+        }
         
         subject = f"Cancelación de Cita - {appointment_data.get('appointment_date')}"
         
-        email = EmailMultiAlternatives(
+        DeliveryService.enqueue_email(
+            recipient=appointment_data.get('patient_email'),
             subject=subject,
-            body=plain_message,
-            from_email=settings.DEFAULT_FROM_EMAIL,
-            to=[appointment_data.get('patient_email')]
+            template='emails/appointment_cancellation.html',
+            context=context
         )
-        email.attach_alternative(html_message, "text/html")
-        email.send()
         
-        logger.info("Appointment cancellation email sent successfully")
-        return f"Cancellation email sent to {appointment_data.get('patient_email')}"
+        logger.info("Appointment cancellation email queued")
+        return f"Cancellation email queued for {appointment_data.get('patient_email')}"
         
     except Exception as e:
         logger.error(f"Failed to send appointment cancellation email: {str(e)}")
@@ -325,4 +328,13 @@ def send_bulk_appointment_reminders():
         
     except Exception as e:
         logger.error(f"Failed to send bulk reminders: {str(e)}")
-        raise
\ No newline at end of file
+        raise
+
+
+@shared_task
+def write_audit_logs(entries):
+    """Write a batch of audit log entries queued by core.audit.AuditSink."""
+    from .audit import write_entries
+    written = write_entries(entries)
+    logger.info(f"Wrote {written} audit logs")
+    return written
@@ -13,7 +13,7 @@ sys.path.append(os.path.dirname(os.path.abspath(__file__)))
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'config.settings')
 django.setup()
 
-from apps.doctors.models import Doctor
+from apps.doctors.models import Doctor, Specialization, normalize_specialization_name
 
 def fix_specializations():
     """
@@ -37,38 +37,28 @@ def fix_specializations():
     for spec, doctor_ids in specializations_found.items():
         print(f"  - '{spec}' (Doctores: {doctor_ids})")
     
-    # Mapeo de correcciones
-    corrections = {
-        'Cardiolog??a': 'Cardiología',
-        'CardiologÃa': 'Cardiología', 
-        'Traumatolog??a': 'Traumatología',
-        'TraumatologÃa': 'Traumatología',
-        'Medicina General': 'Medicina General',  # Ya está bien
-    }
-    
     print(f"\n🔧 Aplicando correcciones...")
     
+    # Las correcciones de codificación viven en el modelo: al guardar, cada doctor
+    # se normaliza y se enlaza con el catálogo de especialidades.
     updated_count = 0
-    for doctor in doctors:
-        if doctor.specialization in corrections:
-            old_spec = doctor.specialization
-            new_spec = corrections[old_spec]
-            
-            if old_spec != new_spec:
-                print(f"  - Doctor {doctor.id} ({doctor.user.get_full_name()}): '{old_spec}' → '{new_spec}'")
-                doctor.specialization = new_spec
-                doctor.save(update_fields=['specialization'])
-                updated_count += 1
+    for doctor in doctors.select_related('user'):
+        old_spec = doctor.specialization
+        new_spec = normalize_specialization_name(old_spec)
+        
+        if old_spec != new_spec or doctor.specialty_id is None:
+            print(f"  - Doctor {doctor.id} ({doctor.user.get_full_name()}): '{old_spec}' → '{new_spec}'")
+            doctor.specialization = new_spec
+            doctor.save(update_fields=['specialization'])
+            updated_count += 1
     
     print(f"\n✅ Correcciones completadas: {updated_count} doctores actualizados")
     
-    # Mostrar especialidades finales
+    # Mostrar especialidades finales desde el catálogo
     print(f"\n📋 Especialidades después de la corrección:")
-    final_specializations = Doctor.objects.values_list('specialization', flat=True).distinct().order_by('specialization')
-    for spec in final_specializations:
-        if spec:
-            count = Doctor.objects.filter(specialization=spec).count()
-            print(f"  - {spec} ({count} doctores)")
+    Specialization.rebuild_counters()
+    for spec in Specialization.objects.filter(doctors_count__gt=0):
+        print(f"  - {spec.name} ({spec.doctors_count} doctores)")
 
 def create_sample_specializations():
     """
@@ -76,8 +66,9 @@ def create_sample_specializations():
     """
     print("\n🏥 Verificando si necesitamos más especialidades...")
     
-    current_specs = set(Doctor.objects.values_list('specialization', flat=True).distinct())
-    current_specs = {spec for spec in current_specs if spec and spec.strip()}
+    current_specs = set(
+        Specialization.objects.filter(doctors_count__gt=0).values_list('name', flat=True)
+    )
     
     # Especialidades comunes que deberíamos tener
     common_specializations = {
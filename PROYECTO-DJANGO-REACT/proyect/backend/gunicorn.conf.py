@@ -0,0 +1,34 @@
+"""
+Configuración de gunicorn (se carga sola al arrancar desde este directorio).
+
+    gunicorn config.wsgi:application
+    gunicorn config.asgi:application -k uvicorn.workers.UvicornWorker -w 2
+
+Con PROMETHEUS_MULTIPROC_DIR definido, cada worker escribe sus métricas en
+archivos de ese directorio (ver apps/core/metrics.py): el directorio se vacía
+al arrancar y `child_exit` marca como muertos los workers que terminan, para
+que /metrics no siga sumando sus gauges.
+"""
+
+import os
+import shutil
+
+bind = os.environ.get('GUNICORN_BIND', '0.0.0.0:8000')
+workers = int(os.environ.get('GUNICORN_WORKERS', 4))
+timeout = int(os.environ.get('GUNICORN_TIMEOUT', 30))
+accesslog = '-'
+
+
+def on_starting(server):
+    """Métricas limpias en cada arranque del master."""
+    multiproc_dir = os.environ.get('PROMETHEUS_MULTIPROC_DIR')
+    if multiproc_dir:
+        shutil.rmtree(multiproc_dir, ignore_errors=True)
+        os.makedirs(multiproc_dir, exist_ok=True)
+
+
+def child_exit(server, worker):
+    """Descartar los archivos de métricas del worker que terminó."""
+    if os.environ.get('PROMETHEUS_MULTIPROC_DIR'):
+        from prometheus_client import multiprocess
+        multiprocess.mark_process_dead(worker.pid)
@@ -1,4 +1,4 @@
-import { useState, useEffect, useCallback } from 'react';
+import { useState, useEffect, useCallback, useRef } from 'react';
 import { useAuth } from '../contexts/AuthContext';
 import { tokenUtils } from '../services/authService';
 
@@ -12,6 +12,30 @@ interface BackendNotification {
   notification_type?: string;
 }
 
+// Eventos del stream SSE (ver backend/apps/notifications/realtime.py)
+interface StreamEvent {
+  type: string;
+  unread_count?: number;
+  unread_delta?: number;
+  notification?: BackendNotification;
+  ids?: number[] | null;
+  id?: number;
+}
+
+const API_BASE_URL = 'http://localhost:8000/api/notifications';
+const POLLING_INTERVAL_MS = 30000;
+const STREAM_RETRY_MS = 5000;
+// Intentos fallidos de abrir el stream antes de volver al polling (p. ej. backend bajo WSGI)
+const STREAM_MAX_FAILURES = 3;
+const STREAM_EVENT_TYPES = [
+  'unread_count',
+  'notification.created',
+  'notifications.read',
+  'notifications.unread',
+  'notification.deleted',
+  'resync',
+];
+
 // Tipo para el estado del hook
 interface UseNotificationsReturn {
   // Estado
@@ -42,6 +66,9 @@ export const useNotifications = (): UseNotificationsReturn => {
   const [loading, setLoading] = useState<boolean>(false);
   const [error, setError] = useState<string | null>(null);
   
+  const [streamActive, setStreamActive] = useState<boolean>(false);
+  const streamActiveRef = useRef<boolean>(false);
+  
   const { isAuthenticated } = useAuth();
 
   // 🔧 Función para obtener notificaciones del backend
@@ -130,7 +157,10 @@ export const useNotifications = (): UseNotificationsReturn => {
             : notification
         )
       );
-      setUnreadCount(prev => Math.max(0, prev - 1));
+      // Con el stream activo el conteo llega como evento 'notifications.read'
+      if (!streamActiveRef.current) {
+        setUnreadCount(prev => Math.max(0, prev - 1));
+      }
 
       const response = await fetch(
         `http://localhost:8000/api/notifications/${notificationId}/mark_read/`,
@@ -156,7 +186,9 @@ export const useNotifications = (): UseNotificationsReturn => {
             : notification
         )
       );
-      setUnreadCount(prev => prev + 1);
+      if (!streamActiveRef.current) {
+        setUnreadCount(prev => prev + 1);
+      }
       const errorMessage = err instanceof Error ? err.message : 'Error desconocido';
       setError(errorMessage);
       console.error('Error marking notification as read:', err);
@@ -206,16 +238,134 @@ export const useNotifications = (): UseNotificationsReturn => {
     fetchNotifications();
   }, [fetchNotifications]);
 
-  // 🔧 Polling para actualizaciones en tiempo real (cada 30 segundos)
+  // 🔧 Aplicar un evento del stream al estado local
+  const applyStreamEvent = useCallback((event: StreamEvent): void => {
+    const delta = event.unread_delta ?? 0;
+    
+    switch (event.type) {
+      case 'unread_count':
+        setUnreadCount(event.unread_count ?? 0);
+        break;
+      case 'notification.created':
+        if (event.notification) {
+          const created = event.notification;
+          setNotifications(prev => [created, ...prev.filter(n => n.id !== created.id)]);
+        }
+        setUnreadCount(prev => Math.max(0, prev + delta));
+        break;
+      case 'notifications.read':
+        setNotifications(prev =>
+          prev.map(notification =>
+            !event.ids || event.ids.includes(notification.id)
+              ? { ...notification, is_read: true }
+              : notification
+          )
+        );
+        setUnreadCount(prev => Math.max(0, prev + delta));
+        break;
+      case 'notifications.unread':
+        setNotifications(prev =>
+          prev.map(notification =>
+            event.ids?.includes(notification.id)
+              ? { ...notification, is_read: false }
+              : notification
+          )
+        );
+        setUnreadCount(prev => Math.max(0, prev + delta));
+        break;
+      case 'notification.deleted':
+        setNotifications(prev => prev.filter(n => n.id !== event.id));
+        setUnreadCount(prev => Math.max(0, prev + delta));
+        break;
+      case 'resync':
+        fetchNotifications();
+        break;
+    }
+  }, [fetchNotifications]);
+
+  // 🔧 Stream en tiempo real (Server-Sent Events) en lugar de polling
   useEffect(() => {
     if (!isAuthenticated) return;
 
+    let source: EventSource | null = null;
+    let retryTimeout: ReturnType<typeof setTimeout> | null = null;
+    let failures = 0;
+    let cancelled = false;
+
+    const setActive = (active: boolean) => {
+      streamActiveRef.current = active;
+      setStreamActive(active);
+    };
+
+    const connect = async () => {
+      const token = tokenUtils.getAccessToken();
+      if (!token || cancelled) return;
+
+      try {
+        // EventSource no envía headers: se usa un ticket de un solo uso
+        const response = await fetch(`${API_BASE_URL}/stream/ticket/`, {
+          method: 'POST',
+          headers: {
+            'Authorization': `Bearer ${token}`,
+            'Content-Type': 'application/json',
+          },
+        });
+        if (!response.ok) throw new Error(`Error ${response.status} al obtener ticket`);
+        const { data } = await response.json();
+        if (cancelled) return;
+
+        source = new EventSource(`${API_BASE_URL}/stream/?ticket=${encodeURIComponent(data.ticket)}`);
+        source.onopen = () => {
+          failures = 0;
+          setActive(true);
+        };
+        STREAM_EVENT_TYPES.forEach(eventType => {
+          source?.addEventListener(eventType, (message: MessageEvent) => {
+            applyStreamEvent({ ...JSON.parse(message.data), type: eventType });
+          });
+        });
+        source.onerror = () => {
+          // El ticket es de un solo uso: cerrar y reconectar con uno nuevo
+          source?.close();
+          source = null;
+          setActive(false);
+          scheduleReconnect();
+        };
+      } catch (err) {
+        console.error('❌ Error abriendo stream de notificaciones:', err);
+        scheduleReconnect();
+      }
+    };
+
+    const scheduleReconnect = () => {
+      failures += 1;
+      if (cancelled || failures >= STREAM_MAX_FAILURES) {
+        console.log('🔁 Stream de notificaciones no disponible, usando polling');
+        return;
+      }
+      retryTimeout = setTimeout(connect, STREAM_RETRY_MS);
+    };
+
+    connect();
+
+    return () => {
+      cancelled = true;
+      source?.close();
+      if (retryTimeout) clearTimeout(retryTimeout);
+      setActive(false);
+    };
+  }, [isAuthenticated, applyStreamEvent]);
+
+  // 🔧 Polling de respaldo (cada 30 segundos) solo si el stream no está activo
+  useEffect(() => {
+    if (!isAuthenticated || streamActive) return;
+
     const interval = setInterval(() => {
       fetchNotifications();
-    }, 30000); // 30 segundos
+    }, POLLING_INTERVAL_MS);
 
     return () => clearInterval(interval);
-  }, [isAuthenticated, fetchNotifications]);
+  }, [isAuthenticated, streamActive, fetchNotifications]);
 
   return {
     // Estado